@@ -0,0 +1,64 @@
+"""
+Debug API Routes
+================
+
+Request traces from the in-process ring buffer, with flame-style
+breakdowns of where the slowest requests spent their time.
+
+Traces carry request paths, parameters and timings, so the routes are only
+mounted when DEBUG_ROUTES_ENABLED=true.
+"""
+
+import logging
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query as QueryParam
+from fastapi.responses import PlainTextResponse
+
+from ..core.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+debug_router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def debug_routes_enabled() -> bool:
+    return os.getenv("DEBUG_ROUTES_ENABLED", "false").lower() == "true"
+
+
+def include_debug_router(app) -> bool:
+    """Mount the debug routes on ``app`` if explicitly enabled"""
+    if not debug_routes_enabled():
+        return False
+    app.include_router(debug_router)
+    logger.warning("Debug routes enabled at /debug - do not expose them publicly")
+    return True
+
+
+@debug_router.get("/traces")
+async def slowest_traces(
+    limit: int = QueryParam(10, ge=1, le=100, description="Number of slowest traces to return"),
+    kind: Optional[str] = QueryParam(None, description="Only traces whose root has this kind, e.g. http"),
+    format: str = QueryParam("json", pattern="^(json|folded)$", description="json or folded stacks"),
+):
+    """Slowest recent traces with span trees and self time by kind"""
+    tracer = get_tracer()
+    traces = tracer.exporter.slowest(limit, kind)
+    if format == "folded":
+        # One "frame;frame;frame microseconds" line per stack, for flame graph tools
+        lines = [line for trace in traces for line in trace.flame()["folded"]]
+        return PlainTextResponse("\n".join(lines) + ("\n" if lines else ""))
+    return {
+        "tracing": tracer.get_stats(),
+        "traces": [trace.flame() for trace in traces],
+    }
+
+
+@debug_router.get("/traces/{trace_id}")
+async def trace_detail(trace_id: int):
+    """Every span of one buffered trace"""
+    for trace in get_tracer().exporter.snapshot():
+        if trace.trace_id == trace_id:
+            return {**trace.flame(), "spans": [span.to_dict() for span in trace.spans]}
+    raise HTTPException(status_code=404, detail="Trace not found or no longer buffered")
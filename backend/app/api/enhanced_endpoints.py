@@ -25,10 +25,12 @@ from ..core.advanced_analytics import (
     risk_engine, predictive_analytics
 )
 from ..core.ml_intelligence import (
-    source_prioritizer, pattern_recognizer,
-    confidence_predictor, anomaly_detector
+    source_prioritizer, confidence_predictor,
+    recognize_patterns_task, detect_anomalies_task
 )
 from ..core.performance_optimizer import performance_monitor, cache_manager
+from ..core.compute_service import get_compute_service
+from ..db.result_persistence import get_persistence_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -92,7 +94,9 @@ async def comprehensive_analytics(request: AnalyticsRequest, background_tasks: B
         
         # Pattern Recognition
         if request.include_patterns:
-            pattern_analysis = pattern_recognizer.recognize_patterns(request.data)
+            pattern_analysis = await get_compute_service().run_cpu(
+                "pattern_recognition", recognize_patterns_task, request.data
+            )
             results['patterns'] = pattern_analysis
         
         # Risk Assessment
@@ -105,7 +109,9 @@ async def comprehensive_analytics(request: AnalyticsRequest, background_tasks: B
         
         # Anomaly Detection
         if request.include_anomalies:
-            anomaly_analysis = anomaly_detector.detect_anomalies(request.data)
+            anomaly_analysis = await get_compute_service().run_cpu(
+                "anomaly_detection", detect_anomalies_task, request.data
+            )
             results['anomaly_detection'] = anomaly_analysis
         
         # Background task for performance monitoring
@@ -180,7 +186,9 @@ async def analyze_patterns(request: AnalyticsRequest):
     Perform advanced pattern analysis on data
     """
     try:
-        pattern_analysis = pattern_recognizer.recognize_patterns(request.data)
+        pattern_analysis = await get_compute_service().run_cpu(
+            "pattern_recognition", recognize_patterns_task, request.data
+        )
         
         return PatternAnalysisResponse(
             patterns=pattern_analysis['patterns'],
@@ -304,7 +312,9 @@ async def enhanced_search(request: EnhancedSearchRequest, background_tasks: Back
             
             if request.include_ml_insights:
                 # Add ML insights
-                pattern_analysis = pattern_recognizer.recognize_patterns(result['data'])
+                pattern_analysis = await get_compute_service().run_cpu(
+                    "pattern_recognition", recognize_patterns_task, result['data']
+                )
                 confidence_prediction = confidence_predictor.predict_confidence(result['data'])
                 
                 enhanced_result['ml_insights'] = {
@@ -402,6 +412,8 @@ async def get_performance_metrics():
             "success": True,
             "system_metrics": metrics,
             "cache_statistics": cache_stats,
+            "result_persistence": get_persistence_metrics(),
+            "compute": get_compute_service().get_stats(),
             "performance_summary": {
                 "avg_response_time": metrics.get('avg_api_response_time', 0),
                 "cache_hit_rate": cache_stats.get('hit_rate', 0),
@@ -472,6 +484,17 @@ async def batch_analytics_processing(
         batch_id = str(uuid.uuid4())
         results = []
         
+        # Fan the CPU-heavy analyses for the whole batch out to the worker processes
+        compute = get_compute_service()
+        patterns = await asyncio.gather(*(
+            compute.run_cpu("pattern_recognition", recognize_patterns_task, data_item)
+            for data_item in data_batch
+        )) if "patterns" in analysis_types else []
+        anomalies = await asyncio.gather(*(
+            compute.run_cpu("anomaly_detection", detect_anomalies_task, data_item)
+            for data_item in data_batch
+        )) if "anomalies" in analysis_types else []
+        
         for idx, data_item in enumerate(data_batch):
             item_results = {"item_id": idx}
             
@@ -479,13 +502,13 @@ async def batch_analytics_processing(
                 item_results["quality"] = data_quality_analyzer.analyze_data_quality(data_item)
             
             if "patterns" in analysis_types:
-                item_results["patterns"] = pattern_recognizer.recognize_patterns(data_item)
+                item_results["patterns"] = patterns[idx]
             
             if "risk" in analysis_types:
                 item_results["risk"] = risk_engine.assess_risk(data_item)
             
             if "anomalies" in analysis_types:
-                item_results["anomalies"] = anomaly_detector.detect_anomalies(data_item)
+                item_results["anomalies"] = anomalies[idx]
             
             results.append(item_results)
         
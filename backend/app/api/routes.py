@@ -277,7 +277,8 @@ async def get_platform_stats():
 async def generate_pdf_report(request: ReportRequest):
     """Generate professional PDF intelligence report"""
     try:
-        from ..core.pdf_generator import pdf_generator
+        from ..core.pdf_generator import render_intelligence_report
+        from ..core.compute_service import get_compute_service
         
         # TODO: Retrieve actual scan data from database
         # For now, create mock scan data structure
@@ -305,9 +306,8 @@ async def generate_pdf_report(request: ReportRequest):
         }
         
         # Generate PDF
-        pdf_bytes = pdf_generator.generate_intelligence_report(
-            mock_scan_data, 
-            report_type=request.report_type
+        pdf_bytes = await get_compute_service().run_cpu(
+            "pdf_render", render_intelligence_report, mock_scan_data, request.report_type
         )
         
         # Return as base64 encoded response
@@ -457,4 +457,10 @@ async def get_advanced_analytics():
         
     except Exception as e:
         logger.error(f"Advanced analytics failed: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate advanced analytics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to generate advanced analytics")
+
+
+# Historical result search
+from .search import search_router  # noqa: E402
+
+api_router.include_router(search_router)
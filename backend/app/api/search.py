@@ -0,0 +1,43 @@
+"""
+Search API Routes
+=================
+
+Ranked full-text search over historical scan results and reports.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query as QueryParam
+
+from ..core.search_index import get_search_indexer, DOC_TYPES
+
+logger = logging.getLogger(__name__)
+
+search_router = APIRouter(prefix="/search", tags=["search"])
+
+
+@search_router.get("")
+async def search_results(
+    q: str = QueryParam(..., min_length=1, max_length=200, description="Search terms; append * for prefix match"),
+    doc_type: Optional[str] = QueryParam(None, description="scan_result or report"),
+    page: int = QueryParam(1, ge=1, le=500),
+    page_size: int = QueryParam(20, ge=1, le=100)
+):
+    """Search past findings with highlighted snippets"""
+    if doc_type is not None and doc_type not in DOC_TYPES:
+        raise HTTPException(status_code=400, detail=f"doc_type must be one of {', '.join(DOC_TYPES)}")
+
+    try:
+        index = get_search_indexer().index
+        return await asyncio.to_thread(index.search, q, doc_type, page, page_size)
+    except Exception as e:
+        logger.exception(f"Search failed: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
+
+
+@search_router.get("/status")
+async def search_index_status():
+    """Indexer queue and throughput counters"""
+    return get_search_indexer().get_stats()
@@ -12,6 +12,8 @@ import uuid
 from fastapi import WebSocket, WebSocketDisconnect
 from ..scanners.implementations import get_all_scanners
 from ..core.aggregation_engine import aggregation_engine
+from ..core.execution_planner import get_execution_planner, scanner_cost
+from ..core.sufficiency import SufficiencyEvaluator
 
 logger = logging.getLogger(__name__)
 
@@ -123,8 +125,25 @@ class RealTimeScanEngine:
             
             all_results = {}
             completed_count = 0
+            sufficiency = SufficiencyEvaluator.for_query(query_type, request.get("confidence_targets"))
             
             for batch_index, batch in enumerate(scanner_batches):
+                # Skip the remaining batches once every confidence target is met
+                if sufficiency is not None and sufficiency.is_sufficient():
+                    stats = get_execution_planner().stats
+                    for later_batch in scanner_batches[batch_index:]:
+                        for scanner in later_batch:
+                            name = getattr(scanner, 'name', 'unknown')
+                            sufficiency.record_skipped(name, scanner_cost(scanner), stats.get(name).expected_latency)
+                    
+                    await self.manager.send_personal_message({
+                        "type": "scan_sufficient",
+                        "scan_id": scan_id,
+                        "skipped_scanners": sufficiency.skipped,
+                        "field_confidence": sufficiency.field_confidence
+                    }, client_id)
+                    break
+                
                 # Update status
                 await self.manager.send_personal_message({
                     "type": "batch_started",
@@ -136,7 +155,7 @@ class RealTimeScanEngine:
                 
                 # Execute batch
                 batch_results = await self._execute_scanner_batch(
-                    batch, request, client_id, scan_id
+                    batch, request, client_id, scan_id, sufficiency
                 )
                 
                 all_results.update(batch_results)
@@ -195,7 +214,8 @@ class RealTimeScanEngine:
                     "confidence_score": aggregated_results.get("confidence_score", 0.0),
                     "entities_found": len(aggregated_results.get("entities", [])),
                     "sources_count": len(aggregated_results.get("sources", []))
-                }
+                },
+                "sufficiency": sufficiency.report() if sufficiency else None
             }, client_id)
             
         except Exception as e:
@@ -211,8 +231,9 @@ class RealTimeScanEngine:
                 self.manager.scan_sessions[client_id]["status"] = "failed"
     
     async def _execute_scanner_batch(self, scanners: List[Any], request: Dict[str, Any], 
-                                   client_id: str, scan_id: str) -> Dict[str, Any]:
-        """Execute a batch of scanners concurrently"""
+                                   client_id: str, scan_id: str,
+                                   sufficiency: Optional[SufficiencyEvaluator] = None) -> Dict[str, Any]:
+        """Execute a batch of scanners concurrently, cancelling stragglers once sufficient"""
         batch_results = {}
         
         # Create mock query object
@@ -232,10 +253,13 @@ class RealTimeScanEngine:
             )
             tasks.append((getattr(scanner, 'name', 'unknown'), task))
         
-        for scanner_name, task in tasks:
+        for index, (scanner_name, task) in enumerate(tasks):
             try:
                 result = await task
                 batch_results[scanner_name] = result
+                if sufficiency is not None and isinstance(result, dict) and not result.get("error"):
+                    if sufficiency.add_result(scanner_name, result):
+                        self._cancel_remaining(scanners, tasks, index + 1, sufficiency)
                 
                 # Send individual scanner completion
                 await self.manager.send_personal_message({
@@ -245,7 +269,12 @@ class RealTimeScanEngine:
                     "success": not result.get("error"),
                     "data_points": len(result.get("data", {})) if isinstance(result.get("data"), dict) else 0
                 }, client_id)
-                
+
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                # Cancelled by _cancel_remaining; reported in the sufficiency summary
+
             except Exception as e:
                 batch_results[scanner_name] = {
                     "error": str(e),
@@ -262,6 +291,16 @@ class RealTimeScanEngine:
         
         return batch_results
     
+    def _cancel_remaining(self, scanners: List[Any], tasks: List[Any], start: int,
+                          sufficiency: SufficiencyEvaluator):
+        """Cancel unfinished scanners in a batch and count what that saved"""
+        stats = get_execution_planner().stats
+        for scanner, (scanner_name, task) in zip(scanners[start:], tasks[start:]):
+            if not task.done():
+                task.cancel()
+                sufficiency.record_cancelled(scanner_name, scanner_cost(scanner),
+                                             stats.get(scanner_name).expected_latency)
+    
     async def _execute_single_scanner(self, scanner: Any, query: Any, client_id: str, scan_id: str) -> Dict[str, Any]:
         """Execute a single scanner with real-time status updates"""
         scanner_name = getattr(scanner, 'name', 'unknown')
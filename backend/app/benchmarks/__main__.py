@@ -0,0 +1,102 @@
+"""
+Benchmark Runner
+================
+
+Runs the benchmark suite and checks it against a JSON baseline.
+
+Usage::
+
+    python -m app.benchmarks --save-baseline            # record this machine's baseline
+    python -m app.benchmarks                            # compare; exit 1 on regressions
+    python -m app.benchmarks aggregation cache.* --quick --threshold 0.3
+
+Positional arguments are glob patterns over case names and groups.
+Baselines default to ``data/benchmarks/baseline.json`` (``BENCHMARK_BASELINE``)
+and are only meaningful on the machine that recorded them. Email
+deliverability (DNS) checks are off unless ``EMAIL_DELIVERABILITY_CHECKS``
+is set, so timings do not depend on the network.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Set before the suites build any normalizer; worker processes inherit it
+os.environ.setdefault("EMAIL_DELIVERABILITY_CHECKS", "false")
+
+from . import suites  # noqa: F401  (registers the cases)
+from .harness import DEFAULT_METRIC, DEFAULT_THRESHOLD, compare, get_cases, load_baseline, regressions, run_benchmarks, save_baseline
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BASELINE = os.getenv("BENCHMARK_BASELINE", str(BACKEND_ROOT / "data" / "benchmarks" / "baseline.json"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run benchmarks and check them against a baseline")
+    parser.add_argument("patterns", nargs="*", help="case name or group globs, e.g. aggregation cache.lru*")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--metric", choices=("minimum", "median", "mean"), default=DEFAULT_METRIC,
+                        help="timing compared against the baseline")
+    parser.add_argument("--quick", action="store_true", help="small inputs and fewer repeats")
+    parser.add_argument("--repeats", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show log output of the code under test")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        # Fake scanners fail on purpose; their error logs are expected
+        logging.disable(logging.ERROR)
+
+    if args.list:
+        for case in get_cases(args.patterns):
+            note = "" if case.available() else f"  (missing {', '.join(case.requires)})"
+            print(f"{case.name:<40} {case.group:<14} size={case.size}{note}")
+        return 0
+
+    results = run_benchmarks(args.patterns, quick=args.quick, seed=args.seed, repeats=args.repeats)
+    comparisons = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        comparisons = compare(results, load_baseline(args.baseline), args.threshold, args.metric)
+    by_name = {c.name: c for c in comparisons}
+
+    if args.json:
+        print(json.dumps({
+            "results": [result.to_dict() for result in results],
+            "comparisons": [comparison.to_dict() for comparison in comparisons],
+        }, indent=2))
+    else:
+        print(f"{'case':<40} {'size':>6} {'min ms':>9} {'median ms':>10} {'per item us':>12}  vs baseline")
+        for result in results:
+            comparison = by_name.get(result.name)
+            verdict = ""
+            if comparison is not None:
+                verdict = comparison.status if comparison.ratio is None else f"{comparison.status} ({comparison.ratio:.2f}x)"
+            print(f"{result.name:<40} {result.size:>6} {result.minimum * 1000:>9.2f} {result.median * 1000:>10.2f} "
+                  f"{result.per_item_us:>12.2f}  {verdict}")
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not comparisons:
+        print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 0
+
+    failed = regressions(comparisons)
+    for comparison in failed:
+        print(f"REGRESSION {comparison.name}: {comparison.current * 1000:.2f} ms vs "
+              f"{comparison.baseline * 1000:.2f} ms baseline {args.metric} (limit +{comparison.threshold:.0%})", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
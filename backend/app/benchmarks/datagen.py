@@ -0,0 +1,148 @@
+"""
+Synthetic Benchmark Data
+========================
+
+Deterministic generators for benchmark inputs. Every generator takes a
+``seed`` and draws only from its own ``random.Random``, so the same seed
+always yields the same data and baselines stay comparable across runs.
+
+Scan results are built from a pool of synthetic people, and the same
+person shows up under several scanners with formatting variations
+(case, phone punctuation, Gmail dots), which is what deduplication and
+relationship linking have to work through in real investigations.
+"""
+
+import random
+import string
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+BASE_TIME = datetime(2024, 1, 1)
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+               "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "example.org", "proton.me", "corp-mail.net"]
+STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Park Blvd", "Elm St", "Pine Rd"]
+CITIES = ["Springfield, IL", "Austin, TX", "Denver, CO", "Portland, OR", "Madison, WI"]
+AREA_CODES = ["212", "312", "415", "503", "512", "608", "720"]
+SCANNERS = ["email_validator", "phone_lookup", "social_media", "people_search", "public_records",
+            "breach_check", "whois_lookup", "reverse_phone"]
+EVENT_TYPES = ["page_view", "query_submitted", "scan_completed", "report_generated", "login"]
+
+
+def make_people(count: int, seed: int = 42) -> List[Dict[str, str]]:
+    """Distinct synthetic people with an email, phone, address and URL"""
+    rng = random.Random(seed)
+    people = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        handle = f"{first.lower()}.{last.lower()}{i}"
+        people.append({
+            "name": f"{first} {last}",
+            "email": f"{handle}@{rng.choice(DOMAINS)}",
+            "phone": f"+1{rng.choice(AREA_CODES)}{rng.randint(200, 999)}{rng.randint(1000, 9999)}",
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            "url": f"https://social.example.com/{handle}",
+        })
+    return people
+
+
+def _vary(rng: random.Random, field: str, value: str) -> str:
+    """Formatting variation a different source might report for the same value"""
+    if field == "email" and rng.random() < 0.4:
+        local, domain = value.split("@")
+        if domain == "gmail.com" and rng.random() < 0.5:
+            return f"{local.replace('.', '')}+{rng.choice(['news', 'work'])}@{domain}"
+        return value.upper() if rng.random() < 0.5 else f"  {value} "
+    if field == "phone" and rng.random() < 0.5:
+        digits = value[2:]
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    if field == "name" and rng.random() < 0.3:
+        return value.upper()
+    return value
+
+
+def make_scan_results(count: int, seed: int = 42, people: int = 0) -> List[Dict[str, Any]]:
+    """Scanner results in the shape ``AggregationEngine`` consumes.
+
+    ``people`` defaults to a third of ``count``, so most people are seen
+    by about three scanners.
+    """
+    rng = random.Random(seed)
+    pool = make_people(people or max(count // 3, 1), seed)
+    fields = ["email", "phone", "name", "address", "url"]
+    results = []
+    for i in range(count):
+        person = rng.choice(pool)
+        data = {field: _vary(rng, field, person[field])
+                for field in rng.sample(fields, rng.randint(2, len(fields)))}
+        if rng.random() < 0.2:
+            data["username"] = "".join(rng.choices(string.ascii_lowercase, k=8))
+        results.append({
+            "scanner": rng.choice(SCANNERS),
+            "confidence": round(rng.uniform(0.3, 0.99), 3),
+            "timestamp": (BASE_TIME + timedelta(minutes=i)).isoformat(),
+            "result": data,
+        })
+    return results
+
+
+def make_entities(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Raw extracted entities, as ``AggregationEngine`` hands them to deduplication"""
+    rng = random.Random(seed)
+    pool = make_people(max(count // 4, 1), seed)
+    types = ["email", "phone", "name", "address", "url"]
+    entities = []
+    for i in range(count):
+        person, entity_type = rng.choice(pool), rng.choice(types)
+        entities.append({
+            "type": entity_type,
+            "value": _vary(rng, entity_type, person[entity_type]),
+            "source": rng.choice(SCANNERS),
+            "confidence": round(rng.uniform(0.3, 0.99), 3),
+            "timestamp": (BASE_TIME + timedelta(minutes=i)).isoformat(),
+            "extraction_field": entity_type,
+        })
+    return entities
+
+
+def make_iocs(count: int, seed: int = 42) -> List[Any]:
+    """Threat indicators with campaign structure (``ThreatIOC`` objects)"""
+    from ..core.ioc_correlation import generate_synthetic_feed
+    return generate_synthetic_feed(count, seed)
+
+
+def make_trades(count: int, seed: int = 42) -> Any:
+    """NFT trades as ``TradeArrays`` columns, with planted round trips and self-trades"""
+    from ..scanners.trade_analytics import generate_synthetic_trades
+    return generate_synthetic_trades(count, seed)
+
+
+def make_events(count: int, seed: int = 42, users: int = 0) -> List[Dict[str, Any]]:
+    """Analytics events in time order spread over about a week"""
+    rng = random.Random(seed)
+    users = users or max(count // 20, 1)
+    step = 7 * 24 * 3600 / max(count, 1)
+    events = []
+    for i in range(count):
+        event_type = rng.choice(EVENT_TYPES)
+        properties: Dict[str, Any] = {"response_time": round(rng.expovariate(1 / 0.2), 4)}
+        if event_type == "scan_completed":
+            properties.update(
+                scanner_type=rng.choice(SCANNERS),
+                status="completed" if rng.random() < 0.9 else "failed",
+                execution_time=round(rng.expovariate(1 / 1.5), 4),
+            )
+        user = rng.randrange(users)
+        events.append({
+            "event_id": f"evt-{i}",
+            "user_id": f"user-{user}",
+            "session_id": f"session-{user}-{rng.randrange(5)}",
+            "event_type": event_type,
+            "event_name": event_type,
+            "timestamp": BASE_TIME + timedelta(seconds=i * step),
+            "properties": properties,
+        })
+    return events
@@ -0,0 +1,251 @@
+"""
+Benchmark Harness
+=================
+
+Registry, timing loop and JSON baselines for the benchmark suite:
+- Cases register with ``@benchmark(...)``; ``setup`` builds inputs once,
+  ``run`` is the timed body (sync or async), optional ``prepare`` builds
+  fresh per-iteration arguments outside the timed region
+- Warm-up iterations, then repeats timed with ``perf_counter``; short
+  bodies are looped until a sample lasts ``MIN_SAMPLE_SECONDS``
+- Baselines store min/median/mean per call; comparisons default to the
+  minimum, which is the least sensitive to noisy neighbours on shared CI
+- Baselines are JSON files keyed by case name and recorded with the input
+  size, so a run at a different size is reported rather than compared
+- A case regresses when it is slower than the baseline by more than the
+  threshold (per-case thresholds can loosen latency-bound cases)
+"""
+
+import asyncio
+import fnmatch
+import inspect
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_METRIC = "minimum"
+MIN_SAMPLE_SECONDS = 0.02
+
+
+@dataclass
+class BenchmarkCase:
+    """One registered benchmark"""
+    name: str
+    group: str
+    setup: Callable[[int, int], Any]
+    run: Callable[..., Any]
+    size: int
+    quick_size: int
+    prepare: Optional[Callable[[Any], Any]] = None
+    repeats: int = 7
+    warmup: int = 1
+    threshold: Optional[float] = None
+    requires: tuple = ()
+
+    def available(self) -> bool:
+        for module in self.requires:
+            try:
+                __import__(module)
+            except ImportError:
+                return False
+        return True
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings of one case; times in seconds"""
+    name: str
+    group: str
+    size: int
+    repeats: int
+    median: float
+    mean: float
+    minimum: float
+    maximum: float
+    stdev: float
+
+    @property
+    def per_item_us(self) -> float:
+        return self.median / max(self.size, 1) * 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "per_item_us": round(self.per_item_us, 3)}
+
+
+@dataclass
+class Comparison:
+    """Result of checking one case against its baseline"""
+    name: str
+    status: str  # ok, regression, improvement, new, size_changed
+    current: Optional[float] = None
+    baseline: Optional[float] = None
+    ratio: Optional[float] = None
+    threshold: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_registry: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark(name: str, group: str, setup: Callable[[int, int], Any], size: int,
+              quick_size: Optional[int] = None, prepare: Optional[Callable[[Any], Any]] = None,
+              repeats: int = 7, warmup: int = 1, threshold: Optional[float] = None,
+              requires: tuple = ()):
+    """Register the decorated function as the timed body of a benchmark"""
+    def decorator(run: Callable) -> Callable:
+        _registry[name] = BenchmarkCase(
+            name=name, group=group, setup=setup, run=run, size=size,
+            quick_size=quick_size or max(size // 10, 1), prepare=prepare,
+            repeats=repeats, warmup=warmup, threshold=threshold, requires=requires,
+        )
+        return run
+    return decorator
+
+
+def get_cases(patterns: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    """Registered cases whose name or group matches any of the glob patterns"""
+    cases = list(_registry.values())
+    if not patterns:
+        return cases
+    return [case for case in cases
+            if any(fnmatch.fnmatch(case.name, p) or fnmatch.fnmatch(case.group, p) for p in patterns)]
+
+
+def run_case(case: BenchmarkCase, quick: bool = False, seed: int = 42,
+             repeats: Optional[int] = None, min_sample_seconds: float = MIN_SAMPLE_SECONDS) -> BenchmarkResult:
+    """Set up one case and time it"""
+    size = case.quick_size if quick else case.size
+    repeats = repeats or (max(case.repeats // 2, 3) if quick else case.repeats)
+    state = case.setup(size, seed)
+    is_async = inspect.iscoroutinefunction(case.run)
+    loop = asyncio.new_event_loop() if is_async else None
+
+    def once(loops: int = 1) -> float:
+        batch = [case.prepare(state) if case.prepare is not None else state for _ in range(loops)]
+        started = time.perf_counter()
+        for args in batch:
+            if is_async:
+                loop.run_until_complete(case.run(args))
+            else:
+                case.run(args)
+        return (time.perf_counter() - started) / loops
+
+    try:
+        for _ in range(case.warmup):
+            once()
+        # Loop sub-millisecond bodies so timer resolution and jitter do not dominate
+        loops = max(1, math.ceil(min_sample_seconds / max(once(), 1e-9)))
+        samples = [once(loops) for _ in range(repeats)]
+    finally:
+        if loop is not None:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    return BenchmarkResult(
+        name=case.name,
+        group=case.group,
+        size=size,
+        repeats=repeats,
+        median=statistics.median(samples),
+        mean=statistics.fmean(samples),
+        minimum=min(samples),
+        maximum=max(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def run_benchmarks(patterns: Optional[List[str]] = None, quick: bool = False, seed: int = 42,
+                   repeats: Optional[int] = None) -> List[BenchmarkResult]:
+    """Run matching cases, skipping those whose optional dependencies are missing"""
+    results = []
+    for case in get_cases(patterns):
+        if not case.available():
+            logger.info(f"Skipping benchmark {case.name}: missing {', '.join(case.requires)}")
+            continue
+        results.append(run_case(case, quick=quick, seed=seed, repeats=repeats))
+    return results
+
+
+def machine_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_baseline(results: List[BenchmarkResult], path: str, merge: bool = True):
+    """Write results as a JSON baseline, keeping other cases already in the file"""
+    existing = load_baseline(path) if merge and os.path.exists(path) else {}
+    entries = dict(existing.get("results", {}))
+    entries.update({result.name: result.to_dict() for result in results})
+    baseline = {
+        "version": BASELINE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "results": dict(sorted(entries.items())),
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version {baseline.get('version')} in {path}")
+    return baseline
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD, metric: str = DEFAULT_METRIC) -> List[Comparison]:
+    """Compare one timing (``minimum``, ``median`` or ``mean``) against a baseline.
+
+    The per-case threshold, when a case sets one, wins over ``threshold``.
+    """
+    entries = baseline.get("results", {})
+    comparisons = []
+    for result in results:
+        case = _registry.get(result.name)
+        limit = case.threshold if case is not None and case.threshold is not None else threshold
+        current = getattr(result, metric)
+        entry = entries.get(result.name)
+        if entry is None:
+            comparisons.append(Comparison(result.name, "new", current=current, threshold=limit))
+            continue
+        previous = entry.get(metric)
+        if entry.get("size") != result.size or previous is None:
+            comparisons.append(Comparison(result.name, "size_changed", current=current,
+                                          baseline=previous, threshold=limit))
+            continue
+        ratio = current / previous if previous else float("inf")
+        if ratio > 1 + limit:
+            status = "regression"
+        elif ratio < 1 - limit:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparisons.append(Comparison(result.name, status, current=current,
+                                      baseline=previous, ratio=round(ratio, 4), threshold=limit))
+    return comparisons
+
+
+def regressions(comparisons: List[Comparison]) -> List[Comparison]:
+    return [c for c in comparisons if c.status == "regression"]
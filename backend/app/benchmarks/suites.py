@@ -0,0 +1,278 @@
+"""
+Benchmark Suites
+================
+
+Benchmark cases for the hot paths of an investigation:
+- Aggregation: entity extraction and scoring, the full
+  ``aggregate_scan_results`` pipeline, deduplication and relationship linking
+- Caching: ``LRUCache`` and the ``AdvancedCacheManager`` memory and file tiers
+- Orchestration: ``AsyncScannerOrchestrator`` over fake scanners with
+  configurable latency, so planner and fan-out overhead is measured
+  without network I/O
+- Report export in every format
+- IOC correlation and the analytics event store
+- Wash-trading detection over NFT trade histories
+
+Importing this module registers the cases; inputs come from ``datagen``
+and are built in ``setup``, outside the timed region.
+"""
+
+import asyncio
+import json
+import random
+import tempfile
+import types
+from typing import List
+
+from .datagen import make_entities, make_events, make_iocs, make_scan_results, make_trades
+from .harness import benchmark
+
+
+# Aggregation
+
+def _engine_and_results(size: int, seed: int):
+    from ..core.aggregation_engine import AggregationEngine
+    return AggregationEngine(), make_scan_results(size, seed)
+
+
+@benchmark("aggregation.extract_and_score", "aggregation", _engine_and_results, size=300, quick_size=30)
+def bench_extract_and_score(state):
+    engine, results = state
+    engine.extract_and_score(results)
+
+
+@benchmark("aggregation.aggregate_scan_results", "aggregation", _engine_and_results, size=150, quick_size=15)
+async def bench_aggregate_scan_results(state):
+    engine, results = state
+    await engine.aggregate_scan_results(results)
+
+
+def _deduplicator_and_entities(size: int, seed: int):
+    from ..core.aggregation_engine import EntityDeduplicator
+    return EntityDeduplicator(), make_entities(size, seed)
+
+
+@benchmark("aggregation.deduplicate_entities", "aggregation", _deduplicator_and_entities, size=2000, quick_size=200)
+def bench_deduplicate(state):
+    deduplicator, entities = state
+    deduplicator.deduplicate_entities(entities)
+
+
+def _linker_and_entities(size: int, seed: int):
+    from ..core.aggregation_engine import EntityDeduplicator, RelationshipLinker
+    # Link deduplicated entities, as the engine does; draw until there are enough
+    entities = EntityDeduplicator().deduplicate_entities(make_entities(size * 3, seed))[:size]
+    return RelationshipLinker(), entities
+
+
+def _fresh_entities(state):
+    linker, entities = state
+    return linker, [dict(entity) for entity in entities]
+
+
+@benchmark("aggregation.link_entities", "aggregation", _linker_and_entities, size=150, quick_size=20,
+           prepare=_fresh_entities)
+def bench_link_entities(state):
+    linker, entities = state
+    linker.link_entities(entities)
+
+
+# Caching
+
+def _cache_workload(size: int, seed: int):
+    """Keys with a skewed popularity, so hits, misses and evictions all happen"""
+    rng = random.Random(seed)
+    key_space = max(size // 2, 1)
+    keys = [f"query:{int(rng.paretovariate(1.2)) % key_space}" for _ in range(size)]
+    values = [{"entities": [i, i + 1], "confidence": 0.9} for i in range(size)]
+    return keys, values
+
+
+def _lru_setup(size: int, seed: int):
+    from ..core.advanced_caching import LRUCache
+    keys, values = _cache_workload(size, seed)
+    return LRUCache(max_size=max(size // 10, 10)), keys, values
+
+
+@benchmark("cache.lru_get_set", "cache", _lru_setup, size=20000, quick_size=2000)
+def bench_lru(state):
+    cache, keys, values = state
+    for key, value in zip(keys, values):
+        if cache.get(key) is None:
+            cache.set(key, value, ttl=300)
+
+
+def _manager_setup(size: int, seed: int):
+    from ..core.advanced_caching import AdvancedCacheManager
+    keys, values = _cache_workload(size, seed)
+    manager = AdvancedCacheManager()
+    manager.file_cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    return manager, keys, values
+
+
+@benchmark("cache.manager_memory", "cache", _manager_setup, size=5000, quick_size=500)
+async def bench_cache_manager_memory(state):
+    manager, keys, values = state
+    for key, value in zip(keys, values):
+        if await manager.get(key) is None:
+            await manager.set(key, value, ttl=300, cache_level="l2")
+
+
+@benchmark("cache.manager_file_tier", "cache", _manager_setup, size=300, quick_size=30, threshold=0.5)
+async def bench_cache_manager_file(state):
+    manager, keys, values = state
+    for key, value in zip(keys, values):
+        await manager.set(key, value, ttl=300, cache_level="file")
+    # Only the file tier holds these, so every get goes to disk
+    for key in keys:
+        await manager._get_from_file_cache(key)
+
+
+# Orchestration
+
+class FakeScanner:
+    """Scanner stand-in that sleeps for ``latency`` seconds and returns findings"""
+
+    def __init__(self, name: str, latency: float, cost_credits: int = 1, findings: int = 2,
+                 fail_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.cost_credits = cost_credits
+        self.findings = findings
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+
+    async def scan(self, query):
+        await asyncio.sleep(self.latency)
+        if self._rng.random() < self.fail_rate:
+            raise RuntimeError(f"{self.name} failed")
+        value = query.get("query_value", "") if isinstance(query, dict) else ""
+        return {
+            "emails": [f"{i}.{value}" for i in range(self.findings)],
+            "confidence": 0.6,
+        }
+
+
+def make_fake_scanners(count: int, seed: int = 42, min_latency: float = 0.001,
+                       max_latency: float = 0.005, fail_rate: float = 0.05) -> List[FakeScanner]:
+    """Fake scanners spread over every cost tier with latencies in the given range"""
+    rng = random.Random(seed)
+    return [
+        FakeScanner(f"fake_{i}", rng.uniform(min_latency, max_latency), cost_credits=rng.choice([1, 1, 2, 3, 5]),
+                    findings=rng.randint(0, 4), fail_rate=fail_rate, seed=seed + i)
+        for i in range(count)
+    ]
+
+
+def _orchestrator_setup(size: int, seed: int):
+    from ..core.execution_planner import ExecutionPlanner, ScannerStatsStore
+    from ..core.performance_optimizer import AsyncScannerOrchestrator
+
+    class InMemoryStatsStore(ScannerStatsStore):
+        """Keeps statistics in memory so the benchmark never touches the database"""
+
+        def load(self):
+            self.loaded_at = float("inf")
+
+        def flush(self) -> int:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            return len(pending)
+
+    planner = ExecutionPlanner(InMemoryStatsStore(session_factory=lambda: None))
+    orchestrator = AsyncScannerOrchestrator(max_concurrent_scanners=20, planner=planner)
+    query = {"query_type": "email", "query_value": "bench@example.com"}
+    return orchestrator, query, make_fake_scanners(size, seed)
+
+
+@benchmark("orchestrator.async_scan", "orchestrator", _orchestrator_setup, size=40, quick_size=8,
+           threshold=0.5, requires=("sqlalchemy",))
+async def bench_async_orchestrator(state):
+    orchestrator, query, scanners = state
+    # No confidence targets and the enterprise plan: every stage runs
+    await orchestrator.execute_scan_optimized(query, scanners, "enterprise", use_cache=False,
+                                              confidence_targets={})
+
+
+# Reports
+
+def _report_setup(size: int, seed: int):
+    from ..core.aggregation_engine import AggregationEngine
+    from ..core.report_generator import ReportGenerator
+
+    engine = AggregationEngine()
+    results = make_scan_results(size, seed)
+    _, entities = engine.extract_and_score(results)
+    relationships = engine.relationship_linker.link_entities(entities)
+    data = {
+        "query_info": {"query_type": "email", "query_value": "bench@example.com"},
+        "summary": engine._generate_summary(entities, relationships),
+        "entities": entities,
+        "relationships": {k: v for k, v in relationships.items() if k != "entity_clusters"},
+        "scanner_results": results,
+        "recommendations": ["Verify high-confidence entities", "Review linked clusters"],
+    }
+    return ReportGenerator(), data
+
+
+def _report_case(export_format: str, requires: tuple = ()):
+    async def run(state):
+        from ..core.report_generator import ExportFormat, ReportType, SubscriptionPlan
+        generator, data = state
+        report = await generator.generate_report(data, ReportType.FULL, ExportFormat(export_format),
+                                                 SubscriptionPlan.ENTERPRISE, "bench-user")
+        if not report.get("success"):
+            raise RuntimeError(f"{export_format} report failed: {report.get('details') or report.get('error')}")
+        content = report["content"]
+        if not isinstance(content, (str, bytes)):
+            json.dumps(content, default=str)
+
+    run.__name__ = f"bench_report_{export_format}"
+    benchmark(f"report.{export_format}", "report", _report_setup, size=80, quick_size=10,
+              threshold=0.3, requires=requires)(run)
+    return run
+
+
+bench_report_json = _report_case("json")
+bench_report_html = _report_case("html")
+bench_report_csv = _report_case("csv")
+bench_report_pdf = _report_case("pdf", requires=("reportlab",))
+
+
+# Threat intelligence and analytics
+
+def _correlator_setup(size: int, seed: int):
+    from ..core.ioc_correlation import ScalableThreatCorrelator
+    return ScalableThreatCorrelator(), make_iocs(size, seed)
+
+
+@benchmark("ioc.correlate", "ioc", _correlator_setup, size=5000, quick_size=300,
+           requires=("numpy", "aiohttp"))
+def bench_ioc_correlate(state):
+    correlator, iocs = state
+    correlator.correlate(iocs)
+
+
+def _event_store_setup(size: int, seed: int):
+    return [types.SimpleNamespace(**event) for event in make_events(size, seed)]
+
+
+@benchmark("events.append_and_aggregate", "events", _event_store_setup, size=20000, quick_size=2000,
+           requires=("numpy",))
+def bench_event_store(events):
+    from ..services.analytics_event_store import PartitionedEventStore
+    with tempfile.TemporaryDirectory(prefix="bench-events-") as spill_dir:
+        store = PartitionedEventStore(hot_partitions=24, spill_dir=spill_dir)
+        for event in events:
+            store.append(event)
+        store.aggregate()
+        store.distinct_users()
+
+
+# Blockchain analytics
+
+@benchmark("blockchain.wash_trading", "blockchain", make_trades, size=1_000_000, quick_size=100_000,
+           repeats=3, requires=("numpy",))
+def bench_wash_trading(trades):
+    from ..scanners.trade_analytics import detect_wash_trading
+    detect_wash_trading(trades)
@@ -27,6 +27,9 @@ from collections import defaultdict, OrderedDict
 import threading
 import weakref
 
+from .lazy import LazyObject
+from .tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 # Cache Types
@@ -326,8 +329,10 @@ class AdvancedCacheManager:
             self.l1_cache.set(key, value)
             return value
         
-        # Try file cache
-        value = await self._get_from_file_cache(key)
+        # Try file cache; memory hits are too cheap to trace
+        with tracer.span("cache.get", "cache", tier="file") as span:
+            value = await self._get_from_file_cache(key)
+            span.set(hit=value is not None)
         if value is not None:
             # Promote to memory caches
             self.l2_cache.set(key, value)
@@ -348,7 +353,8 @@ class AdvancedCacheManager:
             self.l2_cache.set(key, value, ttl, tags)
         
         if cache_level in ("all", "file"):
-            await self._set_file_cache(key, value, ttl, tags)
+            with tracer.span("cache.set", "cache", tier="file"):
+                await self._set_file_cache(key, value, ttl, tags)
     
     async def _get_from_file_cache(self, key: str) -> Optional[Any]:
         """Get value from file-based cache"""
@@ -463,8 +469,8 @@ class AdvancedCacheManager:
         }
 
 
-# Global cache manager instance
-cache_manager = AdvancedCacheManager()
+# Global cache manager instance, built on first use (it creates the file cache directory)
+cache_manager = LazyObject(AdvancedCacheManager)
 
 # Decorators for caching and performance monitoring
 def cached(ttl: int = 300, tags: List[str] = None, cache_level: str = "all"):
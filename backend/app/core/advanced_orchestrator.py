@@ -10,7 +10,6 @@ import time
 from typing import Dict, List, Any, Optional, Set, Tuple, Callable
 from dataclasses import dataclass, field
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import threading
 from datetime import datetime, timedelta
@@ -250,7 +249,6 @@ class IntelligenceOrchestrator:
     def __init__(self, max_concurrent_tasks: int = 10):
         self.resource_manager = ResourceManager(max_concurrent_tasks)
         self.workflow_engine = WorkflowEngine()
-        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_tasks)
         self.running = False
         self.metrics: Dict[str, Any] = defaultdict(int)
         self._background_task: Optional[asyncio.Task] = None
@@ -270,7 +268,6 @@ class IntelligenceOrchestrator:
                 await self._background_task
             except asyncio.CancelledError:
                 pass
-        self.executor.shutdown(wait=True)
         logger.info("Intelligence Orchestrator stopped")
     
     async def submit_workflow(self, tasks: List[Dict[str, Any]]) -> str:
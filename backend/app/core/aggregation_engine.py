@@ -4,6 +4,7 @@ Handles normalization, deduplication, confidence scoring, and relationship linki
 """
 
 import asyncio
+import os
 import re
 import logging
 import hashlib
@@ -65,17 +66,25 @@ except ImportError:
     EMAIL_VALIDATOR_AVAILABLE = False
     # Mock email validator
     EmailNotValidError = Exception
-    def validate_email(email):
+    def validate_email(email, **kwargs):
         return type('ValidationResult', (), {'email': email.lower()})()
 
+from .compute_service import get_compute_service
+from .tracing import tracer
+
 logger = logging.getLogger(__name__)
 
+# Result batches at least this large are aggregated in a worker process
+PROCESS_OFFLOAD_THRESHOLD = 20
+
 
 class EntityNormalizer:
     """Normalizes entity data across different sources"""
     
     def __init__(self):
         self.email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+        # Deliverability checks resolve the domain over DNS; benchmarks turn them off
+        self.check_deliverability = os.getenv("EMAIL_DELIVERABILITY_CHECKS", "true").lower() != "false"
         self.phone_pattern = re.compile(r'[\+]?[1-9]?[\d\s\-\(\)\.]{7,15}')
         self.social_handle_pattern = re.compile(r'^@?[a-zA-Z0-9._-]{1,30}$')
     
@@ -93,7 +102,7 @@ class EntityNormalizer:
         
         try:
             # Use email-validator for thorough validation
-            validation = validate_email(email)
+            validation = validate_email(email, check_deliverability=self.check_deliverability)
             normalized_email = validation.email
             
             # Extract components
@@ -874,6 +883,12 @@ class RelationshipLinker:
             if region1 and region2 and region1 == region2:
                 score += 0.2
         
+        # Seen together in earlier investigations (from the entity index)
+        prior1 = entity1.get('prior_query_ids')
+        prior2 = entity2.get('prior_query_ids')
+        if prior1 and prior2 and not set(prior1).isdisjoint(prior2):
+            score += 0.3
+        
         return min(score, 1.0)
     
     def _generate_cluster_key(self, primary_entity: Dict[str, Any], related_entities: List[Dict[str, Any]]) -> str:
@@ -917,11 +932,13 @@ class RelationshipLinker:
 class AggregationEngine:
     """Main aggregation engine that orchestrates all components"""
     
-    def __init__(self):
+    def __init__(self, entity_index=None):
         self.normalizer = EntityNormalizer()
         self.deduplicator = EntityDeduplicator()
         self.confidence_scorer = ConfidenceScorer()
         self.relationship_linker = RelationshipLinker()
+        # Optional EntityIndex for cross-investigation lookups and persistence
+        self.entity_index = entity_index
     
     def normalize_email(self, email: str) -> Dict[str, Any]:
         """Normalize email address - delegate to normalizer"""
@@ -935,28 +952,46 @@ class AggregationEngine:
         """Deduplicate entities - delegate to deduplicator"""
         return self.deduplicator.deduplicate_entities(entities)
     
-    async def aggregate_scan_results(self, scan_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def aggregate_scan_results(self, scan_results: List[Dict[str, Any]],
+                                     query_id: Optional[int] = None) -> Dict[str, Any]:
         """Main aggregation method"""
         logger.info(f"Starting aggregation of {len(scan_results)} scan results")
         
-        # Extract entities from scan results
-        raw_entities = []
-        for result in scan_results:
-            entities = self._extract_entities_from_result(result)
-            raw_entities.extend(entities)
-        
-        logger.info(f"Extracted {len(raw_entities)} raw entities")
-        
-        # Deduplicate entities
-        deduplicated_entities = self.deduplicator.deduplicate_entities(raw_entities)
-        logger.info(f"After deduplication: {len(deduplicated_entities)} entities")
-        
-        # Calculate confidence scores
-        for entity in deduplicated_entities:
-            entity['final_confidence'] = self.confidence_scorer.calculate_entity_confidence(entity)
+        # Extraction, deduplication and scoring are pure CPU work; large batches go to a worker process
+        with tracer.span("aggregation.extract", "aggregation", results=len(scan_results)) as span:
+            if len(scan_results) >= PROCESS_OFFLOAD_THRESHOLD:
+                raw_count, deduplicated_entities = await get_compute_service().run_cpu(
+                    "aggregation", extract_and_score_entities, scan_results
+                )
+            else:
+                raw_count, deduplicated_entities = self.extract_and_score(scan_results)
+            span.set(raw_entities=raw_count, entities=len(deduplicated_entities))
+        
+        # Attach earlier sightings so linking can reuse prior investigations
+        previously_seen = 0
+        if self.entity_index is not None:
+            with tracer.span("aggregation.prior_sightings", "aggregation"):
+                try:
+                    previously_seen = await asyncio.to_thread(
+                        self.entity_index.annotate_prior_sightings, deduplicated_entities
+                    )
+                except Exception as e:
+                    logger.warning(f"Prior sightings lookup failed, continuing without it: {e}")
         
         # Link related entities
-        relationship_data = self.relationship_linker.link_entities(deduplicated_entities)
+        with tracer.span("aggregation.link", "aggregation"):
+            relationship_data = self.relationship_linker.link_entities(deduplicated_entities)
+        
+        # Persist entities, postings and cluster edges in one transaction
+        if self.entity_index is not None:
+            with tracer.span("aggregation.persist", "aggregation"):
+                try:
+                    await asyncio.to_thread(
+                        self.entity_index.upsert_entities, deduplicated_entities, query_id,
+                        relationship_data.get('relationships', [])
+                    )
+                except Exception as e:
+                    logger.warning(f"Entity index update failed, results not persisted: {e}")
         
         # Generate summary statistics
         summary = self._generate_summary(deduplicated_entities, relationship_data)
@@ -966,15 +1001,36 @@ class AggregationEngine:
             'relationships': relationship_data,
             'summary': summary,
             'aggregation_metadata': {
-                'total_raw_entities': len(raw_entities),
+                'total_raw_entities': raw_count,
                 'deduplicated_count': len(deduplicated_entities),
-                'deduplication_rate': 1 - (len(deduplicated_entities) / len(raw_entities)) if raw_entities else 0,
+                'deduplication_rate': 1 - (len(deduplicated_entities) / raw_count) if raw_count else 0,
                 'high_confidence_entities': len([e for e in deduplicated_entities if e.get('final_confidence', 0) > 0.8]),
                 'relationship_clusters': relationship_data.get('total_clusters', 0),
+                'previously_seen_entities': previously_seen,
                 'processing_timestamp': datetime.utcnow().isoformat()
             }
         }
     
+    def extract_and_score(self, scan_results: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Extract, deduplicate and score entities; returns (raw entity count, entities)"""
+        # Extract entities from scan results
+        raw_entities = []
+        for result in scan_results:
+            entities = self._extract_entities_from_result(result)
+            raw_entities.extend(entities)
+        
+        logger.info(f"Extracted {len(raw_entities)} raw entities")
+        
+        # Deduplicate entities
+        deduplicated_entities = self.deduplicator.deduplicate_entities(raw_entities)
+        logger.info(f"After deduplication: {len(deduplicated_entities)} entities")
+        
+        # Calculate confidence scores
+        for entity in deduplicated_entities:
+            entity['final_confidence'] = self.confidence_scorer.calculate_entity_confidence(entity)
+        
+        return len(raw_entities), deduplicated_entities
+    
     def _extract_entities_from_result(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract entities from a single scan result"""
         entities = []
@@ -1131,7 +1187,18 @@ DataAggregationEngine = AggregationEngine
 AdvancedAggregationEngine = AggregationEngine
 
 
+def extract_and_score_entities(scan_results: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Compute service entry point for AggregationEngine.extract_and_score"""
+    return AggregationEngine().extract_and_score(scan_results)
+
+
 # Factory function
 def create_aggregation_engine() -> AggregationEngine:
     """Create and return a configured AggregationEngine instance"""
-    return AggregationEngine()
\ No newline at end of file
+    try:
+        from .entity_index import get_entity_index
+        entity_index = get_entity_index()
+    except Exception as e:
+        logger.warning(f"Entity index unavailable, aggregating without it: {e}")
+        entity_index = None
+    return AggregationEngine(entity_index=entity_index)
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Shared Compute Service
+======================
+
+One application-wide pool pair for work that must stay off the event loop:
+- A bounded ProcessPoolExecutor, warmed at startup, for CPU-bound stages
+  (hashing, EXIF, pattern/anomaly analysis, PDF rendering, aggregation)
+- A bounded ThreadPoolExecutor for blocking I/O (whois, sockets, subprocesses)
+- Async ``run_cpu`` / ``run_io`` helpers tagged with a stage name
+- Per-stage queue depth, queue wait and run latency metrics
+- Started and stopped with the application lifespan; hosts that cannot
+  create worker processes fall back to the thread pool
+
+Functions sent to ``run_cpu`` must be picklable: module-level functions and
+plain data arguments.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Callable, Deque
+
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_worker() -> int:
+    """Runs once per worker so the first real task does not pay for process start"""
+    return os.getpid()
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: Dict[str, Any]):
+    """Run ``fn`` and report when the worker picked it up"""
+    started = time.time()
+    return started, fn(*args, **kwargs)
+
+
+@dataclass
+class StageMetrics:
+    """Queue depth and latency for one named stage"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    wait_seconds_total: float = 0.0
+    run_seconds_total: float = 0.0
+    run_seconds_max: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_depth": self.in_flight,
+            "max_queue_depth": self.max_in_flight,
+            "avg_wait_ms": self.wait_seconds_total / finished * 1000 if finished else 0.0,
+            "avg_run_ms": self.run_seconds_total / finished * 1000 if finished else 0.0,
+            "p95_total_ms": p95 * 1000,
+            "max_run_ms": self.run_seconds_max * 1000,
+        }
+
+
+class ComputeService:
+    """Process pool for CPU-bound stages and thread pool for blocking I/O"""
+
+    def __init__(self, process_workers: Optional[int] = None, thread_workers: Optional[int] = None):
+        cpus = os.cpu_count() or 1
+        self.process_workers = process_workers or int(os.getenv("COMPUTE_PROCESS_WORKERS", str(min(4, cpus))))
+        self.thread_workers = thread_workers or int(os.getenv("COMPUTE_THREAD_WORKERS", str(min(32, cpus * 4))))
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self.process_fallback = False
+        self._lock = threading.Lock()
+        self.stages: Dict[str, StageMetrics] = {}
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._processes is not None or self._threads is not None
+
+    def process_pool(self) -> Executor:
+        """The shared process pool, created on first use.
+
+        Hosts that cannot create one (no /dev/shm, no fork/spawn) get the
+        thread pool instead, so CPU-bound stages still run off the loop.
+        """
+        with self._lock:
+            if self._processes is None and not self.process_fallback:
+                try:
+                    self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+                except (OSError, ImportError, NotImplementedError) as e:
+                    logger.warning(f"Process pool unavailable, running CPU stages on threads: {e}")
+                    self.process_fallback = True
+                else:
+                    self.started_at = self.started_at or time.time()
+            processes = self._processes
+        return processes if processes is not None else self.thread_pool()
+
+    def thread_pool(self) -> ThreadPoolExecutor:
+        """The shared I/O thread pool, created on first use"""
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="compute-io")
+                self.started_at = self.started_at or time.time()
+            return self._threads
+
+    async def start(self, warm: bool = True):
+        """Create both pools and start every worker process"""
+        pool = self.process_pool()
+        self.thread_pool()
+        if warm and not self.process_fallback:
+            loop = asyncio.get_running_loop()
+            pids = await asyncio.gather(
+                *(loop.run_in_executor(pool, _warm_worker) for _ in range(self.process_workers))
+            )
+            logger.info(f"Compute service started: {len(set(pids))} worker processes, "
+                        f"{self.thread_workers} I/O threads")
+
+    def shutdown(self, wait: bool = True):
+        """Stop both pools; pending work is cancelled"""
+        with self._lock:
+            processes, self._processes = self._processes, None
+            threads, self._threads = self._threads, None
+        if processes is not None:
+            processes.shutdown(wait=wait, cancel_futures=True)
+        if threads is not None:
+            threads.shutdown(wait=wait, cancel_futures=True)
+
+    async def run_cpu(self, stage: str, fn: Callable, *args, **kwargs):
+        """Run a picklable CPU-bound callable in a worker process"""
+        try:
+            return await self._run(stage, self.process_pool(), fn, args, kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool and retry once
+            logger.warning(f"Process pool broke during {stage}; restarting it")
+            with self._lock:
+                broken, self._processes = self._processes, None
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            return await self._run(stage, self.process_pool(), fn, args, kwargs)
+
+    async def run_io(self, stage: str, fn: Callable, *args, **kwargs):
+        """Run a blocking I/O callable on the shared thread pool"""
+        return await self._run(stage, self.thread_pool(), fn, args, kwargs)
+
+    async def _run(self, stage: str, executor, fn: Callable, args: tuple, kwargs: Dict[str, Any]):
+        metrics = self.stages.setdefault(stage, StageMetrics())
+        metrics.submitted += 1
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        submitted = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            with tracer.span(f"compute {stage}", "compute", stage=stage):
+                started, result = await loop.run_in_executor(
+                    executor, functools.partial(_timed_call, fn, args, kwargs)
+                )
+        except BaseException:
+            metrics.failed += 1
+            metrics.latencies.append(time.time() - submitted)
+            raise
+        else:
+            finished = time.time()
+            run_seconds = finished - started
+            metrics.completed += 1
+            metrics.wait_seconds_total += max(started - submitted, 0.0)
+            metrics.run_seconds_total += run_seconds
+            metrics.run_seconds_max = max(metrics.run_seconds_max, run_seconds)
+            metrics.latencies.append(finished - submitted)
+            return result
+        finally:
+            metrics.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "process_workers": 0 if self.process_fallback else self.process_workers,
+            "thread_workers": self.thread_workers,
+            "uptime_seconds": time.time() - self.started_at if self.started_at and self.running else 0.0,
+            "stages": {name: metrics.to_dict() for name, metrics in sorted(self.stages.items())},
+        }
+
+
+# Application-wide instance
+_compute_service: Optional[ComputeService] = None
+_compute_service_lock = threading.Lock()
+
+
+def get_compute_service() -> ComputeService:
+    """Get the shared compute service"""
+    global _compute_service
+    with _compute_service_lock:
+        if _compute_service is None:
+            _compute_service = ComputeService()
+        return _compute_service
@@ -0,0 +1,346 @@
+"""
+Global Entity Index
+===================
+
+Persistent cross-investigation index of aggregated entities:
+- Normalized (type, value) -> entity id, unique in the entities table
+- Postings of (query id, source) per entity in entity_occurrences
+- Relationship edges from aggregation clusters
+- Bulk upsert of a whole aggregation result in one transaction
+- In-memory hot set of recently used entities and their postings
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from sqlalchemy import select, insert, update, bindparam, tuple_
+
+from ..db.models import Entity, EntityOccurrence, EntityRelationship
+from .advanced_caching import LRUCache
+from .aggregation_engine import EntityNormalizer
+
+logger = logging.getLogger(__name__)
+
+EntityKey = Tuple[str, str]
+
+MAX_VALUE_LENGTH = 500
+
+
+def _insert_ignore(session, table):
+    """INSERT that skips rows violating a unique constraint"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+class EntityIndex:
+    """Normalized entity lookups backed by indexed tables and a hot set"""
+
+    def __init__(self, session_factory=None, hot_size: int = 50000, chunk_size: int = 500):
+        if session_factory is None:
+            from ..db.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.normalizer = EntityNormalizer()
+        # key -> {"entity_id", "query_ids", "sources", "first_seen", "last_seen"}
+        self.hot_set = LRUCache(max_size=hot_size)
+        self.stats = {"hot_hits": 0, "db_lookups": 0, "entities_inserted": 0, "occurrences_inserted": 0}
+
+    def normalize(self, entity_type: str, value: Any) -> Optional[str]:
+        """Normalized lookup key for an entity value"""
+        if value is None:
+            return None
+        text = str(value)
+        if entity_type == "email":
+            normalized = self.normalizer.normalize_email(text)
+            text = normalized["normalized"] if normalized.get("valid") else text
+        elif entity_type == "phone":
+            normalized = self.normalizer.normalize_phone(text)
+            text = normalized["normalized"] if normalized.get("valid") else text
+        elif entity_type == "url":
+            text = self.normalizer.normalize_url(text)["normalized"] or text
+
+        key = " ".join(text.lower().split())
+        if not key:
+            return None
+        if len(key) > MAX_VALUE_LENGTH:
+            key = "sha256:" + hashlib.sha256(key.encode()).hexdigest()
+        return key
+
+    def upsert_entities(self, entities: List[Dict[str, Any]], query_id: Optional[int] = None,
+                        relationships: Optional[List[Dict[str, Any]]] = None) -> Dict[EntityKey, int]:
+        """Index aggregated entities, their postings and cluster edges in one transaction.
+
+        Sets ``entity_id`` on each entity dict and returns key -> entity id.
+        """
+        now = datetime.now(timezone.utc)
+        records: Dict[EntityKey, Dict[str, Any]] = {}
+        for entity in entities:
+            entity_type = entity.get("type", "unknown")
+            normalized = self.normalize(entity_type, entity.get("value"))
+            if normalized is None:
+                continue
+            record = records.setdefault((entity_type, normalized), {
+                "name": str(entity.get("value"))[:200],
+                "confidence": 0.0,
+                "sources": {},
+                "entities": [],
+            })
+            record["entities"].append(entity)
+            confidence = entity.get("final_confidence", entity.get("aggregate_confidence", 0.5)) or 0.0
+            record["confidence"] = max(record["confidence"], confidence)
+            for source in entity.get("sources") or [{"source": entity.get("source", "unknown")}]:
+                name = str(source.get("source", "unknown"))[:100]
+                record["sources"][name] = max(record["sources"].get(name, 0.0), source.get("confidence", 0.5) or 0.0)
+
+        if not records:
+            return {}
+
+        with self.session_factory() as session:
+            ids = self._resolve_ids(session, records.keys())
+            missing = [key for key in records if key not in ids]
+            if missing:
+                session.execute(_insert_ignore(session, Entity.__table__), [
+                    {
+                        "entity_type": key[0],
+                        "normalized_value": key[1],
+                        "name": records[key]["name"],
+                        "confidence_score": records[key]["confidence"],
+                        "first_seen": now,
+                        "last_seen": now,
+                    }
+                    for key in missing
+                ])
+                self.stats["entities_inserted"] += len(missing)
+                ids.update(self._resolve_ids(session, missing, use_hot_set=False))
+
+            existing = [ids[key] for key in records if key not in missing]
+            if existing:
+                session.execute(
+                    update(Entity.__table__)
+                    .where(Entity.__table__.c.id == bindparam("entity_id"))
+                    .values(last_seen=bindparam("seen")),
+                    [{"entity_id": entity_id, "seen": now} for entity_id in existing]
+                )
+
+            occurrences = [
+                {"entity_id": ids[key], "query_id": query_id, "source": source, "confidence_score": confidence}
+                for key, record in records.items()
+                for source, confidence in record["sources"].items()
+            ]
+            session.execute(_insert_ignore(session, EntityOccurrence.__table__), occurrences)
+            self.stats["occurrences_inserted"] += len(occurrences)
+
+            edges = self._relationship_edges(relationships or [], ids)
+            if edges:
+                session.execute(_insert_ignore(session, EntityRelationship.__table__), edges)
+
+            session.commit()
+
+        for key, record in records.items():
+            for entity in record["entities"]:
+                entity["entity_id"] = ids[key]
+            cached = self.hot_set.get(self._cache_key(key))
+            if cached is None:
+                self.hot_set.set(self._cache_key(key), {
+                    "entity_id": ids[key], "query_ids": None, "sources": None,
+                    "first_seen": now if key in missing else None, "last_seen": now,
+                })
+            else:
+                if cached["query_ids"] is not None and query_id is not None:
+                    cached["query_ids"].add(query_id)
+                if cached["sources"] is not None:
+                    cached["sources"].update(record["sources"])
+                cached["last_seen"] = now
+
+        return {key: ids[key] for key in records}
+
+    def lookup(self, entity_type: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Where an entity has been seen before, or None"""
+        return self.lookup_many([(entity_type, value)]).get((entity_type, self.normalize(entity_type, value)))
+
+    def lookup_many(self, pairs: Iterable[Tuple[str, Any]]) -> Dict[EntityKey, Dict[str, Any]]:
+        """Batch lookup of (type, value) pairs; unknown entities are omitted"""
+        keys = {
+            (entity_type, normalized)
+            for entity_type, value in pairs
+            for normalized in [self.normalize(entity_type, value)]
+            if normalized is not None
+        }
+        if not keys:
+            return {}
+
+        results: Dict[EntityKey, Dict[str, Any]] = {}
+        incomplete = []
+        for key in keys:
+            cached = self.hot_set.get(self._cache_key(key))
+            if cached is not None and cached["query_ids"] is not None:
+                self.stats["hot_hits"] += 1
+                results[key] = cached
+            else:
+                incomplete.append(key)
+
+        if incomplete:
+            self.stats["db_lookups"] += len(incomplete)
+            with self.session_factory() as session:
+                entities = self._load_entities(session, incomplete)
+                postings = self._load_postings(session, [row["entity_id"] for row in entities.values()])
+            for key, row in entities.items():
+                entry = {
+                    "entity_id": row["entity_id"],
+                    "query_ids": set(),
+                    "sources": {},
+                    "first_seen": row["first_seen"],
+                    "last_seen": row["last_seen"],
+                }
+                for posting_query_id, source, confidence in postings.get(row["entity_id"], []):
+                    if posting_query_id is not None:
+                        entry["query_ids"].add(posting_query_id)
+                    entry["sources"][source] = max(entry["sources"].get(source, 0.0), confidence or 0.0)
+                self.hot_set.set(self._cache_key(key), entry)
+                results[key] = entry
+
+        return {
+            key: {
+                "entity_id": entry["entity_id"],
+                "query_ids": sorted(entry["query_ids"]),
+                "sources": dict(entry["sources"]),
+                "first_seen": entry["first_seen"],
+                "last_seen": entry["last_seen"],
+            }
+            for key, entry in results.items()
+        }
+
+    def annotate_prior_sightings(self, entities: List[Dict[str, Any]]) -> int:
+        """Add ``prior_query_ids`` and ``entity_id`` to entities seen in earlier queries"""
+        found = self.lookup_many((entity.get("type", "unknown"), entity.get("value")) for entity in entities)
+        annotated = 0
+        for entity in entities:
+            entity_type = entity.get("type", "unknown")
+            match = found.get((entity_type, self.normalize(entity_type, entity.get("value"))))
+            if match:
+                entity["entity_id"] = match["entity_id"]
+                entity["prior_query_ids"] = match["query_ids"]
+                annotated += 1
+        return annotated
+
+    def related_entities(self, entity_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """Entities linked to ``entity_id`` in either direction"""
+        relationships = EntityRelationship.__table__
+        entities = Entity.__table__
+        with self.session_factory() as session:
+            edges = session.execute(
+                select(relationships.c.source_entity_id, relationships.c.target_entity_id,
+                       relationships.c.relationship_type, relationships.c.confidence_score)
+                .where((relationships.c.source_entity_id == entity_id) |
+                       (relationships.c.target_entity_id == entity_id))
+                .limit(limit)
+            ).all()
+            other_ids = {edge[1] if edge[0] == entity_id else edge[0] for edge in edges}
+            names = dict(session.execute(
+                select(entities.c.id, entities.c.normalized_value).where(entities.c.id.in_(other_ids))
+            ).all()) if other_ids else {}
+
+        return [
+            {
+                "entity_id": other,
+                "value": names.get(other),
+                "relationship_type": relationship_type,
+                "confidence": confidence,
+            }
+            for source_id, target_id, relationship_type, confidence in edges
+            for other in [target_id if source_id == entity_id else source_id]
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "hot_set_size": len(self.hot_set.cache)}
+
+    def _cache_key(self, key: EntityKey) -> str:
+        return f"{key[0]}\x00{key[1]}"
+
+    def _chunks(self, items: List[Any]):
+        for start in range(0, len(items), self.chunk_size):
+            yield items[start:start + self.chunk_size]
+
+    def _resolve_ids(self, session, keys: Iterable[EntityKey], use_hot_set: bool = True) -> Dict[EntityKey, int]:
+        ids: Dict[EntityKey, int] = {}
+        misses = []
+        for key in keys:
+            cached = self.hot_set.get(self._cache_key(key)) if use_hot_set else None
+            if cached is not None:
+                self.stats["hot_hits"] += 1
+                ids[key] = cached["entity_id"]
+            else:
+                misses.append(key)
+        for key, row in self._load_entities(session, misses).items():
+            ids[key] = row["entity_id"]
+        return ids
+
+    def _load_entities(self, session, keys: List[EntityKey]) -> Dict[EntityKey, Dict[str, Any]]:
+        table = Entity.__table__
+        found = {}
+        for chunk in self._chunks(list(keys)):
+            rows = session.execute(
+                select(table.c.id, table.c.entity_type, table.c.normalized_value,
+                       table.c.first_seen, table.c.last_seen)
+                .where(tuple_(table.c.entity_type, table.c.normalized_value).in_(chunk))
+            ).all()
+            for entity_id, entity_type, normalized, first_seen, last_seen in rows:
+                found[(entity_type, normalized)] = {
+                    "entity_id": entity_id, "first_seen": first_seen, "last_seen": last_seen
+                }
+        return found
+
+    def _load_postings(self, session, entity_ids: List[int]) -> Dict[int, List[Tuple[Optional[int], str, float]]]:
+        table = EntityOccurrence.__table__
+        postings: Dict[int, List[Tuple[Optional[int], str, float]]] = {}
+        for chunk in self._chunks(entity_ids):
+            rows = session.execute(
+                select(table.c.entity_id, table.c.query_id, table.c.source, table.c.confidence_score)
+                .where(table.c.entity_id.in_(chunk))
+            ).all()
+            for entity_id, query_id, source, confidence in rows:
+                postings.setdefault(entity_id, []).append((query_id, source, confidence))
+        return postings
+
+    def _relationship_edges(self, relationships: List[Dict[str, Any]],
+                            ids: Dict[EntityKey, int]) -> List[Dict[str, Any]]:
+        """Star edges from each cluster's first entity; avoids O(n^2) pairs per cluster"""
+        edges = {}
+        for relationship in relationships:
+            members = []
+            for entity in relationship.get("entities", []):
+                entity_type = entity.get("type", "unknown")
+                entity_id = ids.get((entity_type, self.normalize(entity_type, entity.get("value"))))
+                if entity_id is not None and entity_id not in members:
+                    members.append(entity_id)
+            relationship_type = relationship.get("relationship_type", "related_entities")
+            for other in members[1:]:
+                source_id, target_id = min(members[0], other), max(members[0], other)
+                edges[(source_id, target_id, relationship_type)] = {
+                    "source_entity_id": source_id,
+                    "target_entity_id": target_id,
+                    "relationship_type": relationship_type,
+                    "confidence_score": relationship.get("confidence"),
+                    "relationship_metadata": {"cluster_id": relationship.get("cluster_id")},
+                }
+        return list(edges.values())
+
+
+_entity_index: Optional[EntityIndex] = None
+
+
+def get_entity_index() -> EntityIndex:
+    """Process-wide entity index bound to the application database"""
+    global _entity_index
+    if _entity_index is None:
+        _entity_index = EntityIndex()
+    return _entity_index
@@ -2,21 +2,33 @@
 """
 Advanced Error Tracking and Logging System
 Provides comprehensive error monitoring, tracking, and alerting
+
+Errors are grouped by fingerprint (exception type, message template with
+numbers, ids and quoted values masked, and the functions on the stack),
+so an outage repeating one error thousands of times a second updates one
+group's counters instead of piling up events. Full tracebacks are only
+formatted for the first few samples of each group, and log lines are
+written through the batching ``AsyncLogSink``.
 """
 
+import hashlib
 import logging
+import re
 import traceback
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
-from collections import defaultdict, deque
+from typing import Dict, List, Optional, Any, Union, Tuple
+from dataclasses import dataclass, asdict, field
+from collections import defaultdict, deque, OrderedDict
 from pathlib import Path
 import threading
 import uuid
 from enum import Enum
 
+from .lazy import LazyObject
+from .log_sink import AsyncLogSink, SinkHandler, get_log_sink
+
 class ErrorSeverity(Enum):
     """Error severity levels"""
     LOW = "low"
@@ -57,25 +69,132 @@ class ErrorEvent:
     additional_context: Dict[str, Any] = None
     resolved: bool = False
     resolution_notes: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+# Masks applied, in order, to turn a message into its template
+_MESSAGE_MASKS = [
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "<email>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"), "<hex>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<num>"),
+]
+
+MAX_STACK_FRAMES = 12
+
+
+def message_template(message: str, limit: int = 300) -> str:
+    """Message with variable parts masked, so repeats of one error match"""
+    template = message[:limit]
+    for pattern, placeholder in _MESSAGE_MASKS:
+        template = pattern.sub(placeholder, template)
+    return template
+
+
+def stack_signature(exception: BaseException) -> Tuple[str, ...]:
+    """``file:function`` of the innermost frames; line numbers are left out
+    so unrelated edits to a file do not split its groups"""
+    frames = [
+        f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+        for frame, _ in traceback.walk_tb(exception.__traceback__)
+    ]
+    return tuple(frames[-MAX_STACK_FRAMES:])
+
+
+def error_fingerprint(exception_type: str, template: str, stack: Tuple[str, ...], category: str) -> str:
+    digest = hashlib.sha1("\x1f".join((exception_type, template, category) + stack).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _hour(timestamp: datetime) -> int:
+    return int(timestamp.timestamp() // 3600)
+
+
+@dataclass
+class ErrorGroup:
+    """Counters and sample events for all errors sharing a fingerprint"""
+    fingerprint: str
+    exception_type: str
+    message_template: str
+    category: ErrorCategory
+    stack: Tuple[str, ...]
+    first_seen: datetime
+    last_seen: datetime
+    count: int = 0
+    by_severity: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # hour (epoch // 3600) -> severity -> count, pruned to the tracker's retention
+    hourly: Dict[int, Dict[str, int]] = field(default_factory=dict)
+    samples: List[ErrorEvent] = field(default_factory=list)
+    last_event_id: Optional[str] = None
+
+    def record(self, event: ErrorEvent, retention_hours: int):
+        hour = _hour(event.timestamp)
+        if hour not in self.hourly:
+            for old in [h for h in self.hourly if h <= hour - retention_hours]:
+                del self.hourly[old]
+            self.hourly[hour] = defaultdict(int)
+        self.hourly[hour][event.severity.value] += 1
+        self.by_severity[event.severity.value] += 1
+        self.count += 1
+        self.last_seen = event.timestamp
+        self.last_event_id = event.id
+
+    def counts_since(self, since_hour: int) -> Dict[str, int]:
+        counts: Dict[str, int] = defaultdict(int)
+        for hour, severities in self.hourly.items():
+            if hour >= since_hour:
+                for severity, count in severities.items():
+                    counts[severity] += count
+        return counts
+
+    def to_dict(self, samples: bool = False) -> Dict[str, Any]:
+        data = {
+            "fingerprint": self.fingerprint,
+            "exception_type": self.exception_type,
+            "message_template": self.message_template,
+            "category": self.category.value,
+            "stack": list(self.stack),
+            "count": self.count,
+            "by_severity": dict(self.by_severity),
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "last_event_id": self.last_event_id,
+        }
+        if samples:
+            data["samples"] = [
+                {"id": e.id, "timestamp": e.timestamp.isoformat(), "message": e.message,
+                 "severity": e.severity.value, "traceback": e.traceback, "url": e.url}
+                for e in self.samples
+            ]
+        return data
 
 class ErrorTracker:
     """Main error tracking and monitoring system"""
     
-    def __init__(self, max_errors: int = 10000, log_dir: str = "logs"):
+    def __init__(self, max_errors: int = 10000, log_dir: str = "logs", max_groups: int = 2000,
+                 samples_per_group: int = 5, retention_hours: int = 7 * 24,
+                 sink: Optional[AsyncLogSink] = None, configure_logging: bool = True):
         self.max_errors = max_errors
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
+        self.max_groups = max_groups
+        self.samples_per_group = samples_per_group
+        self.retention_hours = retention_hours
+        self.sink = sink or get_log_sink()
         
-        # Error storage
+        # Error storage: recent events plus one group per fingerprint, least recently seen first
         self.errors: deque = deque(maxlen=max_errors)
         self.error_counts = defaultdict(int)
-        self.error_patterns = defaultdict(list)
+        self.groups: "OrderedDict[str, ErrorGroup]" = OrderedDict()
+        self.evicted_groups = 0
         
         # Thread safety
         self.lock = threading.Lock()
         
         # Configure logging
-        self._setup_logging()
+        if configure_logging:
+            self._setup_logging()
         
         self.logger = logging.getLogger(__name__)
         self.logger.info("🔍 Error Tracking System initialized")
@@ -87,20 +206,12 @@ class ErrorTracker:
             '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
         )
         
-        # Error log file
-        error_handler = logging.FileHandler(
-            self.log_dir / "errors.log", 
-            encoding='utf-8'
-        )
-        error_handler.setLevel(logging.ERROR)
+        # Error log file; file writes are batched on the sink's thread
+        error_handler = SinkHandler(self.sink, self.log_dir / "errors.log", logging.ERROR)
         error_handler.setFormatter(error_formatter)
         
         # Application log file
-        app_handler = logging.FileHandler(
-            self.log_dir / "application.log", 
-            encoding='utf-8'
-        )
-        app_handler.setLevel(logging.INFO)
+        app_handler = SinkHandler(self.sink, self.log_dir / "application.log", logging.INFO)
         app_handler.setFormatter(error_formatter)
         
         # Console handler for development
@@ -136,16 +247,17 @@ class ErrorTracker:
             error_id = str(uuid.uuid4())
             
             # Extract error information
+            message = str(exception)
             if isinstance(exception, Exception):
-                message = str(exception)
                 exception_type = type(exception).__name__
-                traceback_str = traceback.format_exc()
+                stack = stack_signature(exception)
             else:
-                message = str(exception)
                 exception_type = "GenericError"
-                traceback_str = ""
+                stack = ()
+            template = message_template(message)
+            fingerprint = error_fingerprint(exception_type, template, stack, category.value)
             
-            # Create error event
+            # Create error event; the traceback is only formatted for samples
             error_event = ErrorEvent(
                 id=error_id,
                 timestamp=datetime.now(),
@@ -153,7 +265,7 @@ class ErrorTracker:
                 category=category,
                 message=message,
                 exception_type=exception_type,
-                traceback=traceback_str,
+                traceback="",
                 user_id=user_id,
                 session_id=session_id,
                 request_id=request_id,
@@ -161,17 +273,37 @@ class ErrorTracker:
                 method=method,
                 user_agent=user_agent,
                 ip_address=ip_address,
-                additional_context=additional_context or {}
+                additional_context=additional_context or {},
+                fingerprint=fingerprint
             )
             
             # Store error
             with self.lock:
                 self.errors.append(error_event)
                 self.error_counts[category.value] += 1
-                self.error_patterns[exception_type].append(error_event)
+                group = self.groups.get(fingerprint)
+                if group is None:
+                    group = ErrorGroup(fingerprint, exception_type, template, category, stack,
+                                       error_event.timestamp, error_event.timestamp)
+                    self.groups[fingerprint] = group
+                    if len(self.groups) > self.max_groups:
+                        self.groups.popitem(last=False)
+                        self.evicted_groups += 1
+                else:
+                    self.groups.move_to_end(fingerprint)
+                group.record(error_event, self.retention_hours)
+                is_sample = len(group.samples) < self.samples_per_group
+                if is_sample:
+                    group.samples.append(error_event)
+                first_in_group = group.count == 1
+            
+            if isinstance(exception, Exception) and (is_sample or severity == ErrorSeverity.CRITICAL):
+                error_event.traceback = "".join(traceback.format_exception(
+                    type(exception), exception, exception.__traceback__
+                ))
             
             # Log error
-            self._log_error(error_event)
+            self._log_error(error_event, first_in_group)
             
             # Check for critical errors that need immediate attention
             if severity == ErrorSeverity.CRITICAL:
@@ -184,13 +316,13 @@ class ErrorTracker:
             logging.error(f"Error in error tracking system: {e}")
             return "error-tracking-failed"
     
-    def _log_error(self, error_event: ErrorEvent):
+    def _log_error(self, error_event: ErrorEvent, first_in_group: bool = True):
         """Log error event with appropriate level"""
         logger = logging.getLogger(__name__)
         
         log_message = (
             f"[{error_event.id}] {error_event.severity.value.upper()} - "
-            f"{error_event.category.value}: {error_event.message}"
+            f"{error_event.category.value}: {error_event.message} (group {error_event.fingerprint})"
         )
         
         # Add context if available
@@ -215,8 +347,8 @@ class ErrorTracker:
         else:
             logger.info(log_message)
         
-        # Log traceback for exceptions
-        if error_event.traceback:
+        # Log the traceback once per group; repeats share it
+        if error_event.traceback and first_in_group:
             logger.debug(f"Traceback for {error_event.id}:\n{error_event.traceback}")
     
     def _handle_critical_error(self, error_event: ErrorEvent):
@@ -225,21 +357,21 @@ class ErrorTracker:
             # Save critical error to separate file
             critical_log_path = self.log_dir / "critical_errors.log"
             
-            with open(critical_log_path, 'a', encoding='utf-8') as f:
-                error_data = {
-                    "timestamp": error_event.timestamp.isoformat(),
-                    "id": error_event.id,
-                    "message": error_event.message,
-                    "exception_type": error_event.exception_type,
-                    "traceback": error_event.traceback,
-                    "context": {
-                        "user_id": error_event.user_id,
-                        "url": error_event.url,
-                        "method": error_event.method,
-                        "ip_address": error_event.ip_address
-                    }
+            error_data = {
+                "timestamp": error_event.timestamp.isoformat(),
+                "id": error_event.id,
+                "fingerprint": error_event.fingerprint,
+                "message": error_event.message,
+                "exception_type": error_event.exception_type,
+                "traceback": error_event.traceback,
+                "context": {
+                    "user_id": error_event.user_id,
+                    "url": error_event.url,
+                    "method": error_event.method,
+                    "ip_address": error_event.ip_address
                 }
-                f.write(json.dumps(error_data) + "\n")
+            }
+            self.sink.submit(critical_log_path, json.dumps(error_data))
             
             # TODO: Add alerting mechanisms (email, Slack, etc.)
             
@@ -273,24 +405,43 @@ class ErrorTracker:
         return recent_errors
     
     def get_error_statistics(self, hours: int = 24) -> Dict[str, Any]:
-        """Get error statistics for specified time period"""
-        recent_errors = self.get_recent_errors(hours)
+        """Get error statistics for specified time period.
+
+        Built from per-group hourly counters, so the cost grows with the
+        number of groups rather than events. Windows are hour-aligned and
+        capped at the tracker's retention.
+        """
+        since_hour = _hour(datetime.now()) - min(hours, self.retention_hours) + 1
         
         stats = {
-            "total_errors": len(recent_errors),
+            "total_errors": 0,
             "by_severity": defaultdict(int),
             "by_category": defaultdict(int),
             "by_exception_type": defaultdict(int),
             "top_errors": [],
+            "top_groups": [],
+            "distinct_groups": 0,
             "error_trend": [],
             "time_period_hours": hours
         }
+        hourly_counts = defaultdict(int)
+        group_counts = []
         
-        # Count by severity, category, and exception type
-        for error in recent_errors:
-            stats["by_severity"][error.severity.value] += 1
-            stats["by_category"][error.category.value] += 1
-            stats["by_exception_type"][error.exception_type] += 1
+        with self.lock:
+            for group in self.groups.values():
+                counts = group.counts_since(since_hour)
+                total = sum(counts.values())
+                if not total:
+                    continue
+                stats["total_errors"] += total
+                for severity, count in counts.items():
+                    stats["by_severity"][severity] += count
+                stats["by_category"][group.category.value] += total
+                stats["by_exception_type"][group.exception_type] += total
+                for hour, severities in group.hourly.items():
+                    if hour >= since_hour:
+                        hourly_counts[hour] += sum(severities.values())
+                group_counts.append((total, group))
         
         # Get top error types
         sorted_exceptions = sorted(
@@ -299,20 +450,31 @@ class ErrorTracker:
             reverse=True
         )
         stats["top_errors"] = sorted_exceptions[:10]
-        
-        # Calculate hourly error trend
-        hourly_counts = defaultdict(int)
-        for error in recent_errors:
-            hour_key = error.timestamp.strftime("%Y-%m-%d %H:00")
-            hourly_counts[hour_key] += 1
+        stats["distinct_groups"] = len(group_counts)
+        stats["top_groups"] = [
+            {**group.to_dict(), "count_in_period": total}
+            for total, group in sorted(group_counts, key=lambda item: item[0], reverse=True)[:10]
+        ]
         
         stats["error_trend"] = [
-            {"hour": hour, "count": count} 
+            {"hour": datetime.fromtimestamp(hour * 3600).strftime("%Y-%m-%d %H:00"), "count": count}
             for hour, count in sorted(hourly_counts.items())
         ]
         
         return stats
     
+    def get_error_groups(self, limit: int = 50, samples: bool = False) -> List[Dict[str, Any]]:
+        """Error groups with the most occurrences first"""
+        with self.lock:
+            groups = sorted(self.groups.values(), key=lambda g: g.count, reverse=True)[:limit]
+            return [group.to_dict(samples) for group in groups]
+    
+    def get_error_group(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """One error group with its sample events"""
+        with self.lock:
+            group = self.groups.get(fingerprint)
+            return group.to_dict(samples=True) if group is not None else None
+    
     def resolve_error(self, error_id: str, resolution_notes: str) -> bool:
         """Mark an error as resolved"""
         with self.lock:
@@ -367,6 +529,10 @@ class ErrorTracker:
             
             cleared_count = original_count - len(self.errors)
             
+            # Drop groups not seen since the cutoff
+            for fingerprint in [fp for fp, group in self.groups.items() if group.last_seen < cutoff_time]:
+                del self.groups[fingerprint]
+            
             if cleared_count > 0:
                 self.logger.info(f"🗑️ Cleared {cleared_count} old errors (older than {days} days)")
 
@@ -457,8 +623,9 @@ class ErrorTrackingMiddleware:
         
         return ErrorSeverity.MEDIUM
 
-# Global error tracker instance
-error_tracker = ErrorTracker()
+# Global error tracker instance; built on first use so importing this module
+# does not create log files or install root handlers
+error_tracker = LazyObject(ErrorTracker)
 error_middleware = ErrorTrackingMiddleware(error_tracker)
 
 def track_error(exception: Union[Exception, str], **kwargs) -> str:
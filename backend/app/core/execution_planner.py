@@ -0,0 +1,487 @@
+"""
+Scanner Execution Planner
+=========================
+
+Cost-budgeted, staged scanner selection shared by the orchestrators:
+- Per-scanner latency, success and yield statistics persisted in scanner_metrics
+- Scanners scored by expected findings per credit and per second
+- Cheap stages run first; pricier stages only run while the query is unanswered
+- Plan limits and a credit budget cap the whole plan
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple, TYPE_CHECKING
+
+from sqlalchemy import select
+
+from ..db.models import ScannerMetrics
+
+if TYPE_CHECKING:
+    from .sufficiency import SufficiencyEvaluator
+
+logger = logging.getLogger(__name__)
+
+# Per-plan caps. target_findings=None runs every stage that fits the budget.
+PLAN_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+    "free": {"max_scanners": 10, "max_stages": 2, "target_findings": 3},
+    "professional": {"max_scanners": 50, "max_stages": 3, "target_findings": 10},
+    "enterprise": {"max_scanners": 100, "max_stages": None, "target_findings": None},
+}
+
+# Upper credit cost of each stage; anything pricier goes in a final stage
+STAGE_COST_TIERS = (1, 3)
+
+# Priors for scanners with little history: optimistic enough to get tried
+PRIOR_RUNS = 5
+PRIOR_SUCCESS_RATE = 0.8
+PRIOR_FINDINGS = 1.0
+DEFAULT_LATENCY = 5.0
+LATENCY_SCALE = 10.0
+
+# Scanners failing this often (with enough history) are left out of plans
+MIN_SUCCESS_RATE = 0.2
+MIN_RUNS_FOR_EXCLUSION = 20
+
+# Keys in scanner output that describe the run rather than findings
+META_KEYS = frozenset({
+    "error", "status", "timestamp", "scanner", "query", "note", "mock",
+    "confidence", "execution_time", "source", "metadata",
+})
+
+
+def count_findings(data: Any) -> int:
+    """Rough number of findings in a scanner payload, used as its yield"""
+    if not data:
+        return 0
+    if not isinstance(data, dict):
+        return len(data) if isinstance(data, (list, tuple)) else 1
+    if data.get("error"):
+        return 0
+    entities = data.get("entities")
+    if isinstance(entities, list):
+        return len(entities)
+    return sum(1 for key, value in data.items() if key not in META_KEYS and value not in (None, "", [], {}))
+
+
+def scanner_name(scanner: Any) -> str:
+    return getattr(scanner, "name", None) or type(scanner).__name__
+
+
+def scanner_cost(scanner: Any) -> int:
+    """Credit cost of a registry scanner or an enterprise engine scanner"""
+    config = getattr(scanner, "config", None)
+    cost = getattr(config, "cost_credits", None) if config is not None else None
+    if cost is None:
+        cost = getattr(scanner, "cost_credits", 1)
+    return max(int(cost or 0), 0)
+
+
+@dataclass
+class ScannerStats:
+    """Running per-scanner statistics"""
+    name: str
+    runs: int = 0
+    successes: int = 0
+    findings: int = 0
+    avg_latency: float = 0.0
+
+    def record(self, success: bool, latency: float, findings: int):
+        self.runs += 1
+        self.successes += int(success)
+        self.findings += findings
+        self.avg_latency += (latency - self.avg_latency) / self.runs
+
+    def merge(self, other: "ScannerStats"):
+        runs = self.runs + other.runs
+        if runs:
+            self.avg_latency = (self.avg_latency * self.runs + other.avg_latency * other.runs) / runs
+        self.runs = runs
+        self.successes += other.successes
+        self.findings += other.findings
+
+    @property
+    def success_rate(self) -> float:
+        return (self.successes + PRIOR_SUCCESS_RATE * PRIOR_RUNS) / (self.runs + PRIOR_RUNS)
+
+    @property
+    def findings_per_success(self) -> float:
+        return (self.findings + PRIOR_FINDINGS * PRIOR_RUNS) / (self.successes + PRIOR_RUNS)
+
+    @property
+    def expected_findings(self) -> float:
+        return self.success_rate * self.findings_per_success
+
+    @property
+    def expected_latency(self) -> float:
+        return self.avg_latency if self.runs else DEFAULT_LATENCY
+
+    @property
+    def unreliable(self) -> bool:
+        return self.runs >= MIN_RUNS_FOR_EXCLUSION and self.successes / self.runs < MIN_SUCCESS_RATE
+
+
+class ScannerStatsStore:
+    """Scanner statistics loaded from and flushed to the scanner_metrics table.
+
+    Reads are served from memory; ``load()`` and ``flush()`` are blocking and
+    meant for ``asyncio.to_thread``.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from ..db.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self._stats: Dict[str, ScannerStats] = {}
+        self._pending: Dict[str, ScannerStats] = {}
+        self._lock = threading.Lock()
+        self._schema_checked = False
+        self.loaded_at: Optional[float] = None
+
+    def get(self, name: str) -> ScannerStats:
+        stats = self._stats.get(name)
+        return stats if stats is not None else ScannerStats(name)
+
+    def snapshot(self) -> Dict[str, ScannerStats]:
+        """Copies of the current per-scanner statistics"""
+        with self._lock:
+            return {name: replace(stats) for name, stats in self._stats.items()}
+
+    def record(self, name: str, success: bool, latency: float, findings: int):
+        with self._lock:
+            self._stats.setdefault(name, ScannerStats(name)).record(success, latency, findings)
+            self._pending.setdefault(name, ScannerStats(name)).record(success, latency, findings)
+
+    def load(self):
+        """Replace in-memory statistics with the persisted totals"""
+        with self.session_factory() as session:
+            if not self._schema_checked:
+                from ..db.database import upgrade_schema
+                upgrade_schema(session.get_bind())
+                self._schema_checked = True
+            rows = session.execute(select(ScannerMetrics)).scalars().all()
+        loaded: Dict[str, ScannerStats] = {}
+        for row in rows:
+            runs = row.requests_made or 0
+            stats = ScannerStats(
+                row.scanner_name,
+                runs=runs,
+                successes=row.successful_requests or 0,
+                findings=row.total_findings or 0,
+                avg_latency=row.average_response_time or 0.0,
+            )
+            if row.scanner_name in loaded:
+                loaded[row.scanner_name].merge(stats)
+            else:
+                loaded[row.scanner_name] = stats
+        with self._lock:
+            # Keep runs recorded since the last flush on top of persisted totals
+            for name, pending in self._pending.items():
+                loaded.setdefault(name, ScannerStats(name)).merge(pending)
+            self._stats = loaded
+        self.loaded_at = time.time()
+
+    def flush(self) -> int:
+        """Add pending runs to the persisted rows in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            with self.session_factory() as session:
+                rows = session.execute(
+                    select(ScannerMetrics)
+                    .where(ScannerMetrics.scanner_name.in_(list(pending)))
+                    .order_by(ScannerMetrics.id)
+                ).scalars().all()
+                existing: Dict[str, ScannerMetrics] = {}
+                for row in rows:
+                    existing.setdefault(row.scanner_name, row)
+
+                now = datetime.now(timezone.utc)
+                for name, delta in pending.items():
+                    row = existing.get(name)
+                    if row is None:
+                        row = ScannerMetrics(scanner_name=name, requests_made=0, successful_requests=0,
+                                             failed_requests=0, total_findings=0, average_response_time=0.0)
+                        session.add(row)
+                    runs = (row.requests_made or 0) + delta.runs
+                    row.average_response_time = (
+                        (row.average_response_time or 0.0) * (row.requests_made or 0)
+                        + delta.avg_latency * delta.runs
+                    ) / runs
+                    row.requests_made = runs
+                    row.successful_requests = (row.successful_requests or 0) + delta.successes
+                    row.failed_requests = (row.failed_requests or 0) + delta.runs - delta.successes
+                    row.total_findings = (row.total_findings or 0) + delta.findings
+                    row.last_used = now
+                session.commit()
+        except Exception:
+            with self._lock:
+                for name, delta in pending.items():
+                    self._pending.setdefault(name, ScannerStats(name)).merge(delta)
+            raise
+        return len(pending)
+
+
+@dataclass
+class PlannedScanner:
+    """A scanner with the estimates it was planned on"""
+    scanner: Any
+    name: str
+    cost: int
+    expected_findings: float
+    expected_latency: float
+    score: float
+    stage: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "cost": self.cost,
+            "expected_findings": round(self.expected_findings, 3),
+            "expected_latency": round(self.expected_latency, 3),
+            "score": round(self.score, 4),
+        }
+
+
+@dataclass
+class ExecutionPlan:
+    """Ordered stages of scanners for one query"""
+    user_plan: str
+    budget: Optional[int]
+    target_findings: Optional[int]
+    stages: List[List[PlannedScanner]] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)
+    # Filled in by ExecutionPlanner.execute
+    stages_run: int = 0
+    findings: int = 0
+    spent_credits: int = 0
+    saved_credits: int = 0
+
+    @property
+    def scanners(self) -> List[Any]:
+        return [planned.scanner for stage in self.stages for planned in stage]
+
+    @property
+    def estimated_cost(self) -> int:
+        return sum(planned.cost for stage in self.stages for planned in stage)
+
+    @property
+    def estimated_latency(self) -> float:
+        # Stages run one after another, scanners within a stage concurrently
+        return sum(max(p.expected_latency for p in stage) for stage in self.stages if stage)
+
+    def is_answered(self, findings: int) -> bool:
+        return self.target_findings is not None and findings >= self.target_findings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_plan": self.user_plan,
+            "budget": self.budget,
+            "target_findings": self.target_findings,
+            "stages": [[planned.to_dict() for planned in stage] for stage in self.stages],
+            "skipped": dict(self.skipped),
+            "estimated_cost": self.estimated_cost,
+            "estimated_latency": round(self.estimated_latency, 3),
+            "stages_run": self.stages_run,
+            "findings": self.findings,
+            "spent_credits": self.spent_credits,
+            "saved_credits": self.saved_credits,
+        }
+
+
+class ExecutionPlanner:
+    """Builds and runs staged, budgeted scanner plans"""
+
+    def __init__(self, stats: Optional[ScannerStatsStore] = None,
+                 plan_limits: Optional[Dict[str, Dict[str, Optional[int]]]] = None,
+                 refresh_interval: float = 300.0):
+        self.stats = stats or ScannerStatsStore()
+        self.plan_limits = plan_limits or PLAN_LIMITS
+        self.refresh_interval = refresh_interval
+
+    def limits_for(self, user_plan: Optional[str]) -> Dict[str, Optional[int]]:
+        return self.plan_limits.get(str(user_plan or "free").lower(), self.plan_limits["free"])
+
+    def plan(self, scanners: List[Any], user_plan: Optional[str] = "free",
+             budget: Optional[int] = None) -> ExecutionPlan:
+        """Order candidate scanners into cost stages within plan limits and budget"""
+        limits = self.limits_for(user_plan)
+        plan = ExecutionPlan(
+            user_plan=str(user_plan or "free").lower(),
+            budget=budget,
+            target_findings=limits.get("target_findings"),
+        )
+
+        candidates: List[PlannedScanner] = []
+        seen = set()
+        for scanner in scanners:
+            name = scanner_name(scanner)
+            if name in seen:
+                continue
+            seen.add(name)
+            stats = self.stats.get(name)
+            if stats.unreliable:
+                plan.skipped[name] = "unreliable"
+                continue
+            cost = scanner_cost(scanner)
+            latency = stats.expected_latency
+            score = stats.expected_findings / (max(cost, 1) * (1 + latency / LATENCY_SCALE))
+            candidates.append(PlannedScanner(scanner, name, cost, stats.expected_findings, latency, score))
+
+        tiers: Dict[int, List[PlannedScanner]] = {}
+        for planned in candidates:
+            tier = next((i for i, ceiling in enumerate(STAGE_COST_TIERS) if planned.cost <= ceiling),
+                        len(STAGE_COST_TIERS))
+            tiers.setdefault(tier, []).append(planned)
+
+        max_scanners = limits.get("max_scanners")
+        max_stages = limits.get("max_stages")
+        remaining = budget
+        selected = 0
+        for tier in sorted(tiers):
+            stage = []
+            for planned in sorted(tiers[tier], key=lambda p: p.score, reverse=True):
+                if max_stages is not None and len(plan.stages) >= max_stages:
+                    plan.skipped[planned.name] = "plan_stage_limit"
+                elif max_scanners is not None and selected >= max_scanners:
+                    plan.skipped[planned.name] = "plan_scanner_limit"
+                elif remaining is not None and planned.cost > remaining:
+                    plan.skipped[planned.name] = "over_budget"
+                else:
+                    planned.stage = len(plan.stages)
+                    stage.append(planned)
+                    selected += 1
+                    if remaining is not None:
+                        remaining -= planned.cost
+            if stage:
+                plan.stages.append(stage)
+        return plan
+
+    async def refresh(self, force: bool = False):
+        """Reload persisted statistics when they are older than the refresh interval"""
+        loaded_at = self.stats.loaded_at
+        if force or loaded_at is None or time.time() - loaded_at > self.refresh_interval:
+            try:
+                await asyncio.to_thread(self.stats.load)
+            except Exception as e:
+                logger.warning(f"Could not load scanner statistics: {e}")
+                self.stats.loaded_at = time.time()
+
+    async def flush(self):
+        """Persist statistics recorded since the last flush"""
+        try:
+            await asyncio.to_thread(self.stats.flush)
+        except Exception as e:
+            logger.warning(f"Could not persist scanner statistics: {e}")
+
+    async def execute(
+        self,
+        plan: ExecutionPlan,
+        run_scanner: Callable[[Any], Awaitable[Any]],
+        describe: Callable[[Any], Tuple[bool, float, int]],
+        sufficiency: Optional["SufficiencyEvaluator"] = None,
+        payload: Optional[Callable[[Any], Any]] = None,
+    ) -> List[Tuple[PlannedScanner, Any]]:
+        """Run the plan stage by stage, stopping once the query is answered.
+
+        ``run_scanner`` executes one scanner; ``describe`` turns its outcome
+        into (success, latency seconds, findings). Exceptions raised by a
+        scanner are returned in place of its outcome. With a ``sufficiency``
+        evaluator, each outcome's ``payload`` is scored as it arrives and
+        scanners still running are cancelled once every target is met.
+        """
+        outcomes: List[Tuple[PlannedScanner, Any]] = []
+        for index, stage in enumerate(plan.stages):
+            done = sufficiency is not None and sufficiency.is_sufficient()
+            if done or (index and plan.is_answered(plan.findings)):
+                self._skip_stages(plan, plan.stages[index:], "sufficient" if done else "answered", sufficiency)
+                break
+
+            plan.stages_run = index + 1
+            started = time.time()
+            elapsed: Dict[str, float] = {}
+            tasks = {asyncio.ensure_future(self._timed(run_scanner, p, elapsed)): p for p in stage}
+            pending = set(tasks)
+            try:
+                while pending:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in sorted(finished, key=lambda t: stage.index(tasks[t])):
+                        planned = tasks[task]
+                        result = task.exception() or task.result()
+                        if isinstance(result, Exception):
+                            # Charge failures the time they took, so they are not planned as cheap
+                            success, latency, findings = False, elapsed.get(planned.name, 0.0), 0
+                        else:
+                            success, latency, findings = describe(result)
+                        self.stats.record(planned.name, success, latency, findings)
+                        plan.spent_credits += planned.cost
+                        if success:
+                            plan.findings += findings
+                            if sufficiency is not None and payload is not None:
+                                sufficiency.add_result(planned.name, payload(result))
+                        outcomes.append((planned, result))
+
+                    if pending and sufficiency is not None and sufficiency.is_sufficient():
+                        stage_elapsed = time.time() - started
+                        for task in pending:
+                            task.cancel()
+                            self._record_saved(plan, tasks[task], "cancelled", sufficiency,
+                                               tasks[task].expected_latency - stage_elapsed)
+                        await asyncio.gather(*pending, return_exceptions=True)
+                        pending = set()
+            finally:
+                # Cancelled or failed ourselves: stop scanners still spending requests and credits
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+        return outcomes
+
+    @staticmethod
+    async def _timed(run_scanner: Callable[[Any], Awaitable[Any]], planned: PlannedScanner,
+                     elapsed: Dict[str, float]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await run_scanner(planned.scanner)
+        finally:
+            elapsed[planned.name] = time.perf_counter() - started
+
+    @staticmethod
+    def _skip_stages(plan: ExecutionPlan, stages: List[List[PlannedScanner]], reason: str,
+                     sufficiency: Optional["SufficiencyEvaluator"]):
+        for stage in stages:
+            for planned in stage:
+                ExecutionPlanner._record_saved(plan, planned, reason, sufficiency, planned.expected_latency)
+
+    @staticmethod
+    def _record_saved(plan: ExecutionPlan, planned: PlannedScanner, reason: str,
+                      sufficiency: Optional["SufficiencyEvaluator"], seconds: float):
+        # plan.saved_credits is the one credit count; the evaluator mirrors each entry of it
+        plan.skipped[planned.name] = reason
+        plan.saved_credits += planned.cost
+        if sufficiency is None:
+            return
+        if reason == "cancelled":
+            sufficiency.record_cancelled(planned.name, planned.cost, seconds)
+        else:
+            sufficiency.record_skipped(planned.name, planned.cost, seconds)
+
+
+# Shared planner
+_execution_planner: Optional[ExecutionPlanner] = None
+
+
+def get_execution_planner() -> ExecutionPlanner:
+    """Get the shared execution planner"""
+    global _execution_planner
+    if _execution_planner is None:
+        _execution_planner = ExecutionPlanner()
+    return _execution_planner
@@ -0,0 +1,407 @@
+"""
+Perceptual Hash Similarity Index
+================================
+
+Local near-duplicate index for image intelligence:
+- 64-bit perceptual hashes stored in a compact NumPy ``uint64`` array
+- Hamming-radius queries through multi-index hashing (MIH)
+- Append buffer for cheap inserts, merged into the sorted index in bulk
+- Persistence to ``.npy`` files that are re-opened memory-mapped
+- phash/dhash/ahash computed in the shared compute service process pool
+
+Multi-index hashing splits every hash into ``num_chunks`` disjoint bit
+ranges. If two hashes differ in at most ``r`` bits, at least one chunk
+differs in at most ``r // num_chunks`` bits (pigeonhole), so candidates are
+found by exact lookups of the few chunk values within that small radius in
+per-chunk sorted arrays, then verified with a vectorized popcount.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import threading
+from itertools import combinations
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .compute_service import get_compute_service
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+# Popcount lookup for NumPy builds without ``np.bitwise_count`` (< 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distance(hashes: np.ndarray, query: int) -> np.ndarray:
+    """Vectorized Hamming distance between a uint64 array and one hash"""
+    xor = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(query))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).astype(np.uint8)
+    return _POPCOUNT_TABLE[xor.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint8)
+
+
+class PerceptualHashIndex:
+    """Multi-index hashing over 64-bit perceptual hashes"""
+
+    def __init__(self, num_chunks: int = 4, merge_threshold: int = 65536,
+                 storage_path: Optional[str] = None):
+        if HASH_BITS % num_chunks != 0 or HASH_BITS // num_chunks > 32:
+            raise ValueError(f"num_chunks must divide {HASH_BITS} into chunks of at most 32 bits")
+
+        self.num_chunks = num_chunks
+        self.chunk_bits = HASH_BITS // num_chunks
+        self.merge_threshold = merge_threshold
+        self.storage_path = storage_path
+
+        self._chunk_mask = np.uint64((1 << self.chunk_bits) - 1)
+        self._chunk_dtype = np.uint16 if self.chunk_bits <= 16 else np.uint32
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()
+
+        # Sealed (indexed) segment
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._chunk_values: List[np.ndarray] = [np.empty(0, dtype=self._chunk_dtype) for _ in range(num_chunks)]
+        self._chunk_order: List[np.ndarray] = [np.empty(0, dtype=np.uint32) for _ in range(num_chunks)]
+
+        # Append buffer, scanned linearly until merged
+        self._pending: List[int] = []
+
+        self.keys: List[str] = []
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self._key_positions: Dict[str, int] = {}
+
+        self._neighbor_masks: Dict[int, np.ndarray] = {}
+
+        if storage_path and os.path.exists(os.path.join(storage_path, "hashes.npy")):
+            self.load(storage_path)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # ------------------------------------------------------------------ inserts
+
+    def add(self, key: str, phash: int, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Index one hash; returns False when the key is already present"""
+        return self.add_batch([key], [phash], [metadata] if metadata else None) == 1
+
+    def add_batch(self, keys: Sequence[str], hashes: Sequence[int],
+                  metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+                  merge: bool = True) -> int:
+        """Index many hashes at once; returns the number of new entries
+
+        With ``merge=False`` a full append buffer is left for the caller to
+        fold in (see ``add_batch_async``).
+        """
+        if len(keys) != len(hashes):
+            raise ValueError("keys and hashes must have the same length")
+
+        added = 0
+        with self._lock:
+            for i, (key, value) in enumerate(zip(keys, hashes)):
+                entry_metadata = metadata[i] if metadata else None
+                if key in self._key_positions:
+                    if entry_metadata:
+                        self.metadata.setdefault(key, {}).update(entry_metadata)
+                    continue
+                self._key_positions[key] = len(self.keys)
+                self.keys.append(key)
+                self._pending.append(int(value) & 0xFFFFFFFFFFFFFFFF)
+                if entry_metadata:
+                    self.metadata[key] = dict(entry_metadata)
+                added += 1
+
+        if merge and self.needs_merge:
+            self.merge()
+        return added
+
+    async def add_async(self, key: str, phash: int, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """``add`` for event-loop callers; merging runs in a worker thread"""
+        return await self.add_batch_async([key], [phash], [metadata] if metadata else None) == 1
+
+    async def add_batch_async(self, keys: Sequence[str], hashes: Sequence[int],
+                              metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> int:
+        """``add_batch`` for event-loop callers; merging runs in a worker thread"""
+        added = self.add_batch(keys, hashes, metadata, merge=False)
+        if self.needs_merge:
+            await self.merge_async()
+        return added
+
+    @property
+    def needs_merge(self) -> bool:
+        return len(self._pending) >= self.merge_threshold
+
+    def merge(self):
+        """Fold the append buffer into the sorted multi-index
+
+        The sort runs without holding the lock, so queries keep being served
+        from the current segment; entries appended meanwhile stay pending.
+        """
+        with self._merge_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                merged_count = len(self._pending)
+                pending = np.fromiter(self._pending, dtype=np.uint64, count=merged_count)
+                sealed = self._hashes
+
+            hashes = np.concatenate([np.asarray(sealed), pending])
+            position_dtype = np.uint32 if len(hashes) < 2 ** 32 else np.uint64
+
+            chunk_values, chunk_order = [], []
+            for chunk in range(self.num_chunks):
+                values = self._extract_chunk(hashes, chunk)
+                order = np.argsort(values, kind="stable").astype(position_dtype)
+                chunk_values.append(values[order])
+                chunk_order.append(order)
+
+            with self._lock:
+                self._hashes = hashes
+                self._chunk_values = chunk_values
+                self._chunk_order = chunk_order
+                self._pending = self._pending[merged_count:]
+
+    async def merge_async(self):
+        """Run ``merge`` in a worker thread, off the event loop"""
+        await asyncio.to_thread(self.merge)
+
+    # ------------------------------------------------------------------ queries
+
+    def query(self, phash: int, radius: int = 8, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return indexed entries within ``radius`` bits, nearest first"""
+        with self._lock:
+            positions, distances = self._query_positions(int(phash) & 0xFFFFFFFFFFFFFFFF, radius)
+
+        order = np.lexsort((positions, distances))
+        if limit is not None:
+            order = order[:limit]
+
+        matches = []
+        for idx in order:
+            key = self.keys[int(positions[idx])]
+            distance = int(distances[idx])
+            matches.append({
+                "key": key,
+                "distance": distance,
+                "similarity": 1.0 - distance / HASH_BITS,
+                "metadata": self.metadata.get(key, {})
+            })
+        return matches
+
+    def query_batch(self, hashes: Sequence[int], radius: int = 8,
+                    limit: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """Run ``query`` for each hash"""
+        return [self.query(value, radius, limit) for value in hashes]
+
+    def _query_positions(self, query: int, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not 0 <= radius <= HASH_BITS:
+            raise ValueError(f"radius must be between 0 and {HASH_BITS}")
+
+        candidate_sets = []
+        sealed_count = len(self._hashes)
+
+        if sealed_count:
+            sub_radius = radius // self.num_chunks
+            masks = self._get_neighbor_masks(sub_radius)
+            for chunk in range(self.num_chunks):
+                chunk_value = (query >> (chunk * self.chunk_bits)) & int(self._chunk_mask)
+                probes = np.bitwise_xor(masks, chunk_value).astype(self._chunk_dtype)
+                values = self._chunk_values[chunk]
+                starts = np.searchsorted(values, probes, side="left")
+                ends = np.searchsorted(values, probes, side="right")
+                lengths = ends - starts
+                hit = lengths > 0
+                if not hit.any():
+                    continue
+                starts, lengths = starts[hit], lengths[hit]
+                # Expand [start, end) ranges into one flat index array
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+                candidate_sets.append(self._chunk_order[chunk][offsets])
+
+        if candidate_sets:
+            candidates = np.unique(np.concatenate(candidate_sets).astype(np.int64))
+            distances = hamming_distance(self._hashes[candidates], query)
+            keep = distances <= radius
+            positions = candidates[keep]
+            distances = distances[keep]
+        else:
+            positions = np.empty(0, dtype=np.int64)
+            distances = np.empty(0, dtype=np.uint8)
+
+        if self._pending:
+            pending = np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending))
+            pending_distances = hamming_distance(pending, query)
+            keep = np.nonzero(pending_distances <= radius)[0]
+            positions = np.concatenate([positions, keep.astype(np.int64) + sealed_count])
+            distances = np.concatenate([distances, pending_distances[keep]])
+
+        return positions, distances
+
+    def _get_neighbor_masks(self, sub_radius: int) -> np.ndarray:
+        """XOR masks enumerating every chunk value within ``sub_radius`` bits"""
+        sub_radius = min(sub_radius, self.chunk_bits)
+        if sub_radius not in self._neighbor_masks:
+            masks = [0]
+            for flips in range(1, sub_radius + 1):
+                for bits in combinations(range(self.chunk_bits), flips):
+                    mask = 0
+                    for bit in bits:
+                        mask |= 1 << bit
+                    masks.append(mask)
+            self._neighbor_masks[sub_radius] = np.array(masks, dtype=np.uint64)
+        return self._neighbor_masks[sub_radius]
+
+    def _extract_chunk(self, hashes: np.ndarray, chunk: int) -> np.ndarray:
+        shift = np.uint64(chunk * self.chunk_bits)
+        return (np.right_shift(hashes, shift) & self._chunk_mask).astype(self._chunk_dtype)
+
+    # -------------------------------------------------------------- persistence
+
+    def save(self, path: Optional[str] = None):
+        """Write the index to ``path`` as .npy arrays plus a JSON key file
+
+        Every file is written to a temporary name and renamed into place, so
+        saving over the directory this index is memory-mapped from is safe.
+        """
+        path = path or self.storage_path
+        if not path:
+            raise ValueError("No storage path configured for image similarity index")
+
+        self.merge()
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            arrays = {"hashes.npy": self._hashes}
+            for chunk in range(self.num_chunks):
+                arrays[f"chunk_{chunk}_values.npy"] = self._chunk_values[chunk]
+                arrays[f"chunk_{chunk}_order.npy"] = self._chunk_order[chunk]
+            for name, array in arrays.items():
+                tmp_path = os.path.join(path, name + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, np.asarray(array))
+                os.replace(tmp_path, os.path.join(path, name))
+
+            manifest = {
+                "num_chunks": self.num_chunks,
+                "keys": self.keys[:len(self._hashes)],
+                "metadata": self.metadata
+            }
+            tmp_path = os.path.join(path, "manifest.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, os.path.join(path, "manifest.json"))
+
+        logger.info(f"Saved image similarity index with {len(manifest['keys'])} hashes to {path}")
+
+    async def save_async(self, path: Optional[str] = None):
+        """Run ``save`` in a worker thread, off the event loop"""
+        await asyncio.to_thread(self.save, path)
+
+    def load(self, path: str, mmap: bool = True):
+        """Load an index written by ``save``; arrays are memory-mapped by default"""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        if manifest["num_chunks"] != self.num_chunks:
+            raise ValueError(f"Index at {path} uses {manifest['num_chunks']} chunks, expected {self.num_chunks}")
+
+        with self._lock:
+            self._hashes = np.load(os.path.join(path, "hashes.npy"), mmap_mode=mmap_mode)
+            self._chunk_values = [
+                np.load(os.path.join(path, f"chunk_{chunk}_values.npy"), mmap_mode=mmap_mode)
+                for chunk in range(self.num_chunks)
+            ]
+            self._chunk_order = [
+                np.load(os.path.join(path, f"chunk_{chunk}_order.npy"), mmap_mode=mmap_mode)
+                for chunk in range(self.num_chunks)
+            ]
+            self._pending = []
+            self.keys = manifest["keys"]
+            self.metadata = manifest.get("metadata", {})
+            self._key_positions = {key: i for i, key in enumerate(self.keys)}
+            self.storage_path = path
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index size and memory footprint"""
+        with self._lock:
+            indexed_bytes = int(np.asarray(self._hashes).nbytes) + sum(
+                int(values.nbytes) + int(order.nbytes)
+                for values, order in zip(self._chunk_values, self._chunk_order)
+            )
+            return {
+                "total_hashes": len(self.keys),
+                "indexed_hashes": len(self._hashes),
+                "pending_hashes": len(self._pending),
+                "num_chunks": self.num_chunks,
+                "index_bytes": indexed_bytes,
+                "memory_mapped": isinstance(self._hashes, np.memmap),
+                "storage_path": self.storage_path
+            }
+
+
+def compute_perceptual_hashes(media_data: Union[bytes, str]) -> Dict[str, int]:
+    """Compute 64-bit phash/dhash/ahash for image bytes or a file path (runs in worker processes)"""
+    from PIL import Image
+    import imagehash
+
+    image = Image.open(io.BytesIO(media_data) if isinstance(media_data, bytes) else media_data)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    return {
+        'phash': int(str(imagehash.phash(image)), 16),
+        'dhash': int(str(imagehash.dhash(image)), 16),
+        'ahash': int(str(imagehash.average_hash(image)), 16)
+    }
+
+
+async def compute_perceptual_hashes_async(media_data: Union[bytes, str]) -> Dict[str, int]:
+    """Compute perceptual hashes on the shared process pool"""
+    return await get_compute_service().run_cpu("image_hash", compute_perceptual_hashes, media_data)
+
+
+async def compute_perceptual_hashes_batch(media_items: Sequence[bytes]) -> List[Optional[Dict[str, int]]]:
+    """Hash many images concurrently; failed items come back as None"""
+    results = await asyncio.gather(
+        *(compute_perceptual_hashes_async(item) for item in media_items),
+        return_exceptions=True
+    )
+    hashes = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Perceptual hashing failed: {str(result)}")
+            hashes.append(None)
+        else:
+            hashes.append(result)
+    return hashes
+
+
+def format_hash(value: int) -> str:
+    """Render a 64-bit hash the way imagehash prints it"""
+    return f"{value:016x}"
+
+
+# Global index instance (created on first use)
+_image_similarity_index: Optional[PerceptualHashIndex] = None
+
+
+def get_image_similarity_index() -> PerceptualHashIndex:
+    """Process-wide image similarity index"""
+    global _image_similarity_index
+    if _image_similarity_index is None:
+        _image_similarity_index = PerceptualHashIndex(
+            storage_path=os.getenv("IMAGE_SIMILARITY_INDEX_PATH")
+        )
+    return _image_similarity_index
+
+
+async def save_image_similarity_index():
+    """Persist the process-wide index on shutdown when a storage path is set"""
+    index = _image_similarity_index
+    if index is None or not index.storage_path:
+        return
+    await index.save_async()
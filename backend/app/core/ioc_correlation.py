@@ -0,0 +1,361 @@
+"""
+Scalable IOC Correlation
+========================
+
+Candidate-driven clustering for threat indicators:
+- Compact per-IOC feature sets (frozen source/tag sets, integer timestamps)
+- Exact inverted index on tags and week-blocked sources for small and medium feeds
+- MinHash LSH over sources ∪ tags with time-bucket blocking for large feeds
+- Union-find cluster bookkeeping
+
+The pairwise similarity is the one used by ``ThreatCorrelationEngine``:
+0.3 * source Jaccard + 0.2 * tag Jaccard + 0.2 * temporal proximity
++ 0.3 * threat level agreement (1.0 or 0.5). Without any shared source or
+tag the score is at most 0.5, so with the default 0.6 threshold only IOCs
+sharing a source or tag can cluster, and pairs sharing only sources must
+also be within the 7-day temporal window. The inverted index therefore finds
+exactly the clusters the original all-pairs scan would, and clusters come
+out identical on inputs up to ``exact_limit``.
+
+Above ``exact_limit`` candidates come from LSH buckets keyed by
+(band, band signature, time bucket). Each IOC probes its own and the
+neighbouring time buckets, so pairs further apart than one bucket and pairs
+with low source/tag overlap may be missed; the result is an approximation
+of the exact clustering in exchange for near-linear ingestion.
+"""
+
+import hashlib
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_AWARE_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+_TEMPORAL_WINDOW_SECONDS = 7 * 24 * 3600
+
+
+@dataclass
+class IOCFeatures:
+    """Precomputed correlation features for one IOC"""
+    sources: frozenset
+    tags: frozenset
+    tokens: frozenset
+    timestamp_us: int
+    threat_level: Any
+
+
+class UnionFind:
+    """Disjoint sets over cluster ids; the smallest id is always the root"""
+
+    def __init__(self):
+        self.parent: List[int] = []
+
+    def add(self) -> int:
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        return root_a
+
+
+class MinHashLSH:
+    """MinHash signatures and banding over token sets"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 32, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._token_hashes: Dict[str, np.ndarray] = {}
+        self._band_cache: Dict[frozenset, Tuple[bytes, ...]] = {}
+
+    def _token_hash(self, token: str) -> np.ndarray:
+        hashed = self._token_hashes.get(token)
+        if hashed is None:
+            x = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little') % _MERSENNE_PRIME
+            hashed = (self._a * np.uint64(x) + self._b) % np.uint64(_MERSENNE_PRIME)
+            self._token_hashes[token] = hashed
+        return hashed
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        """MinHash signature of a non-empty token set"""
+        return np.minimum.reduce([self._token_hash(token) for token in tokens])
+
+    def band_keys(self, tokens: frozenset) -> Tuple[bytes, ...]:
+        """One bucket key per band; cached per distinct token set"""
+        keys = self._band_cache.get(tokens)
+        if keys is None:
+            signature = self.signature(sorted(tokens)).astype(np.uint32)
+            keys = tuple(
+                signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)
+            )
+            if len(self._band_cache) < 1_000_000:
+                self._band_cache[tokens] = keys
+        return keys
+
+
+class ScalableThreatCorrelator:
+    """Cluster IOCs using candidate lookups instead of all-pairs comparison"""
+
+    def __init__(self, similarity_threshold: float = 0.6, exact_limit: int = 20000,
+                 num_perm: int = 32, lsh_bands: int = 16,
+                 time_bucket_seconds: int = _TEMPORAL_WINDOW_SECONDS,
+                 max_bucket_members: int = 4, transitive: bool = False):
+        self.similarity_threshold = similarity_threshold
+        self.exact_limit = exact_limit
+        self.time_bucket_us = time_bucket_seconds * 1_000_000
+        self.max_bucket_members = max_bucket_members
+        # Greedy first-match assignment reproduces ThreatCorrelationEngine;
+        # transitive mode also merges every cluster an IOC bridges.
+        self.transitive = transitive
+        self.lsh = MinHashLSH(num_perm=num_perm, bands=lsh_bands)
+        self.last_stats: Dict[str, Any] = {}
+
+    def extract_features(self, ioc) -> IOCFeatures:
+        """Build the compact feature set for an IOC"""
+        sources = frozenset(ioc.sources)
+        tags = frozenset(ioc.tags)
+        tokens = frozenset([f"s:{source}" for source in sources] + [f"t:{tag}" for tag in tags])
+        epoch = _NAIVE_EPOCH if ioc.first_seen.tzinfo is None else _AWARE_EPOCH
+        return IOCFeatures(
+            sources=sources,
+            tags=tags,
+            tokens=tokens,
+            timestamp_us=(ioc.first_seen - epoch) // _ONE_MICROSECOND,
+            threat_level=ioc.threat_level
+        )
+
+    @staticmethod
+    def similarity(f1: IOCFeatures, f2: IOCFeatures) -> float:
+        """Same score as ThreatCorrelationEngine._calculate_similarity"""
+        common_sources = len(f1.sources & f2.sources)
+        source_similarity = common_sources / max(len(f1.sources) + len(f2.sources) - common_sources, 1)
+        common_tags = len(f1.tags & f2.tags)
+        tag_similarity = common_tags / max(len(f1.tags) + len(f2.tags) - common_tags, 1)
+        time_diff = abs(f1.timestamp_us - f2.timestamp_us) / 10**6
+        temporal_similarity = max(0, 1 - (time_diff / _TEMPORAL_WINDOW_SECONDS))
+        level_similarity = 1.0 if f1.threat_level == f2.threat_level else 0.5
+        return sum([
+            source_similarity * 0.3,
+            tag_similarity * 0.2,
+            temporal_similarity * 0.2,
+            level_similarity * 0.3
+        ])
+
+    def correlate(self, iocs: Sequence[Any]) -> Dict[str, List[Any]]:
+        """Group IOCs into clusters named ``cluster_<n>`` in creation order"""
+        start_time = time.time()
+        features = [self.extract_features(ioc) for ioc in iocs]
+        use_lsh = len(features) > self.exact_limit
+        # Below 0.5 IOCs without any shared source/tag may still cluster
+        overlap_required = self.similarity_threshold >= 0.5
+        threshold = self.similarity_threshold
+        similarity = self.similarity
+
+        clusters = UnionFind()
+        assignment: List[int] = []
+        cluster_members: List[List[int]] = []
+        index: Dict[Any, Dict[int, Any]] = {}
+        comparisons = 0
+
+        for i, feature in enumerate(features):
+            insert_keys, probe_keys = self._index_keys(feature, use_lsh)
+
+            if overlap_required:
+                candidates = self._candidate_clusters(index, probe_keys, clusters if self.transitive else None)
+            else:
+                candidates = (
+                    (root, [cluster_members[root]])
+                    for root in range(len(cluster_members)) if clusters.find(root) == root
+                )
+
+            matched: List[int] = []
+            for root, member_lists in candidates:
+                seen = set()
+                for members in member_lists:
+                    for member in members:
+                        if member in seen:
+                            continue
+                        seen.add(member)
+                        comparisons += 1
+                        if similarity(feature, features[member]) > threshold:
+                            matched.append(root)
+                            break
+                    if matched and matched[-1] == root:
+                        break
+                if matched and not self.transitive:
+                    break
+
+            if matched:
+                cluster_id = matched[0]
+                for other in matched[1:]:
+                    cluster_id = clusters.union(cluster_id, other)
+            else:
+                cluster_id = clusters.add()
+                cluster_members.append([])
+            assignment.append(cluster_id)
+            cluster_members[cluster_id].append(i)
+
+            for key in insert_keys:
+                postings = index.get(key)
+                if postings is None:
+                    postings = index[key] = {}
+                members = postings.get(cluster_id)
+                if members is None:
+                    members = postings[cluster_id] = deque(maxlen=self.max_bucket_members) if use_lsh else []
+                members.append(i)
+
+        grouped: Dict[int, List[Any]] = {}
+        for i, cluster_id in enumerate(assignment):
+            grouped.setdefault(clusters.find(cluster_id), []).append(iocs[i])
+
+        result = {
+            f"cluster_{position + 1}": grouped[root]
+            for position, root in enumerate(sorted(grouped))
+        }
+
+        self.last_stats = {
+            'total_iocs': len(features),
+            'total_clusters': len(result),
+            'mode': 'lsh' if use_lsh else 'exact',
+            'similarity_comparisons': comparisons,
+            'processing_time': time.time() - start_time
+        }
+        return result
+
+    def _index_keys(self, feature: IOCFeatures, use_lsh: bool) -> Tuple[List[Any], List[Any]]:
+        """Keys an IOC is stored under and keys it probes for candidates"""
+        if use_lsh and feature.tokens:
+            bucket = feature.timestamp_us // self.time_bucket_us
+            band_keys = self.lsh.band_keys(feature.tokens)
+            insert_keys = [(band, key, bucket) for band, key in enumerate(band_keys)]
+            probe_keys = [
+                (band, key, bucket + offset)
+                for band, key in enumerate(band_keys)
+                for offset in (-1, 0, 1)
+            ]
+            return insert_keys, probe_keys
+
+        tag_keys = [('t', tag) for tag in feature.tags]
+        if self.similarity_threshold < 0.6:
+            source_keys = [('s', source) for source in feature.sources]
+            return tag_keys + source_keys, tag_keys + source_keys
+
+        # At >= 0.6 a pair sharing no tag scores at most 0.6 unless it is also
+        # inside the 7-day temporal window, so sources are blocked by week.
+        bucket = feature.timestamp_us // (_TEMPORAL_WINDOW_SECONDS * 1_000_000)
+        insert_keys = tag_keys + [('s', source, bucket) for source in feature.sources]
+        probe_keys = tag_keys + [
+            ('s', source, bucket + offset)
+            for source in feature.sources
+            for offset in (-1, 0, 1)
+        ]
+        return insert_keys, probe_keys
+
+    @staticmethod
+    def _candidate_clusters(index: Dict[Any, Dict[int, Any]], keys: Iterable[Any],
+                            clusters: Optional[UnionFind] = None) -> Iterator[Tuple[int, List[Any]]]:
+        """Yield (cluster root, member lists) sharing a key with the IOC, oldest cluster first"""
+        postings_list = [postings for postings in map(index.get, keys) if postings]
+        if not postings_list:
+            return
+        cluster_ids = set().union(*postings_list)
+
+        if clusters is None:
+            for cluster_id in sorted(cluster_ids):
+                yield cluster_id, [postings[cluster_id] for postings in postings_list if cluster_id in postings]
+            return
+
+        grouped: Dict[int, List[int]] = {}
+        for cluster_id in cluster_ids:
+            grouped.setdefault(clusters.find(cluster_id), []).append(cluster_id)
+        for root in sorted(grouped):
+            yield root, [
+                postings[cluster_id]
+                for cluster_id in grouped[root]
+                for postings in postings_list if cluster_id in postings
+            ]
+
+
+def generate_synthetic_feed(size: int, seed: int = 42) -> List[Any]:
+    """Deterministic synthetic IOC feed with campaign-like structure"""
+    from .threat_intelligence import ThreatIOC, IOCType, ThreatLevel
+
+    rng = random.Random(seed)
+    sources = ['threatcrowd', 'virustotal', 'malware_bazaar', 'otx', 'misp'] + [f'feed_{i}' for i in range(15)]
+    campaigns = max(size // 50, 1)
+    levels = list(ThreatLevel)
+    ioc_types = list(IOCType)
+    base_time = datetime(2024, 1, 1)
+
+    iocs = []
+    for i in range(size):
+        campaign = rng.randrange(campaigns)
+        campaign_rng = random.Random(campaign)
+        campaign_tags = [f'campaign_{campaign}', f'family_{campaign % 97}']
+        campaign_sources = campaign_rng.sample(sources, 2)
+        first_seen = base_time + timedelta(
+            days=campaign_rng.randrange(365), seconds=rng.randrange(3 * 24 * 3600)
+        )
+        iocs.append(ThreatIOC(
+            value=f'ioc-{i}.example',
+            ioc_type=rng.choice(ioc_types),
+            threat_level=levels[campaign % len(levels)] if rng.random() < 0.8 else rng.choice(levels),
+            confidence=rng.random(),
+            first_seen=first_seen,
+            last_seen=first_seen,
+            sources=campaign_sources[:rng.randint(1, 2)] + ([rng.choice(sources)] if rng.random() < 0.2 else []),
+            tags=campaign_tags[:rng.randint(1, 2)] + ([f'tag_{rng.randrange(500)}'] if rng.random() < 0.3 else [])
+        ))
+    return iocs
+
+
+def benchmark_correlation(sizes: Sequence[int] = (10_000, 100_000, 1_000_000),
+                          correlator: Optional[ScalableThreatCorrelator] = None) -> List[Dict[str, Any]]:
+    """Time correlation over synthetic feeds of the given sizes"""
+    correlator = correlator or ScalableThreatCorrelator()
+    results = []
+    for size in sizes:
+        feed = generate_synthetic_feed(size)
+        correlator.correlate(feed)
+        stats = dict(correlator.last_stats)
+        stats['iocs_per_second'] = size / max(stats['processing_time'], 1e-9)
+        results.append(stats)
+        logger.info(f"Correlated {size} IOCs into {stats['total_clusters']} clusters "
+                    f"in {stats['processing_time']:.2f}s ({stats['mode']})")
+    return results
+
+
+if __name__ == "__main__":
+    for row in benchmark_correlation():
+        print(f"{row['total_iocs']:>9} IOCs  {row['mode']:>5}  {row['total_clusters']:>7} clusters  "
+              f"{row['processing_time']:8.2f}s  {row['iocs_per_second']:>10.0f} IOC/s")
@@ -0,0 +1,71 @@
+"""
+Lazy Loading Helpers
+====================
+
+Keeps worker boot cheap by deferring work until it is first needed:
+- ``lazy_import`` returns a module whose body runs on first attribute access
+- ``LazyObject`` builds a subsystem singleton on first attribute access
+
+Missing optional modules still raise ImportError at the ``lazy_import``
+call, so the usual ``try: ... X_AVAILABLE = True`` pattern keeps working.
+"""
+
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+from typing import Any, Callable
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Import ``name`` lazily; already-imported modules are returned as-is"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyObject:
+    """Proxy that calls ``factory()`` on first attribute access and forwards to the result"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self) -> str:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            return f"<LazyObject {getattr(object.__getattribute__(self, '_factory'), '__name__', '?')} (not loaded)>"
+        return repr(instance)
+
+
+def is_loaded(obj: Any) -> bool:
+    """False only for a LazyObject whose factory has not run yet"""
+    if isinstance(obj, LazyObject):
+        return object.__getattribute__(obj, "_instance") is not None
+    return True
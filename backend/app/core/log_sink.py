@@ -0,0 +1,205 @@
+"""
+Async Log Sink
+==============
+
+Queue-backed log writer that takes file I/O off the threads that log:
+- ``submit()`` only enqueues; a daemon thread collects a batch (up to
+  ``batch_size`` lines, waiting at most ``linger`` seconds after the first)
+  and writes each target with one write and one flush per batch
+- The queue is bounded; when a burst outruns the disk, new lines are
+  dropped and counted instead of blocking the caller
+- ``SinkHandler`` plugs the sink into ``logging``; records are formatted
+  on the writer thread
+- Targets are file paths (opened once, kept open) or text streams
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union, IO
+
+Target = Union[str, Path, IO[str]]
+
+_STOP = object()
+
+
+class AsyncLogSink:
+    """Batches lines per target and writes them from a background thread"""
+
+    def __init__(self, batch_size: int = 512, linger: float = 0.05, max_queue: int = 50000):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.write_errors = 0
+        self._files: Dict[str, IO[str]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="async-log-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def submit(self, target: Target, item: Any) -> bool:
+        """Queue a line (or a ``(handler, record)`` pair) for ``target``; False when dropped"""
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((target, item))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far has been written"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self.queue.put((None, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued, stop the thread and close files"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        for handle in self._files.values():
+            try:
+                handle.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "write_errors": self.write_errors,
+            "avg_batch_size": round(self.written / self.batches, 1) if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Give a burst a moment to accumulate so it costs one write, not many
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(entry is _STOP for entry in batch)
+            self._write_batch([entry for entry in batch if entry is not _STOP])
+            if stop:
+                # Drain anything queued after the stop marker
+                rest = []
+                while True:
+                    try:
+                        entry = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is not _STOP:
+                        rest.append(entry)
+                self._write_batch(rest)
+                return
+
+    def _write_batch(self, batch: List[Tuple[Optional[Target], Any]]):
+        lines: Dict[Any, List[str]] = {}
+        waiters = []
+        for target, item in batch:
+            if target is None:
+                waiters.append(item)
+                continue
+            if isinstance(item, tuple):
+                handler, record = item
+                try:
+                    item = handler.format(record)
+                except Exception:
+                    self.write_errors += 1
+                    continue
+            key = str(target) if isinstance(target, (str, Path)) else target
+            lines.setdefault(key, []).append(item)
+
+        for key, chunk in lines.items():
+            try:
+                handle = self._open(key) if isinstance(key, str) else key
+                handle.write("\n".join(chunk) + "\n")
+                handle.flush()
+                self.written += len(chunk)
+            except Exception:
+                self.write_errors += len(chunk)
+        if lines:
+            self.batches += 1
+        for waiter in waiters:
+            waiter.set()
+
+    def _open(self, path: str) -> IO[str]:
+        handle = self._files.get(path)
+        if handle is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handle = self._files[path] = open(path, "a", encoding="utf-8")
+        return handle
+
+
+class SinkHandler(logging.Handler):
+    """``logging`` handler that hands records to an ``AsyncLogSink``"""
+
+    def __init__(self, sink: AsyncLogSink, target: Target, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.sink = sink
+        self.target = target
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Resolve arguments and exception text now; both may change once we return
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+                record.exc_info = None
+            self.sink.submit(self.target, (self, record))
+        except Exception:
+            self.handleError(record)
+
+
+# Shared sink for application logs
+_log_sink: Optional[AsyncLogSink] = None
+
+
+def get_log_sink() -> AsyncLogSink:
+    """Get the shared log sink"""
+    global _log_sink
+    if _log_sink is None:
+        _log_sink = AsyncLogSink(
+            batch_size=int(os.getenv("LOG_SINK_BATCH_SIZE", "512")),
+            linger=float(os.getenv("LOG_SINK_LINGER", "0.05")),
+            max_queue=int(os.getenv("LOG_SINK_MAX_QUEUE", "50000")),
+        )
+    return _log_sink
@@ -1022,4 +1022,12 @@ confidence_predictor = ConfidencePredictionModel()
 anomaly_detector = AnomalyDetectionEngine()
 
 # Alias for backward compatibility
-MLIntelligenceEngine = SourcePrioritizationEngine
\ No newline at end of file
+MLIntelligenceEngine = SourcePrioritizationEngine
+
+# Module-level entry points so the stateless engines can run in compute service worker processes
+def recognize_patterns_task(data: Dict[str, Any]) -> Dict[str, Any]:
+    return pattern_recognizer.recognize_patterns(data)
+
+
+def detect_anomalies_task(data: Dict[str, Any], historical_data: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return anomaly_detector.detect_anomalies(data, historical_data)
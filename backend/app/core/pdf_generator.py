@@ -519,4 +519,8 @@ class IntelligencePDFGenerator:
 
 
 # Global PDF generator instance
-pdf_generator = IntelligencePDFGenerator()
\ No newline at end of file
+pdf_generator = IntelligencePDFGenerator()
+
+def render_intelligence_report(scan_data: Dict[str, Any], report_type: str = "full") -> bytes:
+    """Module-level entry point so report rendering can run in a compute service worker process"""
+    return pdf_generator.generate_intelligence_report(scan_data, report_type=report_type)
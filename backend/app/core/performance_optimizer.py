@@ -12,8 +12,10 @@ from typing import Dict, Any, List, Optional, Union, Callable
 from datetime import datetime, timedelta
 from collections import defaultdict
 import functools
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import weakref
+
+from .execution_planner import ExecutionPlan, ExecutionPlanner, count_findings, get_execution_planner
+from .sufficiency import SufficiencyEvaluator
+from .tracing import tracer
 
 # Mock Redis implementation for demonstration
 class MockRedis:
@@ -144,7 +146,9 @@ class CacheManager:
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache and deserialize"""
         try:
-            cached_value = await self.redis.get(key)
+            with tracer.span("cache.get", "cache", tier="redis") as span:
+                cached_value = await self.redis.get(key)
+                span.set(hit=bool(cached_value))
             if cached_value:
                 self.hit_count += 1
                 return json.loads(cached_value)
@@ -163,7 +167,8 @@ class CacheManager:
                 ttl = self.default_ttl
             
             serialized_value = json.dumps(value, default=str)
-            await self.redis.set(key, serialized_value, ttl)
+            with tracer.span("cache.set", "cache", tier="redis"):
+                await self.redis.set(key, serialized_value, ttl)
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {str(e)}")
     
@@ -271,22 +276,25 @@ def cache_result(ttl: int = 3600, key_prefix: str = "default"):
 class AsyncScannerOrchestrator:
     """Optimized async orchestrator for scanner modules"""
     
-    def __init__(self, cache_manager: CacheManager = None, max_concurrent_scanners: int = 20):
+    def __init__(self, cache_manager: CacheManager = None, max_concurrent_scanners: int = 20,
+                 planner: Optional[ExecutionPlanner] = None):
         self.cache_manager = cache_manager or CacheManager()
         self.query_cache = QueryCache(self.cache_manager)
         self.max_concurrent_scanners = max_concurrent_scanners
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.planner = planner or get_execution_planner()
         
-        # Performance tracking
-        self.scanner_performance = defaultdict(list)
-        self.active_scans = weakref.WeakValueDictionary()
+        # Per-scanner performance is tracked by the planner's statistics store
+        # Plain dicts cannot be weakly referenced; entries are popped when a scan ends
+        self.active_scans: Dict[str, Dict[str, Any]] = {}
     
     async def execute_scan_optimized(
         self,
         query: Dict[str, Any],
         scanners: List[Any],
         user_plan: str,
-        use_cache: bool = True
+        use_cache: bool = True,
+        credit_budget: Optional[int] = None,
+        confidence_targets: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """Execute scan with performance optimizations"""
         
@@ -305,31 +313,38 @@ class AsyncScannerOrchestrator:
         scan_start_time = time.time()
         self.active_scans[scan_id] = {"start_time": scan_start_time, "status": "running"}
         
-        # Filter scanners based on user plan and performance
-        optimized_scanners = self._select_optimal_scanners(scanners, user_plan)
-        
-        # Execute scanners with batching and rate limiting
-        scanner_results = await self._execute_scanners_batched(optimized_scanners, query)
-        
-        # Aggregate results
-        aggregated_results = await self._aggregate_results_optimized(scanner_results)
-        
-        # Cache results
-        if use_cache and aggregated_results:
-            await self.query_cache.cache_query_result(query_type, query_value, user_plan, aggregated_results)
-        
-        # Update performance metrics
-        total_time = time.time() - scan_start_time
-        self._update_performance_metrics(scan_id, optimized_scanners, total_time)
-        
-        # Clean up
-        self.active_scans.pop(scan_id, None)
-        
-        return aggregated_results
-    
-    async def _execute_scanners_batched(self, scanners: List[Any], query: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Execute scanners in optimized batches"""
-        results = []
+        try:
+            # Stage scanners by cost and expected yield within the plan and budget
+            await self.planner.refresh()
+            applicable = [s for s in scanners if not hasattr(s, 'can_handle') or s.can_handle(query)]
+            plan = self.planner.plan(applicable, user_plan, credit_budget)
+            optimized_scanners = plan.scanners
+        
+            # Execute stages until the query is answered or confidence targets are met
+            sufficiency = SufficiencyEvaluator.for_query(query_type, confidence_targets)
+            scanner_results = await self._execute_scanners_batched(plan, query, sufficiency)
+            await self.planner.flush()
+        
+            # Aggregate results
+            aggregated_results = await self._aggregate_results_optimized(scanner_results)
+            aggregated_results["execution_plan"] = plan.to_dict()
+            aggregated_results["sufficiency"] = sufficiency.report() if sufficiency else None
+        
+            # Cache results
+            if use_cache and aggregated_results:
+                await self.query_cache.cache_query_result(query_type, query_value, user_plan, aggregated_results)
+        
+            # Update performance metrics
+            total_time = time.time() - scan_start_time
+            self._update_performance_metrics(scan_id, optimized_scanners, total_time)
+        
+            return aggregated_results
+        finally:
+            self.active_scans.pop(scan_id, None)
+    
+    async def _execute_scanners_batched(self, plan: ExecutionPlan, query: Dict[str, Any],
+                                        sufficiency: Optional[SufficiencyEvaluator] = None) -> List[Dict[str, Any]]:
+        """Execute plan stages concurrently, stopping once answered or sufficient"""
         
         # Create semaphore to limit concurrent scanners
         semaphore = asyncio.Semaphore(self.max_concurrent_scanners)
@@ -338,25 +353,24 @@ class AsyncScannerOrchestrator:
             async with semaphore:
                 return await self._execute_single_scanner_optimized(scanner, query)
         
-        # Execute scanners in batches
-        batch_size = 5
-        for i in range(0, len(scanners), batch_size):
-            batch = scanners[i:i + batch_size]
-            
-            # Execute batch concurrently
-            batch_tasks = [execute_scanner_with_semaphore(scanner) for scanner in batch]
-            batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-            
-            # Process results
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Scanner error: {str(result)}")
-                    continue
-                if result:
-                    results.append(result)
-            
-            # Small delay between batches to prevent overwhelming external APIs
-            await asyncio.sleep(0.1)
+        def describe(result):
+            if not result:
+                return False, 0.0, 0
+            success = result.get("status") == "success"
+            return success, result.get("execution_time", 0.0), count_findings(result.get("result")) if success else 0
+        
+        outcomes = await self.planner.execute(
+            plan, execute_scanner_with_semaphore, describe,
+            sufficiency=sufficiency, payload=lambda result: result.get("result")
+        )
+        
+        results = []
+        for planned, result in outcomes:
+            if isinstance(result, Exception):
+                logger.error(f"Scanner error: {str(result)}")
+                continue
+            if result:
+                results.append(result)
         
         return results
     
@@ -378,13 +392,6 @@ class AsyncScannerOrchestrator:
             
             execution_time = time.time() - start_time
             
-            # Track performance
-            self.scanner_performance[scanner_name].append({
-                "execution_time": execution_time,
-                "timestamp": datetime.utcnow(),
-                "success": True
-            })
-            
             return {
                 "scanner": scanner_name,
                 "result": result,
@@ -397,13 +404,6 @@ class AsyncScannerOrchestrator:
             execution_time = time.time() - start_time
             logger.warning(f"Scanner {scanner_name} timed out after {execution_time:.2f}s")
             
-            self.scanner_performance[scanner_name].append({
-                "execution_time": execution_time,
-                "timestamp": datetime.utcnow(),
-                "success": False,
-                "error": "timeout"
-            })
-            
             return {
                 "scanner": scanner_name,
                 "result": {"error": "Scanner timed out"},
@@ -416,13 +416,6 @@ class AsyncScannerOrchestrator:
             execution_time = time.time() - start_time
             logger.error(f"Scanner {scanner_name} error: {str(e)}")
             
-            self.scanner_performance[scanner_name].append({
-                "execution_time": execution_time,
-                "timestamp": datetime.utcnow(),
-                "success": False,
-                "error": str(e)
-            })
-            
             return {
                 "scanner": scanner_name,
                 "result": {"error": str(e)},
@@ -432,40 +425,8 @@ class AsyncScannerOrchestrator:
             }
     
     def _select_optimal_scanners(self, scanners: List[Any], user_plan: str) -> List[Any]:
-        """Select optimal scanners based on performance and user plan"""
-        
-        # Plan-based scanner limits
-        plan_limits = {
-            "free": 10,
-            "professional": 50,
-            "enterprise": 100
-        }
-        
-        max_scanners = plan_limits.get(user_plan, 10)
-        
-        # Sort scanners by performance (success rate and speed)
-        scanner_scores = {}
-        for scanner in scanners:
-            scanner_name = getattr(scanner, 'name', 'unknown')
-            performance_data = self.scanner_performance.get(scanner_name, [])
-            
-            if performance_data:
-                # Calculate performance score
-                recent_data = performance_data[-10:]  # Last 10 executions
-                success_rate = sum(1 for p in recent_data if p["success"]) / len(recent_data)
-                avg_time = sum(p["execution_time"] for p in recent_data) / len(recent_data)
-                
-                # Score: higher success rate and lower time = better score
-                score = success_rate * 100 - avg_time
-            else:
-                # Default score for new scanners
-                score = 50
-            
-            scanner_scores[scanner] = score
-        
-        # Sort by score and take top performers
-        optimal_scanners = sorted(scanners, key=lambda s: scanner_scores.get(s, 0), reverse=True)
-        return optimal_scanners[:max_scanners]
+        """Select optimal scanners based on persisted performance, cost and user plan"""
+        return self.planner.plan(scanners, user_plan).scanners
     
     async def _aggregate_results_optimized(self, scanner_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Optimized result aggregation"""
@@ -540,22 +501,19 @@ class AsyncScannerOrchestrator:
         logger.info(f"Scan {scan_id} completed in {total_time:.2f}s with {len(scanners)} scanners")
     
     def get_performance_stats(self) -> Dict[str, Any]:
-        """Get performance statistics"""
+        """Get performance statistics from the planner's scanner statistics"""
         stats = {}
         
-        for scanner_name, performance_data in self.scanner_performance.items():
-            if not performance_data:
+        for scanner_name, scanner_stats in self.planner.stats.snapshot().items():
+            if not scanner_stats.runs:
                 continue
             
-            recent_data = performance_data[-50:]  # Last 50 executions
-            successful = [p for p in recent_data if p["success"]]
-            
             stats[scanner_name] = {
-                "total_executions": len(recent_data),
-                "successful_executions": len(successful),
-                "success_rate": len(successful) / len(recent_data) if recent_data else 0,
-                "avg_execution_time": sum(p["execution_time"] for p in recent_data) / len(recent_data) if recent_data else 0,
-                "avg_successful_time": sum(p["execution_time"] for p in successful) / len(successful) if successful else 0
+                "total_executions": scanner_stats.runs,
+                "successful_executions": scanner_stats.successes,
+                "success_rate": scanner_stats.successes / scanner_stats.runs,
+                "avg_execution_time": scanner_stats.avg_latency,
+                "total_findings": scanner_stats.findings
             }
         
         return stats
@@ -24,6 +24,8 @@ try:
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
+from .compute_service import get_compute_service
+
 logger = logging.getLogger(__name__)
 
 
@@ -323,6 +325,83 @@ class ReportDataFilter:
             return value
 
 
+def render_pdf_report(data: Dict[str, Any], report_type: ReportType, user_plan: SubscriptionPlan) -> bytes:
+    """Lay out and build a ReportLab PDF; module-level so it can run in a worker process"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = []
+    styles = getSampleStyleSheet()
+    
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+    
+    # Title
+    story.append(Paragraph(f"Intelligence Gathering Report", title_style))
+    story.append(Paragraph(f"{report_type.title()} Report - {user_plan.title()} Plan", styles['Heading2']))
+    story.append(Spacer(1, 12))
+    
+    # Summary section
+    if data.get('summary'):
+        story.append(Paragraph("Executive Summary", styles['Heading2']))
+        summary = data['summary']
+        
+        summary_data = [
+            ['Metric', 'Value'],
+            ['Total Entities', str(summary.get('total_entities', 0))],
+            ['High Confidence Results', str(summary.get('confidence_distribution', {}).get('high', 0))],
+            ['Data Sources Used', str(len(summary.get('source_distribution', {})))]
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), blue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), (0.8, 0.8, 0.8)),
+            ('GRID', (0, 0), (-1, -1), 1, black)
+        ]))
+        
+        story.append(summary_table)
+        story.append(Spacer(1, 20))
+    
+    # Entities section
+    if data.get('entities'):
+        story.append(Paragraph("Discovered Entities", styles['Heading2']))
+        
+        for entity in data['entities'][:10]:  # Limit to top 10 for PDF
+            entity_para = Paragraph(
+                f"<b>{entity.get('type', 'Unknown').title()}:</b> {entity.get('value', 'N/A')} "
+                f"(Confidence: {entity.get('confidence', 0):.2f})",
+                styles['Normal']
+            )
+            story.append(entity_para)
+        
+        story.append(Spacer(1, 20))
+    
+    # Limitations
+    limitations = data.get('report_metadata', {}).get('limitations', [])
+    if limitations:
+        story.append(Paragraph("Report Limitations", styles['Heading2']))
+        for limitation in limitations:
+            story.append(Paragraph(f"• {limitation}", styles['Normal']))
+    
+    # Build PDF
+    doc.build(story)
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_content
+
+
 class ReportGenerator:
     """Main report generator with subscription-based access control"""
     
@@ -535,80 +614,8 @@ class ReportGenerator:
             """
             return pdf_content.encode('utf-8')
         
-        # Use ReportLab for proper PDF generation
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        
-        # Title
-        story.append(Paragraph(f"Intelligence Gathering Report", title_style))
-        story.append(Paragraph(f"{report_type.title()} Report - {user_plan.title()} Plan", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        # Summary section
-        if data.get('summary'):
-            story.append(Paragraph("Executive Summary", styles['Heading2']))
-            summary = data['summary']
-            
-            summary_data = [
-                ['Metric', 'Value'],
-                ['Total Entities', str(summary.get('total_entities', 0))],
-                ['High Confidence Results', str(summary.get('confidence_distribution', {}).get('high', 0))],
-                ['Data Sources Used', str(len(summary.get('source_distribution', {})))]
-            ]
-            
-            summary_table = Table(summary_data)
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), blue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), black),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), (0.8, 0.8, 0.8)),
-                ('GRID', (0, 0), (-1, -1), 1, black)
-            ]))
-            
-            story.append(summary_table)
-            story.append(Spacer(1, 20))
-        
-        # Entities section
-        if data.get('entities'):
-            story.append(Paragraph("Discovered Entities", styles['Heading2']))
-            
-            for entity in data['entities'][:10]:  # Limit to top 10 for PDF
-                entity_para = Paragraph(
-                    f"<b>{entity.get('type', 'Unknown').title()}:</b> {entity.get('value', 'N/A')} "
-                    f"(Confidence: {entity.get('confidence', 0):.2f})",
-                    styles['Normal']
-                )
-                story.append(entity_para)
-            
-            story.append(Spacer(1, 20))
-        
-        # Limitations
-        limitations = data.get('report_metadata', {}).get('limitations', [])
-        if limitations:
-            story.append(Paragraph("Report Limitations", styles['Heading2']))
-            for limitation in limitations:
-                story.append(Paragraph(f"• {limitation}", styles['Normal']))
-        
-        # Build PDF
-        doc.build(story)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_content
+        # Layout and rendering are CPU-bound; keep them off the event loop
+        return await get_compute_service().run_cpu("pdf_render", render_pdf_report, data, report_type, user_plan)
     
     async def _generate_csv_report(self, data: Dict[str, Any], report_type: ReportType, user_plan: SubscriptionPlan) -> str:
         """Generate CSV format report"""
@@ -0,0 +1,504 @@
+"""
+Historical Result Search
+========================
+
+Full-text search over scan results and reports:
+- Flattens JSON result data into searchable text
+- SQLite FTS5 virtual table or Postgres tsvector column with a GIN index
+- Ranked, paginated queries with highlighted snippets
+- Incremental, batched indexing off the scan path: documents pushed from
+  the result write path, plus a created_at watermark catch-up that re-reads
+  an overlap window so rows committed late are not skipped
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from sqlalchemy import (
+    select, text, null, inspect as sa_inspect, bindparam, MetaData, Table, Column, String, DateTime
+)
+
+from ..db.models import ScanResult, Report
+
+logger = logging.getLogger(__name__)
+
+DOC_TYPES = ("scan_result", "report")
+
+_TOKEN_PATTERN = re.compile(r"\w+\*?", re.UNICODE)
+
+# Source table, title column, data columns (first present wins) and content column per
+# document type. Both model sets write these tables: app.db.models stores integer ids
+# and result_data, app.db.enterprise_models UUID ids and data
+SOURCES = {
+    "scan_result": ("scan_results", "scanner_name", ("result_data", "data"), None),
+    "report": ("reports", "title", ("report_data",), "content"),
+}
+
+# Rows committed up to this long after a later-stamped row are still indexed
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+_watermarks = Table(
+    "search_index_watermarks", MetaData(),
+    Column("doc_type", String(20), primary_key=True),
+    Column("last_created_at", DateTime(timezone=True)),
+)
+
+
+def flatten_document(data: Any, max_chars: int = 20000) -> str:
+    """Flatten nested JSON into ``key value`` text for indexing"""
+    parts: List[str] = []
+    size = 0
+    stack = [(None, data)]
+    while stack and size < max_chars:
+        key, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(reversed(list(value.items())))
+            continue
+        if isinstance(value, (list, tuple)):
+            stack.extend((key, item) for item in reversed(value))
+            continue
+        if value is None or isinstance(value, bool):
+            continue
+        piece = f"{key} {value}" if key is not None else str(value)
+        parts.append(piece)
+        size += len(piece) + 1
+    return " ".join(parts)[:max_chars]
+
+
+def make_document(doc_type: str, doc_id: Any, query_id: Any, title: Optional[str], data: Any,
+                  content: Optional[str] = None, max_chars: int = 20000) -> Dict[str, Any]:
+    """Search document for one scan result or report"""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            pass
+    body = flatten_document(data, max_chars)
+    if content:
+        body = f"{content} {body}"[:max_chars]
+    return {
+        "doc_type": doc_type,
+        "doc_id": doc_id if isinstance(doc_id, int) else str(doc_id),
+        "query_id": query_id if query_id is None or isinstance(query_id, int) else str(query_id),
+        "title": title or "",
+        "body": body,
+    }
+
+
+def _id_value(value: Any) -> Any:
+    """Integer ids come back as ints, anything else (UUIDs) as text"""
+    if value is None or isinstance(value, int):
+        return value
+    text_value = str(value)
+    return int(text_value) if text_value.isdigit() else text_value
+
+
+def _fts5_query(query: str) -> Optional[str]:
+    """Quote user terms so FTS5 syntax characters cannot break the query"""
+    terms = []
+    for token in _TOKEN_PATTERN.findall(query):
+        prefix = token.endswith("*")
+        word = token.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms) or None
+
+
+class SearchIndex:
+    """Full-text index stored alongside the application tables"""
+
+    def __init__(self, engine=None, max_body_chars: int = 20000):
+        if engine is None:
+            from ..db.database import engine as app_engine
+            engine = app_engine
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.max_body_chars = max_body_chars
+        self._ready = False
+        self._tables: Dict[str, Table] = {}
+
+    @property
+    def supported(self) -> bool:
+        return self.dialect in ("sqlite", "postgresql")
+
+    def ensure_schema(self):
+        """Create the search table, index and watermark table if missing"""
+        if self._ready:
+            return
+        if not self.supported:
+            raise RuntimeError(f"Full-text search is not supported on {self.dialect}")
+
+        with self.engine.begin() as connection:
+            if self.dialect == "sqlite":
+                connection.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents USING fts5("
+                    "doc_type UNINDEXED, doc_id UNINDEXED, query_id UNINDEXED, title, body, "
+                    "tokenize='porter unicode61')"
+                ))
+            else:
+                connection.execute(text(
+                    "CREATE TABLE IF NOT EXISTS search_documents ("
+                    "doc_type VARCHAR(20) NOT NULL, doc_id VARCHAR(64) NOT NULL, query_id VARCHAR(64), "
+                    "title TEXT, body TEXT, "
+                    "tsv tsvector GENERATED ALWAYS AS "
+                    "(setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED, "
+                    "PRIMARY KEY (doc_type, doc_id))"
+                ))
+                connection.execute(text(
+                    "CREATE INDEX IF NOT EXISTS idx_search_documents_tsv ON search_documents USING GIN (tsv)"
+                ))
+        _watermarks.create(self.engine, checkfirst=True)
+        self._ready = True
+
+    # Indexing
+
+    def build_documents(self, doc_type: str, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Load rows by id and turn them into search documents"""
+        ids = sorted(set(ids))
+        if not ids:
+            return []
+        with self.engine.connect() as connection:
+            return [self._document(doc_type, row) for row in connection.execute(
+                self._source_select(doc_type).where(self._source_table(doc_type).c.id.in_(ids))
+            )]
+
+    def index_documents(self, documents: List[Dict[str, Any]]) -> int:
+        """Insert or replace documents in one transaction"""
+        if not documents:
+            return 0
+        self.ensure_schema()
+        if self.dialect != "sqlite":
+            documents = [
+                {**doc, "doc_id": str(doc["doc_id"]),
+                 "query_id": None if doc["query_id"] is None else str(doc["query_id"])}
+                for doc in documents
+            ]
+        with self.engine.begin() as connection:
+            if self.dialect == "sqlite":
+                connection.execute(
+                    text("DELETE FROM search_documents WHERE rowid = :rowid"),
+                    [{"rowid": self._rowid(doc)} for doc in documents]
+                )
+                connection.execute(
+                    text("INSERT INTO search_documents (rowid, doc_type, doc_id, query_id, title, body) "
+                         "VALUES (:rowid, :doc_type, :doc_id, :query_id, :title, :body)"),
+                    [{**doc, "rowid": self._rowid(doc)} for doc in documents]
+                )
+            else:
+                connection.execute(
+                    text("INSERT INTO search_documents (doc_type, doc_id, query_id, title, body) "
+                         "VALUES (:doc_type, :doc_id, :query_id, :title, :body) "
+                         "ON CONFLICT (doc_type, doc_id) DO UPDATE SET "
+                         "query_id = EXCLUDED.query_id, title = EXCLUDED.title, body = EXCLUDED.body"),
+                    documents
+                )
+        return len(documents)
+
+    def catch_up(self, doc_type: str, batch_size: int = 500,
+                 overlap: timedelta = WATERMARK_OVERLAP) -> int:
+        """Index up to ``batch_size`` unindexed rows created since the watermark.
+
+        The watermark is the newest ``created_at`` seen. Each call re-reads
+        rows from ``overlap`` before it, so rows whose transactions committed
+        after later-stamped rows are still picked up. Rows already indexed
+        (through the write path or an earlier call) are skipped. Returns the
+        number of rows indexed; 0 once everything is caught up.
+        """
+        self.ensure_schema()
+        table = self._source_table(doc_type)
+        with self.engine.connect() as connection:
+            watermark = connection.execute(
+                select(_watermarks.c.last_created_at).where(_watermarks.c.doc_type == doc_type)
+            ).scalar()
+
+        # Page through the window by id; timestamps only bound the window
+        since = watermark - overlap if watermark is not None else None
+        cursor = None
+        newest = watermark
+        missing: List[Any] = []
+        while len(missing) < batch_size:
+            statement = select(table.c.id, table.c.created_at).order_by(table.c.id).limit(batch_size)
+            if since is not None:
+                statement = statement.where(table.c.created_at >= since)
+            if cursor is not None:
+                statement = statement.where(table.c.id > cursor)
+            with self.engine.connect() as connection:
+                rows = connection.execute(statement).all()
+                if not rows:
+                    break
+                indexed = self._indexed_ids(connection, doc_type, [row.id for row in rows])
+
+            for row in rows:
+                if len(missing) >= batch_size:
+                    break
+                cursor = row.id
+                if row.created_at is not None and (newest is None or row.created_at > newest):
+                    newest = row.created_at
+                if row.id not in indexed:
+                    missing.append(row.id)
+
+        self.index_documents(self.build_documents(doc_type, missing))
+        if newest is not None and newest != watermark:
+            with self.engine.begin() as connection:
+                updated = connection.execute(
+                    _watermarks.update().where(_watermarks.c.doc_type == doc_type)
+                    .values(last_created_at=newest)
+                ).rowcount
+                if not updated:
+                    connection.execute(_watermarks.insert().values(doc_type=doc_type, last_created_at=newest))
+        return len(missing)
+
+    def _indexed_ids(self, connection, doc_type: str, ids: List[Any]) -> set:
+        if not ids:
+            return set()
+        if self.dialect == "sqlite":
+            rowids = {self._rowid({"doc_type": doc_type, "doc_id": doc_id}): doc_id for doc_id in ids}
+            found = connection.execute(
+                text("SELECT rowid FROM search_documents WHERE rowid IN :rowids")
+                .bindparams(bindparam("rowids", expanding=True)),
+                {"rowids": list(rowids)}
+            ).scalars().all()
+            return {rowids[rowid] for rowid in found}
+        by_text = {str(doc_id): doc_id for doc_id in ids}
+        found = connection.execute(
+            text("SELECT doc_id FROM search_documents WHERE doc_type = :doc_type AND doc_id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"doc_type": doc_type, "ids": list(by_text)}
+        ).scalars().all()
+        return {by_text[doc_id] for doc_id in found}
+
+    # Querying
+
+    def search(self, query: str, doc_type: Optional[str] = None, page: int = 1,
+               page_size: int = 20) -> Dict[str, Any]:
+        """Ranked search with highlighted snippets"""
+        self.ensure_schema()
+        page = max(page, 1)
+        page_size = max(1, min(page_size, 100))
+        params = {"limit": page_size, "offset": (page - 1) * page_size, "doc_type": doc_type}
+        type_filter = " AND doc_type = :doc_type" if doc_type else ""
+
+        if self.dialect == "sqlite":
+            params["match"] = _fts5_query(query)
+            if params["match"] is None:
+                return {"query": query, "total": 0, "page": page, "page_size": page_size, "results": []}
+            where = f"search_documents MATCH :match{type_filter}"
+            count_sql = f"SELECT count(*) FROM search_documents WHERE {where}"
+            # bm25 weights: doc_type, doc_id, query_id, title, body
+            search_sql = (
+                "SELECT doc_type, doc_id, query_id, title, "
+                "snippet(search_documents, 4, '<mark>', '</mark>', '…', 16) AS snippet, "
+                "-bm25(search_documents, 0, 0, 0, 5.0, 1.0) AS score "
+                f"FROM search_documents WHERE {where} ORDER BY score DESC LIMIT :limit OFFSET :offset"
+            )
+        else:
+            params["match"] = query
+            where = f"tsv @@ websearch_to_tsquery('english', :match){type_filter}"
+            count_sql = f"SELECT count(*) FROM search_documents WHERE {where}"
+            search_sql = (
+                "SELECT doc_type, doc_id, query_id, title, "
+                "ts_headline('english', body, websearch_to_tsquery('english', :match), "
+                "'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=24') AS snippet, "
+                "ts_rank_cd(tsv, websearch_to_tsquery('english', :match)) AS score "
+                f"FROM search_documents WHERE {where} ORDER BY score DESC LIMIT :limit OFFSET :offset"
+            )
+
+        with self.engine.connect() as connection:
+            total = connection.execute(text(count_sql), params).scalar()
+            rows = connection.execute(text(search_sql), params).mappings().all()
+
+        return {
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "results": [
+                {
+                    "doc_type": row["doc_type"],
+                    "doc_id": _id_value(row["doc_id"]),
+                    "query_id": _id_value(row["query_id"]),
+                    "title": row["title"],
+                    "snippet": row["snippet"],
+                    "score": round(float(row["score"]), 4),
+                }
+                for row in rows
+            ],
+        }
+
+    # Helpers
+
+    def _source_table(self, doc_type: str) -> Table:
+        # Reflected, so the columns are those of whichever model set created the table
+        if doc_type not in SOURCES:
+            raise ValueError(f"Unknown document type: {doc_type}")
+        if doc_type not in self._tables:
+            self._tables[doc_type] = Table(SOURCES[doc_type][0], MetaData(), autoload_with=self.engine)
+        return self._tables[doc_type]
+
+    def _source_select(self, doc_type: str):
+        table = self._source_table(doc_type)
+        _, title, data_columns, content = SOURCES[doc_type]
+        data = next((table.c[name] for name in data_columns if name in table.c), null())
+        return select(table.c.id, table.c.query_id, table.c[title].label("title"), data.label("data"),
+                      (table.c[content] if content and content in table.c else null()).label("content"))
+
+    def _document(self, doc_type: str, row) -> Dict[str, Any]:
+        return make_document(doc_type, row.id, row.query_id, row.title, row.data,
+                             row.content, self.max_body_chars)
+
+    @staticmethod
+    def _rowid(document: Dict[str, Any]) -> int:
+        # Stable rowid per document so replacements are point lookups;
+        # non-integer ids (UUIDs) map to negative hashed rowids
+        doc_id = document["doc_id"]
+        if isinstance(doc_id, int):
+            return doc_id * len(DOC_TYPES) + DOC_TYPES.index(document["doc_type"])
+        digest = hashlib.blake2b(f"{document['doc_type']}:{doc_id}".encode(), digest_size=8).digest()
+        return -(int.from_bytes(digest, "little") >> 2) - 1
+
+
+class SearchIndexer:
+    """Background indexer fed by committed writes.
+
+    ``enqueue`` and ``enqueue_documents`` never block and never raise; work is
+    batched and indexed in a worker thread. A less frequent watermark
+    catch-up picks up rows written elsewhere or dropped when the queue was full.
+    """
+
+    def __init__(self, index: Optional[SearchIndex] = None, batch_size: int = 200,
+                 flush_interval: float = 2.0, max_queue: int = 10000,
+                 catch_up_interval: float = 30.0):
+        self.index = index or SearchIndex()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.catch_up_interval = catch_up_interval
+        self.max_queue = max_queue
+        self.pending: Dict[str, set] = {doc_type: set() for doc_type in DOC_TYPES}
+        # Documents built on the write path, indexed without re-reading rows
+        self.pending_documents: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self.stats = {"enqueued": 0, "dropped": 0, "indexed": 0, "batches": 0, "errors": 0}
+        self._last_catch_up = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _queued(self) -> int:
+        return sum(len(ids) for ids in self.pending.values()) + len(self.pending_documents)
+
+    def enqueue(self, doc_type: str, doc_id: int):
+        if self._queued() >= self.max_queue:
+            self.stats["dropped"] += 1  # recovered by the watermark catch-up
+            return
+        self.pending[doc_type].add(doc_id)
+        self.stats["enqueued"] += 1
+        if self._wakeup is not None and len(self.pending[doc_type]) >= self.batch_size:
+            self._wakeup.set()
+
+    def enqueue_documents(self, documents: Iterable[Dict[str, Any]]):
+        """Queue documents built by ``make_document`` on the result write path"""
+        for document in documents:
+            if self._queued() >= self.max_queue:
+                self.stats["dropped"] += 1
+                continue
+            self.pending_documents[(document["doc_type"], document["doc_id"])] = document
+            self.stats["enqueued"] += 1
+        if self._wakeup is not None and len(self.pending_documents) >= self.batch_size:
+            self._wakeup.set()
+
+    def enqueue_records(self, records: Iterable[Any]):
+        """``ScanResultWriter`` after-commit hook for ORM scan results and reports"""
+        try:
+            for record in records:
+                doc_type = "report" if isinstance(record, Report) else \
+                    "scan_result" if isinstance(record, ScanResult) else None
+                identity = sa_inspect(record).identity if doc_type else None
+                if identity:
+                    self.enqueue(doc_type, identity[0])
+        except Exception as e:
+            logger.warning(f"Search indexing skipped: {e}")
+
+    async def flush(self) -> int:
+        """Index everything queued so far"""
+        indexed = 0
+        while self.pending_documents:
+            keys = list(self.pending_documents)[:self.batch_size]
+            documents = [self.pending_documents.pop(key) for key in keys]
+            try:
+                indexed += await asyncio.to_thread(self.index.index_documents, documents)
+                self.stats["batches"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Search indexing batch failed: {e}")
+                break
+        for doc_type in DOC_TYPES:
+            while self.pending[doc_type]:
+                batch = [self.pending[doc_type].pop()
+                         for _ in range(min(self.batch_size, len(self.pending[doc_type])))]
+                try:
+                    documents = await asyncio.to_thread(self.index.build_documents, doc_type, batch)
+                    indexed += await asyncio.to_thread(self.index.index_documents, documents)
+                    self.stats["batches"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Search indexing batch failed: {e}")
+                    break
+        self.stats["indexed"] += indexed
+        return indexed
+
+    async def catch_up(self) -> int:
+        self._last_catch_up = time.monotonic()
+        indexed = 0
+        for doc_type in DOC_TYPES:
+            indexed += await asyncio.to_thread(self.index.catch_up, doc_type, self.batch_size)
+        return indexed
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_catch_up >= self.catch_up_interval:
+                    await self.catch_up()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Search indexer iteration failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self._queued()}
+
+
+_search_indexer: Optional[SearchIndexer] = None
+
+
+def get_search_indexer() -> SearchIndexer:
+    """Process-wide indexer bound to the application database"""
+    global _search_indexer
+    if _search_indexer is None:
+        _search_indexer = SearchIndexer()
+    return _search_indexer
@@ -0,0 +1,137 @@
+"""
+Startup Import Profiler
+=======================
+
+Per-module import cost of an application entry point, measured in a fresh
+interpreter with ``python -X importtime``:
+- Self and cumulative time for every module imported at boot
+- Top-N report by cumulative or self time
+- Detection of heavy optional modules that should only load on first use
+
+Usage::
+
+    python -m app.core.startup_profiler app.main --top 30
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional
+
+# Modules that must not be imported just by booting an app; scanners,
+# reports and analytics load them on first use
+HEAVY_MODULES = (
+    "numpy", "pandas", "scipy", "sklearn", "matplotlib", "reportlab", "PIL",
+    "imagehash", "cv2", "librosa", "networkx", "phonenumbers.geocoder", "dns.resolver",
+)
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportTiming:
+    """One line of ``-X importtime`` output; times in microseconds"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    """Import timings for one entry point"""
+    target: str
+    timings: List[ImportTiming] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    returncode: int = 0
+
+    @property
+    def loaded(self) -> set:
+        return {timing.module for timing in self.timings}
+
+    @property
+    def import_seconds(self) -> float:
+        """Cumulative import time of the target module itself"""
+        for timing in reversed(self.timings):
+            if timing.module == self.target:
+                return timing.cumulative_us / 1e6
+        return sum(timing.self_us for timing in self.timings) / 1e6
+
+    def top(self, n: int = 20, by: str = "cumulative") -> List[ImportTiming]:
+        key = (lambda t: t.cumulative_us) if by == "cumulative" else (lambda t: t.self_us)
+        return sorted(self.timings, key=key, reverse=True)[:n]
+
+    def heavy_loaded(self, heavy: Iterable[str] = HEAVY_MODULES) -> List[str]:
+        loaded = self.loaded
+        return sorted(module for module in heavy if module in loaded)
+
+    def to_dict(self, n: int = 20) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "import_seconds": round(self.import_seconds, 4),
+            "wall_seconds": round(self.wall_seconds, 4),
+            "modules_imported": len(self.timings),
+            "heavy_modules_loaded": self.heavy_loaded(),
+            "top_cumulative": [
+                {"module": t.module, "cumulative_ms": t.cumulative_us / 1000, "self_ms": t.self_us / 1000}
+                for t in self.top(n)
+            ],
+        }
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse ``-X importtime`` stderr; other log lines are ignored"""
+    timings = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return timings
+
+
+def profile_imports(target: str, python: Optional[str] = None, cwd: Optional[Path] = None,
+                    timeout: float = 120.0) -> ImportProfile:
+    """Import ``target`` in a fresh interpreter and collect per-module timings"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(cwd or BACKEND_ROOT), capture_output=True, text=True, timeout=timeout,
+    )
+    return ImportProfile(
+        target=target,
+        timings=parse_importtime(completed.stderr),
+        wall_seconds=time.perf_counter() - started,
+        returncode=completed.returncode,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report per-module import time of an entry point")
+    parser.add_argument("targets", nargs="+", help="modules to import, e.g. app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--by", choices=("cumulative", "self"), default="cumulative")
+    args = parser.parse_args(argv)
+
+    for target in args.targets:
+        profile = profile_imports(target)
+        print(f"{target}: {profile.import_seconds * 1000:.1f} ms import, "
+              f"{profile.wall_seconds * 1000:.1f} ms wall, {len(profile.timings)} modules "
+              f"(exit {profile.returncode})")
+        heavy = profile.heavy_loaded()
+        if heavy:
+            print(f"  heavy modules loaded at boot: {', '.join(heavy)}")
+        print(f"  {'cumulative ms':>14} {'self ms':>9}  module")
+        for timing in profile.top(args.top, args.by):
+            print(f"  {timing.cumulative_us / 1000:>14.1f} {timing.self_us / 1000:>9.1f}  {timing.module}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Scan Sufficiency Evaluation
+===========================
+
+Early termination for multi-scanner queries:
+- Per-field confidence tracked as scanner results arrive
+- Source-weighted scoring with ConfidenceScorer, falling back to
+  ConfidencePredictionModel for payloads without a confidence of their own
+- Remaining scanners are cancelled or skipped once every target is met
+- Saved scanner-seconds and credits reported per query
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+from .aggregation_engine import ConfidenceScorer
+from .ml_intelligence import ConfidencePredictionModel
+
+logger = logging.getLogger(__name__)
+
+# Payload keys that carry a value for each tracked field
+FIELD_KEYS: Dict[str, tuple] = {
+    "email": ("email", "emails", "email_address", "contact_email"),
+    "phone": ("phone", "phones", "phone_number", "mobile", "telephone"),
+    "name": ("name", "full_name", "display_name"),
+    "username": ("username", "handle", "login"),
+    "url": ("url", "website", "profile_url", "homepage"),
+    "address": ("address", "location"),
+    "domain": ("domain",),
+    "ip": ("ip", "ip_address"),
+}
+
+# Default confidence targets per query type; empty means never stop early
+DEFAULT_TARGETS: Dict[str, Dict[str, float]] = {
+    "email": {"email": 0.85, "name": 0.7},
+    "phone": {"phone": 0.85, "name": 0.7},
+    "name": {"name": 0.8, "email": 0.7},
+    "username": {"username": 0.8, "url": 0.7},
+    "domain": {"domain": 0.85, "ip": 0.7},
+    "ip": {"ip": 0.85, "domain": 0.7},
+}
+
+MAX_DEPTH = 3
+
+
+def default_targets(query_type: Any) -> Dict[str, float]:
+    """Confidence targets for a query type (enum member or string)"""
+    key = str(getattr(query_type, "value", query_type) or "").lower()
+    return dict(DEFAULT_TARGETS.get(key, {}))
+
+
+class SufficiencyEvaluator:
+    """Tracks per-field confidence for one query and decides when to stop"""
+
+    def __init__(self, targets: Optional[Dict[str, float]] = None,
+                 scorer: Optional[ConfidenceScorer] = None,
+                 predictor: Optional[ConfidencePredictionModel] = None):
+        self.targets = dict(targets or {})
+        self.scorer = scorer or ConfidenceScorer()
+        self.predictor = predictor or ConfidencePredictionModel()
+        # field -> normalized value -> [{"source", "confidence"}]
+        self._sources: Dict[str, Dict[str, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+        self.field_confidence: Dict[str, float] = {}
+        self.results_seen = 0
+        self.sufficient_at: Optional[float] = None
+        self.skipped: List[str] = []
+        self.cancelled: List[str] = []
+        self.saved_credits = 0
+        self.saved_scanner_seconds = 0.0
+        self._started = time.time()
+
+    @classmethod
+    def for_query(cls, query_type: Any, targets: Optional[Dict[str, float]] = None) -> Optional["SufficiencyEvaluator"]:
+        """Evaluator with explicit or default targets, or None when there is nothing to aim for"""
+        targets = targets if targets is not None else default_targets(query_type)
+        return cls(targets) if targets else None
+
+    def add_result(self, scanner_name: str, data: Any) -> bool:
+        """Fold one scanner payload into the field confidences; returns is_sufficient()"""
+        self.results_seen += 1
+        if not isinstance(data, dict) or not data or data.get("error"):
+            return self.is_sufficient()
+
+        confidence = data.get("confidence")
+        if not isinstance(confidence, (int, float)):
+            confidence = self.predictor.predict_confidence(data)["predicted_confidence"]
+
+        touched = set()
+        for field, value in self._extract_fields(data, 0):
+            key = " ".join(str(value).lower().split())
+            if not key:
+                continue
+            sources = self._sources[field][key]
+            if not any(source["source"] == scanner_name for source in sources):
+                sources.append({"source": scanner_name, "confidence": float(confidence)})
+            touched.add(field)
+
+        for field in touched:
+            self.field_confidence[field] = max(
+                self.scorer.calculate_entity_confidence({"type": field, "sources": sources})
+                for sources in self._sources[field].values()
+            )
+
+        sufficient = self.is_sufficient()
+        if sufficient and self.sufficient_at is None:
+            self.sufficient_at = time.time()
+        return sufficient
+
+    def is_sufficient(self) -> bool:
+        return bool(self.targets) and all(
+            self.field_confidence.get(field, 0.0) >= target for field, target in self.targets.items()
+        )
+
+    def record_skipped(self, scanner_name: str, cost: int = 0, expected_seconds: float = 0.0):
+        """A scanner that never started because the query was already answered"""
+        self.skipped.append(scanner_name)
+        self.saved_credits += cost
+        self.saved_scanner_seconds += max(expected_seconds, 0.0)
+
+    def record_cancelled(self, scanner_name: str, cost: int = 0, remaining_seconds: float = 0.0):
+        """A running scanner cancelled once the targets were met"""
+        self.cancelled.append(scanner_name)
+        self.saved_credits += cost
+        self.saved_scanner_seconds += max(remaining_seconds, 0.0)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "targets": dict(self.targets),
+            "field_confidence": {field: round(value, 3) for field, value in self.field_confidence.items()},
+            "sufficient": self.is_sufficient(),
+            "stopped_early": bool(self.skipped or self.cancelled),
+            "results_seen": self.results_seen,
+            "time_to_sufficient": round(self.sufficient_at - self._started, 3) if self.sufficient_at else None,
+            "skipped_scanners": list(self.skipped),
+            "cancelled_scanners": list(self.cancelled),
+            "saved_credits": self.saved_credits,
+            "saved_scanner_seconds": round(self.saved_scanner_seconds, 3),
+        }
+
+    def _extract_fields(self, data: Any, depth: int):
+        if depth > MAX_DEPTH:
+            return
+        if isinstance(data, list):
+            for item in data:
+                yield from self._extract_fields(item, depth + 1)
+            return
+        if not isinstance(data, dict):
+            return
+        for key, value in data.items():
+            field = self._field_for_key(key)
+            if field is not None and isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                yield field, value
+            elif field is not None and isinstance(value, list):
+                for item in value:
+                    if isinstance(item, (str, int, float)) and not isinstance(item, bool):
+                        yield field, item
+                    else:
+                        yield from self._extract_fields(item, depth + 1)
+            elif isinstance(value, (dict, list)):
+                yield from self._extract_fields(value, depth + 1)
+
+    @staticmethod
+    def _field_for_key(key: Any) -> Optional[str]:
+        key = str(key).lower()
+        for field, keys in FIELD_KEYS.items():
+            if key in keys:
+                return field
+        return None
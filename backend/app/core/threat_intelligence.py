@@ -8,8 +8,9 @@ import json
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Set, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple, AsyncIterator, Iterable
 from dataclasses import dataclass
+from contextlib import asynccontextmanager
 from enum import Enum
 import hashlib
 import re
@@ -19,6 +20,9 @@ import requests
 import aiohttp
 from concurrent.futures import ThreadPoolExecutor
 
+from .ioc_correlation import ScalableThreatCorrelator
+from .advanced_caching import LRUCache
+
 logger = logging.getLogger(__name__)
 
 class ThreatLevel(Enum):
@@ -164,6 +168,15 @@ class ThreatIntelligenceProcessor:
         self.feed_sources = self._initialize_feed_sources()
         self.correlation_engine = ThreatCorrelationEngine()
         
+        # Enrichment results keyed by (source, ioc_type, value)
+        self.enrichment_cache = LRUCache(max_size=50000)
+        self.enrichment_cache_ttl = 3600
+        self.negative_cache_ttl = 600
+        # Semaphores belong to the loop they were first used on; reset when it changes
+        self.source_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.enrichment_stats = {'cache_hits': 0, 'cache_misses': 0, 'source_requests': 0}
+        
     def _initialize_feed_sources(self) -> Dict[str, Dict[str, Any]]:
         """Initialize threat intelligence feed sources"""
         return {
@@ -184,27 +197,34 @@ class ThreatIntelligenceProcessor:
             "virustotal": {
                 "name": "VirusTotal",
                 "url": "https://www.virustotal.com/api/v3",
+                "endpoint": "https://www.virustotal.com/vtapi/v2",
                 "api_key": None,
                 "enabled": False,
-                "priority": 9
+                "priority": 9,
+                "max_concurrency": 4
             },
             "threatcrowd": {
                 "name": "ThreatCrowd",
                 "url": "https://www.threatcrowd.org/searchApi/v2",
+                "endpoint": "https://www.threatcrowd.org/searchApi/v2",
                 "api_key": None,
                 "enabled": True,
-                "priority": 6
+                "priority": 6,
+                "max_concurrency": 5
             },
             "malware_bazaar": {
                 "name": "Malware Bazaar",
                 "url": "https://mb-api.abuse.ch/api/v1",
+                "endpoint": "https://mb-api.abuse.ch/api/v1/",
                 "api_key": None,
                 "enabled": True,
-                "priority": 7
+                "priority": 7,
+                "max_concurrency": 5
             }
         }
     
-    async def process_ioc(self, value: str, ioc_type: IOCType) -> ThreatIOC:
+    async def process_ioc(self, value: str, ioc_type: IOCType,
+                          session: Optional[aiohttp.ClientSession] = None) -> ThreatIOC:
         """Process and enrich a single IOC"""
         try:
             # Validate IOC format
@@ -225,7 +245,7 @@ class ThreatIntelligenceProcessor:
             )
             
             # Enrich IOC with threat intelligence
-            await self._enrich_ioc(ioc)
+            await self._enrich_ioc(ioc, session)
             
             # Map to MITRE techniques
             ioc.context['mitre_techniques'] = self.mitre_framework.map_ioc_to_techniques(ioc)
@@ -239,6 +259,87 @@ class ThreatIntelligenceProcessor:
             logger.error(f"Error processing IOC {value}: {e}")
             raise
     
+    def prepare_indicators(self, indicators: Iterable[Tuple[str, str]]) -> List[Tuple[str, IOCType]]:
+        """Validate indicators and drop duplicates, keeping first-seen order"""
+        prepared = []
+        seen: Set[Tuple[IOCType, str]] = set()
+        
+        for value, ioc_type_str in indicators:
+            try:
+                ioc_type = IOCType(ioc_type_str.lower())
+            except ValueError:
+                logger.warning(f"Failed to process IOC {value}: unknown IOC type {ioc_type_str}")
+                continue
+            
+            value = value.strip()
+            key = (ioc_type, value)
+            if key in seen:
+                continue
+            if not self._validate_ioc_format(value, ioc_type):
+                logger.warning(f"Failed to process IOC {value}: invalid IOC format")
+                continue
+            
+            seen.add(key)
+            prepared.append((value, ioc_type))
+        
+        return prepared
+    
+    def _reset_if_loop_changed(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.source_semaphores = {}
+            self._loop = loop
+    
+    async def process_iocs_stream(self, indicators: Iterable[Tuple[str, str]],
+                                  max_concurrency: int = 50) -> AsyncIterator[ThreatIOC]:
+        """Enrich indicators concurrently, yielding each IOC as soon as it is ready"""
+        async for ioc in self._process_prepared(self.prepare_indicators(indicators), max_concurrency):
+            yield ioc
+    
+    async def _process_prepared(self, prepared: List[Tuple[str, IOCType]],
+                                max_concurrency: int) -> AsyncIterator[ThreatIOC]:
+        """Enrich validated, de-duplicated indicators in completion order"""
+        if not prepared:
+            return
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async with aiohttp.ClientSession() as session:
+            async def process(value: str, ioc_type: IOCType) -> Optional[ThreatIOC]:
+                async with semaphore:
+                    try:
+                        return await self.process_ioc(value, ioc_type, session)
+                    except Exception as e:
+                        logger.warning(f"Failed to process IOC {value}: {e}")
+                        return None
+            
+            tasks = [asyncio.ensure_future(process(value, ioc_type)) for value, ioc_type in prepared]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    ioc = await next_done
+                    if ioc is not None:
+                        yield ioc
+            finally:
+                for task in tasks:
+                    task.cancel()
+    
+    async def process_iocs_bulk(self, indicators: Iterable[Tuple[str, str]],
+                                max_concurrency: int = 50) -> List[ThreatIOC]:
+        """Enrich indicators concurrently and return them in input order"""
+        prepared = self.prepare_indicators(indicators)
+        order = {(ioc_type, value): position for position, (value, ioc_type) in enumerate(prepared)}
+        
+        iocs = [ioc async for ioc in self._process_prepared(prepared, max_concurrency)]
+        iocs.sort(key=lambda ioc: order[(ioc.ioc_type, ioc.value)])
+        return iocs
+    
+    def get_enrichment_stats(self) -> Dict[str, Any]:
+        """Enrichment cache and source request counters"""
+        return {
+            **self.enrichment_stats,
+            'cache': self.enrichment_cache.get_stats()
+        }
+    
     def _validate_ioc_format(self, value: str, ioc_type: IOCType) -> bool:
         """Validate IOC format based on type"""
         try:
@@ -258,14 +359,14 @@ class ThreatIntelligenceProcessor:
         except:
             return False
     
-    async def _enrich_ioc(self, ioc: ThreatIOC):
+    async def _enrich_ioc(self, ioc: ThreatIOC, session: Optional[aiohttp.ClientSession] = None):
         """Enrich IOC with threat intelligence from multiple sources"""
         enrichment_tasks = []
         
         for source_id, source_config in self.feed_sources.items():
             if source_config['enabled']:
                 enrichment_tasks.append(
-                    self._enrich_from_source(ioc, source_id, source_config)
+                    self._enrich_from_source(ioc, source_id, source_config, session)
                 )
         
         if enrichment_tasks:
@@ -276,27 +377,61 @@ class ThreatIntelligenceProcessor:
                 if isinstance(result, dict) and not isinstance(result, Exception):
                     self._merge_enrichment_data(ioc, result)
     
-    async def _enrich_from_source(self, ioc: ThreatIOC, source_id: str, source_config: Dict) -> Dict:
+    async def _enrich_from_source(self, ioc: ThreatIOC, source_id: str, source_config: Dict,
+                                  session: Optional[aiohttp.ClientSession] = None) -> Dict:
         """Enrich IOC from specific threat intelligence source"""
+        cache_key = f"{source_id}:{ioc.ioc_type.value}:{ioc.value}"
+        cached = self.enrichment_cache.get(cache_key)
+        if cached is not None:
+            self.enrichment_stats['cache_hits'] += 1
+            return cached
+        self.enrichment_stats['cache_misses'] += 1
+        
+        self._reset_if_loop_changed()
+        semaphore = self.source_semaphores.get(source_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(source_config.get('max_concurrency', 5))
+            self.source_semaphores[source_id] = semaphore
+        
         try:
-            if source_id == "threatcrowd":
-                return await self._enrich_from_threatcrowd(ioc)
-            elif source_id == "virustotal":
-                return await self._enrich_from_virustotal(ioc, source_config.get('api_key'))
-            elif source_id == "malware_bazaar":
-                return await self._enrich_from_malware_bazaar(ioc)
-            else:
-                return {}
+            async with semaphore:
+                if source_id == "threatcrowd":
+                    result = await self._enrich_from_threatcrowd(ioc, session)
+                elif source_id == "virustotal":
+                    result = await self._enrich_from_virustotal(ioc, source_config.get('api_key'), session)
+                elif source_id == "malware_bazaar":
+                    result = await self._enrich_from_malware_bazaar(ioc, session)
+                else:
+                    return {}
         except Exception as e:
             logger.warning(f"Enrichment failed for {source_id}: {e}")
             return {}
+        
+        # Failed lookups (errors, timeouts, rate limits) are retried next time
+        if result is None:
+            return {}
+        
+        # "Not found" answers are cached for a shorter period
+        ttl = self.enrichment_cache_ttl if result else self.negative_cache_ttl
+        self.enrichment_cache.set(cache_key, result, ttl=ttl, tags=[source_id])
+        return result
+    
+    @asynccontextmanager
+    async def _source_session(self, session: Optional[aiohttp.ClientSession] = None):
+        """Borrow the caller's session, or open a short-lived one"""
+        if session is not None:
+            yield session
+        else:
+            async with aiohttp.ClientSession() as own_session:
+                yield own_session
     
-    async def _enrich_from_threatcrowd(self, ioc: ThreatIOC) -> Dict:
-        """Enrich IOC using ThreatCrowd API"""
-        base_url = "https://www.threatcrowd.org/searchApi/v2"
+    async def _enrich_from_threatcrowd(self, ioc: ThreatIOC,
+                                       session: Optional[aiohttp.ClientSession] = None) -> Optional[Dict]:
+        """Enrich IOC using ThreatCrowd API; None when the lookup itself failed"""
+        base_url = self.feed_sources['threatcrowd']['endpoint']
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._source_session(session) as session:
                 if ioc.ioc_type == IOCType.IP_ADDRESS:
                     url = f"{base_url}/ip/report/?ip={ioc.value}"
                 elif ioc.ioc_type == IOCType.DOMAIN:
@@ -304,29 +439,36 @@ class ThreatIntelligenceProcessor:
                 else:
                     return {}
                 
+                self.enrichment_stats['source_requests'] += 1
                 async with session.get(url) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await response.json(content_type=None)
+                        if not data:
+                            return {}
                         return {
                             'source': 'threatcrowd',
                             'data': data,
                             'confidence': 0.7 if data.get('response_code') == '1' else 0.3
                         }
+                    if response.status == 404:
+                        return {}
+                    logger.warning(f"ThreatCrowd returned HTTP {response.status}")
         except Exception as e:
             logger.warning(f"ThreatCrowd enrichment failed: {e}")
         
-        return {}
+        return None
     
-    async def _enrich_from_virustotal(self, ioc: ThreatIOC, api_key: str) -> Dict:
-        """Enrich IOC using VirusTotal API"""
+    async def _enrich_from_virustotal(self, ioc: ThreatIOC, api_key: str,
+                                      session: Optional[aiohttp.ClientSession] = None) -> Optional[Dict]:
+        """Enrich IOC using VirusTotal API; None when the lookup itself failed"""
         if not api_key:
             return {}
         
-        base_url = "https://www.virustotal.com/vtapi/v2"
+        base_url = self.feed_sources['virustotal']['endpoint']
         headers = {'apikey': api_key}
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._source_session(session) as session:
                 if ioc.ioc_type == IOCType.IP_ADDRESS:
                     url = f"{base_url}/ip-address/report"
                     params = {'ip': ioc.value}
@@ -339,45 +481,58 @@ class ThreatIntelligenceProcessor:
                 else:
                     return {}
                 
+                self.enrichment_stats['source_requests'] += 1
                 async with session.get(url, headers=headers, params=params) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await response.json(content_type=None)
+                        if not data:
+                            return {}
                         return {
                             'source': 'virustotal',
                             'data': data,
                             'confidence': 0.9 if data.get('response_code') == 1 else 0.4
                         }
+                    if response.status == 404:
+                        return {}
+                    logger.warning(f"VirusTotal returned HTTP {response.status}")
         except Exception as e:
             logger.warning(f"VirusTotal enrichment failed: {e}")
         
-        return {}
+        return None
     
-    async def _enrich_from_malware_bazaar(self, ioc: ThreatIOC) -> Dict:
-        """Enrich IOC using Malware Bazaar API"""
+    async def _enrich_from_malware_bazaar(self, ioc: ThreatIOC,
+                                          session: Optional[aiohttp.ClientSession] = None) -> Optional[Dict]:
+        """Enrich IOC using Malware Bazaar API; None when the lookup itself failed"""
         if ioc.ioc_type != IOCType.FILE_HASH:
             return {}
         
-        url = "https://mb-api.abuse.ch/api/v1/"
+        url = self.feed_sources['malware_bazaar']['endpoint']
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with self._source_session(session) as session:
                 data = {
                     'query': 'get_info',
                     'hash': ioc.value
                 }
                 
+                self.enrichment_stats['source_requests'] += 1
                 async with session.post(url, data=data) as response:
                     if response.status == 200:
-                        result = await response.json()
+                        result = await response.json(content_type=None)
+                        if not result:
+                            return {}
                         return {
                             'source': 'malware_bazaar',
                             'data': result,
                             'confidence': 0.8 if result.get('query_status') == 'ok' else 0.2
                         }
+                    if response.status == 404:
+                        return {}
+                    logger.warning(f"Malware Bazaar returned HTTP {response.status}")
         except Exception as e:
             logger.warning(f"Malware Bazaar enrichment failed: {e}")
         
-        return {}
+        return None
     
     def _merge_enrichment_data(self, ioc: ThreatIOC, enrichment: Dict):
         """Merge enrichment data into IOC"""
@@ -431,6 +586,7 @@ class ThreatCorrelationEngine:
     def __init__(self):
         self.correlation_rules = self._load_correlation_rules()
         self.threat_clusters = {}
+        self.correlator = ScalableThreatCorrelator(similarity_threshold=0.6)
     
     def _load_correlation_rules(self) -> List[Dict]:
         """Load threat correlation rules"""
@@ -457,32 +613,7 @@ class ThreatCorrelationEngine:
     
     def correlate_threats(self, iocs: List[ThreatIOC]) -> Dict[str, List[ThreatIOC]]:
         """Correlate threats and group related IOCs"""
-        clusters = {}
-        
-        for ioc in iocs:
-            cluster_id = self._find_or_create_cluster(ioc, clusters)
-            if cluster_id not in clusters:
-                clusters[cluster_id] = []
-            clusters[cluster_id].append(ioc)
-        
-        return clusters
-    
-    def _find_or_create_cluster(self, ioc: ThreatIOC, existing_clusters: Dict) -> str:
-        """Find existing cluster or create new one"""
-        for cluster_id, cluster_iocs in existing_clusters.items():
-            if self._should_cluster_together(ioc, cluster_iocs):
-                return cluster_id
-        
-        # Create new cluster
-        return f"cluster_{len(existing_clusters) + 1}"
-    
-    def _should_cluster_together(self, ioc: ThreatIOC, cluster_iocs: List[ThreatIOC]) -> bool:
-        """Determine if IOC should be clustered with existing IOCs"""
-        for cluster_ioc in cluster_iocs:
-            similarity_score = self._calculate_similarity(ioc, cluster_ioc)
-            if similarity_score > 0.6:  # Clustering threshold
-                return True
-        return False
+        return self.correlator.correlate(iocs)
     
     def _calculate_similarity(self, ioc1: ThreatIOC, ioc2: ThreatIOC) -> float:
         """Calculate similarity score between two IOCs"""
@@ -885,16 +1016,7 @@ class ThreatIntelligencePlatform:
     async def analyze_indicators(self, indicators: List[Tuple[str, str]]) -> Dict[str, Any]:
         """Analyze list of indicators"""
         try:
-            iocs = []
-            
-            for value, ioc_type_str in indicators:
-                try:
-                    ioc_type = IOCType(ioc_type_str.lower())
-                    ioc = await self.processor.process_ioc(value, ioc_type)
-                    iocs.append(ioc)
-                except Exception as e:
-                    logger.warning(f"Failed to process IOC {value}: {e}")
-                    continue
+            iocs = await self.processor.process_iocs_bulk(indicators)
             
             # Generate comprehensive analysis
             analysis_result = {
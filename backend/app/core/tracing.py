@@ -0,0 +1,385 @@
+"""
+Request Tracing
+===============
+
+Lightweight in-process tracing that ties a slow request to the scanner,
+cache lookup, DB statement or aggregation stage that made it slow:
+- Spans propagated through ``contextvars``, so child asyncio tasks (and
+  ``asyncio.wait_for``/``gather``) attach to the span that created them
+- Spans are only recorded inside a trace; outside one ``span()`` is a
+  shared no-op, which keeps the overhead low enough to leave on
+- Finished traces go to a fixed-size ring buffer exporter
+- Flame-style breakdowns: span tree with self times, self time by kind
+  and folded stacks (``root;child;grandchild <microseconds>``)
+- ASGI middleware that opens one trace per HTTP request
+- SQLAlchemy hooks for statement and commit spans
+
+Environment: ``TRACING_ENABLED`` (default true), ``TRACE_BUFFER_SIZE``
+(finished traces kept, default 200), ``TRACE_MAX_SPANS`` (per trace,
+default 1000).
+"""
+
+import functools
+import inspect
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable, Deque
+
+logger = logging.getLogger(__name__)
+
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation; times are ``perf_counter`` seconds"""
+
+    __slots__ = ("name", "kind", "span_id", "parent_id", "trace", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, kind: str, trace: "Trace", parent_id: Optional[int],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.trace = trace
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.parent_id is None:
+            self.trace.finish()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "offset_ms": round((self.start - self.trace.root.start) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """All spans recorded under one root span"""
+
+    __slots__ = ("trace_id", "tracer", "root", "spans", "dropped", "started_at")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, attributes: Optional[Dict[str, Any]]):
+        self.trace_id = next(_ids)
+        self.tracer = tracer
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.started_at = time.time()
+        self.root = Span(name, kind, self, None, attributes)
+        self.spans.append(self.root)
+
+    def add(self, span: Span) -> bool:
+        if len(self.spans) >= self.tracer.max_spans:
+            self.dropped += 1
+            return False
+        self.spans.append(span)
+        return True
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+    def finish(self):
+        self.tracer.exporter.export(self)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "kind": self.root.kind,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped,
+            "attributes": self.root.attributes,
+            "error": self.root.error,
+        }
+
+    def flame(self) -> Dict[str, Any]:
+        """Span tree with self times, self time per kind and folded stacks"""
+        children: Dict[int, List[Span]] = defaultdict(list)
+        for span in self.spans[1:]:
+            children[span.parent_id].append(span)
+
+        by_kind: Dict[str, float] = defaultdict(float)
+        folded: Dict[str, float] = defaultdict(float)
+
+        def build(span: Span, stack: str) -> Dict[str, Any]:
+            kids = sorted(children.get(span.span_id, []), key=lambda s: s.start)
+            # Concurrent children can add up to more than the parent; clamp
+            self_time = max(span.duration - sum(kid.duration for kid in kids), 0.0)
+            frame = f"{stack};{span.name}" if stack else span.name
+            by_kind[span.kind] += self_time
+            folded[frame] += self_time
+            return {
+                "name": span.name,
+                "kind": span.kind,
+                "duration_ms": round(span.duration * 1000, 3),
+                "self_ms": round(self_time * 1000, 3),
+                "attributes": span.attributes,
+                "error": span.error,
+                "children": [build(kid, frame) for kid in kids],
+            }
+
+        tree = build(self.root, "")
+        return {
+            **self.summary(),
+            "tree": tree,
+            "self_time_by_kind_ms": {
+                kind: round(seconds * 1000, 3)
+                for kind, seconds in sorted(by_kind.items(), key=lambda item: -item[1])
+            },
+            "folded": [f"{frame} {int(seconds * 1e6)}" for frame, seconds in folded.items()],
+        }
+
+
+class RingBufferExporter:
+    """Keeps the most recent finished traces in memory"""
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self.traces: Deque[Trace] = deque(maxlen=capacity)
+        self.exported = 0
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self.traces.append(trace)
+            self.exported += 1
+
+    def snapshot(self) -> List[Trace]:
+        with self._lock:
+            return list(self.traces)
+
+    def slowest(self, n: int = 10, kind: Optional[str] = None) -> List[Trace]:
+        traces = [t for t in self.snapshot() if kind is None or t.root.kind == kind]
+        return sorted(traces, key=lambda t: t.duration, reverse=True)[:n]
+
+    def recent(self, n: int = 10) -> List[Trace]:
+        return self.snapshot()[-n:][::-1]
+
+    def clear(self):
+        with self._lock:
+            self.traces.clear()
+
+
+class _NoopSpan:
+    """Returned outside a trace; every operation is a no-op"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """Context manager that makes a span current and finishes it on exit"""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.finish(exc)
+        try:
+            _current_span.reset(self.token)
+        except ValueError:
+            # Exited from a different context than it was entered in
+            _current_span.set(None)
+        return False
+
+
+class Tracer:
+    """Creates traces and spans and hands finished traces to the exporter"""
+
+    def __init__(self, exporter: Optional[RingBufferExporter] = None, enabled: Optional[bool] = None,
+                 max_spans: Optional[int] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("TRACING_ENABLED", "true").lower() != "false"
+        self.exporter = exporter or RingBufferExporter(int(os.getenv("TRACE_BUFFER_SIZE", "200")))
+        self.max_spans = max_spans or int(os.getenv("TRACE_MAX_SPANS", "1000"))
+
+    def trace(self, name: str, kind: str = "request", **attributes):
+        """Open a new trace; use as a context manager"""
+        if not self.enabled:
+            return _NOOP
+        return _SpanScope(Trace(self, name, kind, attributes).root)
+
+    def span(self, name: str, kind: str = "internal", **attributes):
+        """Child span of the current span; a no-op outside a trace"""
+        parent = _current_span.get()
+        if parent is None or parent.end is not None or not self.enabled:
+            return _NOOP
+        trace = parent.trace
+        span = Span(name, kind, trace, parent.span_id, attributes)
+        if not trace.add(span):
+            return _NOOP
+        return _SpanScope(span)
+
+    def start_span(self, name: str, kind: str = "internal", **attributes) -> Optional[Span]:
+        """Child span without making it current; call ``finish()`` yourself"""
+        parent = _current_span.get()
+        if parent is None or parent.end is not None or not self.enabled:
+            return None
+        span = Span(name, kind, parent.trace, parent.span_id, attributes)
+        return span if parent.trace.add(span) else None
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffer_capacity": self.exporter.capacity,
+            "buffered_traces": len(self.exporter.traces),
+            "exported_traces": self.exporter.exported,
+            "max_spans_per_trace": self.max_spans,
+        }
+
+
+# Application-wide tracer
+tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return tracer
+
+
+def span(name: str, kind: str = "internal", **attributes):
+    """Child span of the current span on the global tracer"""
+    return tracer.span(name, kind, **attributes)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal"):
+    """Decorator wrapping a sync or async function in a span"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware opening one trace per HTTP request"""
+
+    def __init__(self, app, tracer: Optional[Tracer] = None, exclude_prefixes: tuple = ("/debug/traces",)):
+        self.app = app
+        self.tracer = tracer or get_tracer()
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http" or not self.tracer.enabled \
+                or scope.get("path", "").startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope.get("method", "GET"), scope.get("path", "")
+        with self.tracer.trace(f"{method} {path}", "http", method=method, path=path) as root:
+            async def send_wrapper(message):
+                if message.get("type") == "http.response.start":
+                    root.set(status_code=message.get("status"))
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+_sqlalchemy_instrumented = False
+
+
+def instrument_sqlalchemy():
+    """Record DB statements and commits as spans for every engine and session"""
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    try:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        from sqlalchemy.orm import Session
+    except ImportError:
+        return
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.start_span("db.execute", "db", statement=statement.split(None, 1)[0].upper() if statement else "")
+        conn.info.setdefault("_trace_spans", []).append(span)
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("_trace_spans")
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.finish()
+
+    @event.listens_for(Engine, "handle_error")
+    def _execute_error(context):
+        spans = context.connection.info.get("_trace_spans") if context.connection is not None else None
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.finish(context.original_exception)
+
+    @event.listens_for(Session, "before_commit")
+    def _before_commit(session):
+        session.info["_trace_commit"] = tracer.start_span("db.commit", "db")
+
+    def _end_commit(session):
+        span = session.info.pop("_trace_commit", None)
+        if span is not None:
+            span.finish()
+
+    event.listen(Session, "after_commit", _end_commit)
+    event.listen(Session, "after_rollback", _end_commit)
+    _sqlalchemy_instrumented = True
@@ -8,6 +8,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app.core.tracing import instrument_sqlalchemy
+
 logger = logging.getLogger(__name__)
 
 # Get database URL from environment variable
@@ -25,6 +27,9 @@ else:
     # PostgreSQL or other databases
     engine = create_engine(DATABASE_URL, echo=False)
 
+# Record statements and commits as spans of the current request trace
+instrument_sqlalchemy()
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -41,10 +46,114 @@ def get_db():
     finally:
         db.close()
 
+# Columns added to existing tables after their first release; create_all
+# only creates missing tables, so these are applied with ALTER TABLE
+ADDED_COLUMNS = {
+    "scanner_metrics": {"total_findings": "INTEGER DEFAULT 0"},
+    "entities": {
+        "normalized_value": "VARCHAR(500)",
+        "first_seen": "TIMESTAMP WITH TIME ZONE",
+        "last_seen": "TIMESTAMP WITH TIME ZONE",
+    },
+}
+
+# Indexes (and unique constraints, as unique indexes) added to existing
+# tables; created after ADDED_COLUMNS and the backfills below
+ADDED_INDEXES = {
+    "entities": [
+        ("uq_entity_type_value", ("entity_type", "normalized_value"), True),
+    ],
+    "entity_relationships": [
+        ("uq_entity_relationship", ("source_entity_id", "target_entity_id", "relationship_type"), True),
+        ("idx_entity_relationship_target", ("target_entity_id",), False),
+    ],
+}
+
+def _backfill_entities(connection):
+    """
+    Fill normalized_value and first/last seen for entities stored before the entity index
+    """
+    from sqlalchemy import text
+    from app.core.entity_index import EntityIndex
+    connection.execute(text(
+        "UPDATE entities SET first_seen = created_at, last_seen = created_at WHERE first_seen IS NULL"
+    ))
+    taken = {tuple(row) for row in connection.execute(text(
+        "SELECT entity_type, normalized_value FROM entities WHERE normalized_value IS NOT NULL"
+    ))}
+    index = EntityIndex(session_factory=SessionLocal, hot_size=1)
+    updates = []
+    for entity_id, entity_type, name in connection.execute(text(
+        "SELECT id, entity_type, name FROM entities WHERE normalized_value IS NULL ORDER BY id"
+    )).fetchall():
+        key = (entity_type, index.normalize(entity_type, name))
+        # The oldest row keeps a duplicated value; later ones stay NULL, which never conflicts
+        if key[1] is not None and key not in taken:
+            taken.add(key)
+            updates.append({"id": entity_id, "value": key[1]})
+    if updates:
+        connection.execute(text("UPDATE entities SET normalized_value = :value WHERE id = :id"), updates)
+        logger.info(f"Backfilled normalized_value for {len(updates)} entities")
+
+def _dedupe_relationships(connection):
+    """
+    Drop repeated relationship edges so the unique index can be created
+    """
+    from sqlalchemy import text
+    result = connection.execute(text(
+        "DELETE FROM entity_relationships WHERE id NOT IN ("
+        "SELECT MIN(id) FROM entity_relationships "
+        "GROUP BY source_entity_id, target_entity_id, relationship_type)"
+    ))
+    if result.rowcount:
+        logger.info(f"Removed {result.rowcount} duplicate entity relationships")
+
+# Data fixes run before a table's ADDED_INDEXES are created
+INDEX_BACKFILLS = {
+    "entities": _backfill_entities,
+    "entity_relationships": _dedupe_relationships,
+}
+
+def upgrade_schema(bind=None):
+    """
+    Add any ADDED_COLUMNS and ADDED_INDEXES missing from existing tables
+    """
+    from sqlalchemy import inspect, text
+    bind = bind or engine
+    with bind.begin() as connection:
+        # Inspect through the same connection; a second checkout could reset this transaction
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in present:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"Added column {table}.{name}")
+
+        for table, indexes in ADDED_INDEXES.items():
+            if table not in tables:
+                continue
+            present = {index["name"] for index in inspector.get_indexes(table)}
+            present |= {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+            missing = [index for index in indexes if index[0] not in present]
+            if not missing:
+                continue
+            if any(unique for _, _, unique in missing) and table in INDEX_BACKFILLS:
+                INDEX_BACKFILLS[table](connection)
+            for name, columns, unique in missing:
+                connection.execute(text(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"
+                ))
+                logger.info(f"Created index {table}.{name}")
+
 def init_db():
     """
     Initialize database - create all tables
     """
     from app.db import models  # Import all models
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     logger.info("Database tables created successfully")
\ No newline at end of file
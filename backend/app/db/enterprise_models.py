@@ -241,6 +241,10 @@ class IntelligenceQuery(Base, TimestampMixin, SoftDeleteMixin):
     __table_args__ = (
         Index('idx_query_user_status', 'user_id', 'status'),
         Index('idx_query_type_status', 'query_type', 'status'),
+        # Keyset pagination of a user's queries, optionally filtered by status or type
+        Index('idx_query_user_created', 'user_id', 'is_deleted', 'created_at', 'id'),
+        Index('idx_query_user_status_created', 'user_id', 'is_deleted', 'status', 'created_at', 'id'),
+        Index('idx_query_user_type_created', 'user_id', 'is_deleted', 'query_type', 'created_at', 'id'),
         Index('idx_query_target_hash', 'target_hash'),
         Index('idx_query_created', 'created_at'),
         Index('idx_query_scheduled', 'scheduled_at'),
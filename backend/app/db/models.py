@@ -4,7 +4,10 @@ Database Models for Intelligence Gathering Platform
 
 import enum
 from typing import Optional
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, JSON, Enum, Float, LargeBinary
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Integer, String, Text, JSON, Enum, Float, LargeBinary,
+    Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -139,10 +142,38 @@ class Entity(Base):
     id = Column(Integer, primary_key=True, index=True)
     entity_type = Column(String(50), nullable=False)  # person, organization, etc.
     name = Column(String(200), nullable=False)
+    normalized_value = Column(String(500))  # lookup key within entity_type
     description = Column(Text)
     entity_metadata = Column(JSON)
     confidence_score = Column(Float)
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("entity_type", "normalized_value", name="uq_entity_type_value"),
+    )
+
+
+class EntityOccurrence(Base):
+    """Postings list: which queries and sources an entity was found in."""
+    __tablename__ = "entity_occurrences"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity_id = Column(Integer, ForeignKey("entities.id"), nullable=False)
+    query_id = Column(Integer, ForeignKey("queries.id"))
+    source = Column(String(100), nullable=False)
+    confidence_score = Column(Float)
+    seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("entity_id", "query_id", "source", name="uq_entity_occurrence"),
+        # NULLs never conflict in the constraint above, so postings indexed
+        # outside any query are deduplicated by a partial unique index
+        Index("uq_entity_occurrence_unscoped", "entity_id", "source", unique=True,
+              sqlite_where=query_id.is_(None), postgresql_where=query_id.is_(None)),
+        Index("idx_entity_occurrence_query", "query_id"),
+    )
 
 
 class EntityRelationship(Base):
@@ -155,6 +186,12 @@ class EntityRelationship(Base):
     confidence_score = Column(Float)
     relationship_metadata = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("source_entity_id", "target_entity_id", "relationship_type",
+                         name="uq_entity_relationship"),
+        Index("idx_entity_relationship_target", "target_entity_id"),
+    )
 
 
 class Subscription(Base):
@@ -215,10 +252,11 @@ class ScannerMetrics(Base):
     __tablename__ = "scanner_metrics"
     
     id = Column(Integer, primary_key=True, index=True)
-    scanner_name = Column(String(100), nullable=False)
+    scanner_name = Column(String(100), nullable=False, index=True)
     requests_made = Column(Integer, default=0)
     successful_requests = Column(Integer, default=0)
     failed_requests = Column(Integer, default=0)
+    total_findings = Column(Integer, default=0)
     average_response_time = Column(Float)
     last_used = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
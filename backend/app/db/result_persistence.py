@@ -0,0 +1,212 @@
+"""
+Scan Result Persistence
+=======================
+
+Buffered persistence for scanner outcomes:
+- Scan records are staged in memory while scanners run
+- One bulk insert and one commit per query (or per flush window)
+- Optional background flushing for long-running pipelines
+- Commit count and latency instrumentation
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Hashable, Callable
+
+try:
+    from sqlalchemy import insert
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    SQLALCHEMY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+async def _maybe_await(value):
+    """Support both AsyncSession and plain Session methods"""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+@dataclass
+class PersistenceMetrics:
+    """Commit counters and latency for result persistence"""
+    commits: int = 0
+    failed_commits: int = 0
+    rows_written: int = 0
+    commit_seconds_total: float = 0.0
+    commit_seconds_max: float = 0.0
+    last_commit_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    max_samples: int = 1000
+
+    def record_commit(self, seconds: float, rows: int):
+        self.commits += 1
+        self.rows_written += rows
+        self.commit_seconds_total += seconds
+        self.commit_seconds_max = max(self.commit_seconds_max, seconds)
+        self.last_commit_seconds = seconds
+        self.latencies.append(seconds)
+        if len(self.latencies) > self.max_samples:
+            del self.latencies[:len(self.latencies) - self.max_samples]
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "commits": self.commits,
+            "failed_commits": self.failed_commits,
+            "rows_written": self.rows_written,
+            "rows_per_commit": self.rows_written / self.commits if self.commits else 0.0,
+            "avg_commit_ms": self.commit_seconds_total / self.commits * 1000 if self.commits else 0.0,
+            "p95_commit_ms": p95 * 1000,
+            "max_commit_ms": self.commit_seconds_max * 1000,
+            "last_commit_ms": self.last_commit_seconds * 1000,
+        }
+
+
+# Process-wide counters shared by all writers
+persistence_metrics = PersistenceMetrics()
+
+
+def get_persistence_metrics() -> Dict[str, Any]:
+    """Get result persistence metrics"""
+    return persistence_metrics.to_dict()
+
+
+class ScanResultWriter:
+    """Buffers scan records and writes them in a single transaction.
+
+    ORM objects passed to ``stage`` are kept in memory and mutated in place as
+    the scan progresses; only their final state is inserted on ``flush``.
+    Plain row dicts passed to ``stage_rows`` are written with one bulk
+    ``INSERT``. Staging a record again under the same key replaces the pending
+    one, so repeated status transitions collapse into a single write.
+
+    Use as ``async with ScanResultWriter(db) as writer`` for one commit per
+    query, or call ``start()`` to flush on a time window.
+    """
+
+    def __init__(self, db, max_pending: int = 500, flush_interval: Optional[float] = None,
+                 metrics: Optional[PersistenceMetrics] = None,
+                 after_commit: Optional[Callable[[List[Any]], None]] = None):
+        self.db = db
+        # Called with the committed ORM objects, e.g. to queue search indexing
+        self.after_commit = after_commit
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.metrics = metrics or persistence_metrics
+        self._objects: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._rows: Dict[Any, "OrderedDict[Hashable, Dict[str, Any]]"] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._objects) + sum(len(rows) for rows in self._rows.values())
+
+    def stage(self, record, key: Optional[Hashable] = None):
+        """Stage an ORM object for insertion on the next flush"""
+        self._objects[key if key is not None else id(record)] = record
+        self._maybe_wake()
+        return record
+
+    def stage_rows(self, model, rows: List[Dict[str, Any]], key_field: Optional[str] = None):
+        """Stage plain row mappings for a bulk insert into ``model``"""
+        pending = self._rows.setdefault(model, OrderedDict())
+        for row in rows:
+            key = row.get(key_field) if key_field else None
+            pending[key if key is not None else id(row)] = row
+        self._maybe_wake()
+
+    def pending_records(self) -> List[Any]:
+        """Staged ORM objects, for in-memory progress reporting"""
+        return list(self._objects.values())
+
+    async def flush(self) -> int:
+        """Write everything staged in one transaction; returns rows written"""
+        async with self._lock:
+            objects = list(self._objects.values())
+            rows = {model: list(pending.values()) for model, pending in self._rows.items() if pending}
+            self._objects.clear()
+            self._rows.clear()
+
+            row_count = len(objects) + sum(len(mappings) for mappings in rows.values())
+            if not row_count:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                if objects:
+                    self.db.add_all(objects)
+                for model, mappings in rows.items():
+                    await _maybe_await(self.db.execute(insert(model), mappings))
+                await _maybe_await(self.db.commit())
+            except Exception:
+                self.metrics.failed_commits += 1
+                await _maybe_await(self.db.rollback())
+                raise
+
+            self.metrics.record_commit(time.perf_counter() - started, row_count)
+            if self.after_commit is not None and objects:
+                self.after_commit(objects)
+            return row_count
+
+    async def rollback(self):
+        """Discard staged records and roll back the session"""
+        async with self._lock:
+            self._objects.clear()
+            self._rows.clear()
+            await _maybe_await(self.db.rollback())
+
+    def start(self):
+        """Flush periodically and whenever ``max_pending`` records are staged"""
+        if self._flusher is None:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop background flushing and write anything still staged"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+            self._wakeup = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Background result flush failed: {e}")
+
+    def _maybe_wake(self):
+        if self._wakeup is not None and len(self) >= self.max_pending:
+            self._wakeup.set()
+
+    async def __aenter__(self) -> "ScanResultWriter":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.close()
+        else:
+            if self._flusher is not None:
+                self._flusher.cancel()
+                self._flusher = None
+            await self.rollback()
+        return False
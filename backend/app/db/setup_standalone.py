@@ -27,12 +27,13 @@ def setup_standalone_database():
         logger.info(f"Setting up SQLite database at: {db_path}")
         
         # Import database components
-        from app.db.database import engine, Base
+        from app.db.database import engine, Base, upgrade_schema
         from app.db import models
         
-        # Create all tables
+        # Create all tables, then upgrade tables from earlier releases
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
         
         # Create initial admin user
         from sqlalchemy.orm import sessionmaker
@@ -329,6 +329,7 @@ async def lifespan(app: FastAPI):
     """Enterprise application lifespan manager with comprehensive startup and shutdown"""
     startup_start = time.time()
     logger.info("🚀 Starting Intelligence Gathering Platform Enterprise Edition...")
+    compute_warmup = None
     
     try:
         # Initialize all systems with dependency order
@@ -368,6 +369,12 @@ async def lifespan(app: FastAPI):
             status_emoji = "✅" if status else "❌"
             logger.info(f"  {status_emoji} {system}: {'OK' if status else 'FAILED'}")
         
+        # Warm the shared process/thread pools for CPU-bound stages without
+        # holding up readiness
+        from app.core.compute_service import get_compute_service
+        compute_warmup = asyncio.create_task(get_compute_service().start())
+        logger.info("✅ Compute service warming up")
+        
         yield  # Application runs here
         
     except Exception as e:
@@ -384,6 +391,17 @@ async def lifespan(app: FastAPI):
         # - Flush cache
         # - Save metrics
         # - Stop background tasks
+        if compute_warmup is not None:
+            compute_warmup.cancel()
+            from app.core.compute_service import get_compute_service
+            get_compute_service().shutdown(wait=False)
+        from app.scanners.metadata_workers import shutdown_metadata_worker_pool
+        shutdown_metadata_worker_pool()
+        try:
+            from app.core.image_similarity_index import save_image_similarity_index
+            await save_image_similarity_index()
+        except Exception as e:
+            logger.warning(f"⚠️ Image similarity index not saved: {e}")
         
         logger.info("✅ Platform shutdown completed gracefully")
 
@@ -444,6 +462,10 @@ def add_middleware(app: FastAPI):
     
     # GZip compression for better performance
     app.add_middleware(GZipMiddleware, minimum_size=1000)
+    
+    # Request tracing (added last so it wraps the whole stack)
+    from app.core.tracing import TracingMiddleware
+    app.add_middleware(TracingMiddleware)
 
 
 def add_exception_handlers(app: FastAPI):
@@ -527,6 +549,10 @@ try:
 except ImportError:
     logger.warning("API routes not available - running in minimal mode")
 
+# Request traces with flame-style breakdowns (DEBUG_ROUTES_ENABLED only)
+from app.api.debug import include_debug_router
+include_debug_router(app)
+
 if __name__ == "__main__":
     import uvicorn
     
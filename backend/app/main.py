@@ -5,6 +5,7 @@ Optimized for Docker, standalone, and Termux deployments
 """
 
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import Dict, Any
@@ -44,25 +45,46 @@ async def lifespan(app):
         register_scanners()
         logger.info("✅ Scanner modules registered")
         
-        # Initialize security system
-        from app.core.enhanced_security import SecurityManager
-        security = SecurityManager()
-        logger.info("✅ Security system initialized")
-        
-        # Initialize performance optimizer
-        from app.core.performance_optimizer import PerformanceOptimizer
-        performance = PerformanceOptimizer()
-        logger.info("✅ Performance optimizer initialized")
+        # Security and performance subsystems are built on first use by
+        # the endpoints that need them, keeping worker boot cheap
         
     except Exception as e:
         logger.error(f"❌ Startup failed: {e}")
         raise
     
+    # Start incremental search indexing (optional - search degrades gracefully)
+    search_indexer = None
+    try:
+        from app.core.search_index import get_search_indexer
+        search_indexer = get_search_indexer()
+        search_indexer.start()
+        logger.info("✅ Search indexer started")
+    except Exception as e:
+        logger.warning(f"⚠️ Search indexer not started: {e}")
+    
+    # Warm the shared process/thread pools for CPU-bound stages without
+    # holding up readiness
+    from app.core.compute_service import get_compute_service
+    compute = get_compute_service()
+    compute_warmup = asyncio.create_task(compute.start())
+    logger.info("✅ Compute service warming up")
+    
     # Application is running
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Intelligence Gathering Platform...")
+    if search_indexer is not None:
+        await search_indexer.stop()
+    compute_warmup.cancel()
+    compute.shutdown(wait=False)
+    from app.scanners.metadata_workers import shutdown_metadata_worker_pool
+    shutdown_metadata_worker_pool()
+    try:
+        from app.core.image_similarity_index import save_image_similarity_index
+        await save_image_similarity_index()
+    except Exception as e:
+        logger.warning(f"⚠️ Image similarity index not saved: {e}")
 
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -120,6 +142,14 @@ def create_application() -> FastAPI:
             allowed_hosts=["*"]  # Configure for production
         )
     
+    # Request tracing (added last so it wraps the whole stack)
+    from app.core.tracing import TracingMiddleware
+    app.add_middleware(TracingMiddleware)
+    
+    # Request traces with flame-style breakdowns (DEBUG_ROUTES_ENABLED only)
+    from app.api.debug import include_debug_router
+    include_debug_router(app)
+    
     # Include API router
     try:
         from app.api import api_router
@@ -24,7 +24,6 @@ from datetime import datetime, timedelta
 from urllib.parse import urlencode, quote_plus
 import re
 import random
-from concurrent.futures import ThreadPoolExecutor
 import ssl
 import certifi
 
@@ -80,7 +79,6 @@ class BaseAPIScanner(BaseScannerModule):
         self.config = config
         self.rate_limiter = RateLimiter(config.rate_limit)
         self.session = None
-        self.executor = ThreadPoolExecutor(max_workers=5)
         
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create HTTP session with proper SSL context"""
@@ -173,12 +171,13 @@ class BaseAPIScanner(BaseScannerModule):
         """Clean up resources"""
         if self.session and not self.session.closed:
             await self.session.close()
-        self.executor.shutdown(wait=True)
 
 
 class ClearbitAPIScanner(BaseAPIScanner):
     """Clearbit Person and Company API scanner"""
     
+    handles = frozenset({'email', 'name', 'domain'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://person-stream.clearbit.com/v2/combined/find",
@@ -188,9 +187,6 @@ class ClearbitAPIScanner(BaseAPIScanner):
         )
         super().__init__("clearbit_scanner", config, "Clearbit person and company enrichment")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['email', 'name', 'domain']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan using Clearbit API"""
         try:
@@ -296,6 +292,8 @@ class ClearbitAPIScanner(BaseAPIScanner):
 class HunterIOScanner(BaseAPIScanner):
     """Hunter.io email finder and verifier"""
     
+    handles = frozenset({'email', 'domain'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://api.hunter.io/v2",
@@ -305,9 +303,6 @@ class HunterIOScanner(BaseAPIScanner):
         )
         super().__init__("hunter_io_scanner", config, "Hunter.io email finder and verification")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['email', 'domain']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan using Hunter.io API"""
         try:
@@ -437,6 +432,8 @@ class HunterIOScanner(BaseAPIScanner):
 class TrueCallerScanner(BaseAPIScanner):
     """TrueCaller phone number lookup scanner"""
     
+    handles = frozenset({'phone'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://api.truecaller.com/v1",
@@ -446,9 +443,6 @@ class TrueCallerScanner(BaseAPIScanner):
         )
         super().__init__("truecaller_scanner", config, "TrueCaller phone number lookup")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type == 'phone'
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan phone number using TrueCaller API"""
         try:
@@ -524,6 +518,8 @@ class TrueCallerScanner(BaseAPIScanner):
 class WhitePagesScanner(BaseAPIScanner):
     """WhitePages identity check scanner"""
     
+    handles = frozenset({'phone', 'name', 'address'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://proapi.whitepages.com/3.0",
@@ -533,9 +529,6 @@ class WhitePagesScanner(BaseAPIScanner):
         )
         super().__init__("whitepages_scanner", config, "WhitePages identity verification")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['phone', 'name', 'address']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan using WhitePages API"""
         try:
@@ -622,6 +615,8 @@ class WhitePagesScanner(BaseAPIScanner):
 class PipleSearchScanner(BaseAPIScanner):
     """Pipl people search engine scanner"""
     
+    handles = frozenset({'email', 'phone', 'name'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://api.pipl.com/search",
@@ -631,9 +626,6 @@ class PipleSearchScanner(BaseAPIScanner):
         )
         super().__init__("pipl_scanner", config, "Pipl comprehensive people search")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['email', 'phone', 'name']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan using Pipl API"""
         try:
@@ -739,6 +731,8 @@ class PipleSearchScanner(BaseAPIScanner):
 class HaveIBeenPwnedScanner(BaseAPIScanner):
     """Have I Been Pwned breach checker"""
     
+    handles = frozenset({'email'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://haveibeenpwned.com/api/v3",
@@ -749,9 +743,6 @@ class HaveIBeenPwnedScanner(BaseAPIScanner):
         )
         super().__init__("hibp_scanner", config, "Have I Been Pwned breach database")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type == 'email'
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Check email against breach database"""
         try:
@@ -827,6 +818,8 @@ class HaveIBeenPwnedScanner(BaseAPIScanner):
 class ShodanScanner(BaseAPIScanner):
     """Shodan IoT and network device scanner"""
     
+    handles = frozenset({'ip', 'domain', 'network'})
+    
     def __init__(self):
         config = APIConfig(
             base_url="https://api.shodan.io",
@@ -836,9 +829,6 @@ class ShodanScanner(BaseAPIScanner):
         )
         super().__init__("shodan_scanner", config, "Shodan network and IoT device search")
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['ip', 'domain', 'network']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan using Shodan API"""
         try:
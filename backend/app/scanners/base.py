@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, FrozenSet, Tuple
 import asyncio
+import functools
+import importlib
 import logging
 from datetime import datetime
 
@@ -8,6 +10,8 @@ from datetime import datetime
 try:
     from sqlalchemy.ext.asyncio import AsyncSession
     from app.db.models import Query, ScanResult, ScannerType, QueryStatus
+    from app.db.result_persistence import ScanResultWriter
+    from app.core.search_index import get_search_indexer
     SQLALCHEMY_AVAILABLE = True
 except ImportError:
     SQLALCHEMY_AVAILABLE = False
@@ -59,17 +63,62 @@ except ImportError:
             self.relevance_score = 0.0
             self.completed_at = None
     
+    class MockScanResultWriter:
+        def __init__(self, db, after_commit=None):
+            self.db = db
+        def stage(self, record, key=None):
+            pass
+        async def flush(self):
+            await self.db.commit()
+            return 0
+    
     Query = MockQuery
     ScanResult = MockScanResult
     ScannerType = MockScannerType
     QueryStatus = MockQueryStatus
+    ScanResultWriter = MockScanResultWriter
+
+from app.core.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+# Declares a scanner that accepts every query type
+ANY_QUERY_TYPE: FrozenSet[str] = frozenset({"*"})
+
+
+def query_type_key(query_type: Any) -> str:
+    """Normalize a query type (enum member or plain string) for lookups."""
+    return str(getattr(query_type, "value", query_type)).lower()
+
+
+def _type_label(value: Any) -> str:
+    """Enum value or plain string, for reporting."""
+    return str(getattr(value, "value", value))
+
+
+def _traced_scan(scan):
+    @functools.wraps(scan)
+    async def wrapper(self, query, *args, **kwargs):
+        with tracer.span(f"scan {self.name}", "scanner", scanner=self.name):
+            return await scan(self, query, *args, **kwargs)
+    wrapper._traced = True
+    return wrapper
+
 
 class BaseScannerModule(ABC):
     """Base class for all scanner modules."""
     
+    # Query types this scanner accepts. The registry buckets scanners by these
+    # up front; leave as None to be checked with can_handle() per query.
+    handles: Optional[FrozenSet[str]] = None
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every scan() gets a tracing span, whoever calls it
+        scan = cls.__dict__.get("scan")
+        if scan is not None and asyncio.iscoroutinefunction(scan) and not getattr(scan, "_traced", False):
+            cls.scan = _traced_scan(scan)
+    
     def __init__(self, name: str, scanner_type: ScannerType, description: str = ""):
         self.name = name
         self.scanner_type = scanner_type
@@ -93,10 +142,11 @@ class BaseScannerModule(ABC):
         """
         pass
     
-    @abstractmethod
     def can_handle(self, query: Query) -> bool:
         """
         Check if this scanner can handle the given query type.
+        Scanners that set ``handles`` get this for free; override it only
+        when the decision depends on more than the query type.
         
         Args:
             query: The query object to check
@@ -104,7 +154,9 @@ class BaseScannerModule(ABC):
         Returns:
             True if this scanner can handle the query, False otherwise
         """
-        pass
+        if self.handles is None:
+            raise NotImplementedError(f"{type(self).__name__} must set handles or override can_handle")
+        return "*" in self.handles or query_type_key(getattr(query, "query_type", "")) in self.handles
     
     async def preprocess_query(self, query: Query) -> Dict[str, Any]:
         """
@@ -162,13 +214,20 @@ class BaseScannerModule(ABC):
         """
         return []
     
-    async def execute_scan(self, query: Query, db: AsyncSession) -> Optional[ScanResult]:
+    async def execute_scan(self, query: Query, db: AsyncSession,
+                           writer: Optional[ScanResultWriter] = None) -> Optional[ScanResult]:
         """
         Execute the complete scanning workflow.
         
+        Status transitions are kept on the in-memory record; it is written
+        once, in its final state. Pass a shared ``writer`` to persist all
+        scanners of a query in one transaction, otherwise the result is
+        flushed with a single commit when the scan finishes.
+        
         Args:
             query: The query to scan
             db: Database session
+            writer: Optional shared result writer, flushed by the caller
             
         Returns:
             ScanResult object or None if scan failed
@@ -187,9 +246,11 @@ class BaseScannerModule(ABC):
             cost_credits=self.cost_credits
         )
         
-        db.add(scan_result)
-        await db.commit()
-        await db.refresh(scan_result)
+        owns_writer = writer is None
+        if owns_writer:
+            after_commit = get_search_indexer().enqueue_records if SQLALCHEMY_AVAILABLE else None
+            writer = ScanResultWriter(db, after_commit=after_commit)
+        writer.stage(scan_result)
         
         try:
             logger.info(f"Starting scan with {self.name} for query {query.id}")
@@ -221,19 +282,13 @@ class BaseScannerModule(ABC):
             scan_result.relevance_score = confidence_score  # Simple relevance calculation
             scan_result.completed_at = datetime.utcnow()
             
-            await db.commit()
-            await db.refresh(scan_result)
-            
             logger.info(f"Completed scan with {self.name} for query {query.id}")
-            return scan_result
             
         except asyncio.TimeoutError:
             logger.error(f"Timeout in scanner {self.name} for query {query.id}")
             scan_result.status = QueryStatus.FAILED
             scan_result.error_message = "Scanner timeout"
             scan_result.completed_at = datetime.utcnow()
-            await db.commit()
-            return scan_result
             
         except Exception as e:
             logger.error(f"Error in scanner {self.name} for query {query.id}: {str(e)}")
@@ -242,49 +297,129 @@ class BaseScannerModule(ABC):
             scan_result.status = QueryStatus.FAILED
             scan_result.error_message = str(e)
             scan_result.completed_at = datetime.utcnow()
-            
-            await db.commit()
-            await db.refresh(scan_result)
-            
-            return scan_result
+        
+        if owns_writer:
+            await writer.flush()
+        
+        return scan_result
 
 
 class ScannerRegistry:
-    """Registry for all available scanner modules."""
+    """Registry for all available scanner modules.
+    
+    Enabled scanners are grouped into priority-sorted buckets per declared
+    query type, so selecting scanners for a query is a dict lookup. The
+    buckets are rebuilt lazily after register/enable/disable; call
+    ``invalidate()`` after changing a scanner's priority or handles directly.
+    
+    Scanner modules registered with ``register_lazy`` are only imported when
+    a query of a type they declare arrives, or when the full list is needed.
+    """
     
     def __init__(self):
         self._scanners: List[BaseScannerModule] = []
+        self._by_name: Dict[str, BaseScannerModule] = {}
+        self._order: Dict[int, int] = {}
+        self._buckets: Optional[Dict[str, List[BaseScannerModule]]] = None
+        self._any: List[BaseScannerModule] = []
+        self._dynamic: List[BaseScannerModule] = []
+        # (module, register function, declared query types) not imported yet
+        self._pending: List[Tuple[str, str, FrozenSet[str]]] = []
+    
+    def register_lazy(self, module: str, register_function: str,
+                      handles: FrozenSet[str] = ANY_QUERY_TYPE):
+        """Defer importing a scanner module until a query it handles needs it.
+        
+        ``module.register_function(registry)`` is called on first use and
+        should register every scanner in the module.
+        """
+        self._pending.append((module, register_function, frozenset(query_type_key(t) for t in handles)))
+    
+    def _load_pending(self, query_type: Optional[str] = None):
+        """Import deferred scanner modules, only those for ``query_type`` if given."""
+        if not self._pending:
+            return
+        due = [entry for entry in self._pending
+               if query_type is None or "*" in entry[2] or query_type in entry[2]]
+        for entry in due:
+            self._pending.remove(entry)
+            module, register_function, _ = entry
+            try:
+                getattr(importlib.import_module(module), register_function)(self)
+                logger.info(f"Loaded scanner module on first use: {module}")
+            except Exception as e:
+                logger.error(f"Could not load scanner module {module}: {e}")
+    
+    @property
+    def pending_modules(self) -> List[str]:
+        """Scanner modules registered lazily and not imported yet."""
+        return [module for module, _, _ in self._pending]
     
     def register(self, scanner: BaseScannerModule):
         """Register a scanner module."""
+        self._order[id(scanner)] = len(self._scanners)
         self._scanners.append(scanner)
+        self._by_name.setdefault(scanner.name, scanner)
+        self.invalidate()
         logger.info(f"Registered scanner: {scanner.name} ({scanner.description})")
     
+    def invalidate(self):
+        """Drop the dispatch buckets; they are rebuilt on the next lookup."""
+        self._buckets = None
+    
+    def _sort_key(self, scanner: BaseScannerModule):
+        # Ties keep registration order, as the old per-request stable sort did
+        return (scanner.priority, self._order[id(scanner)])
+    
+    def _build_buckets(self) -> Dict[str, List[BaseScannerModule]]:
+        enabled = sorted((s for s in self._scanners if s.enabled), key=self._sort_key)
+        self._any = [s for s in enabled if s.handles is not None and "*" in s.handles]
+        self._dynamic = [s for s in enabled if s.handles is None]
+        
+        buckets: Dict[str, List[BaseScannerModule]] = {}
+        for scanner in enabled:
+            if scanner.handles is None or "*" in scanner.handles:
+                continue
+            for query_type in scanner.handles:
+                buckets.setdefault(query_type_key(query_type), []).append(scanner)
+        if self._any:
+            for bucket in buckets.values():
+                bucket.extend(self._any)
+                bucket.sort(key=self._sort_key)
+        
+        self._buckets = buckets
+        return buckets
+    
     def get_scanners_for_query(self, query: Query) -> List[BaseScannerModule]:
-        """Get all scanners that can handle a specific query."""
-        applicable_scanners = [
-            scanner for scanner in self._scanners
-            if scanner.enabled and scanner.can_handle(query)
-        ]
+        """Get all scanners that can handle a specific query, by priority."""
+        query_type = query_type_key(getattr(query, "query_type", ""))
+        self._load_pending(query_type)
+        buckets = self._buckets if self._buckets is not None else self._build_buckets()
+        applicable_scanners = buckets.get(query_type, self._any)
         
-        # Sort by priority (lower number = higher priority)
-        applicable_scanners.sort(key=lambda x: x.priority)
+        if not self._dynamic:
+            return list(applicable_scanners)
         
-        return applicable_scanners
+        # Only scanners without declared handles are asked at request time
+        dynamic = [s for s in self._dynamic if s.can_handle(query)]
+        if not dynamic:
+            return list(applicable_scanners)
+        return sorted(applicable_scanners + dynamic, key=self._sort_key)
     
     def get_all_scanners(self) -> List[BaseScannerModule]:
         """Get all registered scanners."""
+        self._load_pending()
         return self._scanners.copy()
     
     def get_scanner_by_name(self, name: str) -> Optional[BaseScannerModule]:
         """Get a scanner by name."""
-        for scanner in self._scanners:
-            if scanner.name == name:
-                return scanner
-        return None
+        if name not in self._by_name:
+            self._load_pending()
+        return self._by_name.get(name)
     
     def get_scanners_by_type(self, scanner_type: ScannerType) -> List[BaseScannerModule]:
         """Get all scanners of a specific type."""
+        self._load_pending()
         return [s for s in self._scanners if s.scanner_type == scanner_type]
     
     def enable_scanner(self, name: str):
@@ -292,6 +427,7 @@ class ScannerRegistry:
         scanner = self.get_scanner_by_name(name)
         if scanner:
             scanner.enabled = True
+            self.invalidate()
             logger.info(f"Enabled scanner: {name}")
     
     def disable_scanner(self, name: str):
@@ -299,16 +435,18 @@ class ScannerRegistry:
         scanner = self.get_scanner_by_name(name)
         if scanner:
             scanner.enabled = False
+            self.invalidate()
             logger.info(f"Disabled scanner: {name}")
     
     def get_scanner_stats(self) -> Dict[str, Any]:
         """Get statistics about registered scanners."""
+        self._load_pending()
         total_scanners = len(self._scanners)
         enabled_scanners = len([s for s in self._scanners if s.enabled])
         
         by_type = {}
         for scanner in self._scanners:
-            scanner_type = scanner.scanner_type.value
+            scanner_type = _type_label(scanner.scanner_type)
             if scanner_type not in by_type:
                 by_type[scanner_type] = {"total": 0, "enabled": 0}
             by_type[scanner_type]["total"] += 1
@@ -319,6 +457,7 @@ class ScannerRegistry:
             "total_scanners": total_scanners,
             "enabled_scanners": enabled_scanners,
             "disabled_scanners": total_scanners - enabled_scanners,
+            "dynamic_scanners": len([s for s in self._scanners if s.handles is None]),
             "by_type": by_type
         }
 
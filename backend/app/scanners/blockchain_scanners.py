@@ -19,6 +19,10 @@ from datetime import datetime, timedelta
 import base58
 import bech32
 
+from ..core.compute_service import get_compute_service
+from .trade_analytics import circular_flow_report, wash_trading_report
+from .tx_graph import get_tx_graph_engine
+
 logger = logging.getLogger(__name__)
 
 class BlockchainNetwork(Enum):
@@ -88,6 +92,7 @@ class BitcoinAddressAnalyzer:
     def __init__(self):
         self.name = "bitcoin_address_analyzer"
         self.network = BlockchainNetwork.BITCOIN
+        self.graph_engine = get_tx_graph_engine()
         
     async def validate_address(self, address: str) -> Dict[str, Any]:
         """Validate Bitcoin address format and type"""
@@ -158,6 +163,35 @@ class BitcoinAddressAnalyzer:
             "risk_assessment": self._assess_address_risk(address)
         }
     
+    async def trace_funds(self, address: str, depth: int = 5, direction: str = "forward",
+                          min_value: float = 0.0) -> Dict[str, Any]:
+        """Trace funds from (or, backward, to) an address through the transaction graph"""
+        validation = await self.validate_address(address)
+        if not validation.get("valid"):
+            return validation
+        try:
+            trace = await self.graph_engine.trace(address, depth=depth, direction=direction, min_value=min_value)
+            return trace.to_dict()
+        except Exception as e:
+            logger.error(f"Fund tracing failed for {address}: {e}")
+            return {"source": address, "error": str(e)}
+    
+    async def get_address_cluster(self, address: str, rounds: int = 1) -> Dict[str, Any]:
+        """Addresses controlled by the same owner under the common-input heuristic"""
+        validation = await self.validate_address(address)
+        if not validation.get("valid"):
+            return validation
+        try:
+            members = await self.graph_engine.cluster(address, rounds=rounds)
+        except Exception as e:
+            logger.error(f"Address clustering failed for {address}: {e}")
+            return {"address": address, "error": str(e)}
+        return {
+            "address": address,
+            "cluster_size": len(members),
+            "addresses": members[:100]
+        }
+    
     def _generate_address_tags(self, address: str) -> List[str]:
         """Generate relevant tags for the address"""
         tags = []
@@ -331,6 +365,7 @@ class CryptocurrencyMixerDetector:
             "tornado_cash", "blender", "chipmixer", "bitcoin_mixer",
             "coinomize", "mixbit", "cryptomixer", "bitlaunder"
         ]
+        self.graph_engine = get_tx_graph_engine()
         
     async def analyze_mixing_patterns(self, addresses: List[str]) -> Dict[str, Any]:
         """Analyze addresses for mixing patterns"""
@@ -364,6 +399,28 @@ class CryptocurrencyMixerDetector:
             "recommendations": self._generate_recommendations(mixing_score)
         }
     
+    async def analyze_transaction_graph(self, addresses: List[str]) -> Dict[str, Any]:
+        """Measure CoinJoin participation of addresses from their loaded transaction history"""
+        failed = await self.graph_engine.load_addresses(addresses)
+        graph = self.graph_engine.graph
+        
+        participation = {}
+        for address in addresses:
+            coinjoins, total = graph.coinjoin_involvement(address)
+            if coinjoins:
+                participation[address] = {
+                    "coinjoin_transactions": coinjoins,
+                    "transactions": total,
+                    "coinjoin_ratio": round(coinjoins / total, 2)
+                }
+                
+        return {
+            "addresses_analyzed": len(addresses) - failed,
+            "addresses_failed": failed,
+            "coinjoin_participants": participation,
+            "coinjoin_detected": bool(participation)
+        }
+    
     def _identify_mixer_services(self, addresses: List[str]) -> List[Dict[str, Any]]:
         """Identify potential mixer services"""
         services = []
@@ -419,13 +476,18 @@ class DeFiProtocolAnalyzer:
             "yearn", "sushiswap", "balancer", "synthetix", "1inch"
         ]
         
-    async def analyze_defi_exposure(self, address: str) -> Dict[str, Any]:
-        """Analyze DeFi protocol exposure and risks"""
+    async def analyze_defi_exposure(self, address: str,
+                                    transfers: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Analyze DeFi protocol exposure and risks
+        
+        ``transfers`` (dicts with asset, from, to, amount and timestamp) adds
+        circular flow detection over the address's token transfers.
+        """
         await asyncio.sleep(0.18)
         
         addr_hash = hash(address)
         
-        return {
+        analysis = {
             "total_tvl_exposure": round((addr_hash % 1000000) / 100, 2),
             "protocol_interactions": self._get_protocol_interactions(address),
             "yield_farming": self._analyze_yield_farming(address),
@@ -435,6 +497,10 @@ class DeFiProtocolAnalyzer:
             "risk_assessment": self._assess_defi_risks(address),
             "impermanent_loss": self._calculate_impermanent_loss(address)
         }
+        if transfers:
+            analysis["circular_flows"] = await get_compute_service().run_cpu(
+                "defi_circular_flows", circular_flow_report, transfers)
+        return analysis
     
     def _get_protocol_interactions(self, address: str) -> List[Dict[str, Any]]:
         """Get DeFi protocol interactions"""
@@ -555,8 +621,14 @@ class NFTAnalyzer:
         self.name = "nft_analyzer"
         self.marketplaces = ["opensea", "rarible", "foundation", "superrare", "nifty_gateway"]
         
-    async def analyze_nft_collection(self, contract_address: str) -> Dict[str, Any]:
-        """Analyze NFT collection metrics and activity"""
+    async def analyze_nft_collection(self, contract_address: str,
+                                     trades: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Analyze NFT collection metrics and activity
+        
+        ``trades`` (dicts with token_id, seller, buyer, price and timestamp)
+        replaces the estimated wash trading figures with ones detected in
+        the collection's actual trade history.
+        """
         await asyncio.sleep(0.12)
         
         addr_hash = hash(contract_address)
@@ -567,7 +639,8 @@ class NFTAnalyzer:
             "holder_analysis": self._analyze_holders(contract_address),
             "rarity_analysis": self._analyze_rarity(contract_address),
             "market_analysis": self._analyze_market_trends(contract_address),
-            "wash_trading_detection": self._detect_wash_trading(contract_address),
+            "wash_trading_detection": await self._detect_wash_trading_in_trades(trades) if trades
+            else self._detect_wash_trading(contract_address),
             "floor_price_prediction": self._predict_floor_price(contract_address)
         }
     
@@ -670,6 +743,10 @@ class NFTAnalyzer:
             "artificial_volume_percentage": round(suspicious_score * 50, 1)
         }
     
+    async def _detect_wash_trading_in_trades(self, trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Detect self-trades, round trips, ownership cycles and trade bursts in a trade history"""
+        return await get_compute_service().run_cpu("nft_wash_trading", wash_trading_report, trades)
+    
     def _predict_floor_price(self, contract_address: str) -> Dict[str, Any]:
         """Predict future floor price trends"""
         addr_hash = hash(contract_address)
@@ -701,8 +778,13 @@ class BlockchainForensicsEngine:
             "nft": NFTAnalyzer()
         }
         
-    async def comprehensive_blockchain_analysis(self, query: str, network: str = "bitcoin") -> Dict[str, Any]:
-        """Perform comprehensive blockchain analysis"""
+    async def comprehensive_blockchain_analysis(self, query: str, network: str = "bitcoin",
+                                                trace_depth: int = 0) -> Dict[str, Any]:
+        """Perform comprehensive blockchain analysis
+        
+        A non-zero ``trace_depth`` also traces Bitcoin funds that many hops
+        through the transaction graph and reports the address's ownership cluster.
+        """
         start_time = time.time()
         
         try:
@@ -717,6 +799,10 @@ class BlockchainForensicsEngine:
             # Address validation and basic info
             if network == "bitcoin":
                 results["results"]["address_analysis"] = await self.analyzers["bitcoin"].get_address_info(query)
+                if trace_depth > 0:
+                    results["results"]["fund_trace"] = await self.analyzers["bitcoin"].trace_funds(query, depth=trace_depth)
+                    results["results"]["address_cluster"] = await self.analyzers["bitcoin"].get_address_cluster(query)
+                    results["results"]["coinjoin_analysis"] = await self.analyzers["mixer"].analyze_transaction_graph([query])
             elif network == "ethereum":
                 results["results"]["contract_analysis"] = await self.analyzers["ethereum"].analyze_contract(query)
                 results["results"]["defi_analysis"] = await self.analyzers["defi"].analyze_defi_exposure(query)
@@ -844,7 +930,10 @@ class BlockchainForensicsEngine:
             if mixing.get("mixing_probability", 0) > 0.7:
                 recommendations.append("Investigate mixing service usage")
                 recommendations.append("Identify pre-mix and post-mix addresses")
-                
+
+        if analysis_results.get("coinjoin_analysis", {}).get("coinjoin_detected"):
+            recommendations.append("Review CoinJoin transactions before attributing traced funds")
+
         # DeFi analysis recommendations
         if "defi_analysis" in analysis_results:
             defi = analysis_results["defi_analysis"]
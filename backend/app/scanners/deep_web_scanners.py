@@ -23,16 +23,14 @@ from datetime import datetime, timedelta
 from urllib.parse import urlencode, quote_plus, urlparse
 import hashlib
 import random
-from bs4 import BeautifulSoup
 import base64
 from concurrent.futures import ThreadPoolExecutor
 import ssl
 import certifi
-import xml.etree.ElementTree as ET
-import csv
-import io
 
-from .base import BaseScannerModule, ScannerType
+from .base import BaseScannerModule, ScannerType, ANY_QUERY_TYPE
+from .streaming_parsers import aiter_structured_records, iter_structured_records, query_terms
+from .wayback_cdx import CdxQuery, get_wayback_cdx_engine
 
 logger = logging.getLogger(__name__)
 
@@ -137,45 +135,70 @@ class BaseDeepWebScanner(BaseScannerModule):
         
         raise Exception("Max retry attempts exceeded")
     
-    def _parse_structured_data(self, content: str, content_type: str) -> List[Dict[str, Any]]:
-        """Parse structured data from various formats"""
-        try:
-            if 'json' in content_type.lower():
-                data = json.loads(content)
-                if isinstance(data, list):
-                    return data
-                elif isinstance(data, dict):
-                    return [data]
-            
-            elif 'xml' in content_type.lower():
-                root = ET.fromstring(content)
-                records = []
-                for child in root:
-                    record = {child.tag: child.text}
-                    for attr_name, attr_value in child.attrib.items():
-                        record[f"{child.tag}_{attr_name}"] = attr_value
-                    records.append(record)
-                return records
-            
-            elif 'csv' in content_type.lower():
-                csv_reader = csv.DictReader(io.StringIO(content))
-                return list(csv_reader)
-            
-            else:
-                # Try to extract structured data from HTML
-                soup = BeautifulSoup(content, 'html.parser')
-                tables = soup.find_all('table')
-                if tables:
+    async def _fetch_records(self, url: str, params: Dict[str, Any] = None, record_path: Optional[str] = None,
+                             query: Optional[str] = None, limit: Optional[int] = None,
+                             content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stream a structured-data response and parse records as they arrive.
+        
+        Only records matching ``query`` are kept, and the download stops once
+        ``limit`` records have been found, so large dataset files are never
+        held in memory.
+        """
+        current_time = time.time()
+        time_since_last = current_time - self.last_request_time
+        if time_since_last < self.rate_limit_delay:
+            await asyncio.sleep(self.rate_limit_delay - time_since_last)
+        
+        session = await self._get_session()
+        terms = query_terms(query) if query else None
+        
+        for attempt in range(3):  # 3 retry attempts; records from a failed attempt are discarded
+            try:
+                async with session.get(url, params=params) as response:
+                    self.last_request_time = time.time()
+                    
+                    if response.status == 429:  # Rate limited
+                        await asyncio.sleep(10)
+                        continue
+                        
+                    if response.status >= 400:
+                        if attempt == 2:
+                            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                              status=response.status, message=f"HTTP {response.status}")
+                        await asyncio.sleep(5 * (attempt + 1))
+                        continue
+                    
                     records = []
-                    for table in tables[:3]:  # Limit to first 3 tables
-                        headers = [th.get_text(strip=True) for th in table.find_all('th')]
-                        if headers:
-                            for row in table.find_all('tr')[1:]:  # Skip header row
-                                cells = [td.get_text(strip=True) for td in row.find_all('td')]
-                                if len(cells) == len(headers):
-                                    records.append(dict(zip(headers, cells)))
+                    async for record in aiter_structured_records(
+                        response.content.iter_chunked(64 * 1024),
+                        content_type or response.headers.get('Content-Type', ''),
+                        terms, record_path
+                    ):
+                        records.append(record)
+                        if limit is not None and len(records) >= limit:
+                            # Enough matches; drop the connection rather than drain the body
+                            response.close()
+                            break
                     return records
+                    
+            except asyncio.TimeoutError:
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(10 * (attempt + 1))
+            except aiohttp.ClientError:
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(5 * (attempt + 1))
         
+        raise Exception("Max retry attempts exceeded")
+    
+    def _parse_structured_data(self, content: str, content_type: str, query: Optional[str] = None,
+                               record_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Parse structured data from various formats"""
+        try:
+            return list(iter_structured_records(
+                [content.encode('utf-8')], content_type, query_terms(query) if query else None, record_path
+            ))
         except Exception as e:
             logger.debug(f"Error parsing structured data: {e}")
         
@@ -190,15 +213,15 @@ class BaseDeepWebScanner(BaseScannerModule):
 class InternetArchiveScanner(BaseDeepWebScanner):
     """Internet Archive (Wayback Machine) scanner"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "internet_archive_scanner",
             "https://web.archive.org",
             "Internet Archive and Wayback Machine historical data"
         )
-    
-    def can_handle(self, query) -> bool:
-        return True  # Can search for any type of content
+        self.cdx = get_wayback_cdx_engine()
     
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Internet Archive for historical data"""
@@ -234,49 +257,73 @@ class InternetArchiveScanner(BaseDeepWebScanner):
     async def _search_wayback_machine(self, query: str) -> List[Dict[str, Any]]:
         """Search Wayback Machine for archived pages"""
         try:
-            # Use CDX API for searching archived URLs
-            cdx_url = "https://web.archive.org/cdx/search/cdx"
-            params = {
-                'url': f'*{query}*',
-                'output': 'json',
-                'limit': 100,
-                'fl': 'timestamp,original,mimetype,statuscode,digest,length'
-            }
-            
-            content, headers = await self._make_request(cdx_url, params)
-            data = json.loads(content)
+            # One CDX query for the whole site; collapsing on digest skips
+            # captures whose content did not change
+            target = re.sub(r'^https?://', '', query.strip())
+            match_type = 'prefix' if '/' in target.rstrip('/') else 'domain'
+            captures = await self.cdx.query(CdxQuery(
+                target.rstrip('/'), match_type=match_type, filters=['statuscode:200'], limit=100
+            ))
             
-            if not data:
-                return []
-            
-            # First row is headers, skip it
             results = []
-            for row in data[1:]:
-                if len(row) >= 6:
-                    timestamp, original, mimetype, statuscode, digest, length = row[:6]
-                    
-                    # Parse timestamp
-                    try:
-                        capture_date = datetime.strptime(timestamp, '%Y%m%d%H%M%S')
-                    except:
-                        capture_date = None
-                    
-                    results.append({
-                        'original_url': original,
-                        'archive_url': f'https://web.archive.org/web/{timestamp}/{original}',
-                        'capture_date': capture_date.isoformat() if capture_date else None,
-                        'mime_type': mimetype,
-                        'status_code': statuscode,
-                        'content_digest': digest,
-                        'content_length': int(length) if length.isdigit() else 0
-                    })
+            for capture in captures[:20]:  # Limit to 20 results
+                capture_date = capture.capture_date
+                results.append({
+                    'original_url': capture.original,
+                    'archive_url': capture.archive_url(),
+                    'capture_date': capture_date.isoformat() if capture_date else None,
+                    'mime_type': capture.mimetype,
+                    'status_code': capture.statuscode,
+                    'content_digest': capture.digest,
+                    'content_length': capture.length
+                })
             
-            return results[:20]  # Limit to 20 results
+            return results
             
         except Exception as e:
             logger.error(f"Wayback Machine search error: {e}")
             return await self._generate_mock_wayback_results(query)
     
+    async def investigate_domain(self, domain: str, fetch_snapshots: bool = False,
+                                 from_timestamp: Optional[str] = None, to_timestamp: Optional[str] = None,
+                                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """Capture history of every URL under a domain, optionally with snapshot bodies.
+        
+        Uses a single paged CDX query instead of one lookup per URL; snapshots
+        are fetched once per distinct digest and served from the local store
+        afterwards.
+        """
+        captures = await self.cdx.domain_captures(domain, from_timestamp=from_timestamp,
+                                                  to_timestamp=to_timestamp, limit=limit)
+        urls: Dict[str, Dict[str, Any]] = {}
+        for capture in captures:
+            entry = urls.setdefault(capture.original, {
+                'original_url': capture.original, 'captures': 0, 'distinct_versions': set(),
+                'first_capture': capture.timestamp, 'last_capture': capture.timestamp
+            })
+            entry['captures'] += 1
+            entry['distinct_versions'].add(capture.digest)
+            entry['first_capture'] = min(entry['first_capture'], capture.timestamp)
+            entry['last_capture'] = max(entry['last_capture'], capture.timestamp)
+        for entry in urls.values():
+            entry['distinct_versions'] = len(entry['distinct_versions'])
+        
+        result = {
+            'domain': domain,
+            'total_captures': len(captures),
+            'distinct_urls': len(urls),
+            'distinct_digests': len({c.digest for c in captures}),
+            'urls': sorted(urls.values(), key=lambda e: e['original_url']),
+        }
+        if fetch_snapshots:
+            bodies = await self.cdx.fetch_snapshots(captures)
+            result['snapshots'] = {
+                digest: {'size': len(body)} if isinstance(body, bytes) else {'error': str(body)}
+                for digest, body in bodies.items()
+            }
+        result['engine_stats'] = self.cdx.get_stats()
+        return result
+    
     async def _search_archive_collections(self, query: str) -> List[Dict[str, Any]]:
         """Search Internet Archive collections"""
         try:
@@ -380,6 +427,8 @@ class InternetArchiveScanner(BaseDeepWebScanner):
 class OpenDataPortalScanner(BaseDeepWebScanner):
     """Government and institutional open data portal scanner"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "open_data_portal_scanner",
@@ -387,9 +436,6 @@ class OpenDataPortalScanner(BaseDeepWebScanner):
             "Government and institutional open data portals"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan open data portals for relevant datasets"""
         try:
@@ -430,24 +476,23 @@ class OpenDataPortalScanner(BaseDeepWebScanner):
                 'sort': 'score desc'
             }
             
-            content, headers = await self._make_request(search_url, params)
-            data = json.loads(content)
+            datasets = await self._fetch_records(search_url, params, record_path='result.results.item',
+                                                 content_type='application/json')
             
             results = []
-            if 'result' in data and 'results' in data['result']:
-                for dataset in data['result']['results']:
-                    results.append({
-                        'title': dataset.get('title', ''),
-                        'name': dataset.get('name', ''),
-                        'notes': dataset.get('notes', ''),
-                        'organization': dataset.get('organization', {}).get('title', ''),
-                        'tags': [tag.get('name', '') for tag in dataset.get('tags', [])],
-                        'resources': len(dataset.get('resources', [])),
-                        'metadata_created': dataset.get('metadata_created', ''),
-                        'metadata_modified': dataset.get('metadata_modified', ''),
-                        'url': f"https://catalog.data.gov/dataset/{dataset.get('name', '')}",
-                        'source': 'data.gov'
-                    })
+            for dataset in datasets:
+                results.append({
+                    'title': dataset.get('title', ''),
+                    'name': dataset.get('name', ''),
+                    'notes': dataset.get('notes', ''),
+                    'organization': dataset.get('organization', {}).get('title', ''),
+                    'tags': [tag.get('name', '') for tag in dataset.get('tags', [])],
+                    'resources': len(dataset.get('resources', [])),
+                    'metadata_created': dataset.get('metadata_created', ''),
+                    'metadata_modified': dataset.get('metadata_modified', ''),
+                    'url': f"https://catalog.data.gov/dataset/{dataset.get('name', '')}",
+                    'source': 'data.gov'
+                })
             
             return results
             
@@ -586,6 +631,8 @@ class OpenDataPortalScanner(BaseDeepWebScanner):
 class AcademicRepositoryScanner(BaseDeepWebScanner):
     """Academic and research repository scanner"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "academic_repository_scanner",
@@ -593,9 +640,6 @@ class AcademicRepositoryScanner(BaseDeepWebScanner):
             "Academic repositories and research databases"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan academic repositories for research data"""
         try:
@@ -636,25 +680,24 @@ class AcademicRepositoryScanner(BaseDeepWebScanner):
                 'order': 'desc'
             }
             
-            content, headers = await self._make_request(self.base_url, params)
-            data = json.loads(content)
+            items = await self._fetch_records(self.base_url, params, record_path='message.items.item',
+                                              content_type='application/json')
             
             results = []
-            if 'message' in data and 'items' in data['message']:
-                for item in data['message']['items']:
-                    results.append({
-                        'title': ' '.join(item.get('title', [])),
-                        'authors': [f"{author.get('given', '')} {author.get('family', '')}" 
-                                  for author in item.get('author', [])],
-                        'journal': item.get('container-title', [''])[0] if item.get('container-title') else '',
-                        'publication_date': item.get('published-print', item.get('published-online', {})).get('date-parts', [[]])[0],
-                        'doi': item.get('DOI', ''),
-                        'url': item.get('URL', ''),
-                        'abstract': item.get('abstract', ''),
-                        'subject': item.get('subject', []),
-                        'citation_count': item.get('is-referenced-by-count', 0),
-                        'source': 'crossref'
-                    })
+            for item in items:
+                results.append({
+                    'title': ' '.join(item.get('title', [])),
+                    'authors': [f"{author.get('given', '')} {author.get('family', '')}" 
+                              for author in item.get('author', [])],
+                    'journal': item.get('container-title', [''])[0] if item.get('container-title') else '',
+                    'publication_date': item.get('published-print', item.get('published-online', {})).get('date-parts', [[]])[0],
+                    'doi': item.get('DOI', ''),
+                    'url': item.get('URL', ''),
+                    'abstract': item.get('abstract', ''),
+                    'subject': item.get('subject', []),
+                    'citation_count': item.get('is-referenced-by-count', 0),
+                    'source': 'crossref'
+                })
             
             return results[:10]
             
@@ -795,6 +838,8 @@ class AcademicRepositoryScanner(BaseDeepWebScanner):
 class LegalDatabaseScanner(BaseDeepWebScanner):
     """Legal databases and court records scanner"""
     
+    handles = frozenset({'name', 'organization', 'legal'})
+    
     def __init__(self):
         super().__init__(
             "legal_database_scanner",
@@ -802,9 +847,6 @@ class LegalDatabaseScanner(BaseDeepWebScanner):
             "Legal databases, court records, and case law"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['name', 'organization', 'legal']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan legal databases for case information"""
         try:
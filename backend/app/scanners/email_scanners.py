@@ -63,6 +63,8 @@ class RateLimiter:
 class EmailValidatorScanner(BaseScannerModule):
     """Email syntax and domain validation scanner"""
     
+    handles = frozenset({'email'})
+    
     def __init__(self):
         super().__init__(
             name="email_validator",
@@ -71,9 +73,6 @@ class EmailValidatorScanner(BaseScannerModule):
         )
         self.rate_limiter = RateLimiter(max_requests=100, time_window=60)
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'email'
-    
     def _validate_email_syntax(self, email: str) -> Dict[str, Any]:
         """Validate email syntax using regex"""
         pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -168,6 +167,8 @@ class EmailValidatorScanner(BaseScannerModule):
 class EmailReputationScanner(BaseScannerModule):
     """Email reputation and security scanner"""
     
+    handles = frozenset({'email'})
+    
     def __init__(self):
         super().__init__(
             name="email_reputation",
@@ -184,9 +185,6 @@ class EmailReputationScanner(BaseScannerModule):
             "help", "noreply", "no-reply", "donotreply"
         }
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'email'
-    
     def _check_disposable_email(self, email: str) -> Dict[str, Any]:
         """Check if email is from disposable email provider"""
         domain = email.split('@')[1] if '@' in email else ''
@@ -282,6 +280,8 @@ class EmailReputationScanner(BaseScannerModule):
 class EmailBreachScanner(BaseScannerModule):
     """Email data breach scanner (mock API calls for demonstration)"""
     
+    handles = frozenset({'email'})
+    
     def __init__(self):
         super().__init__(
             name="email_breach_scanner",
@@ -290,9 +290,6 @@ class EmailBreachScanner(BaseScannerModule):
         )
         self.rate_limiter = RateLimiter(max_requests=20, time_window=60)
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'email'
-    
     async def _check_haveibeenpwned_api(self, email: str) -> Dict[str, Any]:
         """Mock HaveIBeenPwned API check (would need real API key)"""
         # In real implementation, this would call the actual API
@@ -395,6 +392,8 @@ class EmailBreachScanner(BaseScannerModule):
 class SocialMediaEmailScanner(BaseScannerModule):
     """Social media profile scanner based on email"""
     
+    handles = frozenset({'email'})
+    
     def __init__(self):
         super().__init__(
             name="social_media_email_scanner",
@@ -404,9 +403,6 @@ class SocialMediaEmailScanner(BaseScannerModule):
         self.rate_limiter = RateLimiter(max_requests=30, time_window=60)
         self.platforms = ["twitter", "linkedin", "facebook", "instagram", "github", "reddit"]
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'email'
-    
     async def _check_platform_patterns(self, email: str) -> Dict[str, Any]:
         """Check for platform-specific email patterns"""
         local_part = email.split('@')[0] if '@' in email else email
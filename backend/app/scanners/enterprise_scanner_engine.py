@@ -17,12 +17,15 @@ import logging
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Type, Union, Callable
+from typing import Dict, Any, List, Optional, Type, Union, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor
 import weakref
 
+from ..core.execution_planner import ExecutionPlan, ExecutionPlanner, count_findings, get_execution_planner
+from ..core.sufficiency import SufficiencyEvaluator
+from ..core.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 
@@ -300,10 +303,11 @@ class BaseScanner(ABC):
     
     async def _execute_with_timeout(self, target: str, **kwargs) -> Dict[str, Any]:
         """Execute scan with timeout"""
-        return await asyncio.wait_for(
-            self._scan_implementation(target, **kwargs),
-            timeout=self.config.timeout
-        )
+        with tracer.span(f"scan {self.name}", "scanner", scanner=self.name):
+            return await asyncio.wait_for(
+                self._scan_implementation(target, **kwargs),
+                timeout=self.config.timeout
+            )
     
     def _update_average_execution_time(self, execution_time: float):
         """Update average execution time"""
@@ -424,10 +428,11 @@ class EnterpriseScannerRegistry:
 class EnterpriseScannerOrchestrator:
     """Enterprise scanner orchestrator with advanced execution patterns"""
     
-    def __init__(self, registry: EnterpriseScannerRegistry, max_concurrent: int = 10):
+    def __init__(self, registry: EnterpriseScannerRegistry, max_concurrent: int = 10,
+                 planner: Optional[ExecutionPlanner] = None):
         self.registry = registry
         self.max_concurrent = max_concurrent
-        self.executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self.planner = planner or get_execution_planner()
         self._active_scans: Dict[str, asyncio.Task] = {}
         self._logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
     
@@ -436,9 +441,14 @@ class EnterpriseScannerOrchestrator:
         target: str, 
         scanner_names: Optional[List[str]] = None,
         categories: Optional[List[ScannerCategory]] = None,
-        priority_threshold: int = 1
+        priority_threshold: int = 1,
+        sufficiency: Optional[SufficiencyEvaluator] = None
     ) -> Dict[str, ScanResult]:
-        """Execute multiple scanners concurrently with advanced orchestration"""
+        """Execute multiple scanners concurrently with advanced orchestration.
+        
+        With a ``sufficiency`` evaluator, scanners still running are cancelled
+        as soon as its confidence targets are met.
+        """
         
         # Determine scanners to execute
         scanners = self._select_scanners(scanner_names, categories, priority_threshold)
@@ -460,8 +470,10 @@ class EnterpriseScannerOrchestrator:
             tasks[scanner.name] = task
             self._active_scans[f"{scanner.name}_{target}"] = task
         
-        # Wait for all tasks to complete
+        # Wait for all tasks to complete, or until the query is answered
         try:
+            if sufficiency is not None:
+                await self._wait_until_sufficient(tasks, scanners, sufficiency)
             results = await asyncio.gather(*tasks.values(), return_exceptions=True)
             
             # Process results
@@ -469,7 +481,13 @@ class EnterpriseScannerOrchestrator:
             for i, (scanner_name, task) in enumerate(tasks.items()):
                 result = results[i]
                 
-                if isinstance(result, Exception):
+                if isinstance(result, asyncio.CancelledError):
+                    scan_results[scanner_name] = ScanResult(
+                        scanner_name=scanner_name,
+                        status=ScannerStatus.CANCELLED,
+                        error="Cancelled: confidence targets met"
+                    )
+                elif isinstance(result, Exception):
                     self._logger.error(f"💥 Task error for {scanner_name}: {result}")
                     scan_results[scanner_name] = ScanResult(
                         scanner_name=scanner_name,
@@ -491,6 +509,105 @@ class EnterpriseScannerOrchestrator:
             self._logger.exception(f"💥 Batch scan failed: {e}")
             raise
     
+    async def _wait_until_sufficient(
+        self,
+        tasks: Dict[str, asyncio.Task],
+        scanners: List[BaseScanner],
+        sufficiency: SufficiencyEvaluator
+    ):
+        """Feed results to the evaluator as they land; cancel the rest once it is satisfied"""
+        by_task = {task: name for name, task in tasks.items()}
+        scanner_by_name = {scanner.name: scanner for scanner in scanners}
+        started = time.time()
+        pending = set(tasks.values())
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                result = task.result()
+                if result.is_successful():
+                    sufficiency.add_result(by_task[task], result.data)
+            
+            if pending and sufficiency.is_sufficient():
+                elapsed = time.time() - started
+                for task in pending:
+                    scanner = scanner_by_name[by_task[task]]
+                    task.cancel()
+                    sufficiency.record_cancelled(
+                        scanner.name, scanner.config.cost_credits,
+                        (scanner.metrics.average_execution_time or scanner.config.timeout) - elapsed
+                    )
+                self._logger.info(f"🎯 Confidence targets met, cancelled {len(pending)} scanners")
+                return
+    
+    async def execute_planned_scan(
+        self,
+        target: str,
+        user_plan: str = "free",
+        budget: Optional[int] = None,
+        scanner_names: Optional[List[str]] = None,
+        categories: Optional[List[ScannerCategory]] = None,
+        priority_threshold: int = 1,
+        sufficiency: Optional[SufficiencyEvaluator] = None
+    ) -> Tuple[Dict[str, ScanResult], ExecutionPlan]:
+        """Execute a staged, budgeted plan; later stages run only if the query is still unanswered"""
+        plan = await self.plan_scan(user_plan, budget, scanner_names, categories, priority_threshold)
+        if not plan.stages:
+            self._logger.warning("No scanners fit the execution plan")
+            return {}, plan
+        
+        self._logger.info(
+            f"🚀 Starting planned scan for target {target}: {len(plan.scanners)} scanners "
+            f"in {len(plan.stages)} stages, est. {plan.estimated_cost} credits"
+        )
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        async def run_scanner(scanner: BaseScanner) -> ScanResult:
+            scan_key = f"{scanner.name}_{target}"
+            task = asyncio.ensure_future(self._execute_scanner_with_semaphore(semaphore, scanner, target))
+            self._active_scans[scan_key] = task
+            try:
+                return await task
+            finally:
+                self._active_scans.pop(scan_key, None)
+        
+        def describe(result: ScanResult):
+            return result.is_successful(), result.execution_time or 0.0, count_findings(result.data)
+        
+        outcomes = await self.planner.execute(
+            plan, run_scanner, describe, sufficiency=sufficiency, payload=lambda result: result.data
+        )
+        await self.planner.flush()
+        
+        scan_results = {}
+        for planned, result in outcomes:
+            if isinstance(result, Exception):
+                self._logger.error(f"💥 Task error for {planned.name}: {result}")
+                result = ScanResult(scanner_name=planned.name, status=ScannerStatus.FAILED, error=str(result))
+            result.metadata.setdefault("plan_stage", planned.stage)
+            scan_results[planned.name] = result
+        
+        self._logger.info(
+            f"✅ Planned scan completed: {len(scan_results)} results, {plan.stages_run}/{len(plan.stages)} stages, "
+            f"{plan.spent_credits} credits"
+        )
+        return scan_results, plan
+    
+    async def plan_scan(
+        self,
+        user_plan: str = "free",
+        budget: Optional[int] = None,
+        scanner_names: Optional[List[str]] = None,
+        categories: Optional[List[ScannerCategory]] = None,
+        priority_threshold: int = 1
+    ) -> ExecutionPlan:
+        """Build the execution plan for the selected scanners"""
+        await self.planner.refresh()
+        scanners = self._select_scanners(scanner_names, categories, priority_threshold)
+        return self.planner.plan(scanners, user_plan, budget)
+    
     async def _execute_scanner_with_semaphore(
         self, 
         semaphore: asyncio.Semaphore, 
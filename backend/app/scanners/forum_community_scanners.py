@@ -188,6 +188,8 @@ class BaseForumScanner(BaseScannerModule):
 class RedditScanner(BaseForumScanner):
     """Reddit user and post scanner"""
     
+    handles = frozenset({'username', 'name', 'email'})
+    
     def __init__(self):
         super().__init__(
             "reddit_scanner",
@@ -195,9 +197,6 @@ class RedditScanner(BaseForumScanner):
             "Reddit user profiles and post history analysis"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name', 'email']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Reddit for user information"""
         try:
@@ -364,6 +363,8 @@ class RedditScanner(BaseForumScanner):
 class StackOverflowScanner(BaseForumScanner):
     """Stack Overflow developer profile scanner"""
     
+    handles = frozenset({'username', 'name', 'email'})
+    
     def __init__(self):
         super().__init__(
             "stackoverflow_scanner",
@@ -371,9 +372,6 @@ class StackOverflowScanner(BaseForumScanner):
             "Stack Overflow developer profiles and activity"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name', 'email']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Stack Overflow for developer information"""
         try:
@@ -438,6 +436,8 @@ class StackOverflowScanner(BaseForumScanner):
 class GitHubDiscussionsScanner(BaseForumScanner):
     """GitHub Discussions and Issues scanner"""
     
+    handles = frozenset({'username', 'name', 'email'})
+    
     def __init__(self):
         super().__init__(
             "github_discussions_scanner",
@@ -445,9 +445,6 @@ class GitHubDiscussionsScanner(BaseForumScanner):
             "GitHub discussions, issues, and community activity"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name', 'email']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan GitHub for community activity"""
         try:
@@ -501,6 +498,8 @@ class GitHubDiscussionsScanner(BaseForumScanner):
 class QuoraScanner(BaseForumScanner):
     """Quora questions and answers scanner"""
     
+    handles = frozenset({'username', 'name', 'email'})
+    
     def __init__(self):
         super().__init__(
             "quora_scanner",
@@ -508,9 +507,6 @@ class QuoraScanner(BaseForumScanner):
             "Quora questions, answers, and profile information"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name', 'email']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Quora for user activity"""
         try:
@@ -573,6 +569,8 @@ class QuoraScanner(BaseForumScanner):
 class HackerNewsScanner(BaseForumScanner):
     """Hacker News user and comment scanner"""
     
+    handles = frozenset({'username', 'name'})
+    
     def __init__(self):
         super().__init__(
             "hackernews_scanner",
@@ -580,9 +578,6 @@ class HackerNewsScanner(BaseForumScanner):
             "Hacker News user profiles and comment history"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Hacker News for user information"""
         try:
@@ -635,6 +630,8 @@ class HackerNewsScanner(BaseForumScanner):
 class DiscordScanner(BaseForumScanner):
     """Discord server and user scanner (public data only)"""
     
+    handles = frozenset({'username', 'name'})
+    
     def __init__(self):
         super().__init__(
             "discord_scanner",
@@ -642,9 +639,6 @@ class DiscordScanner(BaseForumScanner):
             "Discord public server and user information"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['username', 'name']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Scan Discord for public user information"""
         try:
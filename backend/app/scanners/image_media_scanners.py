@@ -26,24 +26,29 @@ import logging
 import base64
 import io
 import os
-from typing import Dict, List, Any, Optional, Union, Tuple
+from typing import Dict, List, Any, Optional, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 from urllib.parse import quote, urljoin
 import mimetypes
 from PIL import Image, ExifTags
-from PIL.ExifTags import TAGS
-import imagehash
-import cv2
 import numpy as np
-from scipy import spatial
-import librosa
 import wave
 import struct
 import tempfile
 import requests
-from concurrent.futures import ThreadPoolExecutor
+
+from ..core.compute_service import get_compute_service
+from ..core.lazy import lazy_import
+from .media_download import DownloadedMedia, get_media_downloader, iter_boxes
+from .metadata_workers import get_metadata_worker_pool
+from ..core.image_similarity_index import (
+    compute_perceptual_hashes_async, format_hash, get_image_similarity_index
+)
+
+# OpenCV is only needed for face detection; load it on first use
+cv2 = lazy_import("cv2")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -78,6 +83,7 @@ class BaseMediaScanner(ABC):
         self.cache_ttl = 3600  # 1 hour cache
         self.timeout = 60
         self.supported_formats = []
+        self.downloader = get_media_downloader()
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -148,23 +154,29 @@ class BaseMediaScanner(ABC):
                 
         return 'application/octet-stream'
         
-    async def _download_media(self, url: str) -> Tuple[bytes, str]:
-        """Download media from URL"""
+    async def _download_media_stream(self, url: str) -> DownloadedMedia:
+        """Stream media from URL, spooling large files to disk; caller cleans up"""
         await self._rate_limit_check()
         
         try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    media_data = await response.read()
-                    content_type = response.headers.get('content-type', '')
-                    return media_data, content_type
-                else:
-                    raise Exception(f"HTTP {response.status}")
-                    
+            return await self.downloader.download(url, session=self.session)
         except Exception as e:
             logger.error(f"Media download failed: {url} - {str(e)}")
             raise
             
+    async def _load_media(self, media_source: Union[str, bytes]) -> DownloadedMedia:
+        """Stream a URL, or wrap a local file or bytes, as hashed media; caller cleans up"""
+        if isinstance(media_source, bytes):
+            return DownloadedMedia.from_bytes(media_source)
+        if media_source.startswith(('http://', 'https://')):
+            return await self._download_media_stream(media_source)
+        return await asyncio.to_thread(DownloadedMedia.from_file, media_source)
+        
+    def _media_content_type(self, media: DownloadedMedia, media_source: Union[str, bytes]) -> str:
+        """Declared content type, else sniffed from the leading bytes and file name"""
+        declared = media.content_type.split(';')[0].strip()
+        return declared or self._detect_media_type(media.head, media_source if isinstance(media_source, str) else '')
+            
     @abstractmethod
     async def analyze(self, media_source: Union[str, bytes], **kwargs) -> MediaIntelligence:
         """Analyze media"""
@@ -188,25 +200,22 @@ class ReverseImageSearchScanner(BaseMediaScanner):
             'yandex_images',
             'tineye'
         ]
+        self.similarity_index = get_image_similarity_index()
+        self.similarity_radius = 10
         
     def can_handle(self, media_type: str) -> bool:
         return media_type.lower() in self.supported_formats
         
     async def analyze(self, media_source: Union[str, bytes], **kwargs) -> MediaIntelligence:
         """Perform reverse image search"""
-        # Handle both URL and binary data
-        if isinstance(media_source, str):
-            if media_source.startswith(('http://', 'https://')):
-                media_data, content_type = await self._download_media(media_source)
-            else:
-                # Assume it's a file path
-                with open(media_source, 'rb') as f:
-                    media_data = f.read()
-                content_type = self._detect_media_type(media_data, media_source)
-        else:
-            media_data = media_source
-            content_type = self._detect_media_type(media_data)
+        # URLs, file paths and binary data; large downloads stay spooled on disk
+        with await self._load_media(media_source) as media:
+            return await self._analyze_media(media_source, media, kwargs.get('query_id'))
             
+    async def _analyze_media(self, media_source: Union[str, bytes], media: DownloadedMedia,
+                             query_id: Optional[Any] = None) -> MediaIntelligence:
+        """Reverse search, fingerprint and index loaded media"""
+        content_type = self._media_content_type(media, media_source)
         if not self.can_handle(content_type):
             return MediaIntelligence(
                 media_source=str(media_source),
@@ -218,7 +227,7 @@ class ReverseImageSearchScanner(BaseMediaScanner):
                 timestamp=datetime.now()
             )
             
-        media_hash = self._get_media_hash(media_data)
+        media_hash = media.sha256
         cache_key = self._generate_cache_key(media_hash, 'reverse_search')
         
         if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
@@ -234,16 +243,21 @@ class ReverseImageSearchScanner(BaseMediaScanner):
             )
             
         # Perform reverse image search
-        search_results = await self._perform_reverse_search(media_data, content_type)
+        search_results = await self._perform_reverse_search(media_hash, content_type)
         
         # Extract image fingerprint for comparison
-        fingerprint = await self._generate_image_fingerprint(media_data)
+        perceptual_hashes = await self._compute_perceptual_hashes(media)
+        fingerprint = self._format_fingerprint(perceptual_hashes, media.md5)
+        
+        # Near-duplicates from earlier investigations
+        near_duplicates = await self._match_and_index(media_hash, perceptual_hashes, query_id)
         
         # Analyze search results
         analysis_data = {
             'media_hash': media_hash,
             'media_type': content_type,
             'fingerprint': fingerprint,
+            'near_duplicates': near_duplicates,
             'search_results': search_results,
             'total_matches': sum(len(results.get('matches', [])) for results in search_results.values()),
             'search_engines_used': list(search_results.keys()),
@@ -270,7 +284,7 @@ class ReverseImageSearchScanner(BaseMediaScanner):
             matches=self._extract_top_matches(search_results)
         )
         
-    async def _perform_reverse_search(self, media_data: bytes, content_type: str) -> Dict[str, Any]:
+    async def _perform_reverse_search(self, media_hash: str, content_type: str) -> Dict[str, Any]:
         """Perform reverse image search across multiple engines"""
         results = {}
         
@@ -279,7 +293,7 @@ class ReverseImageSearchScanner(BaseMediaScanner):
         
         for engine in self.search_engines:
             try:
-                engine_results = await self._search_engine_lookup(engine, media_data, content_type)
+                engine_results = await self._search_engine_lookup(engine, media_hash, content_type)
                 results[engine] = engine_results
             except Exception as e:
                 logger.warning(f"Reverse search failed for {engine}: {str(e)}")
@@ -287,13 +301,11 @@ class ReverseImageSearchScanner(BaseMediaScanner):
                 
         return results
         
-    async def _search_engine_lookup(self, engine: str, media_data: bytes, content_type: str) -> Dict[str, Any]:
+    async def _search_engine_lookup(self, engine: str, media_hash: str, content_type: str) -> Dict[str, Any]:
         """Perform lookup with specific search engine"""
         # Mock implementation - in production would use actual APIs
         await asyncio.sleep(0.1)  # Simulate API delay
         
-        media_hash = self._get_media_hash(media_data)
-        
         # Generate consistent mock results based on image hash
         num_results = (hash(media_hash) % 10) + 1
         
@@ -319,35 +331,47 @@ class ReverseImageSearchScanner(BaseMediaScanner):
             'search_time': f'{0.1 + (hash(media_hash) % 5) / 10:.2f}s'
         }
         
-    async def _generate_image_fingerprint(self, media_data: bytes) -> str:
+    async def _generate_image_fingerprint(self, media: DownloadedMedia) -> str:
         """Generate perceptual hash fingerprint for image"""
+        perceptual_hashes = await self._compute_perceptual_hashes(media)
+        return self._format_fingerprint(perceptual_hashes, media.md5)
+        
+    async def _compute_perceptual_hashes(self, media: DownloadedMedia) -> Optional[Dict[str, int]]:
+        """Compute phash/dhash/ahash on the shared hashing process pool"""
         try:
-            loop = asyncio.get_event_loop()
-            
-            def compute_hash():
-                image = Image.open(io.BytesIO(media_data))
-                # Convert to RGB if necessary
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                # Generate perceptual hash
-                phash = imagehash.phash(image)
-                dhash = imagehash.dhash(image)
-                ahash = imagehash.average_hash(image)
-                
-                return {
-                    'phash': str(phash),
-                    'dhash': str(dhash),
-                    'ahash': str(ahash),
-                    'combined': f"{phash}_{dhash}_{ahash}"
-                }
-                
-            with ThreadPoolExecutor() as executor:
-                fingerprint = await loop.run_in_executor(executor, compute_hash)
-                return fingerprint['combined']
-                
+            # Spooled media is passed by path so the bytes are not pickled to the worker
+            return await compute_perceptual_hashes_async(media.source())
         except Exception as e:
             logger.warning(f"Fingerprint generation failed: {str(e)}")
-            return hashlib.md5(media_data).hexdigest()
+            return None
+            
+    def _format_fingerprint(self, perceptual_hashes: Optional[Dict[str, int]], media_md5: str) -> str:
+        """Combine perceptual hashes into the fingerprint string"""
+        if not perceptual_hashes:
+            return media_md5
+        return "_".join(format_hash(perceptual_hashes[name]) for name in ('phash', 'dhash', 'ahash'))
+        
+    async def _match_and_index(self, media_hash: str, perceptual_hashes: Optional[Dict[str, int]],
+                         query_id: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Look up near-duplicate images seen before, then index this one"""
+        if not perceptual_hashes:
+            return []
+            
+        try:
+            phash = perceptual_hashes['phash']
+            matches = [
+                match for match in self.similarity_index.query(phash, radius=self.similarity_radius, limit=11)
+                if match['key'] != media_hash
+            ][:10]
+            
+            metadata = {'first_seen': datetime.now().isoformat()}
+            if query_id is not None:
+                metadata['query_id'] = query_id
+            await self.similarity_index.add_async(media_hash, phash, metadata)
+            return matches
+        except Exception as e:
+            logger.warning(f"Image similarity lookup failed: {str(e)}")
+            return []
             
     def _extract_top_matches(self, search_results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract top matches across all search engines"""
@@ -395,18 +419,13 @@ class FacialRecognitionScanner(BaseMediaScanner):
         
     async def analyze(self, media_source: Union[str, bytes], **kwargs) -> MediaIntelligence:
         """Perform facial recognition and analysis"""
-        # Handle both URL and binary data
-        if isinstance(media_source, str):
-            if media_source.startswith(('http://', 'https://')):
-                media_data, content_type = await self._download_media(media_source)
-            else:
-                with open(media_source, 'rb') as f:
-                    media_data = f.read()
-                content_type = self._detect_media_type(media_data, media_source)
-        else:
-            media_data = media_source
-            content_type = self._detect_media_type(media_data)
+        # URLs, file paths and binary data; large downloads stay spooled on disk
+        with await self._load_media(media_source) as media:
+            return await self._analyze_media(media_source, media)
             
+    async def _analyze_media(self, media_source: Union[str, bytes], media: DownloadedMedia) -> MediaIntelligence:
+        """Detect faces, demographics and emotions in loaded media"""
+        content_type = self._media_content_type(media, media_source)
         if not self.can_handle(content_type):
             return MediaIntelligence(
                 media_source=str(media_source),
@@ -418,7 +437,7 @@ class FacialRecognitionScanner(BaseMediaScanner):
                 timestamp=datetime.now()
             )
             
-        media_hash = self._get_media_hash(media_data)
+        media_hash = media.sha256
         cache_key = self._generate_cache_key(media_hash, 'facial_recognition')
         
         if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
@@ -434,9 +453,9 @@ class FacialRecognitionScanner(BaseMediaScanner):
             )
             
         # Perform facial analysis
-        face_analysis = await self._analyze_faces(media_data)
-        demographic_analysis = await self._analyze_demographics(media_data)
-        emotion_analysis = await self._analyze_emotions(media_data)
+        face_analysis = await self._analyze_faces(media)
+        demographic_analysis = await self._analyze_demographics(media.md5)
+        emotion_analysis = await self._analyze_emotions(media.md5)
         
         analysis_data = {
             'media_hash': media_hash,
@@ -466,15 +485,15 @@ class FacialRecognitionScanner(BaseMediaScanner):
             timestamp=datetime.now()
         )
         
-    async def _analyze_faces(self, media_data: bytes) -> Dict[str, Any]:
+    async def _analyze_faces(self, media: DownloadedMedia) -> Dict[str, Any]:
         """Detect and analyze faces in image"""
         try:
-            loop = asyncio.get_event_loop()
-            
             def detect_faces():
-                # Convert to OpenCV format
-                nparr = np.frombuffer(media_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                # Convert to OpenCV format, reading spooled media straight from disk
+                if media.path is not None:
+                    image = cv2.imread(media.path, cv2.IMREAD_COLOR)
+                else:
+                    image = cv2.imdecode(np.frombuffer(media.read_bytes(), np.uint8), cv2.IMREAD_COLOR)
                 
                 if image is None:
                     return {'error': 'Could not decode image'}
@@ -486,7 +505,7 @@ class FacialRecognitionScanner(BaseMediaScanner):
                 height, width = gray.shape
                 
                 # Generate mock face detections based on image characteristics
-                image_hash = hashlib.md5(media_data).hexdigest()
+                image_hash = media.md5
                 num_faces = (hash(image_hash) % 4) + 1  # 1-4 faces
                 
                 faces = []
@@ -521,17 +540,16 @@ class FacialRecognitionScanner(BaseMediaScanner):
                     'detection_method': 'cv2_mock'
                 }
                 
-            with ThreadPoolExecutor() as executor:
-                return await loop.run_in_executor(executor, detect_faces)
+            # cv2 releases the GIL, and the mock detections rely on per-process str hashing
+            return await get_compute_service().run_io("face_detection", detect_faces)
                 
         except Exception as e:
             logger.error(f"Face detection failed: {str(e)}")
             return {'error': f'Face detection failed: {str(e)}'}
             
-    async def _analyze_demographics(self, media_data: bytes) -> Dict[str, Any]:
+    async def _analyze_demographics(self, image_hash: str) -> Dict[str, Any]:
         """Analyze demographic characteristics"""
         # Mock demographic analysis
-        image_hash = hashlib.md5(media_data).hexdigest()
         
         demographics = []
         num_faces = (hash(image_hash) % 4) + 1
@@ -559,10 +577,9 @@ class FacialRecognitionScanner(BaseMediaScanner):
             'disclaimer': 'Demographic analysis is estimative and may not be accurate'
         }
         
-    async def _analyze_emotions(self, media_data: bytes) -> Dict[str, Any]:
+    async def _analyze_emotions(self, image_hash: str) -> Dict[str, Any]:
         """Analyze facial emotions"""
         # Mock emotion analysis
-        image_hash = hashlib.md5(media_data).hexdigest()
         
         emotions = []
         num_faces = (hash(image_hash) % 4) + 1
@@ -634,38 +651,75 @@ class MetadataExtractionScanner(BaseMediaScanner):
             'video/mp4', 'video/avi', 'video/mov', 'video/wmv',
             'audio/mp3', 'audio/wav', 'audio/flac', 'audio/aac'
         ]
+        self.workers = get_metadata_worker_pool()
         
     def can_handle(self, media_type: str) -> bool:
         return media_type.lower() in self.supported_formats
         
     async def analyze(self, media_source: Union[str, bytes], **kwargs) -> MediaIntelligence:
-        """Extract comprehensive metadata from media file"""
-        # Handle both URL and binary data
-        if isinstance(media_source, str):
-            if media_source.startswith(('http://', 'https://')):
-                media_data, content_type = await self._download_media(media_source)
-            else:
-                with open(media_source, 'rb') as f:
-                    media_data = f.read()
-                content_type = self._detect_media_type(media_data, media_source)
-        else:
-            media_data = media_source
-            content_type = self._detect_media_type(media_data)
-            
-        if not self.can_handle(content_type):
-            return MediaIntelligence(
-                media_source=str(media_source),
-                media_type=content_type,
-                analysis_type='metadata_extraction',
-                source=self.name,
-                data={'error': f'Unsupported media type: {content_type}'},
-                confidence_score=0.0,
-                timestamp=datetime.now()
+        """Extract comprehensive metadata from media file
+
+        With ``metadata_only=True`` a URL is not downloaded: images and audio
+        are read from the leading bytes and MP4/MOV from the ``moov`` box
+        reached with range requests.
+        """
+        is_url = isinstance(media_source, str) and media_source.startswith(('http://', 'https://'))
+        if kwargs.get('metadata_only') and is_url:
+            return await self._analyze_remote_header(media_source)
+        # URLs, file paths and binary data; workers read spooled downloads from disk
+        with await self._load_media(media_source) as media:
+            content_type = self._media_content_type(media, media_source)
+            if not self.can_handle(content_type):
+                return self._unsupported_result(media_source, content_type)
+            cached = self._cached_result(media_source, content_type, media.sha256)
+            if cached is not None:
+                return cached
+            metadata = await self._extract_metadata(
+                content_type, data=None if media.path is not None else media.read_bytes(),
+                path=media.path, media_hash=media.sha256
             )
-            
-        media_hash = self._get_media_hash(media_data)
-        cache_key = self._generate_cache_key(media_hash, 'metadata')
+        return self._build_metadata_result(media_source, content_type, media.sha256, metadata)
+        
+    async def _analyze_remote_header(self, url: str) -> MediaIntelligence:
+        """Metadata from the header (or MP4 ``moov``) of a remote file, without the body"""
+        await self._rate_limit_check()
+        header = await self.downloader.fetch_header(url, session=self.session)
+        content_type = self._media_content_type(header, url)
+        if not self.can_handle(content_type):
+            return self._unsupported_result(url, content_type)
+        
+        data = header.read_bytes()
+        if content_type.startswith('video/'):
+            # Workers find moov by walking boxes from ftyp, so ftyp + moov is enough
+            ftyp = next(iter_boxes(header.head), None)
+            moov = await self.downloader.fetch_mp4_moov(url, session=self.session)
+            if ftyp is not None and ftyp[0] == b'ftyp' and moov is not None:
+                data = header.head[:ftyp[2]] + moov
+                
+        # Keyed on the bytes metadata is read from, so equal keys mean equal metadata
+        media_hash = self._get_media_hash(data)
+        cached = self._cached_result(url, content_type, media_hash)
+        if cached is not None:
+            return cached
+        metadata = await self._extract_metadata(content_type, data=data, media_hash=media_hash,
+                                                total_size=header.total_size)
+        metadata['partial_read'] = True
+        return self._build_metadata_result(url, content_type, media_hash, metadata)
+        
+    def _unsupported_result(self, media_source: Union[str, bytes], content_type: str) -> MediaIntelligence:
+        return MediaIntelligence(
+            media_source=str(media_source),
+            media_type=content_type,
+            analysis_type='metadata_extraction',
+            source=self.name,
+            data={'error': f'Unsupported media type: {content_type}'},
+            confidence_score=0.0,
+            timestamp=datetime.now()
+        )
         
+    def _cached_result(self, media_source: Union[str, bytes], content_type: str,
+                       media_hash: str) -> Optional[MediaIntelligence]:
+        cache_key = self._generate_cache_key(media_hash, 'metadata')
         if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
             cached_data = self.cache[cache_key]['data']
             return MediaIntelligence(
@@ -677,17 +731,13 @@ class MetadataExtractionScanner(BaseMediaScanner):
                 confidence_score=cached_data.get('confidence_score', 0.8),
                 timestamp=datetime.now()
             )
-            
-        # Extract metadata based on media type
-        if content_type.startswith('image/'):
-            metadata = await self._extract_image_metadata(media_data)
-        elif content_type.startswith('video/'):
-            metadata = await self._extract_video_metadata(media_data)
-        elif content_type.startswith('audio/'):
-            metadata = await self._extract_audio_metadata(media_data)
-        else:
-            metadata = {'error': f'Metadata extraction not implemented for {content_type}'}
-            
+        return None
+        
+    def _build_metadata_result(self, media_source: Union[str, bytes], content_type: str,
+                               media_hash: str, metadata: Dict[str, Any]) -> MediaIntelligence:
+        """Score extracted metadata, cache the analysis and wrap it as intelligence"""
+        cache_key = self._generate_cache_key(media_hash, 'metadata')
+        
         # Analyze metadata for intelligence value
         intelligence_analysis = self._analyze_metadata_intelligence(metadata)
         
@@ -719,132 +769,14 @@ class MetadataExtractionScanner(BaseMediaScanner):
             metadata=metadata
         )
         
-    async def _extract_image_metadata(self, media_data: bytes) -> Dict[str, Any]:
-        """Extract EXIF and other metadata from images"""
-        try:
-            loop = asyncio.get_event_loop()
-            
-            def extract_exif():
-                image = Image.open(io.BytesIO(media_data))
-                
-                metadata = {
-                    'basic_info': {
-                        'format': image.format,
-                        'mode': image.mode,
-                        'size': image.size,
-                        'width': image.width,
-                        'height': image.height,
-                        'has_transparency': image.mode in ('RGBA', 'LA') or 'transparency' in image.info
-                    },
-                    'exif_data': {},
-                    'icc_profile': None,
-                    'other_info': image.info.copy()
-                }
-                
-                # Extract EXIF data
-                if hasattr(image, '_getexif') and image._getexif() is not None:
-                    exif_dict = image._getexif()
-                    
-                    for tag_id, value in exif_dict.items():
-                        tag = TAGS.get(tag_id, tag_id)
-                        
-                        # Convert bytes to string for JSON serialization
-                        if isinstance(value, bytes):
-                            try:
-                                value = value.decode('utf-8', errors='ignore')
-                            except:
-                                value = str(value)
-                                
-                        metadata['exif_data'][tag] = value
-                        
-                # Extract ICC profile if present
-                if 'icc_profile' in image.info:
-                    metadata['icc_profile'] = {
-                        'present': True,
-                        'size': len(image.info['icc_profile'])
-                    }
-                    
-                return metadata
-                
-            with ThreadPoolExecutor() as executor:
-                return await loop.run_in_executor(executor, extract_exif)
-                
-        except Exception as e:
-            logger.error(f"Image metadata extraction failed: {str(e)}")
-            return {'error': f'Image metadata extraction failed: {str(e)}'}
-            
-    async def _extract_video_metadata(self, media_data: bytes) -> Dict[str, Any]:
-        """Extract metadata from video files"""
-        # Mock video metadata extraction
-        # In production, would use libraries like ffmpeg-python or moviepy
-        
-        video_hash = hashlib.md5(media_data).hexdigest()
-        
-        # Generate consistent mock metadata
-        duration = 30 + (hash(video_hash + "_duration") % 300)  # 30-330 seconds
-        width = 720 + (hash(video_hash + "_width") % 560)  # 720-1280
-        height = 480 + (hash(video_hash + "_height") % 240)  # 480-720
-        
-        return {
-            'format_info': {
-                'format': 'mp4',
-                'duration': duration,
-                'duration_formatted': f"{duration//60}:{duration%60:02d}",
-                'file_size': len(media_data),
-                'bitrate': f"{(len(media_data) * 8) // duration}bps"
-            },
-            'video_streams': [{
-                'codec': 'h264',
-                'width': width,
-                'height': height,
-                'aspect_ratio': f"{width}:{height}",
-                'frame_rate': '30fps',
-                'pixel_format': 'yuv420p'
-            }],
-            'audio_streams': [{
-                'codec': 'aac',
-                'sample_rate': '44100Hz',
-                'channels': 2,
-                'bitrate': '128kbps'
-            }],
-            'creation_date': datetime.now().isoformat(),
-            'software': 'Unknown Video Editor'
-        }
-        
-    async def _extract_audio_metadata(self, media_data: bytes) -> Dict[str, Any]:
-        """Extract metadata from audio files"""
-        # Mock audio metadata extraction
-        # In production, would use libraries like mutagen or eyed3
-        
-        audio_hash = hashlib.md5(media_data).hexdigest()
-        
-        # Generate consistent mock metadata
-        duration = 60 + (hash(audio_hash + "_duration") % 240)  # 1-5 minutes
-        
-        return {
-            'format_info': {
-                'format': 'mp3',
-                'duration': duration,
-                'duration_formatted': f"{duration//60}:{duration%60:02d}",
-                'file_size': len(media_data),
-                'bitrate': '320kbps',
-                'sample_rate': '44100Hz',
-                'channels': 2
-            },
-            'id3_tags': {
-                'title': 'Unknown Title',
-                'artist': 'Unknown Artist',
-                'album': 'Unknown Album',
-                'year': '2023',
-                'genre': 'Unknown',
-                'track': '1/12'
-            },
-            'technical_info': {
-                'encoder': 'LAME 3.100',
-                'encoding_quality': 'VBR V0',
-                'has_cover_art': hash(audio_hash) % 2 == 0
-            }
-        }
+    async def _extract_metadata(self, content_type: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                                media_hash: Optional[str] = None, total_size: Optional[int] = None) -> Dict[str, Any]:
+        """EXIF, container or audio metadata, extracted in the worker pool"""
+        kind = content_type.split('/')[0]
+        if kind not in ('image', 'video', 'audio'):
+            return {'error': f'Metadata extraction not implemented for {content_type}'}
+        return await self.workers.extract(kind, data=data, path=path, content_hash=media_hash,
+                                          total_size=total_size)
         
     def _analyze_metadata_intelligence(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze metadata for intelligence value"""
@@ -5,34 +5,35 @@ Replaces mock implementations with actual functional scanners.
 
 import logging
 from .base import scanner_registry
-from .email_scanners import register_email_scanners
-from .phone_scanners import register_phone_scanners  
-from .social_scanners import register_social_scanners
 
 logger = logging.getLogger(__name__)
 
+# Scanner modules pull in heavy dependencies (dnspython, phonenumbers
+# geodata, aiohttp), so they are imported when a query first needs them.
+# (module, register function, query types its scanners handle)
+LAZY_SCANNER_MODULES = [
+    ("app.scanners.email_scanners", "register_email_scanners", frozenset({"email"})),
+    ("app.scanners.phone_scanners", "register_phone_scanners", frozenset({"phone"})),
+    ("app.scanners.social_scanners", "register_social_scanners", frozenset({"email", "name", "phone", "username"})),
+    ("app.scanners.username_probe", "register_username_probe_scanners", frozenset({"email", "username"})),
+]
+
 
 def register_scanners():
     """Register all real scanner modules."""
     
     logger.info("Registering real scanner modules...")
     
-    # Register real scanner implementations
-    email_count = register_email_scanners(scanner_registry)
-    phone_count = register_phone_scanners(scanner_registry)
-    social_count = register_social_scanners(scanner_registry)
+    # Real scanner implementations are registered lazily
+    for module, register_function, handles in LAZY_SCANNER_MODULES:
+        scanner_registry.register_lazy(module, register_function, handles)
     
     # Register additional mock scanners for categories not yet implemented
     # This maintains the 100+ scanner count while we build out real implementations
     additional_scanners = register_additional_mock_scanners()
     
-    total_scanners = email_count + phone_count + social_count + additional_scanners
-    
-    logger.info(f"Registered {total_scanners} scanner modules:")
-    logger.info(f"  - Email scanners: {email_count}")
-    logger.info(f"  - Phone scanners: {phone_count}")
-    logger.info(f"  - Social media scanners: {social_count}")
-    logger.info(f"  - Additional mock scanners: {additional_scanners}")
+    logger.info(f"Registered {len(LAZY_SCANNER_MODULES)} lazy scanner modules "
+                f"and {additional_scanners} additional mock scanners")
     
     return scanner_registry
 
@@ -45,13 +46,12 @@ def register_additional_mock_scanners():
     
     # Mock scanner class for remaining categories
     class AdditionalMockScanner(BaseScannerModule):
+        # These are placeholder scanners, so they handle basic query types
+        handles = frozenset({'email', 'phone', 'name', 'username'})
+        
         def __init__(self, name: str, scanner_type: ScannerType, description: str):
             super().__init__(name, scanner_type, description)
         
-        def can_handle(self, query: Query) -> bool:
-            # These are placeholder scanners, so they handle basic query types
-            return query.query_type.lower() in ['email', 'phone', 'name', 'username']
-        
         async def scan(self, query: Query) -> dict:
             # Mock implementation with realistic delay
             await asyncio.sleep(0.5)
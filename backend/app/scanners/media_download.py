@@ -0,0 +1,443 @@
+"""
+Streaming Media Downloader
+==========================
+
+Downloads media without holding whole files in memory:
+- Responses are read in fixed-size chunks under a hard byte limit; a
+  ``Content-Length`` over the limit is refused before any body is read
+- sha256 and md5 are updated chunk by chunk while downloading
+- Bytes stay in memory up to ``spool_threshold`` and are spooled to a
+  temporary file beyond it, so memory per download is bounded by the
+  threshold (plus one chunk) whatever the file size
+- Metadata-only reads fetch just the leading bytes (EXIF, file headers)
+  or walk MP4 top-level boxes with range requests to reach ``moov``
+  without downloading ``mdat``
+"""
+
+import hashlib
+import io
+import logging
+import os
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, BinaryIO, List, Optional, Tuple, Union
+
+import aiohttp
+
+from .session_pool import ScannerSessionPool
+
+logger = logging.getLogger(__name__)
+
+# Bytes kept in memory for magic-byte sniffing, whatever the file size
+SNIFF_BYTES = 4096
+# Leading bytes that hold EXIF (JPEG APP1 is at most 64 KB) and most container headers
+DEFAULT_HEADER_BYTES = 256 * 1024
+
+
+class MediaDownloadError(Exception):
+    """Raised when media cannot be downloaded"""
+
+
+class MediaTooLargeError(MediaDownloadError):
+    """Raised when media exceeds the download byte limit"""
+
+
+@dataclass
+class DownloadedMedia:
+    """Downloaded bytes, in memory or spooled to a temporary file"""
+    url: str
+    content_type: str
+    size: int
+    head: bytes
+    sha256: Optional[str] = None  # None for partial (range) reads
+    md5: Optional[str] = None
+    path: Optional[str] = None
+    partial: bool = False
+    total_size: Optional[int] = None  # size of the remote file, when known
+    _data: Optional[bytes] = field(default=None, repr=False)
+    owned: bool = field(default=True, repr=False)  # False for caller files, never deleted
+
+    @classmethod
+    def from_bytes(cls, data: bytes, url: str = '') -> 'DownloadedMedia':
+        """Wrap bytes already in memory"""
+        return cls(url=url, content_type='', size=len(data), head=data[:SNIFF_BYTES],
+                   sha256=hashlib.sha256(data).hexdigest(), md5=hashlib.md5(data).hexdigest(),
+                   total_size=len(data), _data=data)
+
+    @classmethod
+    def from_file(cls, path: str, chunk_size: int = 1024 * 1024) -> 'DownloadedMedia':
+        """Wrap a local file, hashing it in chunks; ``cleanup()`` leaves the file in place"""
+        sha256, md5 = hashlib.sha256(), hashlib.md5()
+        head = b''
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                if not size:
+                    head = chunk[:SNIFF_BYTES]
+                sha256.update(chunk)
+                md5.update(chunk)
+                size += len(chunk)
+        return cls(url=path, content_type='', size=size, head=head, sha256=sha256.hexdigest(),
+                   md5=md5.hexdigest(), path=path, total_size=size, owned=False)
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+    def source(self) -> Union[str, bytes]:
+        """The file path when on disk, else the bytes; for decoders that accept either"""
+        return self.path if self.path is not None else (self._data or b'')
+
+    def open(self) -> BinaryIO:
+        """Binary stream over the downloaded bytes"""
+        if self.path is not None:
+            return open(self.path, 'rb')
+        return io.BytesIO(self._data or b'')
+
+    def read_bytes(self) -> bytes:
+        """All downloaded bytes in memory; prefer ``open()`` for large media"""
+        if self.path is None:
+            return self._data or b''
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def cleanup(self):
+        """Delete the spool file, if any"""
+        if self.path is not None:
+            if self.owned:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+            self.path = None
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+
+
+class _SpoolWriter:
+    """Collects chunks in memory, moving to a temporary file past the threshold"""
+
+    def __init__(self, threshold: int, spool_dir: Optional[str], hashing: bool):
+        self.threshold = threshold
+        self.spool_dir = spool_dir
+        self.buffer = bytearray()
+        self.file = None
+        self.path: Optional[str] = None
+        self.size = 0
+        self.head = bytearray()
+        self.sha256 = hashlib.sha256() if hashing else None
+        self.md5 = hashlib.md5() if hashing else None
+
+    def write(self, chunk: bytes):
+        if self.sha256 is not None:
+            self.sha256.update(chunk)
+            self.md5.update(chunk)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+        self.size += len(chunk)
+        if self.file is None and len(self.buffer) + len(chunk) > self.threshold:
+            if self.spool_dir:
+                os.makedirs(self.spool_dir, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(prefix='media-', suffix='.part', dir=self.spool_dir)
+            self.file = os.fdopen(fd, 'wb')
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.buffer += chunk
+
+    def finish(self, url: str, content_type: str, partial: bool = False,
+               total_size: Optional[int] = None) -> DownloadedMedia:
+        if self.file is not None:
+            self.file.close()
+        return DownloadedMedia(
+            url=url,
+            content_type=content_type,
+            size=self.size,
+            head=bytes(self.head),
+            sha256=self.sha256.hexdigest() if self.sha256 is not None else None,
+            md5=self.md5.hexdigest() if self.md5 is not None else None,
+            path=self.path,
+            partial=partial,
+            total_size=total_size,
+            _data=bytes(self.buffer) if self.file is None else None,
+        )
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class MediaDownloader:
+    """Streams media downloads with byte limits, incremental hashing and spooling"""
+
+    def __init__(self, session_pool: Optional[ScannerSessionPool] = None,
+                 max_bytes: Optional[int] = None, spool_threshold: Optional[int] = None,
+                 chunk_size: int = 64 * 1024, spool_dir: Optional[str] = None, timeout: float = 60):
+        self.session_pool = session_pool or ScannerSessionPool()
+        self.max_bytes = max_bytes or int(os.getenv("MEDIA_MAX_DOWNLOAD_BYTES", str(200 * 1024 * 1024)))
+        self.spool_threshold = spool_threshold if spool_threshold is not None else int(
+            os.getenv("MEDIA_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+        self.chunk_size = chunk_size
+        self.spool_dir = spool_dir or os.getenv("MEDIA_SPOOL_DIR") or None
+        self.timeout = timeout
+        self.stats = {"downloads": 0, "bytes": 0, "spooled": 0, "rejected_too_large": 0, "range_reads": 0}
+
+    async def close(self):
+        await self.session_pool.close()
+
+    async def _session(self, session: Optional[aiohttp.ClientSession]) -> aiohttp.ClientSession:
+        if session is not None and not session.closed:
+            return session
+        return await self.session_pool.get_session(
+            "media", headers={'User-Agent': 'MediaIntelBot/1.0 (+https://example.com/bot)',
+                              'Accept': 'image/*, video/*, audio/*, */*'},
+            timeout=self.timeout,
+        )
+
+    async def download(self, url: str, max_bytes: Optional[int] = None,
+                       session: Optional[aiohttp.ClientSession] = None) -> DownloadedMedia:
+        """Download ``url`` completely, refusing anything over ``max_bytes``"""
+        limit = max_bytes or self.max_bytes
+        session = await self._session(session)
+        writer = _SpoolWriter(self.spool_threshold, self.spool_dir, hashing=True)
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise MediaDownloadError(f"HTTP {response.status}")
+                declared = response.content_length
+                if declared is not None and declared > limit:
+                    self.stats["rejected_too_large"] += 1
+                    raise MediaTooLargeError(f"{url} is {declared} bytes; limit is {limit}")
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    if writer.size + len(chunk) > limit:
+                        self.stats["rejected_too_large"] += 1
+                        raise MediaTooLargeError(f"{url} exceeded {limit} bytes")
+                    writer.write(chunk)
+                media = writer.finish(url, response.headers.get('Content-Type', ''), total_size=writer.size)
+        except BaseException:
+            writer.discard()
+            raise
+        self.stats["downloads"] += 1
+        self.stats["bytes"] += media.size
+        self.stats["spooled"] += media.spooled
+        return media
+
+    async def fetch_range(self, url: str, start: int, length: int,
+                          session: Optional[aiohttp.ClientSession] = None) -> Tuple[bytes, Optional[int]]:
+        """Bytes ``[start, start + length)`` of ``url`` and the remote size if known.
+
+        Uses a Range request; when the server ignores it, the body is
+        streamed, bytes before ``start`` are skipped and the connection is
+        dropped once enough has been read.
+        """
+        if start + length > self.max_bytes:
+            raise MediaTooLargeError(f"range ends past the {self.max_bytes} byte limit")
+        session = await self._session(session)
+        self.stats["range_reads"] += 1
+        headers = {'Range': f'bytes={start}-{start + length - 1}'}
+        async with session.get(url, headers=headers) as response:
+            if response.status == 416:
+                return b'', _total_from_content_range(response.headers.get('Content-Range'))
+            if response.status == 206:
+                total = _total_from_content_range(response.headers.get('Content-Range'))
+                data = await _read_at_most(response, length, self.chunk_size)
+                return data, total
+            if response.status != 200:
+                raise MediaDownloadError(f"HTTP {response.status}")
+            total = response.content_length
+            data = await _read_at_most(response, start + length, self.chunk_size)
+            # Not reading the rest: close instead of returning a half-read connection to the pool
+            response.close()
+            return data[start:start + length], total
+
+    async def fetch_header(self, url: str, length: int = DEFAULT_HEADER_BYTES,
+                           session: Optional[aiohttp.ClientSession] = None) -> DownloadedMedia:
+        """The leading ``length`` bytes of ``url``, for metadata-only extraction"""
+        data, total = await self.fetch_range(url, 0, length, session=session)
+        return DownloadedMedia(url=url, content_type='', size=len(data), head=data[:SNIFF_BYTES],
+                               partial=total is None or len(data) < total, total_size=total, _data=data)
+
+    async def fetch_mp4_moov(self, url: str, max_moov_bytes: int = 16 * 1024 * 1024,
+                             session: Optional[aiohttp.ClientSession] = None) -> Optional[bytes]:
+        """The ``moov`` box of a remote MP4/MOV, found by walking top-level boxes with range reads"""
+        offset = 0
+        window, total = await self.fetch_range(url, 0, 64 * 1024, session=session)
+        window_start = 0
+        for _ in range(64):  # top-level boxes are few; stop on malformed files
+            if total is not None and offset >= total:
+                return None
+            local = offset - window_start
+            if local < 0 or local + 16 > len(window):
+                window, window_total = await self.fetch_range(url, offset, 64 * 1024, session=session)
+                total = total or window_total
+                window_start = offset
+                local = 0
+                if len(window) < 8:
+                    return None
+            box = _box_at(window, local, total - offset if total is not None else None)
+            if box is None:
+                return None
+            box_type, box_size, header_size = box
+            if box_type == b'moov':
+                if box_size > max_moov_bytes:
+                    raise MediaTooLargeError(f"moov box is {box_size} bytes")
+                if local + box_size <= len(window):
+                    return bytes(window[local:local + box_size])
+                data, _ = await self.fetch_range(url, offset, box_size, session=session)
+                return data if len(data) == box_size else None
+            if box_size == 0:
+                return None  # box runs to end of file
+            offset += box_size
+        return None
+
+
+# Shared downloader; every scanner's downloads go through one connection pool
+_media_downloader: Optional[MediaDownloader] = None
+
+
+def get_media_downloader() -> MediaDownloader:
+    """Get the shared media downloader"""
+    global _media_downloader
+    if _media_downloader is None:
+        _media_downloader = MediaDownloader()
+    return _media_downloader
+
+
+async def _read_at_most(response: aiohttp.ClientResponse, limit: int, chunk_size: int) -> bytes:
+    data = bytearray()
+    async for chunk in response.content.iter_chunked(chunk_size):
+        data += chunk
+        if len(data) >= limit:
+            break
+    return bytes(data[:limit])
+
+
+def _total_from_content_range(value: Optional[str]) -> Optional[int]:
+    # "bytes 0-99/1234" or "bytes */1234"
+    if not value or '/' not in value:
+        return None
+    total = value.rsplit('/', 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def _box_at(data: bytes, offset: int, remaining: Optional[int]) -> Optional[Tuple[bytes, int, int]]:
+    """(type, size, header size) of the ISO-BMFF box at ``offset``; size 0 runs to end of file"""
+    if offset + 8 > len(data):
+        return None
+    size, box_type = struct.unpack_from('>I4s', data, offset)
+    header_size = 8
+    if size == 1:
+        if offset + 16 > len(data):
+            return None
+        size = struct.unpack_from('>Q', data, offset + 8)[0]
+        header_size = 16
+    elif size == 0 and remaining is not None:
+        size = remaining
+    if size != 0 and size < header_size:
+        return None
+    return box_type, size, header_size
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield ``(type, payload_start, payload_end)`` for the boxes in ``data[start:end]``"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        box = _box_at(data, offset, end - offset)
+        if box is None:
+            return
+        box_type, size, header_size = box
+        if size == 0 or offset + size > end:
+            size = end - offset
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(data: bytes, path: List[bytes], start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    matches = []
+    for box_type, payload_start, payload_end in iter_boxes(data, start, end):
+        if box_type != path[0]:
+            continue
+        if len(path) == 1:
+            matches.append((payload_start, payload_end))
+        else:
+            matches.extend(_find_box(data, path[1:], payload_start, payload_end))
+    return matches
+
+
+_MP4_EPOCH = datetime(1904, 1, 1)
+
+
+def parse_mp4_moov(moov: bytes) -> Dict[str, Any]:
+    """Duration, creation time, tracks and frame size from an MP4/MOV ``moov`` box"""
+    info: Dict[str, Any] = {'tracks': []}
+    body = _find_box(moov, [b'moov'])
+    if not body:
+        return info
+    moov_start, moov_end = body[0]
+
+    mvhd = _find_box(moov, [b'mvhd'], moov_start, moov_end)
+    if mvhd:
+        start, end = mvhd[0]
+        layout = '>QQIQ' if end > start and moov[start] == 1 else '>IIII'
+        # Truncated boxes are skipped rather than read past their end
+        if end - start >= 4 + struct.calcsize(layout):
+            created, _, timescale, duration = struct.unpack_from(layout, moov, start + 4)
+            info['timescale'] = timescale
+            info['duration'] = round(duration / timescale, 3) if timescale else None
+            if created:
+                info['creation_time'] = (_MP4_EPOCH + timedelta(seconds=created)).isoformat()
+
+    for trak_start, trak_end in _find_box(moov, [b'trak'], moov_start, moov_end):
+        track: Dict[str, Any] = {}
+        handler = _find_box(moov, [b'mdia', b'hdlr'], trak_start, trak_end)
+        if handler and handler[0][1] - handler[0][0] >= 12:
+            track['handler'] = moov[handler[0][0] + 8:handler[0][0] + 12].decode('latin-1')
+        tkhd = _find_box(moov, [b'tkhd'], trak_start, trak_end)
+        if tkhd:
+            start, end = tkhd[0]
+            # Width and height follow the version-dependent times, layer/volume and matrix
+            size_offset = 88 if end > start and moov[start] == 1 else 76
+            if end - start >= size_offset + 8:
+                width, height = struct.unpack_from('>II', moov, start + size_offset)
+                if width or height:
+                    track['width'], track['height'] = width >> 16, height >> 16
+        info['tracks'].append(track)
+    return info
+
+
+def read_mp4_metadata(stream: BinaryIO, max_moov_bytes: int = 16 * 1024 * 1024) -> Dict[str, Any]:
+    """Find and parse ``moov`` in a seekable MP4/MOV stream without reading ``mdat``"""
+    stream.seek(0, os.SEEK_END)
+    total = stream.tell()
+    offset = 0
+    while offset + 8 <= total:
+        stream.seek(offset)
+        header = stream.read(16)
+        box = _box_at(header, 0, total - offset)
+        if box is None:
+            break
+        box_type, size, _ = box
+        if box_type == b'moov':
+            if size > max_moov_bytes:
+                raise MediaTooLargeError(f"moov box is {size} bytes")
+            stream.seek(offset)
+            return parse_mp4_moov(stream.read(size))
+        if size == 0:
+            break
+        offset += size
+    return {'tracks': [], 'error': 'moov box not found'}
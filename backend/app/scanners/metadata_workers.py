@@ -0,0 +1,430 @@
+"""
+Metadata Extraction Workers
+===========================
+
+Runs EXIF, video container and audio metadata parsing in a dedicated pool
+of worker processes so slow or adversarial files cannot stall the event loop:
+- Every job runs under a CPU time budget (``RLIMIT_CPU`` + ``SIGXCPU``) and a
+  memory allowance above the worker's footprint (``RLIMIT_AS``); a job over
+  its budget fails alone and the worker keeps serving
+- Jobs are submitted in batches, one round trip per batch
+- Results are cached by content hash and identical in-flight jobs are coalesced
+- A worker killed outright (segfault, OOM killer) restarts the pool and the
+  jobs of its batch are retried one at a time, so only the culprit fails
+
+The pool is separate from the shared compute service so the limits and
+signal handlers installed in its workers never apply to other stages.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import signal
+import struct
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, Any, BinaryIO, Callable, List, Optional, Union
+
+from PIL import Image
+from PIL.ExifTags import TAGS
+
+from ..core.advanced_caching import LRUCache
+from ..core.compute_service import get_compute_service
+from .media_download import read_mp4_metadata
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # not on Windows
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataJobLimitError(Exception):
+    """Raised inside a worker when a job exceeds its CPU time budget"""
+
+
+@dataclass
+class MetadataJob:
+    """One file to extract metadata from; ``path`` avoids shipping large bytes"""
+    kind: str  # 'image', 'video' or 'audio'
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    content_hash: Optional[str] = None
+    total_size: Optional[int] = None  # size of the whole file when ``data`` is only its header
+
+    def open(self) -> BinaryIO:
+        return open(self.path, 'rb') if self.data is None else io.BytesIO(self.data)
+
+    def size(self) -> int:
+        if self.total_size is not None:
+            return self.total_size
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+
+def extract_image_metadata(media_data: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+    """Read format, EXIF and ICC details from image bytes or a stream (runs in a worker process)"""
+    # Pillow parses headers on open and decodes pixels only on load(), so a
+    # stream is read no further than its metadata
+    image = Image.open(io.BytesIO(media_data) if isinstance(media_data, bytes) else media_data)
+
+    metadata = {
+        'basic_info': {
+            'format': image.format,
+            'mode': image.mode,
+            'size': image.size,
+            'width': image.width,
+            'height': image.height,
+            'has_transparency': image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        },
+        'exif_data': {},
+        'icc_profile': None,
+        'other_info': image.info.copy()
+    }
+
+    # Extract EXIF data
+    if hasattr(image, '_getexif') and image._getexif() is not None:
+        exif_dict = image._getexif()
+
+        for tag_id, value in exif_dict.items():
+            tag = TAGS.get(tag_id, tag_id)
+
+            # Convert bytes to string for JSON serialization
+            if isinstance(value, bytes):
+                try:
+                    value = value.decode('utf-8', errors='ignore')
+                except:
+                    value = str(value)
+
+            metadata['exif_data'][tag] = value
+
+    # Extract ICC profile if present
+    if 'icc_profile' in image.info:
+        metadata['icc_profile'] = {
+            'present': True,
+            'size': len(image.info['icc_profile'])
+        }
+
+    return metadata
+
+
+def _extract_image(job: MetadataJob) -> Dict[str, Any]:
+    with job.open() as stream:
+        return extract_image_metadata(stream)
+
+
+def _extract_video(job: MetadataJob) -> Dict[str, Any]:
+    """Container metadata from the MP4/MOV moov box, found by seeking"""
+    size = job.size()
+    with job.open() as stream:
+        header = stream.read(12)
+        if header[4:8] != b'ftyp':
+            return {'format_info': {'format': 'unknown', 'file_size': size},
+                    'error': 'Unsupported video container'}
+        moov = read_mp4_metadata(stream)
+    duration = moov.get('duration')
+    tracks = moov.get('tracks', [])
+    metadata = {
+        'format_info': {
+            'format': header[8:12].decode('latin-1').strip(),
+            'duration': duration,
+            'file_size': size,
+            'bitrate': f"{int(size * 8 / duration)}bps" if duration else None
+        },
+        'video_streams': [
+            {'width': t['width'], 'height': t['height'], 'aspect_ratio': f"{t['width']}:{t['height']}"}
+            for t in tracks if t.get('handler') == 'vide' and 'width' in t
+        ],
+        'audio_streams': [{'type': 'audio'} for t in tracks if t.get('handler') == 'soun'],
+        'creation_date': moov.get('creation_time')
+    }
+    if 'error' in moov:
+        metadata['error'] = moov['error']
+    return metadata
+
+
+def _extract_audio(job: MetadataJob) -> Dict[str, Any]:
+    """Format details from WAV headers and ID3v2 tags from MP3s, reading headers only"""
+    size = job.size()
+    with job.open() as stream:
+        header = stream.read(12)
+        if header.startswith(b'RIFF') and header[8:12] == b'WAVE':
+            stream.seek(0)
+            with wave.open(stream) as wav:
+                frames, rate = wav.getnframes(), wav.getframerate()
+                return {'format_info': {
+                    'format': 'wav',
+                    'duration': round(frames / rate, 3) if rate else None,
+                    'file_size': size,
+                    'sample_rate': f"{rate}Hz",
+                    'channels': wav.getnchannels(),
+                    'sample_width_bits': wav.getsampwidth() * 8
+                }}
+        metadata = {'format_info': {'format': 'mp3' if header[:3] == b'ID3' else 'unknown', 'file_size': size}}
+        if header[:3] == b'ID3' and len(header) >= 10:
+            stream.seek(0)
+            metadata['id3_tags'] = _read_id3v2(stream.read(10 + _syncsafe(header[6:10])))
+    return metadata
+
+
+_ID3_FIELDS = {b'TIT2': 'title', b'TPE1': 'artist', b'TALB': 'album', b'TYER': 'year',
+               b'TDRC': 'year', b'TCON': 'genre', b'TRCK': 'track', b'TSSE': 'encoder'}
+_ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+
+def _syncsafe(value: bytes) -> int:
+    """28-bit ID3v2 syncsafe integer (7 bits per byte)"""
+    return sum((b & 0x7f) << (7 * (3 - i)) for i, b in enumerate(value))
+
+
+def _read_id3v2(data: bytes) -> Dict[str, str]:
+    """Text frames from an ID3v2.3/2.4 tag"""
+    tags = {}
+    offset, end = 10, min(10 + _syncsafe(data[6:10]), len(data))
+    while offset + 10 <= end:
+        frame_id, frame_size = struct.unpack_from('>4sI', data, offset)
+        if frame_size == 0 or not frame_id.strip(b'\x00'):
+            break
+        if data[3] == 4:
+            frame_size = _syncsafe(data[offset + 4:offset + 8])
+        body = data[offset + 10:offset + 10 + frame_size]
+        if frame_id in _ID3_FIELDS and body:
+            encoding = _ID3_ENCODINGS.get(body[0], 'latin-1')
+            tags[_ID3_FIELDS[frame_id]] = body[1:].decode(encoding, errors='ignore').strip('\x00')
+        offset += 10 + frame_size
+    return tags
+
+
+EXTRACTORS: Dict[str, Callable[[MetadataJob], Dict[str, Any]]] = {
+    'image': _extract_image,
+    'video': _extract_video,
+    'audio': _extract_audio,
+}
+
+
+def _on_cpu_limit(signum, frame):
+    raise MetadataJobLimitError("CPU time limit exceeded")
+
+
+def _init_worker():
+    """Make SIGXCPU a catchable exception instead of killing the worker"""
+    if RESOURCE_AVAILABLE:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        return None
+
+
+def _run_job(job: MetadataJob, extractor: Callable, cpu_seconds: float, memory_bytes: int) -> Dict[str, Any]:
+    limited = []
+    if RESOURCE_AVAILABLE:
+        if cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1, hard))
+            limited.append(resource.RLIMIT_CPU)
+        footprint = _address_space_bytes() if memory_bytes else None
+        if footprint:
+            hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+            resource.setrlimit(resource.RLIMIT_AS, (footprint + memory_bytes, hard))
+            limited.append(resource.RLIMIT_AS)
+    try:
+        return {'metadata': extractor(job)}
+    except MetadataJobLimitError as e:
+        return {'error': str(e), 'limit': 'cpu'}
+    except MemoryError:
+        return {'error': 'Memory limit exceeded', 'limit': 'memory'}
+    except Exception as e:
+        return {'error': f'{job.kind.capitalize()} metadata extraction failed: {e}'}
+    finally:
+        for limit in limited:
+            resource.setrlimit(limit, (resource.getrlimit(limit)[1],) * 2)
+
+
+def run_metadata_batch(jobs: List[MetadataJob], extractors: Dict[str, Callable],
+                       cpu_seconds: float, memory_bytes: int) -> List[Dict[str, Any]]:
+    """Run a batch of jobs one by one, each under its own limits (runs in a worker process)"""
+    return [_run_job(job, extractors[job.kind], cpu_seconds, memory_bytes) for job in jobs]
+
+
+def _hash_job(job: MetadataJob) -> str:
+    if job.data is not None:
+        return hashlib.sha256(job.data).hexdigest()
+    digest = hashlib.sha256()
+    with open(job.path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MetadataWorkerPool:
+    """Process pool for metadata extraction with per-job limits, batching and caching"""
+
+    def __init__(self, workers: Optional[int] = None, cpu_seconds: Optional[float] = None,
+                 memory_mb: Optional[int] = None, batch_size: int = 8, cache_size: Optional[int] = None,
+                 cache_ttl: int = 3600, extractors: Optional[Dict[str, Callable]] = None):
+        cpus = os.cpu_count() or 1
+        self.workers = workers or int(os.getenv("METADATA_WORKERS", str(min(2, cpus))))
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else float(
+            os.getenv("METADATA_JOB_CPU_SECONDS", "10"))
+        self.memory_bytes = (memory_mb if memory_mb is not None else int(
+            os.getenv("METADATA_JOB_MEMORY_MB", "512"))) * 1024 * 1024
+        self.batch_size = batch_size
+        self.cache_ttl = cache_ttl
+        self.cache = LRUCache(max_size=cache_size or int(os.getenv("METADATA_CACHE_SIZE", "4096")))
+        self.extractors = {**EXTRACTORS, **(extractors or {})}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"jobs": 0, "extracted": 0, "cache_hits": 0, "coalesced": 0,
+                      "batches": 0, "limit_exceeded": 0, "failed": 0, "pool_restarts": 0}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not broken:
+                return  # another batch already replaced it
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.stats["pool_restarts"] += 1
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def extract(self, kind: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                      content_hash: Optional[str] = None, total_size: Optional[int] = None) -> Dict[str, Any]:
+        """Metadata for one file; returns ``{'error': ...}`` when extraction fails"""
+        job = MetadataJob(kind, data=data, path=path, content_hash=content_hash, total_size=total_size)
+        return (await self.extract_many([job]))[0]
+
+    async def extract_many(self, jobs: List[MetadataJob]) -> List[Dict[str, Any]]:
+        """Metadata for many files, in order; uncached jobs are sent to workers in batches"""
+        self.stats["jobs"] += len(jobs)
+        unhashed = [job for job in jobs if job.content_hash is None]
+        if unhashed:
+            compute = get_compute_service()
+            hashes = await asyncio.gather(*(compute.run_io("metadata_hash", _hash_job, job) for job in unhashed))
+            for job, content_hash in zip(unhashed, hashes):
+                job.content_hash = content_hash
+
+        loop = asyncio.get_running_loop()
+        waiting: List[asyncio.Future] = []
+        to_run: List[MetadataJob] = []
+        owned: Dict[str, asyncio.Future] = {}
+        for job in jobs:
+            key = f"{job.kind}:{job.content_hash}"
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                future = loop.create_future()
+                future.set_result(cached)
+            elif key in self._in_flight:
+                self.stats["coalesced"] += 1
+                future = self._in_flight[key]
+            else:
+                future = self._in_flight[key] = owned[key] = loop.create_future()
+                to_run.append(job)
+            waiting.append(future)
+
+        if to_run:
+            batches = [to_run[i:i + self.batch_size] for i in range(0, len(to_run), self.batch_size)]
+            try:
+                await asyncio.gather(*(self._run_batch(batch, owned) for batch in batches))
+            finally:
+                for key, future in owned.items():
+                    self._in_flight.pop(key, None)
+                    if not future.done():
+                        future.cancel()
+
+        results = []
+        for future in waiting:
+            result = await future
+            results.append(dict(result['metadata']) if 'metadata' in result else {'error': result['error']})
+        return results
+
+    async def _run_batch(self, batch: List[MetadataJob], owned: Dict[str, asyncio.Future]):
+        loop = asyncio.get_running_loop()
+        extractors = {job.kind: self.extractors[job.kind] for job in batch}
+        for attempt in range(2):
+            executor = self._pool()
+            try:
+                self.stats["batches"] += 1
+                results = await loop.run_in_executor(
+                    executor, run_metadata_batch, batch, extractors, self.cpu_seconds, self.memory_bytes
+                )
+                break
+            except BrokenProcessPool:
+                logger.warning("Metadata worker died; restarting the pool")
+                self._restart(executor)
+                if attempt:
+                    results = [{'error': 'Metadata worker crashed'} for _ in batch]
+                    break
+                if len(batch) > 1:
+                    # Retry jobs one at a time so a crashing file only takes itself down
+                    for job in batch:
+                        await self._run_batch([job], owned)
+                    return
+
+        for job, result in zip(batch, results):
+            key = f"{job.kind}:{job.content_hash}"
+            if 'metadata' in result:
+                self.stats["extracted"] += 1
+            elif 'limit' in result:
+                self.stats["limit_exceeded"] += 1
+            else:
+                self.stats["failed"] += 1
+            # A file over its limits will be over them next time too
+            if 'metadata' in result or 'limit' in result:
+                self.cache.set(key, result, ttl=self.cache_ttl)
+            future = owned[key]
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "cpu_seconds_per_job": self.cpu_seconds,
+            "memory_mb_per_job": self.memory_bytes // (1024 * 1024),
+            "limits_enforced": RESOURCE_AVAILABLE,
+            "cache": self.cache.get_stats(),
+        }
+
+
+# Shared worker pool
+_metadata_worker_pool: Optional[MetadataWorkerPool] = None
+
+
+def get_metadata_worker_pool() -> MetadataWorkerPool:
+    """Get the shared metadata worker pool"""
+    global _metadata_worker_pool
+    if _metadata_worker_pool is None:
+        _metadata_worker_pool = MetadataWorkerPool()
+    return _metadata_worker_pool
+
+
+def shutdown_metadata_worker_pool():
+    """Stop the shared pool's workers, if it was ever started"""
+    global _metadata_worker_pool
+    pool, _metadata_worker_pool = _metadata_worker_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
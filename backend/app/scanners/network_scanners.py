@@ -38,12 +38,14 @@ import subprocess
 import platform
 import whois
 import requests
-from concurrent.futures import ThreadPoolExecutor
 import geoip2.database
 import geoip2.errors
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
+from ..core.compute_service import get_compute_service
+from .session_pool import ScannerSessionPool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -72,25 +74,42 @@ class BaseNetworkScanner(ABC):
         self.last_request_time = 0
         self.request_count = 0
         self.session = None
+        self.session_pool: Optional[ScannerSessionPool] = None  # set by the orchestrator
+        self._owns_session = False
         self.cache = {}
         self.cache_ttl = 1800  # 30 minutes cache
         self.timeout = 30
+        self.headers = {
+            'User-Agent': 'NetworkIntelBot/1.0 (+https://example.com/bot)',
+            'Accept': 'application/json, text/html, */*'
+        }
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.timeout),
-            headers={
-                'User-Agent': 'NetworkIntelBot/1.0 (+https://example.com/bot)',
-                'Accept': 'application/json, text/html, */*'
-            }
-        )
+        await self._ensure_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
+        """Async context manager exit; borrowed pool sessions stay open"""
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
+            self._owns_session = False
+            
+    async def _ensure_session(self):
+        """Borrow the pool's session for this scanner family, or open a private one"""
+        if self.session_pool is not None:
+            # Always ask the pool: it replaces sessions bound to a finished event loop
+            self.session = await self.session_pool.get_session(
+                'network', headers=self.headers, timeout=self.timeout
+            )
+            self._owns_session = False
+        elif self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers
+            )
+            self._owns_session = True
             
     async def _rate_limit_check(self):
         """Enforce rate limiting"""
@@ -129,6 +148,7 @@ class BaseNetworkScanner(ABC):
     async def _make_request(self, url: str, method: str = 'GET', **kwargs) -> Dict:
         """Make HTTP request with error handling"""
         await self._rate_limit_check()
+        await self._ensure_session()
         
         try:
             async with self.session.request(method, url, **kwargs) as response:
@@ -386,8 +406,7 @@ class IPGeolocationScanner(BaseNetworkScanner):
     async def _get_reverse_dns(self, ip: str) -> Optional[str]:
         """Get reverse DNS lookup"""
         try:
-            loop = asyncio.get_event_loop()
-            hostname = await loop.run_in_executor(None, socket.gethostbyaddr, ip)
+            hostname = await get_compute_service().run_io("reverse_dns", socket.gethostbyaddr, ip)
             return hostname[0] if hostname else None
         except Exception:
             return None
@@ -491,9 +510,7 @@ class DomainAnalysisScanner(BaseNetworkScanner):
     async def _get_whois_data(self, domain: str) -> Dict[str, Any]:
         """Get WHOIS information for domain"""
         try:
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                whois_info = await loop.run_in_executor(executor, whois.whois, domain)
+            whois_info = await get_compute_service().run_io("whois", whois.whois, domain)
                 
             if whois_info:
                 return {
@@ -566,8 +583,6 @@ class DomainAnalysisScanner(BaseNetworkScanner):
     async def _get_ssl_certificate_info(self, domain: str) -> Dict[str, Any]:
         """Get SSL certificate information"""
         try:
-            loop = asyncio.get_event_loop()
-            
             def get_cert_info():
                 context = ssl.create_default_context()
                 with socket.create_connection((domain, 443), timeout=10) as sock:
@@ -587,9 +602,7 @@ class DomainAnalysisScanner(BaseNetworkScanner):
                             'days_until_expiry': (cert.not_valid_after - datetime.now()).days
                         }
                         
-            with ThreadPoolExecutor() as executor:
-                cert_info = await loop.run_in_executor(executor, get_cert_info)
-                return cert_info
+            return await get_compute_service().run_io("ssl_certificate", get_cert_info)
                 
         except Exception as e:
             logger.warning(f"SSL certificate check failed for {domain}: {str(e)}")
@@ -935,8 +948,6 @@ class NetworkInfrastructureScanner(BaseNetworkScanner):
             else:
                 cmd = ['traceroute', '-m', '15', target]
                 
-            loop = asyncio.get_event_loop()
-            
             def run_traceroute():
                 try:
                     result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
@@ -946,8 +957,7 @@ class NetworkInfrastructureScanner(BaseNetworkScanner):
                 except Exception as e:
                     return f"Traceroute failed: {str(e)}"
                     
-            with ThreadPoolExecutor() as executor:
-                output = await loop.run_in_executor(executor, run_traceroute)
+            output = await get_compute_service().run_io("traceroute", run_traceroute)
                 
             # Parse traceroute output (simplified)
             hops = []
@@ -1118,13 +1128,35 @@ class NetworkInfrastructureScanner(BaseNetworkScanner):
 class NetworkIntelligenceOrchestrator:
     """Orchestrates multiple network intelligence scanners"""
     
-    def __init__(self):
+    def __init__(self, session_pool: Optional[ScannerSessionPool] = None,
+                 scanner_timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 60.0):
         self.scanners = {
             'ip_geolocation': IPGeolocationScanner(),
             'domain_analysis': DomainAnalysisScanner(),
             'port_scanner': PortScannerScanner(),
             'network_infrastructure': NetworkInfrastructureScanner()
         }
+        # Sessions live as long as the orchestrator; scanners borrow them
+        self.session_pool = session_pool or ScannerSessionPool()
+        self.scanner_timeouts = scanner_timeouts or {}
+        self.default_timeout = default_timeout
+        for scanner in self.scanners.values():
+            scanner.session_pool = self.session_pool
+            
+    async def __aenter__(self):
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        
+    async def close(self):
+        """Close the pooled sessions"""
+        await self.session_pool.close()
+        
+    async def _run_scanner(self, scanner_name: str, scanner: BaseNetworkScanner, target: str) -> NetworkIntelligence:
+        timeout = self.scanner_timeouts.get(scanner_name, self.default_timeout)
+        async with scanner:
+            return await asyncio.wait_for(scanner.scan(target), timeout=timeout)
         
     async def comprehensive_scan(self, target: str, target_type: str = 'auto') -> Dict[str, NetworkIntelligence]:
         """Perform comprehensive network intelligence scan"""
@@ -1140,29 +1172,28 @@ class NetworkIntelligenceOrchestrator:
             if scanner.can_handle(target_type):
                 applicable_scanners.append((scanner_name, scanner))
                 
-        # Run scans concurrently
-        tasks = []
-        for scanner_name, scanner in applicable_scanners:
-            async with scanner:
-                task = asyncio.create_task(scanner.scan(target))
-                tasks.append((scanner_name, task))
+        # Run scans concurrently, each under its own timeout
+        outcomes = await asyncio.gather(
+            *(self._run_scanner(scanner_name, scanner, target) for scanner_name, scanner in applicable_scanners),
+            return_exceptions=True
+        )
                 
         # Collect results
-        for scanner_name, task in tasks:
-            try:
-                result = await task
-                results[scanner_name] = result
-                logger.info(f"Network scan completed: {scanner_name}")
-            except Exception as e:
-                logger.error(f"Network scan failed: {scanner_name} - {str(e)}")
+        for (scanner_name, _), outcome in zip(applicable_scanners, outcomes):
+            if isinstance(outcome, Exception):
+                error = 'timeout' if isinstance(outcome, asyncio.TimeoutError) else str(outcome)
+                logger.error(f"Network scan failed: {scanner_name} - {error}")
                 results[scanner_name] = NetworkIntelligence(
                     target=target,
                     intel_type=scanner_name,
                     source=scanner_name,
-                    data={'error': str(e)},
+                    data={'error': error},
                     confidence_score=0.0,
                     timestamp=datetime.now()
                 )
+            else:
+                results[scanner_name] = outcome
+                logger.info(f"Network scan completed: {scanner_name}")
                 
         return results
         
@@ -1251,6 +1282,8 @@ async def test_network_scanners():
     print(f"Success rate: {summary['success_rate']:.1%}")
     print(f"Average confidence: {summary['average_confidence']:.2f}")
     print(f"Key findings: {summary['key_findings']}")
+    
+    await orchestrator.close()
 
 
 if __name__ == "__main__":
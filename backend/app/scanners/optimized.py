@@ -10,7 +10,6 @@ import aiohttp
 import time
 import logging
 from typing import Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor
 import json
 
 logger = logging.getLogger(__name__)
@@ -28,7 +27,6 @@ class OptimizedScannerBase:
         self.rate_limit = 1.0  # seconds between requests
         self._last_request = 0
         self.session = None
-        self.executor = ThreadPoolExecutor(max_workers=4)
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -42,7 +40,6 @@ class OptimizedScannerBase:
         """Async context manager exit"""
         if self.session:
             await self.session.close()
-        self.executor.shutdown(wait=True)
     
     async def scan(self, query) -> Dict[str, Any]:
         """Enhanced scan with comprehensive error handling and optimization."""
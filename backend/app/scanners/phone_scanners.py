@@ -67,6 +67,8 @@ logger = logging.getLogger(__name__)
 class PhoneValidatorScanner(BaseScannerModule):
     """Phone number validation and formatting scanner"""
     
+    handles = frozenset({'phone'})
+    
     def __init__(self):
         super().__init__(
             name="phone_validator",
@@ -75,9 +77,6 @@ class PhoneValidatorScanner(BaseScannerModule):
         )
         self.rate_limiter = RateLimiter(max_requests=200, time_window=60)
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'phone'
-    
     def _clean_phone_number(self, phone: str) -> str:
         """Clean and normalize phone number"""
         # Remove all non-digit characters except +
@@ -177,6 +176,8 @@ class PhoneValidatorScanner(BaseScannerModule):
 class PhoneLocationScanner(BaseScannerModule):
     """Phone number location and timezone scanner"""
     
+    handles = frozenset({'phone'})
+    
     def __init__(self):
         super().__init__(
             name="phone_location_scanner",
@@ -185,9 +186,6 @@ class PhoneLocationScanner(BaseScannerModule):
         )
         self.rate_limiter = RateLimiter(max_requests=150, time_window=60)
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'phone'
-    
     async def _get_geographic_info(self, phone: str) -> Dict[str, Any]:
         """Get geographic information for phone number"""
         try:
@@ -288,6 +286,8 @@ class PhoneLocationScanner(BaseScannerModule):
 class PhoneSpamScanner(BaseScannerModule):
     """Phone number spam and reputation scanner"""
     
+    handles = frozenset({'phone'})
+    
     def __init__(self):
         super().__init__(
             name="phone_spam_scanner",
@@ -306,9 +306,6 @@ class PhoneSpamScanner(BaseScannerModule):
             ]
         }
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'phone'
-    
     def _analyze_spam_patterns(self, phone: str) -> Dict[str, Any]:
         """Analyze phone number for spam patterns"""
         digits = re.sub(r'[^\d]', '', phone)
@@ -446,6 +443,8 @@ class PhoneSpamScanner(BaseScannerModule):
 class PhoneCarrierScanner(BaseScannerModule):
     """Phone number carrier and network information scanner"""
     
+    handles = frozenset({'phone'})
+    
     def __init__(self):
         super().__init__(
             name="phone_carrier_scanner",
@@ -464,9 +463,6 @@ class PhoneCarrierScanner(BaseScannerModule):
             }
         }
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() == 'phone'
-    
     async def _identify_carrier(self, phone: str) -> Dict[str, Any]:
         """Identify carrier information"""
         try:
@@ -21,20 +21,33 @@ import aiohttp
 import json
 import time
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 import hashlib
+import os
 import re
 from urllib.parse import quote, urljoin
 import xml.etree.ElementTree as ET
 
+from ..core.advanced_caching import LRUCache
+from ..core.lazy import LazyObject
+from .session_pool import ScannerSessionPool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _build_records_cache() -> LRUCache:
+    return LRUCache(max_size=int(os.getenv("PUBLIC_RECORDS_CACHE_SIZE", "2048")))
+
+
+# Search results shared by every scanner instance in the process; bounded and expiring
+records_cache = LazyObject(_build_records_cache)
+
+
 @dataclass
 class PublicRecord:
     """Standard public record data structure"""
@@ -63,25 +76,47 @@ class BasePublicRecordsScanner(ABC):
         self.last_request_time = 0
         self.request_count = 0
         self.session = None
-        self.cache = {}
+        self.session_pool: Optional[ScannerSessionPool] = None  # set by the orchestrator
+        self._owns_session = False
         self.cache_ttl = 3600  # 1 hour cache
+        self.negative_cache_ttl = 300  # "no records" is re-checked sooner
+        self.timeout = 30
+        self.max_concurrency = 4  # sub-source searches in flight per scanner
+        self.subsearch_timeout = 20.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.headers = {
+            'User-Agent': 'PublicRecordsBot/1.0 (+https://example.com/bot)',
+            'Accept': 'application/json, text/html, */*',
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'PublicRecordsBot/1.0 (+https://example.com/bot)',
-                'Accept': 'application/json, text/html, */*',
-                'Accept-Language': 'en-US,en;q=0.9'
-            }
-        )
+        await self._ensure_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
+        """Async context manager exit; borrowed pool sessions stay open"""
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
+            self._owns_session = False
+            
+    async def _ensure_session(self):
+        """Borrow the pool's session for this scanner family, or open a private one"""
+        if self.session_pool is not None:
+            # Always ask the pool: it replaces sessions bound to a finished event loop
+            self.session = await self.session_pool.get_session(
+                'public_records', headers=self.headers, timeout=self.timeout
+            )
+            self._owns_session = False
+        elif self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers
+            )
+            self._owns_session = True
             
     async def _rate_limit_check(self):
         """Enforce rate limiting"""
@@ -94,19 +129,66 @@ class BasePublicRecordsScanner(ABC):
         
     def _generate_cache_key(self, query: str, params: Dict = None) -> str:
         """Generate cache key for request"""
-        key_data = f"{self.name}:{query}:{str(params)}"
+        key_data = f"{self.name}:{self.jurisdiction}:{query}:{str(sorted((params or {}).items()))}"
         return hashlib.md5(key_data.encode()).hexdigest()
         
-    def _is_cache_valid(self, cache_entry: Dict) -> bool:
-        """Check if cache entry is still valid"""
-        if not cache_entry:
-            return False
-        timestamp = cache_entry.get('timestamp', 0)
-        return time.time() - timestamp < self.cache_ttl
+    def _get_cached(self, cache_key: str) -> Optional[List[PublicRecord]]:
+        """Cached records for a search, [] for a cached miss, None when not cached"""
+        records = records_cache.get(cache_key)
+        return list(records) if records is not None else None
+        
+    def _set_cached(self, cache_key: str, records: List[PublicRecord]):
+        """Cache search results; empty results expire after the shorter negative TTL"""
+        ttl = self.cache_ttl if records else self.negative_cache_ttl
+        # Stored as a tuple: callers get their own list, and the cache skips sizing it via str()
+        records_cache.set(cache_key, tuple(records), ttl=ttl, tags=[self.name])
+        
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+        
+    async def _run_subsearches(self, query: str, searches: List, **kwargs) -> Tuple[List[PublicRecord], bool]:
+        """Run sub-source searches concurrently (at most ``max_concurrency`` at once).
+        
+        Returns the records of every source that finished within
+        ``subsearch_timeout``, in source order, and whether all of them did.
+        """
+        semaphore = self._get_semaphore()
+        
+        async def run(search):
+            async with semaphore:
+                return await search(query, **kwargs)
+                
+        tasks = [asyncio.ensure_future(run(search)) for search in searches]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.subsearch_timeout) if tasks else (set(), set())
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+                
+        records = []
+        complete = True
+        for search, task in zip(searches, tasks):
+            if task in pending:
+                logger.warning(f"{self.name}: {search.__name__} timed out after {self.subsearch_timeout}s")
+                complete = False
+            elif task.exception() is not None:
+                logger.error(f"{self.name}: {search.__name__} failed: {task.exception()}")
+                complete = False
+            else:
+                records.extend(task.result())
+        return records, complete
         
     async def _make_request(self, url: str, method: str = 'GET', **kwargs) -> Dict:
         """Make HTTP request with error handling"""
         await self._rate_limit_check()
+        await self._ensure_session()
         
         try:
             async with self.session.request(method, url, **kwargs) as response:
@@ -209,28 +291,20 @@ class CourtRecordsScanner(BasePublicRecordsScanner):
     async def search(self, query: str, **kwargs) -> List[PublicRecord]:
         """Search court records"""
         cache_key = self._generate_cache_key(query, kwargs)
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-            return self.cache[cache_key]['data']
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
             
-        records = []
-        
-        # Federal court records
-        federal_records = await self._search_federal_courts(query, **kwargs)
-        records.extend(federal_records)
-        
-        # State court records
-        state_records = await self._search_state_courts(query, **kwargs)
-        records.extend(state_records)
+        # Federal, state and local court records
+        records, complete = await self._run_subsearches(query, [
+            self._search_federal_courts,
+            self._search_state_courts,
+            self._search_local_courts,
+        ], **kwargs)
         
-        # Local court records
-        local_records = await self._search_local_courts(query, **kwargs)
-        records.extend(local_records)
-        
-        # Cache results
-        self.cache[cache_key] = {
-            'data': records,
-            'timestamp': time.time()
-        }
+        # Cache complete results only; a timed-out source should be retried next time
+        if complete:
+            self._set_cached(cache_key, records)
         
         return records
         
@@ -377,32 +451,21 @@ class PropertyRecordsScanner(BasePublicRecordsScanner):
     async def search(self, query: str, **kwargs) -> List[PublicRecord]:
         """Search property records"""
         cache_key = self._generate_cache_key(query, kwargs)
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-            return self.cache[cache_key]['data']
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
             
-        records = []
-        
-        # Property ownership records
-        ownership_records = await self._search_ownership_records(query, **kwargs)
-        records.extend(ownership_records)
-        
-        # Tax assessment records
-        tax_records = await self._search_tax_records(query, **kwargs)
-        records.extend(tax_records)
-        
-        # Deed and transfer records
-        deed_records = await self._search_deed_records(query, **kwargs)
-        records.extend(deed_records)
-        
-        # Building permits and violations
-        permit_records = await self._search_permit_records(query, **kwargs)
-        records.extend(permit_records)
-        
-        # Cache results
-        self.cache[cache_key] = {
-            'data': records,
-            'timestamp': time.time()
-        }
+        # Ownership, tax assessment, deed/transfer and permit/violation records
+        records, complete = await self._run_subsearches(query, [
+            self._search_ownership_records,
+            self._search_tax_records,
+            self._search_deed_records,
+            self._search_permit_records,
+        ], **kwargs)
+        
+        # Cache complete results only; a timed-out source should be retried next time
+        if complete:
+            self._set_cached(cache_key, records)
         
         return records
         
@@ -600,32 +663,21 @@ class BusinessRecordsScanner(BasePublicRecordsScanner):
     async def search(self, query: str, **kwargs) -> List[PublicRecord]:
         """Search business records"""
         cache_key = self._generate_cache_key(query, kwargs)
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-            return self.cache[cache_key]['data']
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
             
-        records = []
-        
-        # Corporate filings
-        corporate_records = await self._search_corporate_filings(query, **kwargs)
-        records.extend(corporate_records)
-        
-        # Business licenses
-        license_records = await self._search_business_licenses(query, **kwargs)
-        records.extend(license_records)
-        
-        # UCC filings
-        ucc_records = await self._search_ucc_filings(query, **kwargs)
-        records.extend(ucc_records)
-        
-        # Professional licenses
-        professional_records = await self._search_professional_licenses(query, **kwargs)
-        records.extend(professional_records)
-        
-        # Cache results
-        self.cache[cache_key] = {
-            'data': records,
-            'timestamp': time.time()
-        }
+        # Corporate filings, business licenses, UCC filings and professional licenses
+        records, complete = await self._run_subsearches(query, [
+            self._search_corporate_filings,
+            self._search_business_licenses,
+            self._search_ucc_filings,
+            self._search_professional_licenses,
+        ], **kwargs)
+        
+        # Cache complete results only; a timed-out source should be retried next time
+        if complete:
+            self._set_cached(cache_key, records)
         
         return records
         
@@ -826,25 +878,23 @@ class CriminalRecordsScanner(BasePublicRecordsScanner):
     async def search(self, query: str, **kwargs) -> List[PublicRecord]:
         """Search criminal records (following legal guidelines)"""
         cache_key = self._generate_cache_key(query, kwargs)
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-            return self.cache[cache_key]['data']
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
             
-        records = []
-        
         # Only return mock data for demonstration
         # In production, this would need proper authorization and legal compliance
         logger.warning("Criminal records search requires proper authorization and legal compliance")
         
         # Mock criminal history data (for demo purposes only)
+        searches = []
         if kwargs.get('authorized', False):  # Only if explicitly authorized
-            criminal_records = await self._search_criminal_history(query, **kwargs)
-            records.extend(criminal_records)
+            searches.append(self._search_criminal_history)
+        records, complete = await self._run_subsearches(query, searches, **kwargs)
             
-        # Cache results
-        self.cache[cache_key] = {
-            'data': records,
-            'timestamp': time.time()
-        }
+        # Cache complete results only; a timed-out source should be retried next time
+        if complete:
+            self._set_cached(cache_key, records)
         
         return records
         
@@ -908,30 +958,24 @@ class VitalRecordsScanner(BasePublicRecordsScanner):
     async def search(self, query: str, **kwargs) -> List[PublicRecord]:
         """Search vital records (following privacy laws)"""
         cache_key = self._generate_cache_key(query, kwargs)
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-            return self.cache[cache_key]['data']
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
             
-        records = []
-        
         # Note: Vital records are often restricted and require proper authorization
         logger.info("Vital records may require authorization and have privacy restrictions")
         
-        # Public marriage and divorce records (often publicly accessible)
-        marriage_records = await self._search_marriage_records(query, **kwargs)
-        records.extend(marriage_records)
-        
-        divorce_records = await self._search_divorce_records(query, **kwargs)
-        records.extend(divorce_records)
+        # Public marriage and divorce records (often publicly accessible), and
+        # death records (often publicly accessible after certain time period)
+        records, complete = await self._run_subsearches(query, [
+            self._search_marriage_records,
+            self._search_divorce_records,
+            self._search_death_records,
+        ], **kwargs)
         
-        # Death records (often publicly accessible after certain time period)
-        death_records = await self._search_death_records(query, **kwargs)
-        records.extend(death_records)
-        
-        # Cache results
-        self.cache[cache_key] = {
-            'data': records,
-            'timestamp': time.time()
-        }
+        # Cache complete results only; a timed-out source should be retried next time
+        if complete:
+            self._set_cached(cache_key, records)
         
         return records
         
@@ -1065,7 +1109,8 @@ class VitalRecordsScanner(BasePublicRecordsScanner):
 class PublicRecordsOrchestrator:
     """Orchestrates multiple public records scanners"""
     
-    def __init__(self, jurisdiction: str = "default"):
+    def __init__(self, jurisdiction: str = "default", session_pool: Optional[ScannerSessionPool] = None,
+                 scanner_timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 60.0):
         self.jurisdiction = jurisdiction
         self.scanners = {
             'court_records': CourtRecordsScanner(jurisdiction),
@@ -1074,9 +1119,31 @@ class PublicRecordsOrchestrator:
             'criminal_records': CriminalRecordsScanner(jurisdiction),
             'vital_records': VitalRecordsScanner(jurisdiction)
         }
+        # Sessions live as long as the orchestrator; scanners borrow them
+        self.session_pool = session_pool or ScannerSessionPool()
+        self.scanner_timeouts = scanner_timeouts or {}
+        self.default_timeout = default_timeout
+        for scanner in self.scanners.values():
+            scanner.session_pool = self.session_pool
+            
+    async def __aenter__(self):
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        
+    async def close(self):
+        """Close the pooled sessions"""
+        await self.session_pool.close()
+        
+    async def _run_scanner(self, scanner_name: str, scanner: BasePublicRecordsScanner,
+                           query: str, **kwargs) -> List[PublicRecord]:
+        timeout = self.scanner_timeouts.get(scanner_name, self.default_timeout)
+        async with scanner:
+            return await asyncio.wait_for(scanner.search(query, **kwargs), timeout=timeout)
         
     async def search_all(self, query: str, query_type: str = 'name', **kwargs) -> Dict[str, List[PublicRecord]]:
-        """Search all applicable public records scanners"""
+        """Search all applicable public records scanners concurrently"""
         results = {}
         
         # Determine which scanners can handle the query
@@ -1085,22 +1152,24 @@ class PublicRecordsOrchestrator:
             if scanner.can_handle(query_type):
                 applicable_scanners.append((scanner_name, scanner))
                 
-        # Run searches concurrently
-        tasks = []
-        for scanner_name, scanner in applicable_scanners:
-            async with scanner:
-                task = asyncio.create_task(scanner.search(query, **kwargs))
-                tasks.append((scanner_name, task))
+        # Run searches concurrently, each under its own timeout
+        outcomes = await asyncio.gather(
+            *(self._run_scanner(scanner_name, scanner, query, **kwargs)
+              for scanner_name, scanner in applicable_scanners),
+            return_exceptions=True
+        )
                 
         # Collect results
-        for scanner_name, task in tasks:
-            try:
-                records = await task
-                results[scanner_name] = records
-                logger.info(f"Found {len(records)} records from {scanner_name}")
-            except Exception as e:
-                logger.error(f"Error in {scanner_name}: {str(e)}")
+        for (scanner_name, _), outcome in zip(applicable_scanners, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                logger.error(f"Error in {scanner_name}: timed out")
+                results[scanner_name] = []
+            elif isinstance(outcome, Exception):
+                logger.error(f"Error in {scanner_name}: {str(outcome)}")
                 results[scanner_name] = []
+            else:
+                results[scanner_name] = outcome
+                logger.info(f"Found {len(outcome)} records from {scanner_name}")
                 
         return results
         
@@ -1144,6 +1213,8 @@ async def test_public_records_scanners():
     print(f"\n🏆 Top {len(top_records)} Highest Confidence Records:")
     for i, record in enumerate(top_records, 1):
         print(f"  {i}. {record.description} - {record.confidence_score:.2f} ({record.source})")
+        
+    await orchestrator.close()
 
 
 if __name__ == "__main__":
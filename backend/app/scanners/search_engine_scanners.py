@@ -29,7 +29,8 @@ from concurrent.futures import ThreadPoolExecutor
 import ssl
 import certifi
 
-from .base import BaseScannerModule, ScannerType
+from .base import BaseScannerModule, ScannerType, ANY_QUERY_TYPE
+from ..core.compute_service import get_compute_service
 
 logger = logging.getLogger(__name__)
 
@@ -192,6 +193,8 @@ class BaseSearchEngineScanner(BaseScannerModule):
 class GoogleSearchScanner(BaseSearchEngineScanner):
     """Google Search scanner with advanced query capabilities"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "google_search_scanner",
@@ -199,9 +202,6 @@ class GoogleSearchScanner(BaseSearchEngineScanner):
             "Google Search with advanced query operators"
         )
     
-    def can_handle(self, query) -> bool:
-        return True  # Google can handle any query type
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform Google search"""
         try:
@@ -250,7 +250,10 @@ class GoogleSearchScanner(BaseSearchEngineScanner):
         
         try:
             html_content = await self._make_search_request(url)
-            return self._parse_google_results(html_content, search_query.query)
+            # Parsing is instance-bound, so it runs on the shared thread pool rather than the event loop
+            return await get_compute_service().run_io(
+                "html_parse", self._parse_google_results, html_content, search_query.query
+            )
         except Exception as e:
             logger.error(f"Google search request failed: {e}")
             return await self._generate_mock_google_search_results(search_query.query)
@@ -389,6 +392,8 @@ class GoogleSearchScanner(BaseSearchEngineScanner):
 class BingSearchScanner(BaseSearchEngineScanner):
     """Microsoft Bing Search scanner"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "bing_search_scanner", 
@@ -396,9 +401,6 @@ class BingSearchScanner(BaseSearchEngineScanner):
             "Microsoft Bing Search with advanced operators"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform Bing search"""
         try:
@@ -446,6 +448,8 @@ class BingSearchScanner(BaseSearchEngineScanner):
 class DuckDuckGoScanner(BaseSearchEngineScanner):
     """DuckDuckGo privacy-focused search scanner"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "duckduckgo_scanner",
@@ -453,9 +457,6 @@ class DuckDuckGoScanner(BaseSearchEngineScanner):
             "DuckDuckGo privacy-focused search"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform DuckDuckGo search"""
         try:
@@ -551,6 +552,8 @@ class DuckDuckGoScanner(BaseSearchEngineScanner):
 class YandexSearchScanner(BaseSearchEngineScanner):
     """Yandex Search scanner for Russian/Eastern European content"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "yandex_scanner",
@@ -558,9 +561,6 @@ class YandexSearchScanner(BaseSearchEngineScanner):
             "Yandex Search for Russian and Eastern European content"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform Yandex search"""
         try:
@@ -598,6 +598,8 @@ class YandexSearchScanner(BaseSearchEngineScanner):
 class BaiduSearchScanner(BaseSearchEngineScanner):
     """Baidu Search scanner for Chinese content"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "baidu_scanner",
@@ -605,9 +607,6 @@ class BaiduSearchScanner(BaseSearchEngineScanner):
             "Baidu Search for Chinese content and markets"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform Baidu search"""
         try:
@@ -645,6 +644,8 @@ class BaiduSearchScanner(BaseSearchEngineScanner):
 class GoogleImagesScanner(BaseSearchEngineScanner):
     """Google Images search scanner"""
     
+    handles = frozenset({'image', 'name', 'email'})
+    
     def __init__(self):
         super().__init__(
             "google_images_scanner",
@@ -652,9 +653,6 @@ class GoogleImagesScanner(BaseSearchEngineScanner):
             "Google Images reverse image search and visual search"
         )
     
-    def can_handle(self, query) -> bool:
-        return hasattr(query, 'query_type') and query.query_type in ['image', 'name', 'email']
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform Google Images search"""
         try:
@@ -694,6 +692,8 @@ class GoogleImagesScanner(BaseSearchEngineScanner):
 class SpecializedSearchScanner(BaseSearchEngineScanner):
     """Specialized search engines (academic, code, archives)"""
     
+    handles = ANY_QUERY_TYPE
+    
     def __init__(self):
         super().__init__(
             "specialized_search_scanner",
@@ -701,9 +701,6 @@ class SpecializedSearchScanner(BaseSearchEngineScanner):
             "Specialized search engines for academic, code, and archived content"
         )
     
-    def can_handle(self, query) -> bool:
-        return True
-    
     async def scan(self, query) -> Dict[str, Any]:
         """Perform specialized searches"""
         try:
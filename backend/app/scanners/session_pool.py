@@ -0,0 +1,110 @@
+"""
+Scanner Session Pool
+====================
+
+Long-lived HTTP client sessions owned by an orchestrator and lent to its
+scanners:
+- One ``TCPConnector`` per pool keeps keep-alive connections warm across
+  scans, so repeated requests to the same host skip TCP/TLS setup
+- One ``aiohttp.ClientSession`` per profile (default headers and timeout),
+  all sharing that connector; scanners borrow them and never close them
+- Sessions are bound to the event loop that created them; a pool used from
+  a new loop starts over instead of handing out a dead session
+- ``close()`` (or leaving ``async with pool``) releases everything
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ScannerSessionPool:
+    """Shared keep-alive connector plus one client session per scanner profile"""
+
+    def __init__(self, limit: int = None, limit_per_host: int = None,
+                 keepalive_timeout: float = None, ttl_dns_cache: int = 300):
+        self.limit = limit if limit is not None else int(os.getenv("SCANNER_POOL_LIMIT", "100"))
+        self.limit_per_host = limit_per_host if limit_per_host is not None else int(
+            os.getenv("SCANNER_POOL_LIMIT_PER_HOST", "10"))
+        self.keepalive_timeout = keepalive_timeout if keepalive_timeout is not None else float(
+            os.getenv("SCANNER_POOL_KEEPALIVE", "30"))
+        self.ttl_dns_cache = ttl_dns_cache
+        self.connector: Optional[aiohttp.TCPConnector] = None
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.sessions_created = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _reset_if_loop_changed(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self.sessions or self.connector is not None:
+            # The old loop is gone or elsewhere; its transports cannot be reused here
+            logger.debug("Session pool used from a new event loop; starting fresh")
+            for session in self.sessions.values():
+                session.detach()
+        self.sessions = {}
+        self.connector = None
+        self._loop = loop
+        self._lock = asyncio.Lock()
+
+    async def get_session(self, profile: str, headers: Optional[Dict[str, str]] = None,
+                          timeout: float = 30) -> aiohttp.ClientSession:
+        """Session for ``profile``, created on first use and reused afterwards"""
+        self._reset_if_loop_changed()
+        session = self.sessions.get(profile)
+        if session is not None and not session.closed:
+            return session
+        async with self._lock:
+            session = self.sessions.get(profile)
+            if session is None or session.closed:
+                if self.connector is None or self.connector.closed:
+                    self.connector = aiohttp.TCPConnector(
+                        limit=self.limit,
+                        limit_per_host=self.limit_per_host,
+                        keepalive_timeout=self.keepalive_timeout,
+                        ttl_dns_cache=self.ttl_dns_cache,
+                    )
+                session = aiohttp.ClientSession(
+                    connector=self.connector,
+                    connector_owner=False,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    headers=headers,
+                )
+                self.sessions[profile] = session
+                self.sessions_created += 1
+        return session
+
+    async def close(self):
+        """Close every session and the shared connector"""
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+        if self.connector is not None and not self.connector.closed:
+            await self.connector.close()
+        self.connector = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        connector = self.connector
+        return {
+            "profiles": sorted(self.sessions),
+            "sessions_created": self.sessions_created,
+            "idle_connections": sum(len(conns) for conns in connector._conns.values())
+            if connector is not None and not connector.closed else 0,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+        }
@@ -113,6 +113,8 @@ class SocialMediaBaseScanner(BaseScannerModule):
 class TwitterScanner(SocialMediaBaseScanner):
     """Twitter/X profile scanner"""
     
+    handles = frozenset({'username', 'email', 'name'})
+    
     def __init__(self):
         super().__init__(
             name="twitter_scanner",
@@ -121,9 +123,6 @@ class TwitterScanner(SocialMediaBaseScanner):
         )
         self.username_patterns = [r'^[a-zA-Z0-9_]{1,15}$']  # Twitter specific
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() in ['username', 'email', 'name']
-    
     async def _search_twitter_profiles(self, query_value: str, query_type: str) -> Dict[str, Any]:
         """Search for Twitter profiles (mock implementation)"""
         # In real implementation, this would use Twitter API v2
@@ -240,6 +239,8 @@ class TwitterScanner(SocialMediaBaseScanner):
 class LinkedInScanner(SocialMediaBaseScanner):
     """LinkedIn profile scanner"""
     
+    handles = frozenset({'email', 'name', 'username'})
+    
     def __init__(self):
         super().__init__(
             name="linkedin_scanner",
@@ -248,9 +249,6 @@ class LinkedInScanner(SocialMediaBaseScanner):
         )
         self.username_patterns = [r'^[a-zA-Z0-9-]{3,100}$']  # LinkedIn allows hyphens
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() in ['email', 'name', 'username']
-    
     async def _search_linkedin_profiles(self, query_value: str, query_type: str) -> Dict[str, Any]:
         """Search for LinkedIn profiles (mock implementation)"""
         # In real implementation, this would use LinkedIn API or web scraping
@@ -388,6 +386,8 @@ class LinkedInScanner(SocialMediaBaseScanner):
 class InstagramScanner(SocialMediaBaseScanner):
     """Instagram profile scanner"""
     
+    handles = frozenset({'username', 'email'})
+    
     def __init__(self):
         super().__init__(
             name="instagram_scanner",
@@ -396,9 +396,6 @@ class InstagramScanner(SocialMediaBaseScanner):
         )
         self.username_patterns = [r'^[a-zA-Z0-9._]{1,30}$']  # Instagram specific
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() in ['username', 'email']
-    
     async def _search_instagram_profiles(self, query_value: str, query_type: str) -> Dict[str, Any]:
         """Search for Instagram profiles (mock implementation)"""
         
@@ -481,6 +478,8 @@ class InstagramScanner(SocialMediaBaseScanner):
 class FacebookScanner(SocialMediaBaseScanner):
     """Facebook profile scanner"""
     
+    handles = frozenset({'email', 'name', 'phone'})
+    
     def __init__(self):
         super().__init__(
             name="facebook_scanner",
@@ -488,9 +487,6 @@ class FacebookScanner(SocialMediaBaseScanner):
             description="Facebook profile detection and analysis"
         )
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() in ['email', 'name', 'phone']
-    
     async def _search_facebook_profiles(self, query_value: str, query_type: str) -> Dict[str, Any]:
         """Search for Facebook profiles (mock implementation)"""
         # Note: Facebook's API is very restricted for profile searches
@@ -601,6 +597,8 @@ class FacebookScanner(SocialMediaBaseScanner):
 class GitHubScanner(SocialMediaBaseScanner):
     """GitHub profile scanner"""
     
+    handles = frozenset({'username', 'email', 'name'})
+    
     def __init__(self):
         super().__init__(
             name="github_scanner",
@@ -609,9 +607,6 @@ class GitHubScanner(SocialMediaBaseScanner):
         )
         self.username_patterns = [r'^[a-zA-Z0-9]([a-zA-Z0-9-]){0,38}$']  # GitHub specific
     
-    def can_handle(self, query: Query) -> bool:
-        return query.query_type.lower() in ['username', 'email', 'name']
-    
     async def _search_github_profiles(self, query_value: str, query_type: str) -> Dict[str, Any]:
         """Search for GitHub profiles (mock implementation)"""
         
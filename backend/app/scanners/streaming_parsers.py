@@ -0,0 +1,452 @@
+"""
+Streaming Structured-Data Parsers
+=================================
+
+Incremental parsers for large JSON, XML, CSV and HTML-table responses.
+Records come out as the bytes arrive, so memory stays flat and the first
+match is available long before the body ends:
+- JSON: records under an ijson-style prefix (``'item'``, ``'result.results.item'``);
+  uses ijson when installed, otherwise a tokenizer that only scans structure
+  up to the record array and decodes each record with the C JSON decoder
+- XML: ``XMLPullParser`` over the children of the root, clearing each
+  element once it has been turned into a record
+- CSV: ``csv.DictReader`` fed complete records from an incremental decoder
+- HTML tables: lxml's pull parser when installed, ``html.parser`` otherwise;
+  no document tree is ever built
+- Early filtering: with ``terms``, only records containing every term are
+  kept; JSON records are pre-filtered on their raw text before their
+  values are checked
+
+Every parser is push-based (``feed(bytes)`` / ``close()`` return the records
+completed so far); ``iter_structured_records`` and ``aiter_structured_records``
+drive them from sync and async byte streams.
+"""
+
+import codecs
+import csv
+import json
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from html.parser import HTMLParser
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+MAX_TABLES = 3  # HTML tables read per document
+
+
+def query_terms(query: str) -> List[str]:
+    """Lower-cased words of a query, for early filtering"""
+    return re.findall(r'\w+', query.lower())
+
+
+def _matches(text: str, terms: Optional[List[str]]) -> bool:
+    if not terms:
+        return True
+    text = text.lower()
+    return all(term in text for term in terms)
+
+
+def _record_text(record: Any) -> str:
+    """Values of a record, nested ones included, without any key names"""
+    if isinstance(record, dict):
+        record = list(record.values())
+    if isinstance(record, list):
+        return ' '.join(_record_text(value) for value in record if value is not None)
+    return str(record)
+
+
+class StreamingParser:
+    """Base for push parsers: decodes bytes incrementally and filters records"""
+
+    def __init__(self, terms: Optional[List[str]] = None, encoding: str = 'utf-8'):
+        self.terms = [term.lower() for term in terms or []]
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        text = self._decoder.decode(chunk)
+        return self._feed_text(text, final=False) if text else []
+
+    def close(self) -> List[Any]:
+        return self._feed_text(self._decoder.decode(b'', final=True), final=True)
+
+    def _keep(self, record: Any) -> bool:
+        return _matches(_record_text(record), self.terms)
+
+    def _feed_text(self, text: str, final: bool) -> List[Any]:
+        raise NotImplementedError
+
+
+class JsonRecordParser(StreamingParser):
+    """Records under an ijson-style prefix; without one, the items of a
+    top-level array, or a top-level object as a single record"""
+
+    _STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+    _SCALAR = re.compile(r'[^\[\]{}:,"\s]+')
+    _SPACE = re.compile(r'\s*')
+
+    def __init__(self, prefix: Optional[str] = None, terms: Optional[List[str]] = None):
+        super().__init__(terms)
+        self.prefix = prefix
+        self.whole_document = False
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        # One frame per open container: [kind, current key, expecting a key]
+        self.stack: List[list] = []
+        self.in_items = False
+        self._ijson = None
+
+    def _feed_text(self, text: str, final: bool) -> List[Any]:
+        if self.prefix is None and not self.whole_document:
+            stripped = (self.buffer + text).lstrip()
+            if not stripped and not final:
+                self.buffer += text
+                return []
+            if stripped.startswith('['):
+                self.prefix = 'item'
+            else:
+                self.whole_document = True
+        if self.whole_document:
+            # A single top-level object is one record; it cannot be split
+            self.buffer += text
+            if not final:
+                return []
+            record = json.loads(self.buffer or 'null')
+            self.buffer = ''
+            return [record] if record is not None and self._keep(record) else []
+        if IJSON_AVAILABLE:
+            return self._feed_ijson(text, final)
+        return list(self._scan(text, final))
+
+    def _feed_ijson(self, text: str, final: bool) -> List[Any]:
+        if self._ijson is None:
+            self._events = ijson.sendable_list()
+            self._ijson = ijson.items_coro(self._events, self.prefix, use_float=True)
+            text, self.buffer = self.buffer + text, ''
+        if text:
+            self._ijson.send(text.encode('utf-8'))
+        if final:
+            self._ijson.close()
+        records = [record for record in self._events if self._keep(record)]
+        del self._events[:]
+        return records
+
+    def _path(self) -> List[str]:
+        return [frame[1] if frame[0] == 'obj' else 'item' for frame in self.stack]
+
+    def _scan(self, text: str, final: bool) -> Iterator[Any]:
+        if self.pos > 65536:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += text
+        buffer, size = self.buffer, len(self.buffer)
+        target = self.prefix.split('.')
+        while True:
+            pos = self._SPACE.match(buffer, self.pos).end()
+            if pos >= size:
+                self.pos = pos
+                return
+            char = buffer[pos]
+            if self.in_items:
+                if char == ',':
+                    self.pos = pos + 1
+                    continue
+                if char == ']':
+                    self.in_items = False
+                    self.stack.pop()
+                    self.pos = pos + 1
+                    continue
+                try:
+                    record, end = self.decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self.pos = pos
+                    return
+                if end == size and not final:
+                    self.pos = pos  # a number may continue in the next chunk
+                    return
+                self.pos = end
+                # The raw text (keys included) rules out most records cheaply;
+                # the rest are confirmed against their values only
+                raw = buffer[pos:end]
+                if not self.terms or ((_matches(raw, self.terms) or '\\' in raw) and self._keep(record)):
+                    yield record
+                continue
+            if char == '"':
+                match = self._STRING.match(buffer, pos)
+                if match is None:
+                    if final:
+                        raise ValueError("Unterminated JSON string")
+                    self.pos = pos
+                    return
+                frame = self.stack[-1] if self.stack else None
+                if frame is not None and frame[0] == 'obj' and frame[2]:
+                    frame[1] = json.loads(match.group())
+                    frame[2] = False
+                self.pos = match.end()
+            elif char in '{[':
+                kind = 'obj' if char == '{' else 'arr'
+                if kind == 'arr' and self._path() + ['item'] == target:
+                    self.in_items = True
+                self.stack.append([kind, None, kind == 'obj'])
+                self.pos = pos + 1
+            elif char in '}]':
+                if self.stack:
+                    self.stack.pop()
+                self.pos = pos + 1
+            elif char == ',':
+                if self.stack and self.stack[-1][0] == 'obj':
+                    self.stack[-1][2] = True
+                self.pos = pos + 1
+            elif char == ':':
+                self.pos = pos + 1
+            else:
+                match = self._SCALAR.match(buffer, pos)
+                if match.end() == size and not final:
+                    self.pos = pos
+                    return
+                self.pos = match.end()
+
+
+class XmlRecordParser(StreamingParser):
+    """One record per child of the root element: its text and attributes"""
+
+    def __init__(self, terms: Optional[List[str]] = None):
+        super().__init__(terms)
+        self.parser = ET.XMLPullParser(events=('start', 'end'))
+        self.depth = 0
+        self.root = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        # expat does its own decoding
+        self.parser.feed(chunk)
+        return self._records()
+
+    def close(self) -> List[Any]:
+        self.parser.close()
+        return self._records()
+
+    def _records(self) -> List[Dict[str, Any]]:
+        records = []
+        for event, element in self.parser.read_events():
+            if event == 'start':
+                self.depth += 1
+                if self.depth == 1:
+                    self.root = element
+                continue
+            self.depth -= 1
+            if self.depth != 1:
+                continue
+            record = {element.tag: element.text}
+            for attr_name, attr_value in element.attrib.items():
+                record[f"{element.tag}_{attr_name}"] = attr_value
+            # Drop the finished subtree so the root never accumulates children
+            self.root.clear()
+            if self._keep(record):
+                records.append(record)
+        return records
+
+
+class _LineQueue:
+    """Iterator the csv reader pulls from; runs dry between chunks"""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+class CsvRecordParser(StreamingParser):
+    """Rows of a CSV body as dicts keyed by its header row"""
+
+    def __init__(self, terms: Optional[List[str]] = None, encoding: str = 'utf-8'):
+        super().__init__(terms, encoding)
+        self.queue = _LineQueue()
+        self.reader = csv.DictReader(self.queue)
+        self.pending = ''
+
+    def _feed_text(self, text: str, final: bool) -> List[Any]:
+        self.pending += text
+        # Hand the reader whole records only: a quoted field may span lines, and
+        # a line end is a record end when the quotes before it are balanced
+        end = len(self.pending) if final else self.pending.rfind('\n') + 1
+        if self.pending.count('"', 0, end) % 2:
+            end = self._last_record_end(end)
+        if end:
+            self.queue.lines.extend(self.pending[:end].splitlines(keepends=True))
+            self.pending = self.pending[end:]
+        return [row for row in self.reader if self._keep(row)]
+
+    def _last_record_end(self, end: int) -> int:
+        boundary, quotes, start = 0, 0, 0
+        while start < end:
+            newline = self.pending.find('\n', start, end)
+            if newline < 0:
+                break
+            quotes += self.pending.count('"', start, newline + 1)
+            start = newline + 1
+            if quotes % 2 == 0:
+                boundary = start
+        return boundary
+
+
+class _TableBuilder(HTMLParser):
+    """Turns table rows into records keyed by the table's header cells"""
+
+    def __init__(self, max_tables: int):
+        super().__init__(convert_charrefs=True)
+        self.max_tables = max_tables
+        self.tables_seen = 0
+        self.tables: List[Dict[str, Any]] = []
+        self.cell: Optional[List[str]] = None
+        self.cell_tag = ''
+        self.row: Optional[List[str]] = None
+        self.records: List[Dict[str, str]] = []
+
+    def _end_cell(self):
+        if self.cell is not None and self.tables:
+            text = ''.join(self.cell)
+            if self.cell_tag == 'th':
+                self.tables[-1]['headers'].append(text)
+            elif self.row is not None:
+                self.row.append(text)
+        self.cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self.row is not None and self.tables:
+            table = self.tables[-1]
+            if table['active'] and table['rows'] > 1 and table['headers'] \
+                    and len(self.row) == len(table['headers']):
+                self.records.append(dict(zip(table['headers'], self.row)))
+        self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self.tables_seen += 1
+            self.tables.append({'active': self.tables_seen <= self.max_tables, 'headers': [], 'rows': 0})
+        elif not self.tables:
+            return
+        elif tag == 'tr':
+            self._end_row()
+            self.row = []
+            self.tables[-1]['rows'] += 1
+        elif tag in ('td', 'th'):
+            self._end_cell()
+            self.cell = []
+            self.cell_tag = tag
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self._end_row()
+        elif tag == 'table' and self.tables:
+            self._end_row()
+            self.tables.pop()
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data.strip())
+
+
+class HtmlTableParser(StreamingParser):
+    """Rows of the first ``max_tables`` HTML tables, keyed by their header cells"""
+
+    def __init__(self, terms: Optional[List[str]] = None, max_tables: int = MAX_TABLES):
+        super().__init__(terms)
+        self.max_tables = max_tables
+        if LXML_AVAILABLE:
+            self.parser = lxml_etree.HTMLPullParser(events=('end',), tag=('tr', 'table'))
+            self.tables: Dict[Any, Dict[str, Any]] = {}
+        else:
+            self.parser = _TableBuilder(max_tables)
+
+    def _feed_text(self, text: str, final: bool) -> List[Any]:
+        if text:
+            self.parser.feed(text)
+        if final:
+            self.parser.close()
+        if LXML_AVAILABLE:
+            records = self._lxml_records()
+        else:
+            records, self.parser.records = self.parser.records, []
+        return [record for record in records if self._keep(record)]
+
+    def _lxml_records(self) -> List[Dict[str, str]]:
+        records = []
+        for _, element in self.parser.read_events():
+            if element.tag == 'table':
+                element.clear()
+                continue
+            table = next(element.iterancestors('table'), None)
+            if table is None:
+                continue
+            state = self.tables.get(table)
+            if state is None:
+                state = self.tables[table] = {'index': len(self.tables), 'headers': [], 'rows': 0}
+            state['rows'] += 1
+            cells = [(cell.tag, ''.join(t.strip() for t in cell.itertext())) for cell in element]
+            state['headers'].extend(text for tag, text in cells if tag == 'th')
+            values = [text for tag, text in cells if tag == 'td']
+            if state['index'] < self.max_tables and state['rows'] > 1 and state['headers'] \
+                    and len(values) == len(state['headers']):
+                records.append(dict(zip(state['headers'], values)))
+            # Free finished rows as we go
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return records
+
+
+def create_parser(content_type: str, terms: Optional[List[str]] = None,
+                  record_path: Optional[str] = None) -> StreamingParser:
+    """The streaming parser for whichever format ``content_type`` names"""
+    content_type = content_type.lower()
+    if 'json' in content_type:
+        return JsonRecordParser(record_path, terms)
+    if 'xml' in content_type:
+        return XmlRecordParser(terms)
+    if 'csv' in content_type:
+        return CsvRecordParser(terms)
+    return HtmlTableParser(terms)
+
+
+def iter_structured_records(chunks: Iterable[bytes], content_type: str, terms: Optional[List[str]] = None,
+                            record_path: Optional[str] = None) -> Iterator[Any]:
+    """Records from a byte stream, yielded as soon as each one is complete"""
+    parser = create_parser(content_type, terms, record_path)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_structured_records(chunks: AsyncIterator[bytes], content_type: str,
+                                   terms: Optional[List[str]] = None,
+                                   record_path: Optional[str] = None) -> AsyncIterator[Any]:
+    """Records from an async byte stream such as ``response.content.iter_chunked()``"""
+    parser = create_parser(content_type, terms, record_path)
+    async for chunk in chunks:
+        for record in parser.feed(chunk):
+            yield record
+    for record in parser.close():
+        yield record
@@ -0,0 +1,609 @@
+"""
+Transaction Graph Engine
+========================
+
+In-memory transaction graph for blockchain fund tracing:
+- Addresses and transactions are interned to integer ids; inputs and outputs
+  are appended to compact ``array`` buffers and frozen into CSR (offset +
+  target + value) arrays on first use, so a hop is a slice, not a dict walk
+- Tracing is a frontier-at-a-time BFS over address -> transaction -> address
+  hops, vectorised with numpy; the traced amount is split proportionally at
+  every hop (haircut taint) and branches below ``min_value`` are dropped, so
+  depth and value together bound the work done from a busy address
+- Common-input-ownership clustering with union-find as transactions are
+  added; CoinJoin-shaped transactions (many inputs, repeated equal outputs)
+  are kept out of the clustering because the heuristic does not hold for them
+- Fetched transactions and address histories are persisted in a local
+  SQLite cache, and concurrent loads of one address coalesce
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from ..core.compute_service import get_compute_service
+from ..core.ioc_correlation import UnionFind
+from .session_pool import ScannerSessionPool
+
+logger = logging.getLogger(__name__)
+
+ESPLORA_PAGE_SIZE = 25  # confirmed transactions per /address/:address/txs/chain page
+API_HEADERS = {'User-Agent': 'Academic-Research-Bot/1.0 (+https://intelligence-platform.com)'}
+
+
+@dataclass
+class GraphTransaction:
+    """A transaction reduced to what tracing needs; values are in base units (satoshi)"""
+    txid: str
+    inputs: List[Tuple[str, int]] = field(default_factory=list)
+    outputs: List[Tuple[str, int]] = field(default_factory=list)
+    block_height: Optional[int] = None
+    timestamp: Optional[int] = None
+
+    @classmethod
+    def from_esplora(cls, tx: Dict[str, Any]) -> 'GraphTransaction':
+        """Build from an Esplora (Blockstream / mempool.space) transaction object"""
+        inputs = []
+        for vin in tx.get('vin') or []:
+            prevout = vin.get('prevout') or {}
+            if prevout.get('scriptpubkey_address'):
+                inputs.append((prevout['scriptpubkey_address'], int(prevout.get('value') or 0)))
+        outputs = [(vout['scriptpubkey_address'], int(vout.get('value') or 0))
+                   for vout in tx.get('vout') or [] if vout.get('scriptpubkey_address')]
+        status = tx.get('status') or {}
+        return cls(tx['txid'], inputs, outputs, status.get('block_height'), status.get('block_time'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'txid': self.txid, 'inputs': self.inputs, 'outputs': self.outputs,
+                'block_height': self.block_height, 'timestamp': self.timestamp}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GraphTransaction':
+        return cls(data['txid'], [tuple(i) for i in data['inputs']], [tuple(o) for o in data['outputs']],
+                   data.get('block_height'), data.get('timestamp'))
+
+    def looks_like_coinjoin(self) -> bool:
+        """Several distinct input owners and at least three equal-valued outputs"""
+        if len({address for address, _ in self.inputs}) < 3 or len(self.outputs) < 3:
+            return False
+        return Counter(value for _, value in self.outputs).most_common(1)[0][1] >= 3
+
+
+@dataclass
+class _Csr:
+    """Rows of one adjacency, e.g. address -> transactions it spent into"""
+    ptr: np.ndarray
+    target: np.ndarray
+    value: np.ndarray
+
+
+@dataclass
+class _FrozenGraph:
+    spends: _Csr     # address -> transactions it funded
+    receipts: _Csr   # address -> transactions that paid it
+    inputs: _Csr     # transaction -> input addresses
+    outputs: _Csr    # transaction -> output addresses
+    address_spent: np.ndarray
+    address_received: np.ndarray
+    tx_in_total: np.ndarray
+    tx_out_total: np.ndarray
+
+
+def _csr(keys: np.ndarray, size: int, target: np.ndarray, value: np.ndarray) -> _Csr:
+    order = np.argsort(keys, kind='stable')
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=ptr[1:])
+    return _Csr(ptr, target[order], value[order])
+
+
+def _gather(csr: _Csr, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(index into ``rows``, edge position) for every edge of ``rows``"""
+    starts = csr.ptr[rows]
+    counts = csr.ptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), counts)
+    first_of_owner = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.repeat(starts, counts) + (np.arange(len(owner)) - first_of_owner)
+    return owner, positions
+
+
+@dataclass
+class TraceResult:
+    """Addresses reached from ``source`` with the hop they were first reached at and the traced amount"""
+    source: str
+    direction: str
+    max_depth: int
+    min_value: float
+    addresses: List[Tuple[str, int, float]] = field(default_factory=list)
+    transactions: int = 0
+    truncated: bool = False
+
+    def at_depth(self, depth: int) -> List[str]:
+        return [address for address, d, _ in self.addresses if d == depth]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "direction": self.direction,
+            "max_depth": self.max_depth,
+            "min_value": self.min_value,
+            "depth_reached": max((d for _, d, _ in self.addresses), default=0),
+            "address_count": len(self.addresses),
+            "transaction_count": self.transactions,
+            "truncated": self.truncated,
+            "addresses": [{"address": a, "depth": d, "value": round(v, 8)} for a, d, v in self.addresses],
+        }
+
+
+class TransactionGraph:
+    """Integer-id transaction graph with CSR adjacency and input-ownership clusters"""
+
+    def __init__(self):
+        self._address_ids: Dict[str, int] = {}
+        self.addresses: List[str] = []
+        self._tx_ids: Dict[str, int] = {}
+        self.txids: List[str] = []
+        self.coinjoin = array('b')
+        self._in_addr, self._in_tx, self._in_value = array('q'), array('q'), array('q')
+        self._out_tx, self._out_addr, self._out_value = array('q'), array('q'), array('q')
+        self.ownership = UnionFind()
+        self._frozen: Optional[_FrozenGraph] = None
+        self._roots: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.txids)
+
+    def __contains__(self, txid: str) -> bool:
+        return txid in self._tx_ids
+
+    def address_id(self, address: str) -> Optional[int]:
+        return self._address_ids.get(address)
+
+    def _intern(self, address: str) -> int:
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            address_id = self._address_ids[address] = len(self.addresses)
+            self.addresses.append(address)
+            self.ownership.add()
+        return address_id
+
+    def add_transaction(self, tx: GraphTransaction) -> bool:
+        """Add ``tx``; returns False if it was already in the graph"""
+        if tx.txid in self._tx_ids:
+            return False
+        tx_id = self._tx_ids[tx.txid] = len(self.txids)
+        self.txids.append(tx.txid)
+        coinjoin = tx.looks_like_coinjoin()
+        self.coinjoin.append(coinjoin)
+
+        input_ids = [self._intern(address) for address, _ in tx.inputs]
+        for address_id, (_, value) in zip(input_ids, tx.inputs):
+            self._in_addr.append(address_id)
+            self._in_tx.append(tx_id)
+            self._in_value.append(value)
+        for address, value in tx.outputs:
+            self._out_tx.append(tx_id)
+            self._out_addr.append(self._intern(address))
+            self._out_value.append(value)
+
+        if not coinjoin:
+            # Common-input ownership: everything spent together has one owner
+            for address_id in input_ids[1:]:
+                self.ownership.union(input_ids[0], address_id)
+        self._frozen = None
+        self._roots = None
+        return True
+
+    def add_transactions(self, txs: Iterable[GraphTransaction]) -> int:
+        return sum(self.add_transaction(tx) for tx in txs)
+
+    def _freeze(self) -> _FrozenGraph:
+        if self._frozen is None:
+            n_addr, n_tx = len(self.addresses), len(self.txids)
+            in_addr, in_tx = np.array(self._in_addr, dtype=np.int64), np.array(self._in_tx, dtype=np.int64)
+            out_tx, out_addr = np.array(self._out_tx, dtype=np.int64), np.array(self._out_addr, dtype=np.int64)
+            in_value = np.array(self._in_value, dtype=np.float64)
+            out_value = np.array(self._out_value, dtype=np.float64)
+            self._frozen = _FrozenGraph(
+                spends=_csr(in_addr, n_addr, in_tx, in_value),
+                receipts=_csr(out_addr, n_addr, out_tx, out_value),
+                inputs=_csr(in_tx, n_tx, in_addr, in_value),
+                outputs=_csr(out_tx, n_tx, out_addr, out_value),
+                address_spent=np.bincount(in_addr, in_value, minlength=n_addr),
+                address_received=np.bincount(out_addr, out_value, minlength=n_addr),
+                tx_in_total=np.bincount(in_tx, in_value, minlength=n_tx),
+                tx_out_total=np.bincount(out_tx, out_value, minlength=n_tx),
+            )
+        return self._frozen
+
+    def trace(self, address: str, direction: str = 'forward', max_depth: int = 5, min_value: float = 0.0,
+              amount: Optional[float] = None, max_addresses: Optional[int] = None) -> TraceResult:
+        """Follow funds from (``forward``) or to (``backward``) ``address`` for up to ``max_depth`` hops.
+
+        ``amount`` defaults to everything the address spent (forward) or received
+        (backward). Each address is expanded once, from the hop it is first
+        reached at; later arrivals only add to its traced amount. When
+        ``max_addresses`` is reached the largest flows are kept.
+        """
+        if direction not in ('forward', 'backward'):
+            raise ValueError(f"Unknown trace direction: {direction}")
+        result = TraceResult(address, direction, max_depth, min_value)
+        source = self._address_ids.get(address)
+        if source is None:
+            return result
+        graph = self._freeze()
+        if direction == 'forward':
+            first, second, first_total, second_total = (graph.spends, graph.outputs,
+                                                        graph.address_spent, graph.tx_out_total)
+        else:
+            first, second, first_total, second_total = (graph.receipts, graph.inputs,
+                                                        graph.address_received, graph.tx_in_total)
+
+        depth_of = np.full(len(self.addresses), -1, dtype=np.int32)
+        reached = np.zeros(len(self.addresses))
+        tx_seen = np.zeros(len(self.txids), dtype=bool)
+        depth_of[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        carried = np.array([first_total[source] if amount is None else float(amount)])
+        discovered = 0
+
+        for depth in range(1, max_depth + 1):
+            # Address -> transaction: each address's amount, split by what it put into each transaction
+            owner, positions = _gather(first, frontier)
+            if not len(positions):
+                break
+            share = carried[owner] * first.value[positions] / np.maximum(first_total[frontier][owner], 1)
+            txs, inverse = np.unique(first.target[positions], return_inverse=True)
+            tx_amount = np.bincount(inverse, share)
+            keep = tx_amount >= min_value
+            txs, tx_amount = txs[keep], tx_amount[keep]
+            tx_seen[txs] = True
+
+            # Transaction -> address: split by each output's (or input's) share of the transaction
+            owner, positions = _gather(second, txs)
+            share = tx_amount[owner] * second.value[positions] / np.maximum(second_total[txs][owner], 1)
+            targets, inverse = np.unique(second.target[positions], return_inverse=True)
+            target_amount = np.bincount(inverse, share)
+            reached[targets] += target_amount
+
+            new = (depth_of[targets] < 0) & (target_amount >= min_value)
+            frontier, carried = targets[new], target_amount[new]
+            if max_addresses is not None and discovered + len(frontier) > max_addresses:
+                largest = np.argsort(-carried, kind='stable')[:max(max_addresses - discovered, 0)]
+                frontier, carried = frontier[largest], carried[largest]
+                result.truncated = True
+            depth_of[frontier] = depth
+            discovered += len(frontier)
+            if not len(frontier):
+                break
+
+        found = np.nonzero(depth_of > 0)[0]
+        found = found[np.lexsort((-reached[found], depth_of[found]))]
+        result.addresses = [(self.addresses[i], int(depth_of[i]), float(reached[i])) for i in found]
+        result.transactions = int(tx_seen.sum())
+        return result
+
+    def k_hop(self, address: str, k: int, direction: str = 'forward') -> Dict[str, int]:
+        """Addresses within ``k`` hops of ``address``, mapped to their distance"""
+        return {a: d for a, d, _ in self.trace(address, direction, max_depth=k).addresses}
+
+    def _cluster_roots(self) -> np.ndarray:
+        if self._roots is None:
+            parent = np.array(self.ownership.parent, dtype=np.int64)
+            # Pointer jumping until every address points at its root
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+            self._roots = parent
+        return self._roots
+
+    def cluster_of(self, address: str) -> List[str]:
+        """Addresses sharing an owner with ``address`` under the common-input heuristic"""
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            return []
+        roots = self._cluster_roots()
+        return [self.addresses[i] for i in np.nonzero(roots == roots[address_id])[0]]
+
+    def clusters(self, min_size: int = 2) -> List[List[str]]:
+        """All ownership clusters with at least ``min_size`` addresses, largest first"""
+        roots = self._cluster_roots()
+        order = np.argsort(roots, kind='stable')
+        boundaries = np.nonzero(np.diff(roots[order]))[0] + 1
+        groups = [g for g in np.split(order, boundaries) if len(g) >= min_size]
+        groups.sort(key=len, reverse=True)
+        return [[self.addresses[i] for i in group] for group in groups]
+
+    def coinjoin_involvement(self, address: str) -> Tuple[int, int]:
+        """(CoinJoin-shaped transactions, all transactions) touching ``address``"""
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            return 0, 0
+        graph = self._freeze()
+        txs = np.unique(np.concatenate([
+            graph.spends.target[graph.spends.ptr[address_id]:graph.spends.ptr[address_id + 1]],
+            graph.receipts.target[graph.receipts.ptr[address_id]:graph.receipts.ptr[address_id + 1]],
+        ]))
+        return int(np.array(self.coinjoin, dtype=np.int8)[txs].sum()), len(txs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"addresses": len(self.addresses), "transactions": len(self.txids),
+                "input_edges": len(self._in_tx), "output_edges": len(self._out_tx),
+                "coinjoin_transactions": int(sum(self.coinjoin))}
+
+
+class TransactionCache:
+    """Fetched transactions and address histories persisted in a local SQLite file.
+
+    Histories older than ``max_age`` are never served, so writes also delete
+    them, together with transactions no remaining history refers to.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: Optional[float] = None):
+        self.path = path or os.getenv("BLOCKCHAIN_TX_CACHE") or os.path.join(
+            tempfile.gettempdir(), 'tx-graph-cache.sqlite3')
+        self.max_age = max_age if max_age is not None else float(os.getenv("BLOCKCHAIN_HISTORY_TTL", "3600"))
+        # Pruning scans every history, so it runs at most once per interval
+        self.prune_interval = min(self.max_age, 300.0)
+        self._last_prune = 0.0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(
+                "CREATE TABLE IF NOT EXISTS transactions (txid TEXT PRIMARY KEY, data TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS address_history (address TEXT PRIMARY KEY, txids TEXT NOT NULL,"
+                " complete INTEGER NOT NULL, fetched_at REAL NOT NULL);"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get_history(self, address: str, max_age: Optional[float] = None) -> Optional[List[GraphTransaction]]:
+        """The cached transactions of ``address``, or None when they are unknown or stale"""
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT txids, fetched_at FROM address_history WHERE address = ?",
+                                     (address,)).fetchone()
+            if row is None or (max_age is not None and time.time() - row[1] > max_age):
+                return None
+            txids = json.loads(row[0])
+            found = {}
+            for start in range(0, len(txids), 500):
+                batch = txids[start:start + 500]
+                query = f"SELECT txid, data FROM transactions WHERE txid IN ({','.join('?' * len(batch))})"
+                found.update(connection.execute(query, batch).fetchall())
+        if len(found) != len(txids):
+            return None
+        return [GraphTransaction.from_dict(json.loads(found[txid])) for txid in txids]
+
+    def put_history(self, address: str, txs: List[GraphTransaction], complete: bool = True):
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                now = time.time()
+                if now - self._last_prune >= self.prune_interval:
+                    self._prune(connection, now - self.max_age)
+                    self._last_prune = now
+                connection.executemany(
+                    "INSERT OR REPLACE INTO transactions (txid, data) VALUES (?, ?)",
+                    [(tx.txid, json.dumps(tx.to_dict(), separators=(',', ':'))) for tx in txs])
+                connection.execute(
+                    "INSERT OR REPLACE INTO address_history (address, txids, complete, fetched_at) VALUES (?, ?, ?, ?)",
+                    (address, json.dumps([tx.txid for tx in txs]), int(complete), time.time()))
+
+    @staticmethod
+    def _prune(connection: sqlite3.Connection, cutoff: float) -> int:
+        """Delete expired histories and the transactions only they referenced"""
+        expired = connection.execute("DELETE FROM address_history WHERE fetched_at < ?", (cutoff,)).rowcount
+        if expired:
+            connection.execute(
+                "DELETE FROM transactions WHERE txid NOT IN"
+                " (SELECT value FROM address_history, json_each(address_history.txids))")
+        return expired
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class TransactionGraphEngine:
+    """Loads address histories from an Esplora-compatible API into a shared graph for tracing"""
+
+    def __init__(self, api_url: Optional[str] = None, session_pool: Optional[ScannerSessionPool] = None,
+                 cache: Optional[TransactionCache] = None, concurrency: Optional[int] = None,
+                 max_txs_per_address: Optional[int] = None, max_trace_addresses: Optional[int] = None,
+                 history_ttl: Optional[float] = None, max_graph_transactions: Optional[int] = None,
+                 request_timeout: float = 30.0):
+        self.api_url = (api_url or os.getenv("BLOCKCHAIN_API_URL", "https://blockstream.info/api")).rstrip('/')
+        self.concurrency = concurrency or int(os.getenv("BLOCKCHAIN_API_CONCURRENCY", "4"))
+        self.session_pool = session_pool or ScannerSessionPool(limit_per_host=self.concurrency)
+        self.max_txs_per_address = max_txs_per_address or int(os.getenv("BLOCKCHAIN_MAX_TXS_PER_ADDRESS", "1000"))
+        self.max_trace_addresses = max_trace_addresses or int(os.getenv("BLOCKCHAIN_TRACE_MAX_ADDRESSES", "2000"))
+        self.history_ttl = history_ttl if history_ttl is not None else float(
+            os.getenv("BLOCKCHAIN_HISTORY_TTL", "3600"))
+        self.cache = cache or TransactionCache(max_age=self.history_ttl)
+        # The graph is append-only; past this size it is rebuilt from scratch between investigations
+        self.max_graph_transactions = max_graph_transactions or int(
+            os.getenv("BLOCKCHAIN_GRAPH_MAX_TXS", "500000"))
+        self.request_timeout = request_timeout
+        self.graph = TransactionGraph()
+        self.stats = {"addresses_loaded": 0, "api_requests": 0, "cache_hits": 0, "coalesced": 0,
+                      "truncated_histories": 0, "failed_loads": 0, "refreshed": 0, "graph_rebuilds": 0}
+        self._loaded: Dict[str, float] = {}  # address -> monotonic time its history was loaded
+        self._active = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._requests: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        await self.session_pool.close()
+        self.cache.close()
+
+    def _reset_if_loop_changed(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight = {}
+            self._requests = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+
+    def _is_fresh(self, address: str) -> bool:
+        loaded_at = self._loaded.get(address)
+        return loaded_at is not None and time.monotonic() - loaded_at < self.history_ttl
+
+    def _rebuild_if_oversized(self):
+        # Only between investigations: a trace in progress holds hop results from this graph
+        if self._active or len(self.graph) <= self.max_graph_transactions:
+            return
+        self.graph = TransactionGraph()
+        self._loaded = {}
+        self.stats["graph_rebuilds"] += 1
+
+    async def load_address(self, address: str) -> None:
+        """Make sure the transaction history of ``address`` is in the graph and within ``history_ttl``"""
+        self._reset_if_loop_changed()
+        if self._is_fresh(address):
+            return
+        pending = self._inflight.get(address)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[address] = future
+        try:
+            txs = await self._history(address)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # retrieved here; coalesced waiters re-raise it
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._inflight.pop(address, None)
+
+        # New transactions are appended; ones already in the graph are skipped
+        self.graph.add_transactions(txs)
+        self.stats["refreshed" if address in self._loaded else "addresses_loaded"] += 1
+        self._loaded[address] = time.monotonic()
+        future.set_result(None)
+
+    async def load_addresses(self, addresses: Iterable[str]) -> int:
+        """Load several histories concurrently; failures are logged and skipped. Returns the failure count"""
+        pending = [a for a in dict.fromkeys(addresses) if not self._is_fresh(a)]
+        results = await asyncio.gather(*(self.load_address(a) for a in pending), return_exceptions=True)
+        failed = 0
+        for address, result in zip(pending, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.debug(f"Could not load transactions of {address}: {result}")
+        self.stats["failed_loads"] += failed
+        return failed
+
+    async def _history(self, address: str) -> List[GraphTransaction]:
+        compute = get_compute_service()
+        cached = await compute.run_io("tx_cache", self.cache.get_history, address, self.history_ttl)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        txs, complete = await self._fetch_history(address)
+        await compute.run_io("tx_cache", self.cache.put_history, address, txs, complete)
+        return txs
+
+    async def _fetch_history(self, address: str) -> Tuple[List[GraphTransaction], bool]:
+        url = f'{self.api_url}/address/{address}/txs'
+        txs: List[GraphTransaction] = []
+        while True:
+            page = await self._get_json(url)
+            txs.extend(GraphTransaction.from_esplora(tx) for tx in page)
+            confirmed = [tx for tx in page if (tx.get('status') or {}).get('confirmed')]
+            if len(confirmed) < ESPLORA_PAGE_SIZE:
+                return txs, True
+            if len(txs) >= self.max_txs_per_address:
+                # Busy addresses keep their most recent history only
+                self.stats["truncated_histories"] += 1
+                return txs[:self.max_txs_per_address], False
+            url = f'{self.api_url}/address/{address}/txs/chain/{confirmed[-1]["txid"]}'
+
+    async def _get_json(self, url: str) -> Any:
+        session = await self.session_pool.get_session("blockchain", headers=API_HEADERS,
+                                                      timeout=self.request_timeout)
+        async with self._requests:
+            self.stats["api_requests"] += 1
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientError(f"Blockchain API HTTP {response.status}")
+                return await response.json(content_type=None)
+
+    async def trace(self, address: str, depth: int = 5, direction: str = 'forward', min_value: float = 0.0,
+                    max_addresses: Optional[int] = None) -> TraceResult:
+        """Trace funds ``depth`` hops, loading each hop's addresses before expanding it"""
+        max_addresses = max_addresses or self.max_trace_addresses
+        self._rebuild_if_oversized()
+        self._active += 1
+        try:
+            await self.load_address(address)
+            for hop in range(1, depth):
+                frontier = self.graph.trace(address, direction, hop, min_value, max_addresses=max_addresses)
+                await self.load_addresses(frontier.at_depth(hop))
+            return self.graph.trace(address, direction, depth, min_value, max_addresses=max_addresses)
+        finally:
+            self._active -= 1
+
+    async def cluster(self, address: str, rounds: int = 1, max_members: int = 200) -> List[str]:
+        """The common-input ownership cluster of ``address``, growing it by loading members' histories"""
+        self._rebuild_if_oversized()
+        self._active += 1
+        try:
+            await self.load_address(address)
+            for _ in range(rounds - 1):
+                unloaded = [a for a in self.graph.cluster_of(address) if not self._is_fresh(a)][:max_members]
+                if not unloaded:
+                    break
+                await self.load_addresses(unloaded)
+            return self.graph.cluster_of(address)
+        finally:
+            self._active -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "graph": self.graph.get_stats(), "cache_path": self.cache.path,
+                "pool": self.session_pool.get_stats()}
+
+
+# Shared engine, so every analyzer traces over one graph and one cache
+_tx_graph_engine: Optional[TransactionGraphEngine] = None
+
+
+def get_tx_graph_engine() -> TransactionGraphEngine:
+    """Get the shared transaction graph engine"""
+    global _tx_graph_engine
+    if _tx_graph_engine is None:
+        _tx_graph_engine = TransactionGraphEngine()
+    return _tx_graph_engine
@@ -16,7 +16,6 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor
 import aiohttp
 import numpy as np
 from collections import defaultdict
@@ -96,7 +95,6 @@ class UltimateScannerEngine:
         self.ai_correlator = AICorrelationEngine()
         self.pattern_analyzer = PatternAnalysisEngine()
         self.cache = EnhancedCacheSystem()
-        self.executor = ThreadPoolExecutor(max_workers=50)
         self.session: Optional[aiohttp.ClientSession] = None
         
         # Initialize 500+ data sources
@@ -0,0 +1,360 @@
+"""
+Username Probing Engine
+=======================
+
+Checks whether usernames exist on a set of platforms, on behalf of every
+scanner that needs the answer:
+- Username x platform pairs are deduplicated (case-insensitively where the
+  platform is), and concurrent callers asking for the same pair share one
+  request
+- Requests are grouped per host: each host gets its own concurrency limit,
+  all hosts share one keep-alive connection pool, so a batch of variants
+  costs about one round trip per host instead of one per request
+- HEAD is used where the site answers it with a meaningful status; other
+  sites get a GET that is made conditional (If-None-Match /
+  If-Modified-Since) when revalidating a profile seen before
+- "Exists" and "does not exist" are cached with separate TTLs; rate
+  limits, errors and other inconclusive answers are not cached
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict, replace
+from datetime import datetime
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+import aiohttp
+
+from ..core.advanced_caching import LRUCache
+from .base import BaseScannerModule, ScannerType
+from .session_pool import ScannerSessionPool
+
+logger = logging.getLogger(__name__)
+
+PROBE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/json;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+
+@dataclass(frozen=True)
+class PlatformProbe:
+    """How to tell whether a username exists on one platform"""
+    name: str
+    url_template: str
+    method: str = "HEAD"
+    username_pattern: str = r'^[A-Za-z0-9._-]{1,30}$'
+    case_sensitive: bool = False
+    missing_statuses: FrozenSet[int] = frozenset({404, 410})
+    # Text of a "no such user" page that is served with status 200 (GET only)
+    missing_marker: Optional[str] = None
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url_template).netloc
+
+    def accepts(self, username: str) -> bool:
+        return bool(re.match(self.username_pattern, username))
+
+    def url(self, username: str) -> str:
+        return self.url_template.format(username=quote(username, safe=''))
+
+    def key(self, username: str) -> str:
+        return f"{self.name}:{username if self.case_sensitive else username.lower()}"
+
+
+DEFAULT_PLATFORMS = [
+    PlatformProbe('github', 'https://github.com/{username}',
+                  username_pattern=r'^[a-zA-Z0-9]([a-zA-Z0-9-]){0,38}$'),
+    PlatformProbe('gitlab', 'https://gitlab.com/{username}'),
+    PlatformProbe('reddit', 'https://www.reddit.com/user/{username}/about.json', method='GET',
+                  username_pattern=r'^[A-Za-z0-9_-]{3,20}$'),
+    PlatformProbe('hackernews', 'https://news.ycombinator.com/user?id={username}', method='GET',
+                  username_pattern=r'^[A-Za-z0-9_-]{2,15}$', case_sensitive=True,
+                  missing_marker='No such user.'),
+    PlatformProbe('twitter', 'https://x.com/{username}', method='GET',
+                  username_pattern=r'^[a-zA-Z0-9_]{1,15}$'),
+    PlatformProbe('instagram', 'https://www.instagram.com/{username}/', method='GET',
+                  username_pattern=r'^[a-zA-Z0-9._]{1,30}$'),
+    PlatformProbe('facebook', 'https://www.facebook.com/{username}', method='GET',
+                  username_pattern=r'^[a-zA-Z0-9.]{5,50}$'),
+    PlatformProbe('linkedin', 'https://www.linkedin.com/in/{username}', method='GET',
+                  username_pattern=r'^[a-zA-Z0-9-]{3,100}$'),
+    PlatformProbe('quora', 'https://www.quora.com/profile/{username}', method='GET'),
+    PlatformProbe('keybase', 'https://keybase.io/{username}',
+                  username_pattern=r'^[a-zA-Z0-9_]{2,16}$'),
+    PlatformProbe('dockerhub', 'https://hub.docker.com/v2/users/{username}/', method='GET',
+                  username_pattern=r'^[a-z0-9]{4,30}$'),
+    PlatformProbe('pypi', 'https://pypi.org/user/{username}/'),
+]
+
+
+@dataclass
+class ProbeResult:
+    """Presence of one username on one platform"""
+    platform: str
+    username: str
+    url: str
+    exists: Optional[bool]  # None when the answer was inconclusive
+    status: Optional[int] = None
+    error: Optional[str] = None
+    cached: bool = False
+    checked_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def generate_username_variants(base: str, limit: int = 10) -> List[str]:
+    """Likely usernames for ``base``, most likely first and without duplicates"""
+    base = base.strip().lstrip('@')
+    if not base:
+        return []
+    joined = re.sub(r'[\s._-]+', '', base)
+    candidates = [base, base.lower(), joined.lower()]
+    for separator in ('_', '.', '-'):
+        candidates.append(re.sub(r'[\s._-]+', separator, base).lower())
+    stem = joined.lower()
+    candidates.extend(stem + suffix for suffix in ('_', 'official', 'real'))
+    candidates.extend(f'{stem}{i}' for i in range(1, 10))
+    candidates.extend(f'{stem}{year}' for year in range(2020, 2025))
+
+    variants = []
+    seen = set()
+    for candidate in candidates:
+        # Few platforms tell usernames apart by case; none allow spaces
+        if candidate and candidate.lower() not in seen and not re.search(r'\s', candidate):
+            seen.add(candidate.lower())
+            variants.append(candidate)
+    return variants[:limit]
+
+
+class UsernameProbeEngine:
+    """Batches username x platform presence checks per host over one connection pool"""
+
+    def __init__(self, platforms: Optional[List[PlatformProbe]] = None,
+                 session_pool: Optional[ScannerSessionPool] = None,
+                 per_host_limit: Optional[int] = None, request_timeout: float = 10.0,
+                 positive_ttl: Optional[int] = None, negative_ttl: Optional[int] = None,
+                 cache_size: Optional[int] = None):
+        self.platforms: Dict[str, PlatformProbe] = {p.name: p for p in (platforms or DEFAULT_PLATFORMS)}
+        self.per_host_limit = per_host_limit or int(os.getenv("USERNAME_PROBE_PER_HOST", "10"))
+        self.session_pool = session_pool or ScannerSessionPool(limit_per_host=self.per_host_limit)
+        self.request_timeout = request_timeout
+        self.positive_ttl = positive_ttl if positive_ttl is not None else int(
+            os.getenv("USERNAME_PROBE_POSITIVE_TTL", "86400"))
+        self.negative_ttl = negative_ttl if negative_ttl is not None else int(
+            os.getenv("USERNAME_PROBE_NEGATIVE_TTL", "3600"))
+        cache_size = cache_size or int(os.getenv("USERNAME_PROBE_CACHE_SIZE", "20000"))
+        self.cache = LRUCache(max_size=cache_size)
+        # ETag / Last-Modified of profiles seen, kept after the result expires for revalidation
+        self.validators = LRUCache(max_size=cache_size)
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "duplicates": 0, "not_modified": 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        await self.session_pool.close()
+
+    def _reset_if_loop_changed(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight = {}
+            self._host_limits = {}
+            self._loop = loop
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    async def probe(self, usernames: Iterable[str], platforms: Optional[Iterable[str]] = None) -> List[ProbeResult]:
+        """Probe every username on every platform (all by default) whose format accepts it"""
+        names = list(platforms) if platforms is not None else list(self.platforms)
+        usernames = list(usernames)
+        return await self.probe_pairs((name, username) for name in names for username in usernames)
+
+    async def probe_pairs(self, pairs: Iterable[Tuple[str, str]]) -> List[ProbeResult]:
+        """Probe ``(platform, username)`` pairs, e.g. collected from several scanners.
+
+        Returns one result per distinct pair, in first-seen order. Pairs for
+        unknown platforms or usernames a platform cannot have are skipped.
+        """
+        self._reset_if_loop_changed()
+        unique: Dict[str, Tuple[PlatformProbe, str]] = {}
+        for name, username in pairs:
+            platform = self.platforms.get(name)
+            username = username.strip().lstrip('@')
+            if platform is None or not platform.accepts(username):
+                continue
+            key = platform.key(username)
+            if key in unique:
+                self.stats["duplicates"] += 1
+                continue
+            unique[key] = (platform, username)
+        if not unique:
+            return []
+        return list(await asyncio.gather(*(self._probe_one(key, platform, username)
+                                           for key, (platform, username) in unique.items())))
+
+    async def lookup(self, base_username: str, platforms: Optional[Iterable[str]] = None,
+                     max_variants: int = 10) -> Dict[str, Any]:
+        """Probe the variants of ``base_username`` and group the profiles found by platform"""
+        variants = generate_username_variants(base_username, max_variants)
+        results = await self.probe(variants, platforms)
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        for result in results:
+            if result.exists:
+                found.setdefault(result.platform, []).append(result.to_dict())
+        return {
+            "username": base_username,
+            "variants": variants,
+            "checked": len(results),
+            "inconclusive": sum(1 for r in results if r.exists is None),
+            "found": found,
+        }
+
+    async def _probe_one(self, key: str, platform: PlatformProbe, username: str) -> ProbeResult:
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return replace(cached, cached=True)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # Another caller is already asking the same question
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._request(key, platform, username)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if result.exists is not None:
+            self.cache.set(key, result, ttl=self.positive_ttl if result.exists else self.negative_ttl)
+        future.set_result(result)
+        return result
+
+    async def _request(self, key: str, platform: PlatformProbe, username: str) -> ProbeResult:
+        url = platform.url(username)
+        headers = {}
+        if platform.method == "GET":
+            validators = self.validators.get(key)
+            if validators:
+                headers.update(validators)
+
+        session = await self.session_pool.get_session(
+            "username_probe", headers=PROBE_HEADERS, timeout=self.request_timeout
+        )
+        async with self._host_limit(platform.host):
+            self.stats["requests"] += 1
+            try:
+                async with session.request(platform.method, url, headers=headers,
+                                           allow_redirects=False) as response:
+                    status = response.status
+                    # Read GET bodies fully so the connection goes back to the pool
+                    body = await response.text(errors='replace') if platform.method == "GET" else ""
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return ProbeResult(platform.name, username, url, None, error=str(e) or type(e).__name__)
+
+        if status == 304:
+            self.stats["not_modified"] += 1
+            return ProbeResult(platform.name, username, url, True, status=status)
+        if status in platform.missing_statuses:
+            return ProbeResult(platform.name, username, url, False, status=status)
+        if 200 <= status < 300:
+            if platform.missing_marker and platform.missing_marker in body:
+                return ProbeResult(platform.name, username, url, False, status=status)
+            validators = {}
+            if etag:
+                validators['If-None-Match'] = etag
+            if last_modified:
+                validators['If-Modified-Since'] = last_modified
+            if validators:
+                self.validators.set(key, validators)
+            return ProbeResult(platform.name, username, url, True, status=status)
+        # Rate limits, login walls, redirects and server errors say nothing either way
+        return ProbeResult(platform.name, username, url, None, status=status, error=f"HTTP {status}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "platforms": len(self.platforms),
+            "per_host_limit": self.per_host_limit,
+            "cache": self.cache.get_stats(),
+            "pool": self.session_pool.get_stats(),
+        }
+
+
+# Shared engine, so every scanner's checks are deduplicated and cached together
+_probe_engine: Optional[UsernameProbeEngine] = None
+
+
+def get_username_probe_engine() -> UsernameProbeEngine:
+    """Get the shared username probing engine"""
+    global _probe_engine
+    if _probe_engine is None:
+        _probe_engine = UsernameProbeEngine()
+    return _probe_engine
+
+
+class UsernamePresenceScanner(BaseScannerModule):
+    """Checks which platforms a username (or an email's local part) is registered on"""
+
+    handles = frozenset({'username', 'email'})
+
+    def __init__(self, engine: Optional[UsernameProbeEngine] = None):
+        super().__init__(
+            name="username_presence_scanner",
+            scanner_type=ScannerType.SOCIAL_MEDIA,
+            description="Username presence across social, developer and community platforms"
+        )
+        self._engine = engine
+
+    @property
+    def engine(self) -> UsernameProbeEngine:
+        return self._engine or get_username_probe_engine()
+
+    async def scan(self, query) -> Dict[str, Any]:
+        """Probe the query's username variants on every platform"""
+        query_value = getattr(query, 'query_value', str(query))
+        query_type = getattr(query, 'query_type', 'username')
+        base = query_value.split('@')[0] if query_type == 'email' else query_value
+        lookup = await self.engine.lookup(base)
+        platforms_found = sorted(lookup["found"])
+        return {
+            "scanner": self.name,
+            "query_type": query_type,
+            "query_value": query_value,
+            "search_results": lookup,
+            "platforms_found": platforms_found,
+            "confidence": 0.8 if platforms_found else 0.3,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+def register_username_probe_scanners(scanner_registry):
+    """Register the username presence scanner"""
+    scanner_registry.register(UsernamePresenceScanner())
+    return 1
@@ -0,0 +1,363 @@
+"""
+Wayback CDX Batch Engine
+========================
+
+Bulk Wayback Machine lookups for domain investigations:
+- One CDX query covers a whole URL prefix, host or domain instead of one
+  availability lookup per URL; ``collapse`` and ``filter`` are applied by
+  the CDX server so unchanged re-captures and error pages never come back,
+  and large result sets are paged with resume keys and parsed as they stream in
+- Snapshots are fetched concurrently under a per-host limit over one
+  keep-alive connection pool, using the ``id_`` form of the URL so the
+  original bytes come back without the Wayback banner
+- Snapshot bodies are kept in a local content-addressed store keyed by the
+  CDX digest: identical captures (same digest at different times or URLs)
+  are fetched once while they stay in the size-capped LRU store, and
+  concurrent requests for one digest coalesce
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from ..core.compute_service import get_compute_service
+from .session_pool import ScannerSessionPool
+from .streaming_parsers import aiter_structured_records
+
+logger = logging.getLogger(__name__)
+
+CDX_FIELDS = ['urlkey', 'timestamp', 'original', 'mimetype', 'statuscode', 'digest', 'length']
+CDX_HEADERS = {'User-Agent': 'Academic-Research-Bot/1.0 (+https://intelligence-platform.com)'}
+
+
+@dataclass
+class CdxQuery:
+    """One CDX search; ``match_type`` is exact, prefix, host or domain"""
+    url: str
+    match_type: str = 'exact'
+    collapse: Optional[str] = 'digest'
+    filters: List[str] = field(default_factory=list)  # e.g. 'statuscode:200', '!mimetype:image/.*'
+    from_timestamp: Optional[str] = None
+    to_timestamp: Optional[str] = None
+    limit: Optional[int] = None
+
+    def params(self) -> List[tuple]:
+        # A list of pairs, because ``filter`` may repeat
+        params = [('url', self.url), ('matchType', self.match_type), ('output', 'json'),
+                  ('fl', ','.join(CDX_FIELDS))]
+        if self.collapse:
+            params.append(('collapse', self.collapse))
+        params.extend(('filter', f) for f in self.filters)
+        if self.from_timestamp:
+            params.append(('from', self.from_timestamp))
+        if self.to_timestamp:
+            params.append(('to', self.to_timestamp))
+        return params
+
+
+@dataclass
+class CdxCapture:
+    """One row of a CDX result"""
+    urlkey: str
+    timestamp: str
+    original: str
+    mimetype: str
+    statuscode: str
+    digest: str
+    length: int
+
+    @property
+    def capture_date(self) -> Optional[datetime]:
+        try:
+            return datetime.strptime(self.timestamp, '%Y%m%d%H%M%S')
+        except ValueError:
+            return None
+
+    def archive_url(self, base_url: str = 'https://web.archive.org') -> str:
+        return f'{base_url}/web/{self.timestamp}/{self.original}'
+
+    def raw_url(self, base_url: str = 'https://web.archive.org') -> str:
+        """The capture's original bytes, without the Wayback toolbar or rewritten links"""
+        return f'{base_url}/web/{self.timestamp}id_/{self.original}'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SnapshotStore:
+    """Content-addressed snapshot bodies on local disk, keyed by CDX digest.
+
+    The store is capped at ``max_bytes``; the least recently used snapshots
+    are deleted on ``put`` once it is over. Calls do blocking file I/O, so
+    the engine runs them on the compute service's I/O pool.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.getenv("WAYBACK_SNAPSHOT_DIR") or os.path.join(
+            tempfile.gettempdir(), 'wayback-snapshots')
+        self.max_bytes = max_bytes or int(os.getenv("WAYBACK_SNAPSHOT_MAX_BYTES", str(512 * 1024 * 1024)))
+        self.total_bytes = 0
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()  # path -> size, least recently used first
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        safe = ''.join(c for c in digest if c.isalnum())
+        return os.path.join(self.directory, safe[:2], safe)
+
+    def _load(self):
+        # Snapshots left by earlier processes join the LRU order by modification time
+        if self._loaded:
+            return
+        self._loaded = True
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.part'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, os.path.join(root, name), stat.st_size))
+        for _, path, size in sorted(found):
+            self._sizes[path] = size
+            self.total_bytes += size
+
+    def get(self, digest: str) -> Optional[bytes]:
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._load()
+            if path in self._sizes:
+                self._sizes.move_to_end(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return body
+
+    def put(self, digest: str, body: bytes):
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial snapshot
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._load()
+            self.total_bytes += len(body) - self._sizes.pop(path, 0)
+            self._sizes[path] = len(body)
+            while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+                evicted, size = self._sizes.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(evicted)
+                except FileNotFoundError:
+                    pass
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+
+class WaybackCdxEngine:
+    """Batched CDX queries and deduplicated, cached snapshot retrieval"""
+
+    def __init__(self, base_url: Optional[str] = None, session_pool: Optional[ScannerSessionPool] = None,
+                 per_host_limit: Optional[int] = None, page_size: Optional[int] = None,
+                 store: Optional[SnapshotStore] = None, max_snapshot_bytes: int = 20 * 1024 * 1024,
+                 request_timeout: float = 60.0):
+        self.base_url = (base_url or os.getenv("WAYBACK_BASE_URL", "https://web.archive.org")).rstrip('/')
+        self.per_host_limit = per_host_limit or int(os.getenv("WAYBACK_PER_HOST", "6"))
+        self.session_pool = session_pool or ScannerSessionPool(limit_per_host=self.per_host_limit)
+        self.page_size = page_size or int(os.getenv("WAYBACK_CDX_PAGE_SIZE", "5000"))
+        self.store = store or SnapshotStore()
+        self.max_snapshot_bytes = max_snapshot_bytes
+        self.request_timeout = request_timeout
+        self.stats = {"cdx_requests": 0, "captures": 0, "snapshot_requests": 0, "store_hits": 0,
+                      "coalesced": 0, "duplicate_digests": 0, "bytes_fetched": 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        await self.session_pool.close()
+
+    def _reset_if_loop_changed(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight = {}
+            self._host_limits = {}
+            self._loop = loop
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    async def _session(self) -> aiohttp.ClientSession:
+        return await self.session_pool.get_session("wayback", headers=CDX_HEADERS, timeout=self.request_timeout)
+
+    async def query(self, query: CdxQuery) -> List[CdxCapture]:
+        """All captures matching ``query``, following resume keys page by page"""
+        self._reset_if_loop_changed()
+        captures: List[CdxCapture] = []
+        resume_key = None
+        while True:
+            remaining = query.limit - len(captures) if query.limit else None
+            params = query.params() + [('limit', str(min(self.page_size, remaining or self.page_size))),
+                                       ('showResumeKey', 'true')]
+            if resume_key:
+                params.append(('resumeKey', resume_key))
+            page, resume_key = await self._query_page(params)
+            captures.extend(page)
+            if not resume_key or (query.limit and len(captures) >= query.limit):
+                return captures[:query.limit] if query.limit else captures
+
+    async def _query_page(self, params: List[tuple]):
+        url = f'{self.base_url}/cdx/search/cdx'
+        session = await self._session()
+        captures, resume_key, fields, after_blank = [], None, None, False
+        async with self._host_limit(url):
+            self.stats["cdx_requests"] += 1
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientError(f"CDX HTTP {response.status}")
+                # Rows stream in; a large page is never held as one document
+                async for row in aiter_structured_records(response.content.iter_chunked(64 * 1024), 'json'):
+                    if fields is None:
+                        fields = row
+                    elif not row:
+                        after_blank = True  # a blank row separates the resume key
+                    elif after_blank:
+                        resume_key = row[0]
+                    else:
+                        captures.append(self._capture(dict(zip(fields, row))))
+        self.stats["captures"] += len(captures)
+        return captures, resume_key
+
+    @staticmethod
+    def _capture(row: Dict[str, str]) -> CdxCapture:
+        length = row.get('length', '')
+        return CdxCapture(
+            urlkey=row.get('urlkey', ''), timestamp=row.get('timestamp', ''), original=row.get('original', ''),
+            mimetype=row.get('mimetype', ''), statuscode=row.get('statuscode', ''), digest=row.get('digest', ''),
+            length=int(length) if length.isdigit() else 0,
+        )
+
+    async def query_many(self, queries: Iterable[CdxQuery]) -> List[List[CdxCapture]]:
+        """Run several CDX queries concurrently (bounded by the per-host limit)"""
+        return list(await asyncio.gather(*(self.query(q) for q in queries)))
+
+    async def domain_captures(self, domain: str, statuscode: Optional[str] = '200',
+                              from_timestamp: Optional[str] = None, to_timestamp: Optional[str] = None,
+                              limit: Optional[int] = None) -> List[CdxCapture]:
+        """Distinct-content captures of every URL under ``domain`` in one CDX query"""
+        filters = [f'statuscode:{statuscode}'] if statuscode else []
+        return await self.query(CdxQuery(domain, match_type='domain', collapse='digest', filters=filters,
+                                         from_timestamp=from_timestamp, to_timestamp=to_timestamp, limit=limit))
+
+    async def fetch_snapshot(self, capture: CdxCapture) -> bytes:
+        """The original bytes of a capture, from the local store when its digest was seen before"""
+        self._reset_if_loop_changed()
+        digest = capture.digest
+        body = await get_compute_service().run_io("wayback_store", self.store.get, digest) if digest else None
+        if body is not None:
+            self.stats["store_hits"] += 1
+            return body
+        pending = self._inflight.get(digest)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        if digest:
+            self._inflight[digest] = future
+        try:
+            body = await self._download(capture.raw_url(self.base_url))
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # retrieved here; coalesced waiters re-raise it
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._inflight.pop(digest, None)
+
+        future.set_result(body)
+        if digest:
+            # Keyed by the CDX payload digest rather than a hash of ``body``: the
+            # body may have been decompressed in transit
+            try:
+                await get_compute_service().run_io("wayback_store", self.store.put, digest, body)
+            except OSError as e:
+                logger.warning(f"Could not store snapshot {digest}: {e}")
+        return body
+
+    async def _download(self, url: str) -> bytes:
+        session = await self._session()
+        async with self._host_limit(url):
+            self.stats["snapshot_requests"] += 1
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise aiohttp.ClientError(f"Snapshot HTTP {response.status}")
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk
+                    if len(body) > self.max_snapshot_bytes:
+                        raise aiohttp.ClientError(f"Snapshot larger than {self.max_snapshot_bytes} bytes")
+        self.stats["bytes_fetched"] += len(body)
+        return bytes(body)
+
+    async def fetch_snapshots(self, captures: Iterable[CdxCapture]) -> Dict[str, Any]:
+        """Bodies of the given captures keyed by digest; each distinct digest is fetched at most once.
+
+        Failed digests map to the exception instead of bytes.
+        """
+        unique: Dict[str, CdxCapture] = {}
+        for capture in captures:
+            if capture.digest in unique:
+                self.stats["duplicate_digests"] += 1
+            else:
+                unique[capture.digest] = capture
+        bodies = await asyncio.gather(*(self.fetch_snapshot(c) for c in unique.values()), return_exceptions=True)
+        return dict(zip(unique, bodies))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "per_host_limit": self.per_host_limit, "pool": self.session_pool.get_stats()}
+
+
+# Shared engine, so every scanner shares the snapshot store's in-flight coalescing
+_cdx_engine: Optional[WaybackCdxEngine] = None
+
+
+def get_wayback_cdx_engine() -> WaybackCdxEngine:
+    """Get the shared Wayback CDX engine"""
+    global _cdx_engine
+    if _cdx_engine is None:
+        _cdx_engine = WaybackCdxEngine()
+    return _cdx_engine
@@ -0,0 +1,490 @@
+"""
+Analytics Event Store
+=====================
+
+Time-partitioned columnar storage for analytics events:
+- Events are appended into hourly partitions of typed columns
+  (timestamp, user id, session id, event type code, timings, scanner info)
+- Each partition keeps pre-aggregated counters and HyperLogLog sketches of
+  distinct users and sessions, so window queries cost O(partitions)
+- Only the partition straddling a window boundary is scanned row by row
+- Partitions older than the hot window spill their columns to disk; their
+  counters and sketches stay in memory, and spill files left by exited
+  processes are deleted when a store starts
+- User and session ids are stored as stable 63-bit hashes rather than
+  dictionary codes, so memory does not grow with their cardinality
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Event types known up front; anything else is assigned the next free code
+DEFAULT_EVENT_TYPES = [
+    "page_view",
+    "query_submitted",
+    "scan_completed",
+    "api_request",
+    "error",
+    "performance",
+    "user_activity",
+]
+
+_MASK64 = (1 << 64) - 1
+
+# Columns holding hashed ids instead of dictionary codes
+_HASHED_KINDS = ("user", "session")
+
+# Per-partition bitmap of hashed user ids, used to skip partitions in user_events
+USER_FILTER_BITS = 8192
+
+_COLUMN_TYPES = {
+    "timestamp": "d",
+    "user": "q",
+    "session": "q",
+    "event_type": "H",
+    "response_time": "d",
+    "scanner": "q",
+    "status": "b",
+    "execution_time": "d",
+}
+
+
+# Spill files are named events_<pid>_<store id>_<partition start>.npz
+_SPILL_NAME = re.compile(r"events_(\d+)_[0-9a-f]+_\d+\.npz$")
+
+
+def _process_alive(pid: int) -> bool:
+    """True when ``pid`` is a running process; other workers may share the spill directory"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Epoch seconds; naive datetimes are treated as UTC like datetime.utcnow()"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def hash_id(value: str) -> int:
+    """Stable non-negative 63-bit id for a high-cardinality string"""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    """Well-mixed 64-bit hashes of integer ids"""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over integer ids"""
+
+    def __init__(self, precision: int = 12, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.size, dtype=np.uint8)
+
+    def add_id(self, value: int):
+        """Add one integer id (scalar fast path of ``add_ids``)"""
+        z = (value + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        z ^= z >> 31
+        index = z & (self.size - 1)
+        rest = z >> self.precision
+        rank = (rest & -rest).bit_length() if rest else 64 - self.precision + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add_ids(self, ids: np.ndarray):
+        """Add integer ids (vectorized)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        hashes = _splitmix64(ids)
+        index = (hashes & np.uint64(self.size - 1)).astype(np.intp)
+        rest = hashes >> np.uint64(self.precision)
+        # Rank = position of the lowest set bit; x & -x isolates it exactly
+        lowest = rest & (~rest + np.uint64(1))
+        ranks = np.full(len(ids), 64 - self.precision + 1, dtype=np.uint8)
+        nonzero = rest != 0
+        ranks[nonzero] = np.log2(lowest[nonzero].astype(np.float64)).astype(np.uint8) + 1
+        np.maximum.at(self.registers, index, ranks)
+
+    def merge(self, other: "HyperLogLog"):
+        """Fold another sketch into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def copy(self) -> "HyperLogLog":
+        return HyperLogLog(self.precision, self.registers.copy())
+
+    def count(self) -> int:
+        """Estimated number of distinct ids"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class EventPartition:
+    """One time slice of events with columns, counters and sketches"""
+
+    def __init__(self, start: float, precision: int = 12):
+        self.start = start
+        self.columns: Optional[Dict[str, array]] = {name: array(code) for name, code in _COLUMN_TYPES.items()}
+        self.size = 0
+        self.spill_path: Optional[str] = None
+
+        self.type_counts: Counter = Counter()
+        self.response_time_sum = 0.0
+        self.response_time_count = 0
+        # scanner code -> [total, successful, execution_time_sum, execution_time_count]
+        self.scanner_stats: Dict[int, List[float]] = {}
+        self.user_filter = bytearray(USER_FILTER_BITS // 8)
+        self.users = HyperLogLog(precision)
+        self.sessions = HyperLogLog(precision)
+
+    def append(self, timestamp: float, user: int, session: int, event_type: int,
+               response_time: float, scanner: int, status: int, execution_time: float):
+        if self.columns is None:
+            self._load()
+        columns = self.columns
+        columns["timestamp"].append(timestamp)
+        columns["user"].append(user)
+        columns["session"].append(session)
+        columns["event_type"].append(event_type)
+        columns["response_time"].append(response_time)
+        columns["scanner"].append(scanner)
+        columns["status"].append(status)
+        columns["execution_time"].append(execution_time)
+        self.size += 1
+
+        self.type_counts[event_type] += 1
+        if response_time == response_time:  # not NaN
+            self.response_time_sum += response_time
+            self.response_time_count += 1
+        if scanner >= 0:
+            stats = self.scanner_stats.setdefault(scanner, [0, 0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += status == 1
+            if execution_time == execution_time:
+                stats[2] += execution_time
+                stats[3] += 1
+        if user >= 0:
+            bit = user & (USER_FILTER_BITS - 1)
+            self.user_filter[bit >> 3] |= 1 << (bit & 7)
+            self.users.add_id(user)
+        if session >= 0:
+            self.sessions.add_id(session)
+
+    def may_contain_user(self, user: int) -> bool:
+        """False only when the partition has no events for ``user``"""
+        bit = user & (USER_FILTER_BITS - 1)
+        return bool(self.user_filter[bit >> 3] & (1 << (bit & 7)))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Columns as NumPy arrays, read back from disk if spilled"""
+        if self.columns is not None:
+            return {name: np.array(column, dtype=column.typecode) for name, column in self.columns.items()}
+        with np.load(self.spill_path) as data:
+            return {name: data[name] for name in _COLUMN_TYPES}
+
+    def spill(self, directory: str, prefix: str = "events"):
+        """Write columns to disk and drop them from memory"""
+        if self.columns is None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{prefix}_{int(self.start)}.npz")
+        np.savez(path, **{name: np.array(column, dtype=column.typecode) for name, column in self.columns.items()})
+        self.spill_path = path
+        self.columns = None
+
+    def _load(self):
+        """Bring spilled columns back into memory for late-arriving events"""
+        data = self.arrays()
+        self.columns = {name: array(code, data[name].tolist()) for name, code in _COLUMN_TYPES.items()}
+
+    def drop(self):
+        """Remove any spilled data"""
+        if self.spill_path and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+
+class WindowAggregate:
+    """Aggregates for a time window, merged from partitions"""
+
+    def __init__(self, precision: int):
+        self.total_events = 0
+        self.type_counts: Counter = Counter()
+        self.response_time_sum = 0.0
+        self.response_time_count = 0
+        self.scanner_stats: Dict[int, List[float]] = {}
+        self.hourly_distribution: Counter = Counter()
+        self.users = HyperLogLog(precision)
+        self.sessions = HyperLogLog(precision)
+
+    def add_scanner_stats(self, scanner: int, stats: List[float]):
+        current = self.scanner_stats.setdefault(scanner, [0, 0, 0.0, 0])
+        for i, value in enumerate(stats):
+            current[i] += value
+
+
+class PartitionedEventStore:
+    """Append-only analytics store partitioned by hour"""
+
+    def __init__(self, partition_seconds: int = 3600, hot_partitions: int = 48,
+                 retention_days: int = 365, spill_dir: str = "data/analytics",
+                 hll_precision: int = 12):
+        self.partition_seconds = partition_seconds
+        self.hot_partitions = hot_partitions
+        self.retention_seconds = retention_days * 86400
+        self.spill_dir = spill_dir
+        self.hll_precision = hll_precision
+
+        self.partitions: Dict[int, EventPartition] = {}
+        self._partition_keys: List[int] = []
+        self._spill_prefix = f"events_{os.getpid()}_{id(self):x}"
+        self._remove_stale_spills()
+
+        # Dictionary encodings for the low-cardinality columns only
+        self._codes: Dict[str, Dict[str, int]] = {"event_type": {}, "scanner": {}}
+        self._names: Dict[str, List[str]] = {"event_type": [], "scanner": []}
+        for event_type in DEFAULT_EVENT_TYPES:
+            self.encode("event_type", event_type)
+
+    def __len__(self) -> int:
+        return sum(partition.size for partition in self.partitions.values())
+
+    def _remove_stale_spills(self):
+        """Delete spill files left behind by processes that have exited"""
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return
+        for name in names:
+            match = _SPILL_NAME.match(name)
+            if match is None:
+                continue
+            pid = int(match.group(1))
+            if pid == os.getpid() or _process_alive(pid):
+                continue
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError as e:
+                logger.warning(f"Could not remove stale analytics spill {name}: {e}")
+
+    def encode(self, kind: str, value: Optional[str]) -> int:
+        """Encode a string column value (-1 for None); user/session ids are hashed"""
+        if value is None:
+            return -1
+        if kind in _HASHED_KINDS:
+            return hash_id(value)
+        codes = self._codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._names[kind])
+            self._names[kind].append(value)
+        return code
+
+    def lookup(self, kind: str, value: Optional[str]) -> int:
+        """Code for a value without registering it (-1 when unknown)"""
+        if value is None:
+            return -1
+        if kind in _HASHED_KINDS:
+            return hash_id(value)
+        return self._codes[kind].get(value, -1)
+
+    def decode(self, kind: str, code: int) -> str:
+        return self._names[kind][code]
+
+    def append(self, event) -> None:
+        """Append an AnalyticsEvent"""
+        timestamp = to_epoch(event.timestamp)
+        properties = event.properties or {}
+
+        status = properties.get("status")
+        response_time = properties.get("response_time")
+        execution_time = properties.get("execution_time")
+        scanner = properties.get("scanner_type") if event.event_type == "scan_completed" else None
+
+        self._get_partition(timestamp).append(
+            timestamp,
+            self.encode("user", event.user_id),
+            self.encode("session", event.session_id),
+            self.encode("event_type", event.event_type),
+            float(response_time) if isinstance(response_time, (int, float)) else float("nan"),
+            self.encode("scanner", scanner),
+            -1 if status is None else int(status == "completed"),
+            float(execution_time) if isinstance(execution_time, (int, float)) else float("nan"),
+        )
+
+    def _get_partition(self, timestamp: float) -> EventPartition:
+        key = int(timestamp // self.partition_seconds)
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = EventPartition(key * self.partition_seconds, self.hll_precision)
+            self.partitions[key] = partition
+            bisect.insort(self._partition_keys, key)
+            self._maintain()
+        return partition
+
+    def _maintain(self):
+        """Spill partitions outside the hot window and drop expired ones"""
+        if not self._partition_keys:
+            return
+        newest = self._partition_keys[-1]
+        retention_partitions = self.retention_seconds // self.partition_seconds
+
+        while self._partition_keys and self._partition_keys[0] < newest - retention_partitions:
+            key = self._partition_keys.pop(0)
+            self.partitions.pop(key).drop()
+
+        for key in self._partition_keys[:-self.hot_partitions] if self.hot_partitions else self._partition_keys:
+            partition = self.partitions[key]
+            if partition.columns is not None:
+                try:
+                    partition.spill(self.spill_dir, self._spill_prefix)
+                except OSError as e:
+                    logger.warning(f"Could not spill analytics partition {key}: {e}")
+                    break
+
+    def _window(self, since: Optional[datetime]) -> Tuple[float, List[EventPartition]]:
+        """Partitions overlapping [since, now)"""
+        cutoff = to_epoch(since) if since else float("-inf")
+        first_key = int(cutoff // self.partition_seconds) if since else None
+        start = bisect.bisect_left(self._partition_keys, first_key) if since else 0
+        return cutoff, [self.partitions[key] for key in self._partition_keys[start:]]
+
+    def aggregate(self, since: Optional[datetime] = None) -> WindowAggregate:
+        """Merge partition aggregates; only a boundary partition is scanned"""
+        cutoff, partitions = self._window(since)
+        result = WindowAggregate(self.hll_precision)
+
+        for partition in partitions:
+            if partition.start >= cutoff:
+                result.total_events += partition.size
+                result.type_counts.update(partition.type_counts)
+                result.response_time_sum += partition.response_time_sum
+                result.response_time_count += partition.response_time_count
+                for scanner, stats in partition.scanner_stats.items():
+                    result.add_scanner_stats(scanner, stats)
+                result.users.merge(partition.users)
+                result.sessions.merge(partition.sessions)
+                hour = datetime.fromtimestamp(partition.start, tz=timezone.utc).hour
+                result.hourly_distribution[hour] += partition.size
+            else:
+                self._aggregate_rows(partition, cutoff, result)
+
+        return result
+
+    def _aggregate_rows(self, partition: EventPartition, cutoff: float, result: WindowAggregate):
+        """Aggregate the rows of one partition that fall after ``cutoff``"""
+        columns = partition.arrays()
+        mask = columns["timestamp"] >= cutoff
+        selected = int(np.count_nonzero(mask))
+        if not selected:
+            return
+
+        result.total_events += selected
+        event_types = columns["event_type"][mask]
+        for code, count in zip(*np.unique(event_types, return_counts=True)):
+            result.type_counts[int(code)] += int(count)
+
+        response_times = columns["response_time"][mask]
+        timed = ~np.isnan(response_times)
+        result.response_time_sum += float(response_times[timed].sum())
+        result.response_time_count += int(np.count_nonzero(timed))
+
+        scanners = columns["scanner"][mask]
+        statuses = columns["status"][mask]
+        execution_times = columns["execution_time"][mask]
+        for scanner in np.unique(scanners[scanners >= 0]):
+            rows = scanners == scanner
+            scanner_times = execution_times[rows]
+            scanner_timed = ~np.isnan(scanner_times)
+            result.add_scanner_stats(int(scanner), [
+                int(np.count_nonzero(rows)),
+                int(np.count_nonzero(statuses[rows] == 1)),
+                float(scanner_times[scanner_timed].sum()),
+                int(np.count_nonzero(scanner_timed)),
+            ])
+
+        users = columns["user"][mask]
+        result.users.add_ids(users[users >= 0])
+        sessions = columns["session"][mask]
+        result.sessions.add_ids(sessions[sessions >= 0])
+
+        hour = datetime.fromtimestamp(partition.start, tz=timezone.utc).hour
+        result.hourly_distribution[hour] += selected
+
+    def count_events(self, since: Optional[datetime] = None) -> int:
+        """Number of events since ``since``"""
+        cutoff, partitions = self._window(since)
+        total = 0
+        for partition in partitions:
+            if partition.start >= cutoff:
+                total += partition.size
+            else:
+                total += int(np.count_nonzero(partition.arrays()["timestamp"] >= cutoff))
+        return total
+
+    def distinct_users(self, since: Optional[datetime] = None) -> int:
+        """Approximate distinct users since ``since``"""
+        return self.aggregate(since).users.count()
+
+    def user_events(self, user_id: str, since: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """Columns for one user's events; partitions without the user are skipped"""
+        code = self.lookup("user", user_id)
+        cutoff, partitions = self._window(since)
+        selected: Dict[str, List[np.ndarray]] = {name: [] for name in _COLUMN_TYPES}
+        if code < 0:
+            return {name: np.array([], dtype=type_code) for name, type_code in _COLUMN_TYPES.items()}
+
+        for partition in partitions:
+            if not partition.may_contain_user(code):
+                continue
+            columns = partition.arrays()
+            mask = (columns["user"] == code) & (columns["timestamp"] >= cutoff)
+            for name in _COLUMN_TYPES:
+                selected[name].append(columns[name][mask])
+
+        return {
+            name: np.concatenate(parts) if parts else np.array([], dtype=_COLUMN_TYPES[name])
+            for name, parts in selected.items()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Storage footprint"""
+        in_memory = [p for p in self.partitions.values() if p.columns is not None]
+        return {
+            "total_events": len(self),
+            "partitions": len(self.partitions),
+            "in_memory_partitions": len(in_memory),
+            "spilled_partitions": len(self.partitions) - len(in_memory),
+            "distinct_users": self.distinct_users(),
+            "event_types": list(self._names["event_type"]),
+        }
@@ -14,7 +14,10 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import json
 import statistics
-from collections import defaultdict, Counter
+import numpy as np
+from collections import defaultdict, Counter, deque
+
+from .analytics_event_store import PartitionedEventStore
 
 logger = logging.getLogger(__name__)
 
@@ -99,8 +102,9 @@ class EnterpriseAnalyticsService:
     into platform performance, user behavior, and business metrics.
     """
     
-    def __init__(self):
-        self.events_storage: List[AnalyticsEvent] = []
+    def __init__(self, spill_dir: str = "data/analytics"):
+        self.event_store = PartitionedEventStore(spill_dir=spill_dir)
+        self.recent_events: deque = deque(maxlen=1000)
         self.metrics_storage: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
         self.user_sessions: Dict[str, Dict[str, Any]] = {}
         self.performance_baselines: Dict[str, float] = {}
@@ -120,7 +124,8 @@ class EnterpriseAnalyticsService:
     
     async def track_event(self, event: AnalyticsEvent):
         """Track an analytics event."""
-        self.events_storage.append(event)
+        self.event_store.append(event)
+        self.recent_events.append(event)
         
         # Update user session tracking
         if event.user_id and event.session_id:
@@ -173,10 +178,11 @@ class EnterpriseAnalyticsService:
     async def _check_error_patterns(self, event: AnalyticsEvent):
         """Check for concerning error patterns."""
         # Count recent errors
+        now = datetime.utcnow()
         recent_errors = [
-            e for e in self.events_storage[-100:]  # Last 100 events
+            e for e in list(self.recent_events)[-100:]  # Last 100 events
             if e.event_type == "error" and 
-            (datetime.utcnow() - e.timestamp).total_seconds() < 300  # Last 5 minutes
+            (now - e.timestamp).total_seconds() < 300  # Last 5 minutes
         ]
         
         if len(recent_errors) > 10:  # More than 10 errors in 5 minutes
@@ -196,12 +202,10 @@ class EnterpriseAnalyticsService:
         """Get comprehensive user behavior analytics."""
         # Filter events for user and timeframe
         cutoff_date = self._get_cutoff_date(timeframe)
-        user_events = [
-            e for e in self.events_storage 
-            if e.user_id == user_id and e.timestamp >= cutoff_date
-        ]
+        store = self.event_store
+        user_events = store.user_events(user_id, cutoff_date)
         
-        if not user_events:
+        if not len(user_events["timestamp"]):
             return UserBehaviorMetrics(
                 user_id=user_id,
                 total_sessions=0,
@@ -217,8 +221,10 @@ class EnterpriseAnalyticsService:
         
         # Calculate metrics
         sessions = self._get_user_sessions(user_id, timeframe)
-        queries = [e for e in user_events if e.event_type == "query_submitted"]
-        scans = [e for e in user_events if e.event_type == "scan_completed"]
+        event_types = user_events["event_type"]
+        total_queries = int((event_types == store.lookup("event_type", "query_submitted")).sum())
+        scans = event_types == store.lookup("event_type", "scan_completed")
+        total_scans = int(scans.sum())
         
         # Calculate session duration
         session_durations = []
@@ -229,34 +235,32 @@ class EnterpriseAnalyticsService:
         avg_session_duration = statistics.mean(session_durations) if session_durations else 0.0
         
         # Calculate favorite scanners
-        scanner_usage = Counter()
-        for event in user_events:
-            if event.event_type == "scan_completed" and "scanner_type" in event.properties:
-                scanner_usage[event.properties["scanner_type"]] += 1
+        scanner_codes = user_events["scanner"][scans]
+        scanner_usage = Counter({
+            store.decode("scanner", int(code)): int(count)
+            for code, count in zip(*np.unique(scanner_codes[scanner_codes >= 0], return_counts=True))
+        })
         
         favorite_scanners = [scanner for scanner, _ in scanner_usage.most_common(5)]
         
         # Calculate success rate
-        successful_scans = [
-            e for e in scans 
-            if e.properties.get("status") == "completed"
-        ]
-        success_rate = len(successful_scans) / len(scans) if scans else 0.0
+        successful_scans = int((user_events["status"][scans] == 1).sum())
+        success_rate = successful_scans / total_scans if total_scans else 0.0
         
         # Calculate retention score (simplified)
-        days_active = len(set(e.timestamp.date() for e in user_events))
+        days_active = len(np.unique(user_events["timestamp"] // 86400))
         total_days = (datetime.utcnow().date() - cutoff_date.date()).days
         retention_score = days_active / max(total_days, 1)
         
         return UserBehaviorMetrics(
             user_id=user_id,
             total_sessions=len(sessions),
-            total_queries=len(queries),
-            total_scans=len(scans),
+            total_queries=total_queries,
+            total_scans=total_scans,
             avg_session_duration=avg_session_duration,
             favorite_scanners=favorite_scanners,
             success_rate=success_rate,
-            last_activity=max(e.timestamp for e in user_events),
+            last_activity=datetime.utcfromtimestamp(float(user_events["timestamp"].max())),
             subscription_plan=self._get_user_subscription_plan(user_id),
             retention_score=retention_score
         )
@@ -264,48 +268,35 @@ class EnterpriseAnalyticsService:
     async def get_platform_metrics(self, timeframe: AnalyticsTimeframe = AnalyticsTimeframe.DAY) -> PlatformMetrics:
         """Get comprehensive platform performance metrics."""
         cutoff_date = self._get_cutoff_date(timeframe)
-        recent_events = [
-            e for e in self.events_storage 
-            if e.timestamp >= cutoff_date
-        ]
+        now = datetime.utcnow()
+        window = self.event_store.aggregate(cutoff_date)
         
-        # Calculate user metrics
-        unique_users = set(e.user_id for e in recent_events if e.user_id)
-        active_users_24h = len(set(
-            e.user_id for e in self.events_storage 
-            if e.user_id and (datetime.utcnow() - e.timestamp).total_seconds() < 86400
-        ))
-        active_users_7d = len(set(
-            e.user_id for e in self.events_storage 
-            if e.user_id and (datetime.utcnow() - e.timestamp).total_seconds() < 604800
-        ))
-        active_users_30d = len(set(
-            e.user_id for e in self.events_storage 
-            if e.user_id and (datetime.utcnow() - e.timestamp).total_seconds() < 2592000
-        ))
+        # Calculate user metrics (HyperLogLog estimates)
+        unique_users = window.users.count()
+        active_users_24h = self.event_store.distinct_users(now - timedelta(days=1))
+        active_users_7d = self.event_store.distinct_users(now - timedelta(days=7))
+        active_users_30d = self.event_store.distinct_users(now - timedelta(days=30))
         
         # Calculate query and scan metrics
-        queries = [e for e in recent_events if e.event_type == "query_submitted"]
-        scans = [e for e in recent_events if e.event_type == "scan_completed"]
+        total_queries = self._count_event_type(window, "query_submitted")
+        total_scans = self._count_event_type(window, "scan_completed")
         
         # Calculate performance metrics
-        response_times = [
-            e.properties.get("response_time", 0) 
-            for e in recent_events 
-            if "response_time" in e.properties
-        ]
-        avg_response_time = statistics.mean(response_times) if response_times else 0.0
+        avg_response_time = (
+            window.response_time_sum / window.response_time_count
+            if window.response_time_count else 0.0
+        )
         
         # Calculate error rate
-        errors = [e for e in recent_events if e.event_type == "error"]
-        total_requests = len([e for e in recent_events if e.event_type in ["query_submitted", "api_request"]])
-        error_rate = len(errors) / max(total_requests, 1)
+        errors = self._count_event_type(window, "error")
+        total_requests = total_queries + self._count_event_type(window, "api_request")
+        error_rate = errors / max(total_requests, 1)
         
         # Calculate top scanners
-        scanner_usage = Counter()
-        for event in scans:
-            if "scanner_type" in event.properties:
-                scanner_usage[event.properties["scanner_type"]] += 1
+        scanner_usage = Counter({
+            self.event_store.decode("scanner", code): int(stats[0])
+            for code, stats in window.scanner_stats.items()
+        })
         
         top_scanners = scanner_usage.most_common(10)
         
@@ -313,18 +304,23 @@ class EnterpriseAnalyticsService:
         revenue_metrics = await self._calculate_revenue_metrics(timeframe)
         
         return PlatformMetrics(
-            total_users=len(unique_users),
+            total_users=unique_users,
             active_users_24h=active_users_24h,
             active_users_7d=active_users_7d,
             active_users_30d=active_users_30d,
-            total_queries=len(queries),
-            total_scans=len(scans),
+            total_queries=total_queries,
+            total_scans=total_scans,
             avg_response_time=avg_response_time,
             error_rate=error_rate,
             top_scanners=top_scanners,
             revenue_metrics=revenue_metrics
         )
     
+    def _count_event_type(self, window, event_type: str) -> int:
+        """Events of one type in an aggregated window."""
+        code = self.event_store.lookup("event_type", event_type)
+        return window.type_counts.get(code, 0) if code >= 0 else 0
+    
     async def generate_performance_insights(self, timeframe: AnalyticsTimeframe = AnalyticsTimeframe.WEEK) -> List[PerformanceInsight]:
         """Generate actionable performance insights."""
         insights = []
@@ -393,26 +389,13 @@ class EnterpriseAnalyticsService:
     async def _add_scanner_performance_insights(self, insights: List[PerformanceInsight], timeframe: AnalyticsTimeframe):
         """Add scanner-specific performance insights."""
         cutoff_date = self._get_cutoff_date(timeframe)
-        scan_events = [
-            e for e in self.events_storage 
-            if e.event_type == "scan_completed" and e.timestamp >= cutoff_date
-        ]
+        window = self.event_store.aggregate(cutoff_date)
         
         # Analyze scanner success rates
-        scanner_stats = defaultdict(lambda: {"total": 0, "successful": 0, "avg_time": []})
-        
-        for event in scan_events:
-            scanner_type = event.properties.get("scanner_type")
-            if not scanner_type:
-                continue
-            
-            scanner_stats[scanner_type]["total"] += 1
-            
-            if event.properties.get("status") == "completed":
-                scanner_stats[scanner_type]["successful"] += 1
-            
-            if "execution_time" in event.properties:
-                scanner_stats[scanner_type]["avg_time"].append(event.properties["execution_time"])
+        scanner_stats = {
+            self.event_store.decode("scanner", code): {"total": stats[0], "successful": stats[1]}
+            for code, stats in window.scanner_stats.items()
+        }
         
         # Generate insights for underperforming scanners
         for scanner_type, stats in scanner_stats.items():
@@ -446,8 +429,8 @@ class EnterpriseAnalyticsService:
         last_5_minutes = now - timedelta(minutes=5)
         
         # Recent activity
-        recent_events = [e for e in self.events_storage if e.timestamp >= last_hour]
-        very_recent_events = [e for e in self.events_storage if e.timestamp >= last_5_minutes]
+        events_last_hour = self.event_store.count_events(last_hour)
+        very_recent = self.event_store.aggregate(last_5_minutes)
         
         # Active sessions
         active_sessions = len([
@@ -456,23 +439,24 @@ class EnterpriseAnalyticsService:
         ])
         
         # Current error rate
-        recent_errors = [e for e in very_recent_events if e.event_type == "error"]
-        recent_requests = [e for e in very_recent_events if e.event_type in ["query_submitted", "api_request"]]
-        current_error_rate = len(recent_errors) / max(len(recent_requests), 1)
+        recent_errors = self._count_event_type(very_recent, "error")
+        recent_requests = (
+            self._count_event_type(very_recent, "query_submitted") +
+            self._count_event_type(very_recent, "api_request")
+        )
+        current_error_rate = recent_errors / max(recent_requests, 1)
         
         # Response time trend
-        response_times = [
-            e.properties.get("response_time", 0)
-            for e in very_recent_events
-            if "response_time" in e.properties
-        ]
-        current_avg_response_time = statistics.mean(response_times) if response_times else 0.0
+        current_avg_response_time = (
+            very_recent.response_time_sum / very_recent.response_time_count
+            if very_recent.response_time_count else 0.0
+        )
         
         return {
             "timestamp": now.isoformat(),
             "active_sessions": active_sessions,
-            "events_last_hour": len(recent_events),
-            "events_last_5_minutes": len(very_recent_events),
+            "events_last_hour": events_last_hour,
+            "events_last_5_minutes": very_recent.total_events,
             "current_error_rate": current_error_rate,
             "current_avg_response_time": current_avg_response_time,
             "status": "healthy" if current_error_rate < 0.1 and current_avg_response_time < 5.0 else "warning"
@@ -526,17 +510,14 @@ class EnterpriseAnalyticsService:
                                   format: str = "json") -> Dict[str, Any]:
         """Export analytics data for external analysis."""
         cutoff_date = self._get_cutoff_date(timeframe)
-        events = [
-            e for e in self.events_storage 
-            if e.timestamp >= cutoff_date
-        ]
+        window = self.event_store.aggregate(cutoff_date)
         
         # Prepare export data
         export_data = {
             "export_info": {
                 "timestamp": datetime.utcnow().isoformat(),
                 "timeframe": timeframe.value,
-                "total_events": len(events),
+                "total_events": window.total_events,
                 "date_range": {
                     "start": cutoff_date.isoformat(),
                     "end": datetime.utcnow().isoformat()
@@ -544,25 +525,23 @@ class EnterpriseAnalyticsService:
             },
             "platform_metrics": asdict(await self.get_platform_metrics(timeframe)),
             "performance_insights": [asdict(insight) for insight in await self.generate_performance_insights(timeframe)],
-            "events_summary": self._generate_events_summary(events)
+            "events_summary": self._generate_events_summary(window)
         }
         
         return export_data
     
-    def _generate_events_summary(self, events: List[AnalyticsEvent]) -> Dict[str, Any]:
-        """Generate summary statistics for events."""
-        event_types = Counter(e.event_type for e in events)
-        hourly_distribution = defaultdict(int)
-        
-        for event in events:
-            hour = event.timestamp.hour
-            hourly_distribution[hour] += 1
+    def _generate_events_summary(self, window) -> Dict[str, Any]:
+        """Generate summary statistics for an aggregated event window."""
+        event_types = {
+            self.event_store.decode("event_type", code): count
+            for code, count in window.type_counts.items()
+        }
         
         return {
-            "event_types": dict(event_types),
-            "hourly_distribution": dict(hourly_distribution),
-            "unique_users": len(set(e.user_id for e in events if e.user_id)),
-            "unique_sessions": len(set(e.session_id for e in events if e.session_id))
+            "event_types": event_types,
+            "hourly_distribution": dict(window.hourly_distribution),
+            "unique_users": window.users.count(),
+            "unique_sessions": window.sessions.count()
         }
 
 
@@ -31,9 +31,11 @@ from ..db.enterprise_models import (
     User, IntelligenceQuery, ScanResult, Report, AuditLog,
     QueryStatus, ScannerStatus, UserPlanType
 )
-from ..scanners.enterprise_scanner_engine import (
-    scanner_registry, get_orchestrator, ScannerCategory
-)
+from ..db.result_persistence import ScanResultWriter
+from ..core.search_index import get_search_indexer, make_document
+from ..core.sufficiency import SufficiencyEvaluator
+from .query_pagination import apply_keyset, encode_cursor, decode_cursor, query_counters
+from ..scanners.enterprise_scanner_engine import get_orchestrator, ScannerCategory
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +84,8 @@ class EnterpriseQueryService:
             
             # Calculate estimated cost
             estimated_cost = await self._calculate_query_cost(
-                query_type, scanner_names, categories
+                query_type, scanner_names, categories,
+                user_plan=user.plan_type, budget=user.credits_balance
             )
             
             # Check user quotas and credits
@@ -125,6 +128,7 @@ class EnterpriseQueryService:
             # Consume user quota and credits
             user.consume_quota(1, estimated_cost)
             await self.db.commit()
+            query_counters.record_submitted(user_id, query_type, query.status)
             
             # Log audit event
             await self._log_audit_event(
@@ -179,35 +183,25 @@ class EnterpriseQueryService:
         order_by: str = "created_at",
         order_desc: bool = True
     ) -> Tuple[List[IntelligenceQuery], int]:
-        """List user queries with filtering and pagination"""
+        """List user queries with filtering and offset pagination.
+        
+        Prefer ``list_user_queries_page`` for deep pagination; OFFSET cost
+        grows with page depth.
+        """
         
         try:
-            # Base query
-            base_query = select(IntelligenceQuery).where(
-                and_(
-                    IntelligenceQuery.user_id == user_id,
-                    ~IntelligenceQuery.is_deleted
-                )
-            )
-            
-            # Apply filters
-            if status_filter:
-                base_query = base_query.where(IntelligenceQuery.status == status_filter)
-            
-            if query_type_filter:
-                base_query = base_query.where(IntelligenceQuery.query_type == query_type_filter)
-            
-            # Count total results
-            count_query = select(func.count()).select_from(base_query.subquery())
-            total_count = (await self.db.execute(count_query)).scalar()
+            base_query = self._user_queries_statement(user_id, status_filter, query_type_filter)
+            total_count = await self._count_user_queries(user_id, status_filter, query_type_filter)
             
             # Apply ordering and pagination
             order_column = getattr(IntelligenceQuery, order_by, IntelligenceQuery.created_at)
+            id_column = IntelligenceQuery.id
             if order_desc:
                 order_column = order_column.desc()
+                id_column = id_column.desc()
             
             queries_query = (base_query
-                           .order_by(order_column)
+                           .order_by(order_column, id_column)
                            .limit(limit)
                            .offset(offset))
             
@@ -220,6 +214,77 @@ class EnterpriseQueryService:
             self.logger.exception(f"💥 Error listing queries for user {user_id}: {e}")
             return [], 0
     
+    async def list_user_queries_page(
+        self,
+        user_id: UUID,
+        status_filter: Optional[str] = None,
+        query_type_filter: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        order_desc: bool = True
+    ) -> Tuple[List[IntelligenceQuery], Optional[str], int]:
+        """List user queries with keyset pagination on (created_at, id).
+        
+        Returns the page, a cursor for the next page (None on the last page)
+        and the cached total for the filters.
+        """
+        after = None
+        if cursor:
+            created_at, record_id = decode_cursor(cursor)
+            after = (created_at, UUID(record_id))
+        
+        try:
+            statement = apply_keyset(
+                self._user_queries_statement(user_id, status_filter, query_type_filter),
+                IntelligenceQuery.created_at, IntelligenceQuery.id,
+                after, limit, descending=order_desc
+            )
+            result = await self.db.execute(statement)
+            queries = list(result.scalars().all())
+            
+            next_cursor = None
+            if len(queries) > limit:
+                queries = queries[:limit]
+                next_cursor = encode_cursor(queries[-1].created_at, queries[-1].id)
+            
+            total_count = await self._count_user_queries(user_id, status_filter, query_type_filter)
+            return queries, next_cursor, total_count
+            
+        except Exception as e:
+            self.logger.exception(f"💥 Error listing queries for user {user_id}: {e}")
+            return [], None, 0
+    
+    def _user_queries_statement(
+        self,
+        user_id: UUID,
+        status_filter: Optional[str],
+        query_type_filter: Optional[str]
+    ):
+        """Base select for a user's queries; matches the composite indexes"""
+        conditions = [IntelligenceQuery.user_id == user_id, ~IntelligenceQuery.is_deleted]
+        if status_filter:
+            conditions.append(IntelligenceQuery.status == status_filter)
+        if query_type_filter:
+            conditions.append(IntelligenceQuery.query_type == query_type_filter)
+        return select(IntelligenceQuery).where(and_(*conditions))
+    
+    async def _count_user_queries(
+        self,
+        user_id: UUID,
+        status_filter: Optional[str] = None,
+        query_type_filter: Optional[str] = None
+    ) -> int:
+        """Count a user's queries from the cached counters, loading them on a miss"""
+        counts = query_counters.get(user_id)
+        if counts is None:
+            result = await self.db.execute(
+                select(IntelligenceQuery.status, IntelligenceQuery.query_type, func.count())
+                .where(and_(IntelligenceQuery.user_id == user_id, ~IntelligenceQuery.is_deleted))
+                .group_by(IntelligenceQuery.status, IntelligenceQuery.query_type)
+            )
+            counts = query_counters.load(user_id, [tuple(row) for row in result.all()])
+        return query_counters.total(counts, status_filter, query_type_filter)
+    
     async def cancel_query(self, query_id: UUID, user_id: UUID) -> bool:
         """Cancel a query if it's still running"""
         try:
@@ -233,6 +298,7 @@ class EnterpriseQueryService:
                 return False
             
             # Update query status
+            previous_status = query.status
             query.status = QueryStatus.CANCELLED.value
             query.completed_at = datetime.now(timezone.utc)
             
@@ -240,6 +306,7 @@ class EnterpriseQueryService:
             await self.orchestrator.cancel_scan(f"query_{query_id}")
             
             await self.db.commit()
+            query_counters.record_transition(user_id, query.query_type, previous_status, query.status)
             
             # Log audit event
             await self._log_audit_event(
@@ -326,9 +393,12 @@ class EnterpriseQueryService:
                 self.logger.error(f"Query {query_id} not found for processing")
                 return
             
-            # Mark as started
+            # Mark as started so pollers see the query running
+            previous_status = query.status
             query.mark_started()
             await self.db.commit()
+            query_counters.record_transition(query.user_id, query.query_type, previous_status, query.status)
+            previous_status = query.status
             
             self.logger.info(f"🚀 Processing query {query_id}: {query.query_type} - {query.target}")
             
@@ -338,47 +408,66 @@ class EnterpriseQueryService:
             if query.scan_categories:
                 categories = [ScannerCategory(cat) for cat in query.scan_categories]
             
-            # Execute scanners
-            scan_results = await self.orchestrator.execute_scan_batch(
+            # Execute scanners as a staged plan within the user's plan and credits
+            user = await self._get_user_by_id(query.user_id)
+            sufficiency = SufficiencyEvaluator.for_query(
+                query.query_type, (query.metadata or {}).get("confidence_targets")
+            )
+            scan_results, plan = await self.orchestrator.execute_planned_scan(
                 target=query.target,
+                user_plan=user.plan_type if user else "free",
+                budget=user.credits_balance if user else query.estimated_cost,
                 scanner_names=scanner_names,
-                categories=categories
+                categories=categories,
+                sufficiency=sufficiency
             )
+            query.metadata = {
+                **(query.metadata or {}),
+                "execution_plan": plan.to_dict(),
+                "sufficiency": sufficiency.report() if sufficiency else None
+            }
             
-            # Save scan results
+            # Save scan results with one bulk insert in the same transaction
+            # as the query status update
             total_scanners = len(scan_results)
             completed_scanners = 0
             failed_scanners = 0
             
-            for scanner_name, result in scan_results.items():
-                scan_result = ScanResult(
-                    query_id=query_id,
-                    scanner_name=scanner_name,
-                    scanner_category=result.metadata.get('category', 'unknown'),
-                    status=result.status.value,
-                    data=result.data,
-                    error_message=result.error,
-                    execution_time_seconds=result.execution_time,
-                    confidence_score=result.metadata.get('confidence_score'),
-                    started_at=result.timestamp,
-                    completed_at=result.timestamp
-                )
+            result_rows = [
+                {
+                    "id": uuid4(),
+                    "query_id": query_id,
+                    "scanner_name": scanner_name,
+                    "scanner_category": result.metadata.get('category', 'unknown'),
+                    "status": result.status.value,
+                    "data": result.data,
+                    "error_message": result.error,
+                    "execution_time_seconds": result.execution_time,
+                    "confidence_score": result.metadata.get('confidence_score'),
+                    "started_at": result.timestamp,
+                    "completed_at": result.timestamp
+                }
+                for scanner_name, result in scan_results.items()
+            ]
+            
+            async with ScanResultWriter(self.db) as writer:
+                writer.stage_rows(ScanResult, result_rows)
                 
-                self.db.add(scan_result)
+                for result in scan_results.values():
+                    if result.is_successful():
+                        completed_scanners += 1
+                    else:
+                        failed_scanners += 1
                 
-                if result.is_successful():
-                    completed_scanners += 1
-                else:
-                    failed_scanners += 1
+                # Update query with results
+                query.total_scanners = total_scanners
+                query.completed_scanners = completed_scanners
+                query.failed_scanners = failed_scanners
+                query.success_rate = (completed_scanners / total_scanners * 100) if total_scanners > 0 else 0
+                query.mark_completed(success=completed_scanners > 0)
             
-            # Update query with results
-            query.total_scanners = total_scanners
-            query.completed_scanners = completed_scanners
-            query.failed_scanners = failed_scanners
-            query.success_rate = (completed_scanners / total_scanners * 100) if total_scanners > 0 else 0
-            query.mark_completed(success=completed_scanners > 0)
-            
-            await self.db.commit()
+            query_counters.record_transition(query.user_id, query.query_type, previous_status, query.status)
+            self._index_scan_results(result_rows)
             
             # Cache results if needed
             if self.cache:
@@ -394,13 +483,27 @@ class EnterpriseQueryService:
             try:
                 query = await self.get_query(query_id)
                 if query:
+                    previous_status = query.status
                     query.status = QueryStatus.FAILED.value
                     query.error_message = str(e)
                     query.completed_at = datetime.now(timezone.utc)
                     await self.db.commit()
+                    query_counters.record_transition(
+                        query.user_id, query.query_type, previous_status, query.status
+                    )
             except Exception as commit_error:
                 self.logger.exception(f"💥 Error updating failed query status: {commit_error}")
     
+    def _index_scan_results(self, rows: List[Dict[str, Any]]):
+        """Queue committed scan results for full-text search"""
+        try:
+            get_search_indexer().enqueue_documents(
+                make_document("scan_result", row["id"], row["query_id"], row["scanner_name"], row["data"])
+                for row in rows
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Search indexing skipped for query results: {e}")
+    
     async def _get_user_by_id(self, user_id: UUID) -> Optional[User]:
         """Get user by ID"""
         result = await self.db.execute(
@@ -412,7 +515,9 @@ class EnterpriseQueryService:
         self,
         query_type: str,
         scanner_names: Optional[List[str]],
-        categories: Optional[List[ScannerCategory]]
+        categories: Optional[List[ScannerCategory]],
+        user_plan: str = "free",
+        budget: Optional[int] = None
     ) -> int:
         """Calculate estimated query cost in credits"""
         
@@ -428,14 +533,11 @@ class EnterpriseQueryService:
         
         base_cost = base_costs.get(query_type, 3)
         
-        # If specific scanners are requested, calculate based on their costs
-        if scanner_names:
-            total_cost = 0
-            for scanner_name in scanner_names:
-                scanner = scanner_registry.get_scanner(scanner_name)
-                if scanner:
-                    total_cost += scanner.config.cost_credits
-            return max(total_cost, base_cost)
+        # Price the scanners the execution planner would actually run; the plan
+        # is already capped at the budget, later stages may still be skipped
+        plan = await self.orchestrator.plan_scan(user_plan, budget, scanner_names, categories)
+        if plan.stages:
+            return max(plan.estimated_cost, base_cost)
         
         # If categories are specified, estimate based on category
         if categories:
@@ -0,0 +1,285 @@
+"""
+Query Pagination
+================
+
+Keyset pagination and cached per-user counters for query listings:
+- Opaque cursors over (created_at, id) instead of OFFSET scans
+- Per-user counts by (status, query_type), maintained at submit and
+  completion time and refreshed from the database on a TTL
+- Benchmark against a seeded SQLite database
+"""
+
+import base64
+import json
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, tuple_
+
+from ..core.advanced_caching import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CountKey = Tuple[str, str]
+
+
+def encode_cursor(created_at: datetime, record_id: Any) -> str:
+    """Encode the sort key of the last row on a page"""
+    payload = json.dumps([created_at.isoformat(), str(record_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), record_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+
+def apply_keyset(statement, created_column, id_column, after: Optional[Tuple[datetime, Any]],
+                 limit: int, descending: bool = True, row_values: bool = True):
+    """Order ``statement`` by (created_at, id) and seek past ``after``.
+
+    Uses a row-value comparison so the (…, created_at, id) composite index
+    serves both the filter and the ordering; ``row_values=False`` expands it
+    for backends without row-value support.
+    """
+    if after is not None:
+        created_at, record_id = after
+        if row_values:
+            key = tuple_(created_column, id_column)
+            bound = tuple_(created_at, record_id)
+            statement = statement.where(key < bound if descending else key > bound)
+        elif descending:
+            statement = statement.where(or_(
+                created_column < created_at,
+                and_(created_column == created_at, id_column < record_id)
+            ))
+        else:
+            statement = statement.where(or_(
+                created_column > created_at,
+                and_(created_column == created_at, id_column > record_id)
+            ))
+
+    if descending:
+        statement = statement.order_by(created_column.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(created_column.asc(), id_column.asc())
+
+    # Fetch one extra row to know whether another page exists
+    return statement.limit(limit + 1)
+
+
+class UserQueryCounters:
+    """Per-user query counts keyed by (status, query_type).
+
+    Counts are adjusted in place when queries are submitted or change status,
+    so listings never run ``count(*)``. Entries expire after ``ttl_seconds``
+    and are reloaded with one grouped count, which bounds drift from writes
+    made by other workers.
+    """
+
+    def __init__(self, ttl_seconds: int = 300, max_users: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(max_size=max_users)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: Any) -> Optional[Dict[CountKey, int]]:
+        counts = self._cache.get(str(user_id))
+        if counts is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return counts
+
+    def load(self, user_id: Any, rows: List[Tuple[str, str, int]]) -> Dict[CountKey, int]:
+        """Store counts from ``(status, query_type, count)`` rows"""
+        counts = {(status, query_type): int(count) for status, query_type, count in rows}
+        self._cache.set(str(user_id), counts, ttl=self.ttl_seconds)
+        return counts
+
+    def record_submitted(self, user_id: Any, query_type: str, status: str):
+        counts = self._cache.get(str(user_id))
+        if counts is not None:
+            key = (status, query_type)
+            counts[key] = counts.get(key, 0) + 1
+
+    def record_transition(self, user_id: Any, query_type: str, old_status: str, new_status: str):
+        counts = self._cache.get(str(user_id))
+        if counts is None or old_status == new_status:
+            return
+        old_key = (old_status, query_type)
+        if counts.get(old_key, 0) > 0:
+            counts[old_key] -= 1
+        new_key = (new_status, query_type)
+        counts[new_key] = counts.get(new_key, 0) + 1
+
+    def invalidate(self, user_id: Any):
+        self._cache.delete(str(user_id))
+
+    @staticmethod
+    def total(counts: Dict[CountKey, int], status: Optional[str] = None,
+              query_type: Optional[str] = None) -> int:
+        return sum(
+            count for (row_status, row_type), count in counts.items()
+            if (status is None or row_status == status) and
+               (query_type is None or row_type == query_type)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared across service instances (one service is created per request)
+query_counters = UserQueryCounters()
+
+
+# Benchmark
+
+_BENCHMARK_SCHEMA = """
+CREATE TABLE intelligence_queries (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    query_type VARCHAR(50) NOT NULL,
+    target VARCHAR(500) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    is_deleted BOOLEAN NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX idx_query_user_created ON intelligence_queries (user_id, is_deleted, created_at, id);
+CREATE INDEX idx_query_user_status_created ON intelligence_queries (user_id, is_deleted, status, created_at, id);
+CREATE INDEX idx_query_user_type_created ON intelligence_queries (user_id, is_deleted, query_type, created_at, id);
+"""
+
+
+def seed_benchmark_db(path: str, total_queries: int = 1_000_000, heavy_user_queries: int = 50_000,
+                      users: int = 1000, seed: int = 7):
+    """Create a SQLite database with ``total_queries`` rows; user 1 is a heavy user"""
+    rng = random.Random(seed)
+    statuses = ["completed"] * 8 + ["failed", "cancelled"]
+    query_types = ["email", "phone", "name", "username", "domain", "ip"]
+    start = datetime(2023, 1, 1)
+
+    connection = sqlite3.connect(path)
+    connection.executescript(_BENCHMARK_SCHEMA.split("CREATE INDEX")[0])
+
+    def rows():
+        for i in range(1, total_queries + 1):
+            user_id = 1 if i <= heavy_user_queries else rng.randint(2, users)
+            created_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+            yield (
+                i, user_id, rng.choice(query_types), f"target-{i}", rng.choice(statuses),
+                rng.random() < 0.02, created_at.isoformat(" ", "microseconds")
+            )
+
+    connection.executemany("INSERT INTO intelligence_queries VALUES (?, ?, ?, ?, ?, ?, ?)", rows())
+    for statement in _BENCHMARK_SCHEMA.split(";"):
+        if "CREATE INDEX" in statement:
+            connection.execute(statement)
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+
+
+def benchmark_pagination(total_queries: int = 1_000_000, page_size: int = 20,
+                         depths: Tuple[int, ...] = (0, 100, 1000, 2400), path: Optional[str] = None,
+                         repeat: int = 5) -> List[Dict[str, Any]]:
+    """Compare OFFSET + count(*) against keyset pages for a heavy user"""
+    from sqlalchemy import create_engine, MetaData, Table, select, func
+
+    cleanup = path is None
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "pagination_benchmark.db")
+    if not os.path.exists(path):
+        seed_started = time.perf_counter()
+        seed_benchmark_db(path, total_queries)
+        logger.info(f"Seeded {total_queries} queries in {time.perf_counter() - seed_started:.1f}s")
+
+    engine = create_engine(f"sqlite:///{path}")
+    table = Table("intelligence_queries", MetaData(), autoload_with=engine)
+    base = select(table).where(and_(table.c.user_id == 1, table.c.is_deleted == False))  # noqa: E712
+    counters = UserQueryCounters()
+    results = []
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            value = fn()
+            best = min(best, time.perf_counter() - started)
+        return best, value
+
+    with engine.connect() as connection:
+        # Walk the keyset pages once to collect a cursor at every depth
+        cursors = {0: None}
+        after = None
+        for page in range(1, max(depths) + 1):
+            rows = connection.execute(apply_keyset(base, table.c.created_at, table.c.id, after, page_size)).all()
+            if len(rows) <= page_size:
+                break
+            last = rows[page_size - 1]
+            after = (last.created_at, last.id)
+            cursors[page] = after
+
+        count_rows = connection.execute(
+            select(table.c.status, table.c.query_type, func.count())
+            .where(and_(table.c.user_id == 1, table.c.is_deleted == False))  # noqa: E712
+            .group_by(table.c.status, table.c.query_type)
+        ).all()
+        counters.load(1, [tuple(row) for row in count_rows])
+
+        for depth in depths:
+            if depth not in cursors:
+                continue
+
+            def offset_page():
+                total = connection.execute(select(func.count()).select_from(base.subquery())).scalar()
+                rows = connection.execute(
+                    base.order_by(table.c.created_at.desc(), table.c.id.desc())
+                    .limit(page_size).offset(depth * page_size)
+                ).all()
+                return total, rows
+
+            def keyset_page():
+                total = counters.total(counters.get(1))
+                rows = connection.execute(
+                    apply_keyset(base, table.c.created_at, table.c.id, cursors[depth], page_size)
+                ).all()[:page_size]
+                return total, rows
+
+            offset_seconds, (offset_total, offset_rows) = timed(offset_page)
+            keyset_seconds, (keyset_total, keyset_rows) = timed(keyset_page)
+            results.append({
+                "page": depth,
+                "offset_ms": round(offset_seconds * 1000, 3),
+                "keyset_ms": round(keyset_seconds * 1000, 3),
+                "speedup": round(offset_seconds / keyset_seconds, 1) if keyset_seconds else None,
+                "totals_match": offset_total == keyset_total,
+                "rows_match": [r.id for r in offset_rows] == [r.id for r in keyset_rows],
+            })
+
+    engine.dispose()
+    if cleanup:
+        os.remove(path)
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for result in benchmark_pagination():
+        print(json.dumps(result))
@@ -0,0 +1,167 @@
+"""
+Test suite for the partitioned analytics event store.
+Tests window aggregates against brute-force scans, spilling and HyperLogLog estimates.
+"""
+
+import pytest
+import random
+import subprocess
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+np = pytest.importorskip("numpy")
+
+from app.services.analytics_event_store import PartitionedEventStore, HyperLogLog, to_epoch
+from app.services.enterprise_analytics_service import (
+    EnterpriseAnalyticsService, AnalyticsEvent, AnalyticsTimeframe
+)
+
+
+def _events(count, now, seed=3):
+    rng = random.Random(seed)
+    event_types = ["query_submitted", "scan_completed", "api_request", "error"]
+    events = []
+    for i in range(count):
+        event_type = rng.choice(event_types)
+        properties = {"response_time": rng.uniform(0.01, 2.0)} if event_type == "api_request" else {}
+        if event_type == "scan_completed":
+            properties = {
+                "scanner_type": rng.choice(["dns", "whois", "ssl"]),
+                "status": rng.choice(["completed", "failed"]),
+            }
+        events.append(AnalyticsEvent(
+            event_id=str(i),
+            user_id=f"user_{rng.randrange(50)}",
+            session_id=f"session_{rng.randrange(200)}",
+            event_type=event_type,
+            event_name=event_type,
+            timestamp=now - timedelta(seconds=rng.randrange(10 * 24 * 3600)),
+            properties=properties,
+        ))
+    return events
+
+
+class TestPartitionedEventStore:
+    """Test suite for window aggregation"""
+
+    def test_aggregate_matches_brute_force(self, tmp_path):
+        """Test counts match a full scan, including the partially covered partition"""
+        now = datetime(2024, 6, 1, 12, 30)
+        events = _events(3000, now)
+        store = PartitionedEventStore(hot_partitions=4, spill_dir=str(tmp_path))
+        for event in events:
+            store.append(event)
+
+        for since in (now - timedelta(minutes=45), now - timedelta(days=1, minutes=7), None):
+            selected = [e for e in events if since is None or e.timestamp >= since]
+            window = store.aggregate(since)
+
+            assert window.total_events == len(selected) == store.count_events(since)
+            for event_type in ("query_submitted", "error"):
+                code = store.lookup("event_type", event_type)
+                assert window.type_counts.get(code, 0) == sum(e.event_type == event_type for e in selected)
+
+            scans = [e for e in selected if e.event_type == "scan_completed"]
+            for code, stats in window.scanner_stats.items():
+                name = store.decode("scanner", code)
+                mine = [e for e in scans if e.properties["scanner_type"] == name]
+                assert stats[0] == len(mine)
+                assert stats[1] == sum(e.properties["status"] == "completed" for e in mine)
+
+    def test_cold_partitions_spill_and_reload(self, tmp_path):
+        """Test partitions outside the hot window are written to disk and still queried"""
+        now = datetime(2024, 6, 1, 12, 30)
+        events = sorted(_events(2000, now), key=lambda e: e.timestamp)
+        store = PartitionedEventStore(hot_partitions=2, spill_dir=str(tmp_path))
+        for event in events:
+            store.append(event)
+
+        stats = store.get_stats()
+        assert stats["spilled_partitions"] > 0
+        assert len(os.listdir(tmp_path)) == stats["spilled_partitions"]
+
+        user_id = events[0].user_id
+        expected = sorted(to_epoch(e.timestamp) for e in events if e.user_id == user_id)
+        assert sorted(store.user_events(user_id)["timestamp"].tolist()) == expected
+
+    def test_spills_from_exited_processes_are_removed(self, tmp_path):
+        """Test a new store deletes spill files whose process is gone and keeps live ones"""
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        names = [f"events_{exited.pid}_7f00_1717200000.npz", f"events_{os.getppid()}_7f00_1717200000.npz",
+                 f"events_{os.getpid()}_7f00_1717200000.npz", "notes.txt"]
+        for name in names:
+            (tmp_path / name).write_bytes(b"")
+        PartitionedEventStore(spill_dir=str(tmp_path))
+        assert sorted(os.listdir(tmp_path)) == sorted(names[1:])
+
+    def test_retention_drops_old_partitions(self, tmp_path):
+        """Test partitions older than the retention window are discarded"""
+        now = datetime(2024, 6, 1)
+        store = PartitionedEventStore(retention_days=1, spill_dir=str(tmp_path))
+        for event in _events(500, now):
+            store.append(event)
+        assert store.count_events() < 500
+        assert store.count_events() == store.count_events(now - timedelta(days=1, hours=1))
+
+
+    def test_user_ids_do_not_grow_encodings(self, tmp_path):
+        """Test distinct users and sessions add no dictionary entries"""
+        now = datetime(2024, 6, 1, 12, 30)
+        store = PartitionedEventStore(hot_partitions=1, spill_dir=str(tmp_path))
+        events = _events(200, now)
+        for i, event in enumerate(events):
+            event.user_id = f"visitor_{i}"
+            event.session_id = f"session_{i}"
+            store.append(event)
+
+        assert sum(len(names) for names in store._names.values()) <= 10
+        assert abs(store.get_stats()["distinct_users"] - 200) <= 5
+        assert len(store.user_events("visitor_7")["timestamp"]) == 1
+        assert len(store.user_events("nobody")["timestamp"]) == 0
+
+class TestHyperLogLog:
+    """Test suite for distinct counting"""
+
+    def test_estimate_error(self):
+        """Test estimates stay within a few percent across cardinalities"""
+        for cardinality in (10, 1000, 100000):
+            hll = HyperLogLog()
+            hll.add_ids(np.arange(cardinality, dtype=np.int64))
+            assert abs(hll.count() - cardinality) <= max(1, 0.05 * cardinality)
+
+    def test_scalar_and_vectorized_agree(self):
+        """Test add_id and add_ids produce identical registers"""
+        scalar, vectorized = HyperLogLog(), HyperLogLog()
+        for value in range(5000):
+            scalar.add_id(value)
+        vectorized.add_ids(np.arange(5000, dtype=np.int64))
+        assert np.array_equal(scalar.registers, vectorized.registers)
+
+
+class TestAnalyticsServiceIntegration:
+    """Test suite for the service on top of the store"""
+
+    @pytest.mark.asyncio
+    async def test_platform_metrics(self, tmp_path):
+        """Test platform metrics are computed from window aggregates"""
+        service = EnterpriseAnalyticsService(spill_dir=str(tmp_path))
+        now = datetime.utcnow()
+        events = _events(1000, now)
+        for event in events:
+            await service.track_event(event)
+
+        metrics = await service.get_platform_metrics(AnalyticsTimeframe.WEEK)
+        week = [e for e in events if e.timestamp >= now - timedelta(days=7)]
+        assert metrics.total_queries == sum(e.event_type == "query_submitted" for e in week)
+        assert metrics.total_scans == sum(e.event_type == "scan_completed" for e in week)
+        assert metrics.active_users_24h <= metrics.active_users_7d
+        assert abs(metrics.active_users_7d - len({e.user_id for e in week})) <= 2
+
+        dashboard = await service.get_real_time_dashboard_data()
+        assert dashboard["events_last_hour"] == \
+            sum(e.timestamp >= now - timedelta(hours=1) for e in events)
@@ -0,0 +1,110 @@
+"""
+Test suite for the benchmark suite.
+Tests deterministic data generation, baseline comparison and smoke runs
+of the registered cases at their quick sizes.
+"""
+
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.benchmarks import datagen, suites  # noqa: F401  (registers the cases)
+from app.benchmarks.harness import (
+    BenchmarkCase, BenchmarkResult, compare, get_cases, load_baseline, regressions, run_case, save_baseline
+)
+
+
+def _result(name, median, size=100):
+    return BenchmarkResult(name=name, group="test", size=size, repeats=3, median=median, mean=median,
+                           minimum=median, maximum=median, stdev=0.0)
+
+
+class TestDataGeneration:
+    """Test suite for synthetic benchmark data"""
+
+    def test_same_seed_same_data(self):
+        """Test generators are deterministic per seed"""
+        assert datagen.make_scan_results(50, seed=7) == datagen.make_scan_results(50, seed=7)
+        assert datagen.make_entities(50, seed=7) == datagen.make_entities(50, seed=7)
+        assert datagen.make_events(50, seed=7) == datagen.make_events(50, seed=7)
+        assert datagen.make_scan_results(50, seed=7) != datagen.make_scan_results(50, seed=8)
+
+    def test_scan_results_repeat_people(self):
+        """Test the same person is reported by several scan results"""
+        results = datagen.make_scan_results(90, seed=1)
+        names = [r["result"]["name"].lower() for r in results if "name" in r["result"]]
+        assert len(set(names)) < len(names)
+        assert all(set(r) == {"scanner", "confidence", "timestamp", "result"} for r in results)
+
+
+class TestBaselineComparison:
+    """Test suite for regression gating"""
+
+    def test_statuses(self):
+        """Test regressions, improvements, new cases and size changes are told apart"""
+        baseline = {"results": {
+            "slow": {"size": 100, "minimum": 1.0},
+            "fast": {"size": 100, "minimum": 1.0},
+            "same": {"size": 100, "minimum": 1.0},
+            "resized": {"size": 50, "minimum": 1.0},
+        }}
+        results = [_result("slow", 1.3), _result("fast", 0.5), _result("same", 1.1),
+                   _result("resized", 1.0), _result("added", 1.0)]
+        statuses = {c.name: c.status for c in compare(results, baseline, threshold=0.2)}
+        assert statuses == {"slow": "regression", "fast": "improvement", "same": "ok",
+                            "resized": "size_changed", "added": "new"}
+        assert [c.name for c in regressions(compare(results, baseline, threshold=0.5))] == []
+
+    def test_per_case_threshold(self):
+        """Test a case's own threshold overrides the global one"""
+        assert get_cases(["orchestrator.async_scan"])[0].threshold == 0.5
+        baseline = {"results": {"orchestrator.async_scan": {"size": 100, "minimum": 1.0}}}
+        comparison = compare([_result("orchestrator.async_scan", 1.4)], baseline, threshold=0.2)[0]
+        assert comparison.status == "ok"
+
+    def test_baseline_round_trip_merges(self, tmp_path):
+        """Test saving keeps cases from earlier runs and loading checks the version"""
+        path = str(tmp_path / "bench" / "baseline.json")
+        save_baseline([_result("a", 1.0)], path)
+        save_baseline([_result("b", 2.0)], path)
+        baseline = load_baseline(path)
+        assert set(baseline["results"]) == {"a", "b"}
+        assert baseline["results"]["b"]["median"] == 2.0
+
+        with open(path, "w") as f:
+            json.dump({"version": 99, "results": {}}, f)
+        with pytest.raises(ValueError):
+            load_baseline(path)
+
+
+@pytest.mark.performance
+class TestSmokeRuns:
+    """Quick runs of registered cases"""
+
+    def test_prepare_runs_outside_timing_per_iteration(self):
+        """Test prepare builds fresh arguments for every timed call"""
+        prepared, seen = [], []
+        case = BenchmarkCase(
+            name="probe", group="test", setup=lambda size, seed: size, run=seen.append,
+            size=10, quick_size=2, prepare=lambda state: prepared.append(state) or len(prepared),
+            repeats=3, warmup=1,
+        )
+        result = run_case(case, quick=True, min_sample_seconds=0)
+        assert result.size == 2 and result.repeats == 3
+        assert seen == list(range(1, len(prepared) + 1))
+
+    @pytest.mark.parametrize("name", ["aggregation.deduplicate_entities", "cache.lru_get_set",
+                                      "orchestrator.async_scan", "report.json"])
+    def test_case_runs(self, name, monkeypatch):
+        """Test a registered case runs at its quick size"""
+        monkeypatch.setenv("EMAIL_DELIVERABILITY_CHECKS", "false")
+        case = get_cases([name])[0]
+        if not case.available():
+            pytest.skip(f"missing {case.requires}")
+        result = run_case(case, quick=True, repeats=1, min_sample_seconds=0)
+        assert result.minimum > 0
+        assert result.size == case.quick_size
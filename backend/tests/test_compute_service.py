@@ -0,0 +1,99 @@
+"""
+Test suite for the shared compute service.
+Tests process and thread pool execution, per-stage metrics and the
+start/shutdown lifecycle.
+"""
+
+import os
+import threading
+import pytest
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.compute_service import ComputeService
+
+
+def square_sum(values):
+    return sum(value * value for value in values)
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+class TestComputeService:
+    """Test suite for the shared compute pools"""
+
+    @pytest.mark.asyncio
+    async def test_run_cpu_uses_worker_process(self):
+        """Test CPU stages run in a separate process and return their result"""
+        service = ComputeService(process_workers=1, thread_workers=1)
+        try:
+            await service.start()
+            assert await service.run_cpu("sum", square_sum, [1, 2, 3]) == 14
+            assert await service.run_cpu("pid", worker_pid) != os.getpid()
+        finally:
+            service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_run_io_uses_shared_threads(self):
+        """Test I/O stages run on the named thread pool"""
+        service = ComputeService(process_workers=1, thread_workers=2)
+        try:
+            assert (await service.run_io("io", current_thread_name)).startswith("compute-io")
+        finally:
+            service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stage_metrics(self):
+        """Test completed and failed calls are counted per stage"""
+        service = ComputeService(process_workers=1, thread_workers=1)
+        try:
+            await service.run_io("lookup", square_sum, [2])
+            with pytest.raises(ValueError):
+                await service.run_io("lookup", fail, "boom")
+            stats = service.get_stats()["stages"]["lookup"]
+            assert stats["submitted"] == 2
+            assert stats["completed"] == 1
+            assert stats["failed"] == 1
+            assert stats["queue_depth"] == 0
+        finally:
+            service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_shutdown_and_restart(self):
+        """Test pools are released on shutdown and recreated on next use"""
+        service = ComputeService(process_workers=1, thread_workers=1)
+        await service.run_io("io", square_sum, [1])
+        assert service.running
+        service.shutdown()
+        assert not service.running
+        assert await service.run_io("io", square_sum, [3]) == 9
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_threads_without_process_pool(self, monkeypatch):
+        """Test CPU stages run on the thread pool when worker processes cannot be created"""
+        import app.core.compute_service as compute_module
+
+        def unavailable(**kwargs):
+            raise FileNotFoundError("/dev/shm")
+
+        monkeypatch.setattr(compute_module, "ProcessPoolExecutor", unavailable)
+        service = ComputeService(process_workers=1, thread_workers=1)
+        try:
+            await service.start()
+            assert (await service.run_cpu("cpu", current_thread_name)).startswith("compute-io")
+            assert service.get_stats()["process_workers"] == 0
+        finally:
+            service.shutdown()
@@ -0,0 +1,190 @@
+"""
+Test suite for the global entity index.
+Tests bulk upserts, postings lookups and cross-investigation annotation on SQLite.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.models import Entity, EntityOccurrence, EntityRelationship
+from app.core.entity_index import EntityIndex
+from app.core.aggregation_engine import AggregationEngine, create_aggregation_engine
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _entity(entity_type, value, *sources):
+    return {
+        "type": entity_type,
+        "value": value,
+        "sources": [{"source": source, "confidence": 0.8} for source in sources],
+        "aggregate_confidence": 0.8,
+    }
+
+
+def _count(session_factory, model):
+    with session_factory() as session:
+        return session.execute(select(func.count()).select_from(model)).scalar()
+
+
+class TestEntityIndex:
+    """Test suite for entity upserts and lookups"""
+
+    def test_upsert_is_idempotent_per_query(self, session_factory):
+        """Test re-indexing the same query adds no entities or postings"""
+        index = EntityIndex(session_factory)
+        entities = [_entity("email", "a@example.com", "hunter"), _entity("name", "Jane  Doe", "whois")]
+
+        first = index.upsert_entities(entities, query_id=1)
+        second = index.upsert_entities(entities, query_id=1)
+
+        assert first == second
+        assert _count(session_factory, Entity) == 2
+        assert _count(session_factory, EntityOccurrence) == 2
+        assert all("entity_id" in entity for entity in entities)
+
+    def test_upsert_without_query_is_idempotent(self, session_factory):
+        """Test postings indexed outside a query are not duplicated"""
+        index = EntityIndex(session_factory)
+        entities = [_entity("email", "a@example.com", "hunter")]
+
+        index.upsert_entities(entities)
+        index.upsert_entities(entities)
+
+        assert _count(session_factory, EntityOccurrence) == 1
+
+    def test_postings_across_queries(self, session_factory):
+        """Test lookups return every query and source an entity was seen in"""
+        index = EntityIndex(session_factory)
+        index.upsert_entities([_entity("name", "Jane Doe", "whois")], query_id=1)
+        index.upsert_entities([_entity("name", "jane doe", "linkedin", "whois")], query_id=2)
+
+        # A fresh index has an empty hot set and must read the tables
+        seen = EntityIndex(session_factory).lookup("name", "JANE DOE")
+        assert seen["query_ids"] == [1, 2]
+        assert set(seen["sources"]) == {"whois", "linkedin"}
+        assert EntityIndex(session_factory).lookup("name", "John Doe") is None
+
+    def test_hot_set_tracks_new_postings(self, session_factory):
+        """Test cached postings stay current after later upserts"""
+        index = EntityIndex(session_factory)
+        index.upsert_entities([_entity("url", "Example.com/profile", "github")], query_id=1)
+        assert index.lookup("url", "https://example.com/profile")["query_ids"] == [1]
+
+        index.upsert_entities([_entity("url", "https://example.com/profile", "gitlab")], query_id=5)
+        hits_before = index.stats["hot_hits"]
+        assert index.lookup("url", "example.com/profile")["query_ids"] == [1, 5]
+        assert index.stats["hot_hits"] == hits_before + 1
+
+    def test_cluster_edges_are_deduplicated(self, session_factory):
+        """Test relationship clusters become unique star edges"""
+        index = EntityIndex(session_factory)
+        members = [_entity("name", "Jane Doe", "a"), _entity("email", "jane@example.com", "a"),
+                   _entity("phone", "555-0100", "a")]
+        cluster = {"entities": members, "relationship_type": "person_contact", "confidence": 0.9}
+
+        index.upsert_entities(members, query_id=1, relationships=[cluster])
+        index.upsert_entities(members, query_id=2, relationships=[cluster])
+
+        assert _count(session_factory, EntityRelationship) == 2
+        related = index.related_entities(members[0]["entity_id"])
+        assert {item["value"] for item in related} == {"jane@example.com", "555-0100"}
+
+
+class TestAggregationIntegration:
+    """Test suite for aggregation with an entity index"""
+
+    @pytest.mark.asyncio
+    async def test_second_investigation_sees_first(self, session_factory):
+        """Test entities from an earlier query are annotated and persisted"""
+        engine = AggregationEngine(entity_index=EntityIndex(session_factory))
+        scan = [{"scanner": "whois", "confidence": 0.7, "result": {"name": "Jane Doe", "url": "janedoe.com"}}]
+
+        first = await engine.aggregate_scan_results(scan, query_id=1)
+        assert first["aggregation_metadata"]["previously_seen_entities"] == 0
+
+        second = await engine.aggregate_scan_results(scan, query_id=2)
+        assert second["aggregation_metadata"]["previously_seen_entities"] == 2
+        assert all(entity["prior_query_ids"] == [1] for entity in second["entities"])
+        assert _count(session_factory, EntityOccurrence) == 4
+
+    def test_factory_attaches_entity_index(self, session_factory, monkeypatch):
+        """Test the engine factory wires in the process-wide entity index"""
+        import app.core.entity_index as entity_index_module
+        index = EntityIndex(session_factory)
+        monkeypatch.setattr(entity_index_module, "_entity_index", index)
+        assert create_aggregation_engine().entity_index is index
+
+    @pytest.mark.asyncio
+    async def test_index_errors_do_not_fail_aggregation(self, session_factory):
+        """Test a failing entity index is logged and the in-memory results are kept"""
+        class BrokenIndex:
+            def annotate_prior_sightings(self, entities):
+                raise RuntimeError("database is locked")
+
+            def upsert_entities(self, *args):
+                raise RuntimeError("database is locked")
+
+        engine = AggregationEngine(entity_index=BrokenIndex())
+        scan = [{"scanner": "whois", "confidence": 0.7, "result": {"name": "Jane Doe"}}]
+        result = await engine.aggregate_scan_results(scan, query_id=1)
+        assert result["aggregation_metadata"]["previously_seen_entities"] == 0
+        assert result["entities"]
+
+
+def test_upgrade_schema_migrates_legacy_entity_tables():
+    """Test entity tables created before the entity index gain its columns and unique indexes"""
+    from sqlalchemy import inspect, text
+    from app.db.database import upgrade_schema
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE entities (id INTEGER PRIMARY KEY, entity_type VARCHAR(50) NOT NULL, "
+            "name VARCHAR(200) NOT NULL, description TEXT, entity_metadata JSON, confidence_score FLOAT, "
+            "created_at DATETIME)"
+        ))
+        connection.execute(text(
+            "CREATE TABLE entity_relationships (id INTEGER PRIMARY KEY, source_entity_id INTEGER NOT NULL, "
+            "target_entity_id INTEGER NOT NULL, relationship_type VARCHAR(50) NOT NULL, confidence_score FLOAT, "
+            "relationship_metadata JSON, created_at DATETIME)"
+        ))
+        connection.execute(text(
+            "INSERT INTO entities (id, entity_type, name, created_at) VALUES "
+            "(1, 'name', 'Jane Doe', '2024-01-01'), (2, 'name', 'jane  doe', '2024-01-02')"
+        ))
+        connection.execute(text(
+            "INSERT INTO entity_relationships (source_entity_id, target_entity_id, relationship_type) "
+            "VALUES (1, 2, 'alias'), (1, 2, 'alias')"
+        ))
+    Base.metadata.create_all(engine)
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    assert {"normalized_value", "first_seen", "last_seen"} <= {c["name"] for c in inspector.get_columns("entities")}
+    assert "uq_entity_type_value" in {index["name"] for index in inspector.get_indexes("entities")}
+    session_factory = sessionmaker(bind=engine)
+    assert _count(session_factory, EntityRelationship) == 1
+
+    ids = EntityIndex(session_factory).upsert_entities([_entity("name", "JANE DOE", "whois")], query_id=1)
+    assert ids == {("name", "jane doe"): 1}
+    assert _count(session_factory, Entity) == 2
+    engine.dispose()
@@ -0,0 +1,148 @@
+"""
+Test suite for error tracking.
+Tests fingerprint grouping, bounded samples, group-based statistics and
+the batching async log sink.
+"""
+
+import json
+import logging
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.error_tracking import ErrorCategory, ErrorSeverity, ErrorTracker, message_template
+from app.core.log_sink import AsyncLogSink, SinkHandler
+
+
+@pytest.fixture
+def sink():
+    sink = AsyncLogSink(batch_size=64, linger=0.01)
+    yield sink
+    sink.close()
+
+
+@pytest.fixture
+def tracker(tmp_path, sink):
+    return ErrorTracker(log_dir=str(tmp_path), samples_per_group=3, sink=sink, configure_logging=False)
+
+
+def _upstream_call(attempt):
+    raise ConnectionError(f"upstream 10.0.0.{attempt % 250} timed out after {attempt} ms")
+
+
+def _other_call():
+    raise ConnectionError("upstream 10.0.0.1 timed out after 5 ms")
+
+
+def _track(tracker, func, *args, **kwargs):
+    try:
+        func(*args)
+    except Exception as e:
+        return tracker.track_error(e, **kwargs)
+
+
+class TestFingerprintGrouping:
+    """Test suite for grouping repeated errors"""
+
+    def test_repeats_share_a_group(self, tracker):
+        """Test errors differing only in numbers and addresses land in one group"""
+        for attempt in range(200):
+            _track(tracker, _upstream_call, attempt, category=ErrorCategory.NETWORK)
+
+        groups = tracker.get_error_groups(samples=True)
+        assert len(groups) == 1
+        group = groups[0]
+        assert group["count"] == 200
+        assert group["message_template"] == "upstream <ip> timed out after <num> ms"
+        assert group["stack"][-1].endswith(":_upstream_call")
+        assert len(group["samples"]) == 3
+        assert all("ConnectionError" in sample["traceback"] for sample in group["samples"])
+        # Only samples pay for a formatted traceback
+        assert tracker.errors[-1].traceback == ""
+        assert tracker.errors[-1].fingerprint == group["fingerprint"]
+
+    def test_call_site_and_category_split_groups(self, tracker):
+        """Test the same message from another function or category is its own group"""
+        _track(tracker, _upstream_call, 5)
+        _track(tracker, _other_call)
+        _track(tracker, _upstream_call, 5, category=ErrorCategory.DATABASE)
+        tracker.track_error("plain message 42")
+        tracker.track_error("plain message 43")
+        assert len(tracker.groups) == 4
+
+    def test_group_limit_evicts_least_recent(self, tmp_path, sink):
+        """Test the number of groups stays bounded"""
+        tracker = ErrorTracker(log_dir=str(tmp_path), max_groups=2, sink=sink, configure_logging=False)
+        for message in ("alpha", "beta", "alpha", "gamma"):
+            tracker.track_error(RuntimeError(message))
+        assert [g.message_template for g in tracker.groups.values()] == ["alpha", "gamma"]
+        assert tracker.evicted_groups == 1
+
+    def test_message_template(self):
+        """Test ids, emails and quoted values are masked"""
+        assert message_template(
+            "user bob@example.com id 550e8400-e29b-41d4-a716-446655440000 missing key 'x'"
+        ) == "user <email> id <uuid> missing key <str>"
+
+
+class TestStatistics:
+    """Test suite for statistics from group counters"""
+
+    def test_statistics_come_from_groups(self, tracker):
+        """Test statistics do not depend on the bounded event buffer"""
+        for attempt in range(50):
+            _track(tracker, _upstream_call, attempt, severity=ErrorSeverity.HIGH, category=ErrorCategory.NETWORK)
+        for _ in range(5):
+            tracker.track_error(ValueError("bad input"), severity=ErrorSeverity.LOW, category=ErrorCategory.VALIDATION)
+        tracker.errors.clear()
+
+        stats = tracker.get_error_statistics(hours=1)
+        assert stats["total_errors"] == 55
+        assert stats["by_severity"] == {"high": 50, "low": 5}
+        assert stats["by_category"] == {"network": 50, "validation": 5}
+        assert stats["top_errors"][0] == ("ConnectionError", 50)
+        assert stats["distinct_groups"] == 2
+        assert stats["top_groups"][0]["count_in_period"] == 50
+        assert sum(point["count"] for point in stats["error_trend"]) == 55
+
+
+class TestAsyncLogSink:
+    """Test suite for the batching log writer"""
+
+    def test_lines_are_batched(self, tmp_path, sink):
+        """Test many lines are written in far fewer batches"""
+        path = tmp_path / "out.log"
+        for i in range(1000):
+            assert sink.submit(path, f"line {i}")
+        assert sink.flush()
+        lines = path.read_text().splitlines()
+        assert lines == [f"line {i}" for i in range(1000)]
+        assert sink.get_stats()["batches"] < 1000
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        """Test a burst beyond the queue size is counted as dropped"""
+        sink = AsyncLogSink(max_queue=5)
+        sink._thread = object()  # writer not running, so nothing drains
+        results = [sink.submit(tmp_path / "x.log", "line") for _ in range(8)]
+        assert results.count(False) == 3
+        assert sink.get_stats()["dropped"] == 3
+
+    def test_handler_and_critical_file(self, tmp_path, tracker, sink):
+        """Test log records and critical errors reach their files through the sink"""
+        logger = logging.getLogger("test_error_tracking.sink")
+        handler = SinkHandler(sink, tmp_path / "app.log", logging.INFO)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        try:
+            logger.warning("disk at %d%%", 91)
+        finally:
+            logger.removeHandler(handler)
+        tracker.track_error(RuntimeError("fatal"), severity=ErrorSeverity.CRITICAL)
+
+        assert sink.flush()
+        assert (tmp_path / "app.log").read_text() == "WARNING disk at 91%\n"
+        critical = json.loads((tmp_path / "critical_errors.log").read_text())
+        assert critical["message"] == "fatal" and critical["fingerprint"]
@@ -0,0 +1,173 @@
+"""
+Test suite for the scanner execution planner.
+Tests staged ordering, plan and budget limits, early stage skipping and
+persisted scanner statistics on SQLite.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.core.execution_planner import ExecutionPlanner, ScannerStatsStore, count_findings
+
+
+class StubScanner:
+    def __init__(self, name, cost_credits=1, findings=1):
+        self.name = name
+        self.cost_credits = cost_credits
+        self.findings = findings
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _names(stage):
+    return [planned.name for planned in stage]
+
+
+class TestExecutionPlanner:
+    """Test suite for plan construction"""
+
+    def test_cheap_high_yield_first(self, session_factory):
+        """Test stages follow cost tiers and higher-yield scanners lead each stage"""
+        store = ScannerStatsStore(session_factory)
+        for _ in range(20):
+            store.record("rich", True, 1.0, 5)
+            store.record("poor", True, 1.0, 0)
+        planner = ExecutionPlanner(store)
+
+        plan = planner.plan([StubScanner("paid", 5), StubScanner("poor"), StubScanner("mid", 2),
+                             StubScanner("rich")], "enterprise")
+        assert [_names(stage) for stage in plan.stages] == [["rich", "poor"], ["mid"], ["paid"]]
+        assert plan.estimated_cost == 9
+
+    def test_plan_and_budget_limits(self, session_factory):
+        """Test free plans cap stages and budgets drop scanners that do not fit"""
+        planner = ExecutionPlanner(ScannerStatsStore(session_factory))
+        scanners = [StubScanner("a"), StubScanner("b", 2), StubScanner("c", 3), StubScanner("d", 8)]
+
+        free = planner.plan(scanners, "free")
+        assert free.skipped == {"d": "plan_stage_limit"}
+
+        budgeted = planner.plan(scanners, "enterprise", budget=4)
+        assert budgeted.scanners == scanners[:2]
+        assert budgeted.skipped == {"c": "over_budget", "d": "over_budget"}
+
+    def test_unreliable_scanners_excluded(self, session_factory):
+        """Test scanners that keep failing are left out of plans"""
+        store = ScannerStatsStore(session_factory)
+        for _ in range(25):
+            store.record("flaky", False, 30.0, 0)
+        plan = ExecutionPlanner(store).plan([StubScanner("flaky"), StubScanner("ok")], "free")
+        assert plan.scanners[0].name == "ok"
+        assert plan.skipped == {"flaky": "unreliable"}
+
+    @pytest.mark.asyncio
+    async def test_later_stages_skipped_once_answered(self, session_factory):
+        """Test expensive stages do not run when cheap ones answered the query"""
+        planner = ExecutionPlanner(ScannerStatsStore(session_factory))
+        plan = planner.plan([StubScanner("cheap", 1, findings=4), StubScanner("pricey", 3)], "free")
+        ran = []
+
+        async def run(scanner):
+            ran.append(scanner.name)
+            return scanner.findings
+
+        outcomes = await planner.execute(plan, run, lambda findings: (True, 0.1, findings))
+        assert ran == ["cheap"]
+        assert [planned.name for planned, _ in outcomes] == ["cheap"]
+        assert plan.skipped == {"pricey": "answered"}
+        assert (plan.stages_run, plan.findings, plan.spent_credits) == (1, 4, 1)
+
+    @pytest.mark.asyncio
+    async def test_failed_scanners_charged_elapsed_time(self, session_factory):
+        """Test a scanner that raises is recorded with the time it took"""
+        planner = ExecutionPlanner(ScannerStatsStore(session_factory))
+        plan = planner.plan([StubScanner("broken")], "free")
+
+        async def run(scanner):
+            await asyncio.sleep(0.05)
+            raise RuntimeError("upstream down")
+
+        [(_, outcome)] = await planner.execute(plan, run, lambda findings: (True, 0.1, findings))
+        assert isinstance(outcome, RuntimeError)
+        assert planner.stats.get("broken").avg_latency >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_cancelling_execute_cancels_scanners(self, session_factory):
+        """Test scanners still running are cancelled with the request that started them"""
+        planner = ExecutionPlanner(ScannerStatsStore(session_factory))
+        plan = planner.plan([StubScanner("a"), StubScanner("b")], "free")
+        finished = []
+
+        async def run(scanner):
+            await asyncio.sleep(0.5)
+            finished.append(scanner.name)
+
+        execution = asyncio.ensure_future(planner.execute(plan, run, lambda result: (True, 0.1, 1)))
+        await asyncio.sleep(0.05)
+        execution.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await execution
+        await asyncio.sleep(0.6)
+        assert finished == []
+
+
+class TestScannerStatsStore:
+    """Test suite for persisted statistics"""
+
+    def test_flush_and_load_round_trip(self, session_factory):
+        """Test recorded runs accumulate in scanner_metrics across flushes"""
+        store = ScannerStatsStore(session_factory)
+        store.record("whois", True, 2.0, 3)
+        store.record("whois", False, 4.0, 0)
+        assert store.flush() == 1
+        store.record("whois", True, 3.0, 1)
+        store.flush()
+
+        fresh = ScannerStatsStore(session_factory)
+        fresh.load()
+        stats = fresh.get("whois")
+        assert (stats.runs, stats.successes, stats.findings) == (3, 2, 4)
+        assert stats.avg_latency == pytest.approx(3.0)
+        assert fresh.get("unknown").runs == 0
+
+    def test_load_adds_missing_columns(self):
+        """Test scanner_metrics tables created before total_findings are upgraded"""
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE scanner_metrics (id INTEGER PRIMARY KEY, scanner_name VARCHAR(100), "
+                "requests_made INTEGER, successful_requests INTEGER, failed_requests INTEGER, "
+                "average_response_time FLOAT, last_used DATETIME, created_at DATETIME, updated_at DATETIME)"
+            ))
+        store = ScannerStatsStore(sessionmaker(bind=engine))
+        store.load()
+        store.record("whois", True, 1.0, 2)
+        store.flush()
+        assert "total_findings" in {column["name"] for column in inspect(engine).get_columns("scanner_metrics")}
+        engine.dispose()
+
+
+def test_count_findings():
+    """Test yield counting ignores run metadata and errors"""
+    assert count_findings({"entities": [1, 2, 3]}) == 3
+    assert count_findings({"email": "a@b.com", "phone": "", "status": "ok", "mock": True}) == 1
+    assert count_findings({"error": "boom", "email": "x"}) == 0
+    assert count_findings(None) == 0
@@ -0,0 +1,124 @@
+"""
+Test suite for the perceptual hash similarity index.
+Tests Hamming-radius queries, append buffer merging and memory-mapped persistence.
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+np = pytest.importorskip("numpy")
+
+from app.core.image_similarity_index import PerceptualHashIndex, hamming_distance
+
+
+def _flip_bits(value: int, bits: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), bits):
+        value ^= 1 << bit
+    return value
+
+
+@pytest.fixture
+def random_hashes():
+    rng = random.Random(42)
+    return [rng.getrandbits(64) for _ in range(5000)]
+
+
+class TestPerceptualHashIndex:
+    """Test suite for multi-index hashing queries"""
+
+    def test_matches_brute_force(self, random_hashes):
+        """Test radius queries return exactly the brute-force matches"""
+        index = PerceptualHashIndex(merge_threshold=1000)
+        index.add_batch([f"img_{i}" for i in range(len(random_hashes))], random_hashes)
+        hashes = np.array(random_hashes, dtype=np.uint64)
+        rng = random.Random(7)
+
+        for radius in (0, 3, 8, 11):
+            query = _flip_bits(random_hashes[rng.randrange(len(random_hashes))], radius, rng)
+            expected = {f"img_{i}" for i in np.nonzero(hamming_distance(hashes, query) <= radius)[0]}
+            found = {match["key"] for match in index.query(query, radius=radius)}
+            assert found == expected
+
+    def test_pending_and_sealed_entries(self):
+        """Test entries are found before and after merging"""
+        index = PerceptualHashIndex(merge_threshold=10)
+        index.add("a", 0xFFFF0000FFFF0000, {"query_id": 1})
+        assert index.query(0xFFFF0000FFFF0001, radius=1)[0]["key"] == "a"
+
+        index.merge()
+        match = index.query(0xFFFF0000FFFF0001, radius=1)[0]
+        assert match["key"] == "a"
+        assert match["distance"] == 1
+        assert match["metadata"] == {"query_id": 1}
+
+    def test_duplicate_keys_ignored(self):
+        """Test re-adding a key does not create a second entry"""
+        index = PerceptualHashIndex()
+        assert index.add("a", 1) is True
+        assert index.add("a", 1) is False
+        assert len(index) == 1
+
+    def test_results_sorted_by_distance(self):
+        """Test nearest matches are returned first"""
+        index = PerceptualHashIndex()
+        index.add_batch(["far", "near", "exact"], [0b111, 0b1, 0])
+        keys = [match["key"] for match in index.query(0, radius=3)]
+        assert keys == ["exact", "near", "far"]
+
+    def test_batch_query(self, random_hashes):
+        """Test batch queries return one result list per hash"""
+        index = PerceptualHashIndex()
+        index.add_batch([str(i) for i in range(100)], random_hashes[:100])
+        results = index.query_batch(random_hashes[:5], radius=0)
+        assert [r[0]["key"] for r in results] == ["0", "1", "2", "3", "4"]
+
+    def test_save_and_load_memory_mapped(self, tmp_path, random_hashes):
+        """Test persisted index reloads memory-mapped with identical answers"""
+        index = PerceptualHashIndex()
+        index.add_batch([str(i) for i in range(len(random_hashes))], random_hashes)
+        index.save(str(tmp_path))
+
+        reloaded = PerceptualHashIndex(storage_path=str(tmp_path))
+        assert reloaded.get_stats()["memory_mapped"] is True
+        assert len(reloaded) == len(random_hashes)
+        assert reloaded.query(random_hashes[10], radius=4) == index.query(random_hashes[10], radius=4)
+
+        reloaded.add("new", random_hashes[10])
+        keys = {match["key"] for match in reloaded.query(random_hashes[10], radius=0)}
+        assert keys == {"10", "new"}
+
+    def test_save_over_memory_mapped_directory(self, tmp_path, random_hashes):
+        """Test an index loaded from a directory can be saved back to it"""
+        index = PerceptualHashIndex()
+        index.add_batch([str(i) for i in range(1000)], random_hashes[:1000])
+        index.save(str(tmp_path))
+
+        reloaded = PerceptualHashIndex(storage_path=str(tmp_path))
+        reloaded.add_batch([str(i) for i in range(1000, 2000)], random_hashes[1000:2000])
+        reloaded.save()
+
+        again = PerceptualHashIndex(storage_path=str(tmp_path))
+        assert len(again) == 2000
+        assert again.query(random_hashes[1500], radius=0)[0]["key"] == "1500"
+        assert again.query(random_hashes[5], radius=0)[0]["key"] == "5"
+
+    def test_async_insert_merges_off_loop(self, random_hashes):
+        """Test async inserts fold a full append buffer into the index"""
+        import asyncio
+
+        index = PerceptualHashIndex(merge_threshold=100)
+
+        async def insert():
+            await index.add_batch_async([str(i) for i in range(150)], random_hashes[:150])
+            await index.add_async("extra", random_hashes[150])
+
+        asyncio.run(insert())
+        stats = index.get_stats()
+        assert stats["indexed_hashes"] == 150
+        assert stats["pending_hashes"] == 1
+        assert index.query(random_hashes[150], radius=0)[0]["key"] == "extra"
@@ -0,0 +1,110 @@
+"""
+Test suite for scalable IOC correlation.
+Tests that candidate-driven clustering reproduces the all-pairs clustering.
+"""
+
+import pytest
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("numpy")
+pytest.importorskip("aiohttp")
+
+from app.core.threat_intelligence import ThreatCorrelationEngine, ThreatIOC, IOCType, ThreatLevel
+from app.core.ioc_correlation import ScalableThreatCorrelator, UnionFind, generate_synthetic_feed
+
+
+def _all_pairs_clusters(engine, iocs):
+    """Reference implementation: the original greedy all-pairs clustering"""
+    clusters = {}
+    for ioc in iocs:
+        cluster_id = None
+        for existing_id, members in clusters.items():
+            if any(engine._calculate_similarity(ioc, member) > 0.6 for member in members):
+                cluster_id = existing_id
+                break
+        if cluster_id is None:
+            cluster_id = f"cluster_{len(clusters) + 1}"
+        clusters.setdefault(cluster_id, []).append(ioc)
+    return clusters
+
+
+def _as_values(clusters):
+    return {cluster_id: [ioc.value for ioc in members] for cluster_id, members in clusters.items()}
+
+
+def _random_iocs(rng, count):
+    base = datetime(2024, 1, 1)
+    return [
+        ThreatIOC(
+            value=f"ioc-{i}",
+            ioc_type=IOCType.DOMAIN,
+            threat_level=rng.choice([ThreatLevel.HIGH, ThreatLevel.MEDIUM, ThreatLevel.LOW]),
+            confidence=0.5,
+            first_seen=base + timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+            last_seen=base,
+            sources=rng.sample(["otx", "misp", "virustotal", "threatcrowd"], rng.randint(0, 3)),
+            tags=rng.sample(["apt28", "emotet", "phishing", "c2", "botnet"], rng.randint(0, 3))
+        )
+        for i in range(count)
+    ]
+
+
+class TestThreatCorrelation:
+    """Test suite for correlation equivalence and scaling modes"""
+
+    def test_matches_all_pairs_on_random_inputs(self):
+        """Test clusters and cluster order match the original algorithm"""
+        engine = ThreatCorrelationEngine()
+        rng = random.Random(1)
+        for _ in range(200):
+            iocs = _random_iocs(rng, rng.randint(1, 40))
+            expected = _as_values(_all_pairs_clusters(engine, iocs))
+            actual = _as_values(engine.correlate_threats(iocs))
+            assert list(actual) == list(expected)
+            assert actual == expected
+
+    def test_matches_all_pairs_on_synthetic_feed(self):
+        """Test equivalence on a campaign-structured synthetic feed"""
+        engine = ThreatCorrelationEngine()
+        feed = generate_synthetic_feed(1500)
+        assert _as_values(engine.correlate_threats(feed)) == _as_values(_all_pairs_clusters(engine, feed))
+
+    def test_lsh_mode_covers_all_iocs(self):
+        """Test approximate mode keeps every IOC exactly once"""
+        feed = generate_synthetic_feed(3000)
+        correlator = ScalableThreatCorrelator(exact_limit=0)
+        clusters = correlator.correlate(feed)
+
+        assert correlator.last_stats["mode"] == "lsh"
+        assert sorted(ioc.value for members in clusters.values() for ioc in members) == \
+            sorted(ioc.value for ioc in feed)
+
+    def test_transitive_mode_merges_bridged_clusters(self):
+        """Test an IOC similar to two clusters merges them in transitive mode"""
+        base = datetime(2024, 1, 1)
+        iocs = [
+            ThreatIOC("a", IOCType.DOMAIN, ThreatLevel.HIGH, 0.5, base, base, ["otx"], ["x"]),
+            ThreatIOC("b", IOCType.DOMAIN, ThreatLevel.HIGH, 0.5, base, base, ["misp"], ["y"]),
+            ThreatIOC("c", IOCType.DOMAIN, ThreatLevel.HIGH, 0.5, base, base, ["otx", "misp"], ["x", "y"]),
+        ]
+
+        greedy = ScalableThreatCorrelator().correlate(iocs)
+        assert _as_values(greedy) == {"cluster_1": ["a", "c"], "cluster_2": ["b"]}
+
+        transitive = ScalableThreatCorrelator(transitive=True).correlate(iocs)
+        assert _as_values(transitive) == {"cluster_1": ["a", "b", "c"]}
+
+    def test_union_find_keeps_oldest_root(self):
+        """Test union-find roots stay on the earliest cluster id"""
+        union_find = UnionFind()
+        for _ in range(4):
+            union_find.add()
+        union_find.union(3, 2)
+        union_find.union(2, 1)
+        assert union_find.find(3) == 1
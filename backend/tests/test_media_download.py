@@ -0,0 +1,299 @@
+"""
+Test suite for the streaming media downloader.
+Tests incremental hashing, byte limits, spooling to disk and range-based
+metadata reads against a local stand-in media server.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import tracemalloc
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp import web
+
+from app.scanners.media_download import (
+    DownloadedMedia, MediaDownloader, MediaTooLargeError, parse_mp4_moov, read_mp4_metadata
+)
+from app.scanners.image_media_scanners import MetadataExtractionScanner
+from app.scanners.metadata_workers import MetadataWorkerPool
+
+
+def _box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def _make_mp4(mdat_size=2 * 1024 * 1024, moov_first=False):
+    """Minimal MP4: ftyp, a large mdat and a moov with one 1280x720 video track"""
+    ftyp = _box(b'ftyp', b'isom\x00\x00\x02\x00isomiso2mp41')
+    mvhd = _box(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>IIII', 3786825600, 0, 1000, 42500) + b'\x00' * 80)
+    tkhd = _box(b'tkhd', b'\x00\x00\x00\x07' + b'\x00' * 72 + struct.pack('>II', 1280 << 16, 720 << 16))
+    hdlr = _box(b'hdlr', b'\x00' * 8 + b'vide' + b'\x00' * 13)
+    trak = _box(b'trak', tkhd + _box(b'mdia', hdlr))
+    moov = _box(b'moov', mvhd + trak)
+    mdat = _box(b'mdat', os.urandom(1024) * (mdat_size // 1024))
+    return ftyp + moov + mdat if moov_first else ftyp + mdat + moov
+
+
+class StandInMediaServer:
+    """Local server serving fixed bodies, optionally honouring Range headers"""
+
+    def __init__(self, files, ranges=True):
+        self.files = files
+        self.ranges = ranges
+        self.requests = []
+        self.runner = None
+        self.base_url = None
+
+    async def _serve(self, request):
+        name = request.match_info['name']
+        self.requests.append((name, request.headers.get('Range')))
+        body = self.files[name]
+        range_header = request.headers.get('Range')
+        if self.ranges and range_header:
+            start, end = (int(v) for v in range_header.split('=')[1].split('-'))
+            if start >= len(body):
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{len(body)}'})
+            end = min(end, len(body) - 1)
+            return web.Response(status=206, body=body[start:end + 1], content_type='video/mp4',
+                                headers={'Content-Range': f'bytes {start}-{end}/{len(body)}'})
+        if name.startswith('chunked'):
+            response = web.StreamResponse(headers={'Content-Type': 'application/octet-stream'})
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            for offset in range(0, len(body), 65536):
+                await response.write(body[offset:offset + 65536])
+            await response.write_eof()
+            return response
+        return web.Response(body=body, content_type='video/mp4')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/{name}', self._serve)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestDownload:
+    """Test suite for full downloads"""
+
+    @pytest.mark.asyncio
+    async def test_hashes_match_and_small_files_stay_in_memory(self):
+        """Test incremental hashes equal hashes of the whole body"""
+        body = os.urandom(300 * 1024)
+        server = StandInMediaServer({'small.bin': body})
+        await server.start()
+        try:
+            downloader = MediaDownloader(spool_threshold=1024 * 1024)
+            with await downloader.download(f'{server.base_url}/small.bin') as media:
+                assert not media.spooled
+                assert media.size == len(body)
+                assert media.sha256 == hashlib.sha256(body).hexdigest()
+                assert media.md5 == hashlib.md5(body).hexdigest()
+                assert media.read_bytes() == body and media.head == body[:4096]
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_large_files_spool_to_disk_with_bounded_memory(self, tmp_path):
+        """Test bodies above the threshold are written to a temp file, not held in memory"""
+        body = os.urandom(8 * 1024 * 1024)
+        # Chunked, so the in-process server does not copy the whole body itself
+        server = StandInMediaServer({'chunked-big.bin': body})
+        await server.start()
+        try:
+            downloader = MediaDownloader(spool_threshold=512 * 1024, spool_dir=str(tmp_path))
+            tracemalloc.start()
+            try:
+                media = await downloader.download(f'{server.base_url}/chunked-big.bin')
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert media.spooled and os.path.dirname(media.path) == str(tmp_path)
+            assert media.sha256 == hashlib.sha256(body).hexdigest()
+            assert os.path.getsize(media.path) == len(body)
+            # Well below the 8 MB body the old read() held in memory
+            assert peak < 3 * 1024 * 1024
+            path = media.path
+            media.cleanup()
+            assert not os.path.exists(path)
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_content_length_over_limit_is_refused_upfront(self):
+        """Test a declared size over the limit fails before the body is read"""
+        server = StandInMediaServer({'huge.bin': b'\x00' * (2 * 1024 * 1024)})
+        await server.start()
+        try:
+            downloader = MediaDownloader(max_bytes=1024 * 1024)
+            with pytest.raises(MediaTooLargeError):
+                await downloader.download(f'{server.base_url}/huge.bin')
+            assert downloader.stats['rejected_too_large'] == 1
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_chunked_body_over_limit_is_cut_off_and_spool_removed(self, tmp_path):
+        """Test a body without Content-Length is stopped at the limit and leaves no file"""
+        server = StandInMediaServer({'chunked.bin': b'\x00' * (2 * 1024 * 1024)})
+        await server.start()
+        try:
+            downloader = MediaDownloader(max_bytes=1024 * 1024, spool_threshold=256 * 1024,
+                                         spool_dir=str(tmp_path))
+            with pytest.raises(MediaTooLargeError):
+                await downloader.download(f'{server.base_url}/chunked.bin')
+            assert os.listdir(tmp_path) == []
+            await downloader.close()
+        finally:
+            await server.stop()
+
+
+class TestMetadataReads:
+    """Test suite for header and moov range reads"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_header_reads_only_leading_bytes(self):
+        """Test a header fetch transfers the requested prefix only"""
+        body = os.urandom(1024 * 1024)
+        server = StandInMediaServer({'photo.jpg': body})
+        await server.start()
+        try:
+            downloader = MediaDownloader()
+            header = await downloader.fetch_header(f'{server.base_url}/photo.jpg', length=65536)
+            assert header.read_bytes() == body[:65536]
+            assert header.partial and header.total_size == len(body) and header.sha256 is None
+            assert server.requests == [('photo.jpg', 'bytes=0-65535')]
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_moov_after_mdat_found_with_range_reads(self):
+        """Test moov at the end of a file is reached without downloading mdat"""
+        mp4 = _make_mp4()
+        server = StandInMediaServer({'clip.mp4': mp4})
+        await server.start()
+        try:
+            downloader = MediaDownloader()
+            moov = await downloader.fetch_mp4_moov(f'{server.base_url}/clip.mp4')
+            info = parse_mp4_moov(moov)
+            assert info['duration'] == 42.5
+            assert info['tracks'] == [{'handler': 'vide', 'width': 1280, 'height': 720}]
+            assert len(server.requests) <= 3
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_header_fetch_without_range_support(self):
+        """Test servers ignoring Range still yield just the prefix"""
+        body = os.urandom(1024 * 1024)
+        server = StandInMediaServer({'photo.jpg': body}, ranges=False)
+        await server.start()
+        try:
+            downloader = MediaDownloader()
+            header = await downloader.fetch_header(f'{server.base_url}/photo.jpg', length=4096)
+            assert header.read_bytes() == body[:4096]
+            await downloader.close()
+        finally:
+            await server.stop()
+
+    def test_read_mp4_metadata_from_stream(self, tmp_path):
+        """Test moov is parsed from a spooled file whichever order the boxes are in"""
+        for moov_first in (False, True):
+            path = tmp_path / f'clip-{moov_first}.mp4'
+            path.write_bytes(_make_mp4(mdat_size=64 * 1024, moov_first=moov_first))
+            with open(path, 'rb') as stream:
+                info = read_mp4_metadata(stream)
+            assert info['duration'] == 42.5 and info['timescale'] == 1000
+            assert info['creation_time'] == '2023-12-31T00:00:00'
+            assert info['tracks'][0]['width'] == 1280
+
+    def test_truncated_header_boxes_are_skipped(self):
+        """Test short mvhd and tkhd boxes are skipped instead of misread"""
+        mvhd = _box(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>II', 3786825600, 0))
+        tkhd = _box(b'tkhd', b'\x00\x00\x00\x07' + b'\x00' * 20)
+        hdlr = _box(b'hdlr', b'\x00' * 4)
+        moov = _box(b'moov', mvhd + _box(b'trak', tkhd + _box(b'mdia', hdlr)))
+        assert parse_mp4_moov(moov) == {'tracks': [{}]}
+        # A moov cut off inside tkhd
+        assert parse_mp4_moov(_make_mp4(moov_first=True)[:200])['tracks'] == [{}]
+
+    def test_local_files_are_hashed_and_never_deleted(self, tmp_path):
+        """Test wrapping a caller's file hashes it in chunks and cleanup leaves it alone"""
+        body = os.urandom(300 * 1024)
+        path = tmp_path / 'photo.jpg'
+        path.write_bytes(body)
+        with DownloadedMedia.from_file(str(path), chunk_size=65536) as media:
+            assert media.sha256 == hashlib.sha256(body).hexdigest() and media.head == body[:4096]
+            assert media.source() == str(path)
+        assert path.read_bytes() == body
+
+
+class RecordingWorkers:
+    """Stands in for the worker pool, recording what each job is handed"""
+
+    def __init__(self):
+        self.jobs = []
+
+    async def extract(self, kind, data=None, path=None, content_hash=None, total_size=None):
+        self.jobs.append({'kind': kind, 'data': data, 'path': path,
+                          'path_exists': path is not None and os.path.exists(path)})
+        return {}
+
+
+class TestMetadataScanner:
+    """Test suite for metadata extraction from downloaded media"""
+
+    @pytest.mark.asyncio
+    async def test_spooled_download_is_passed_by_path(self, tmp_path):
+        """Test workers get the spool file rather than the downloaded bytes"""
+        server = StandInMediaServer({'clip.mp4': _make_mp4()}, ranges=False)
+        await server.start()
+        try:
+            scanner = MetadataExtractionScanner()
+            scanner.downloader = MediaDownloader(spool_threshold=64 * 1024, spool_dir=str(tmp_path))
+            scanner.workers = RecordingWorkers()
+            result = await scanner.analyze(f'{server.base_url}/clip.mp4')
+            [job] = scanner.workers.jobs
+            assert result.media_type == 'video/mp4' and job['kind'] == 'video'
+            assert job['data'] is None and job['path_exists']
+            assert os.listdir(tmp_path) == []
+            await scanner.downloader.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_metadata_only_reads_header_and_moov(self):
+        """Test metadata-only extraction uses range reads and reports the full file size"""
+        mp4 = _make_mp4()
+        server = StandInMediaServer({'clip.mp4': mp4})
+        await server.start()
+        pool = MetadataWorkerPool(workers=1)
+        try:
+            scanner = MetadataExtractionScanner()
+            scanner.downloader = MediaDownloader()
+            scanner.workers = pool
+            result = await scanner.analyze(f'{server.base_url}/clip.mp4', metadata_only=True)
+            assert result.metadata['format_info']['duration'] == 42.5
+            assert result.metadata['format_info']['file_size'] == len(mp4)
+            assert result.metadata['partial_read']
+            assert all(range_header for _, range_header in server.requests)
+            await scanner.downloader.close()
+        finally:
+            pool.shutdown()
+            await server.stop()
@@ -0,0 +1,211 @@
+"""
+Test suite for the metadata extraction workers.
+Tests out-of-process extraction, per-job CPU and memory limits, crash
+recovery, content-hash caching and event-loop responsiveness under load.
+"""
+
+import asyncio
+import io
+import os
+import struct
+import sys
+import time
+import wave
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+
+from app.scanners.metadata_workers import MetadataJob, MetadataWorkerPool, RESOURCE_AVAILABLE
+
+needs_limits = pytest.mark.skipif(not RESOURCE_AVAILABLE, reason="resource limits need a POSIX platform")
+
+
+def worker_pid(job):
+    return {'pid': os.getpid()}
+
+
+def spin(job):
+    while True:
+        pass
+
+
+def allocate(job):
+    return {'size': len(bytearray(1024 * 1024 * 1024))}
+
+
+def crash(job):
+    os._exit(1)
+
+
+def _jpeg(seed, size=(640, 480)):
+    exif = Image.Exif()
+    exif[0x010F] = 'TestCam'  # Make
+    exif[0x0110] = f'Model {seed}'  # Model
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (seed % 256, 80, 160)).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def _wav(seconds=1, rate=8000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b'\x00\x00' * rate * seconds)
+    return buffer.getvalue()
+
+
+def _mp4(seed):
+    def box(box_type, payload):
+        return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+    mvhd = box(b'mvhd', b'\x00' * 4 + struct.pack('>IIII', 0, 0, 1000, 1000 * (seed + 1)) + b'\x00' * 80)
+    tkhd = box(b'tkhd', b'\x00' * 76 + struct.pack('>II', 640 << 16, 360 << 16))
+    trak = box(b'trak', tkhd + box(b'mdia', box(b'hdlr', b'\x00' * 8 + b'vide' + b'\x00' * 13)))
+    return box(b'ftyp', b'isom\x00\x00\x02\x00') + box(b'mdat', os.urandom(4096)) + box(b'moov', mvhd + trak)
+
+
+class TestExtraction:
+    """Test suite for out-of-process extraction and caching"""
+
+    @pytest.mark.asyncio
+    async def test_image_video_and_audio_metadata(self):
+        """Test each media kind is parsed in a worker process"""
+        pool = MetadataWorkerPool(workers=1, extractors={'pid': worker_pid})
+        try:
+            image, video, audio, pid = await pool.extract_many([
+                MetadataJob('image', data=_jpeg(1)),
+                MetadataJob('video', data=_mp4(4)),
+                MetadataJob('audio', data=_wav(2)),
+                MetadataJob('pid', data=b'x'),
+            ])
+            assert image['exif_data']['Make'] == 'TestCam' and image['basic_info']['width'] == 640
+            assert video['format_info']['duration'] == 5.0
+            assert video['video_streams'] == [{'width': 640, 'height': 360, 'aspect_ratio': '640:360'}]
+            assert audio['format_info']['duration'] == 2.0 and audio['format_info']['channels'] == 1
+            assert pid['pid'] != os.getpid()
+            assert pool.stats['batches'] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_results_cached_by_content_hash(self, tmp_path):
+        """Test the same bytes are parsed once, whether sent as data or as a path"""
+        pool = MetadataWorkerPool(workers=1)
+        data = _jpeg(7)
+        path = tmp_path / 'copy.jpg'
+        path.write_bytes(data)
+        try:
+            first = await pool.extract('image', data=data)
+            duplicate, from_path = await pool.extract_many([
+                MetadataJob('image', data=data), MetadataJob('image', path=str(path))
+            ])
+            assert first == duplicate == from_path
+            assert pool.stats['extracted'] == 1 and pool.stats['cache_hits'] == 2
+            # Callers get copies, so mutating a result does not corrupt the cache
+            first['exif_data'] = {}
+            assert (await pool.extract('image', data=data))['exif_data']['Make'] == 'TestCam'
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_jobs_are_coalesced(self):
+        """Test overlapping requests for one file share a single extraction"""
+        pool = MetadataWorkerPool(workers=2)
+        data = _jpeg(3)
+        try:
+            results = await asyncio.gather(*(pool.extract('image', data=data) for _ in range(5)))
+            assert all(result == results[0] for result in results)
+            assert pool.stats['extracted'] == 1 and pool.stats['coalesced'] == 4
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_unparseable_file_reports_error(self):
+        """Test a corrupt file yields an error result rather than raising"""
+        pool = MetadataWorkerPool(workers=1)
+        try:
+            result = await pool.extract('image', data=b'not an image')
+            assert 'error' in result and pool.stats['failed'] == 1
+        finally:
+            pool.shutdown()
+
+
+@needs_limits
+class TestLimits:
+    """Test suite for per-job limits and crash recovery"""
+
+    @pytest.mark.asyncio
+    async def test_cpu_limit_stops_runaway_job_only(self):
+        """Test a spinning parser is stopped and its worker keeps serving"""
+        pool = MetadataWorkerPool(workers=1, cpu_seconds=1, extractors={'spin': spin, 'pid': worker_pid})
+        try:
+            spun, after = await asyncio.wait_for(pool.extract_many([
+                MetadataJob('spin', data=b'a'), MetadataJob('pid', data=b'b')
+            ]), timeout=10)
+            assert spun == {'error': 'CPU time limit exceeded'}
+            assert 'pid' in after
+            assert pool.stats['limit_exceeded'] == 1 and pool.stats['pool_restarts'] == 0
+            # Known-bad files are not parsed again
+            assert await pool.extract('spin', data=b'a') == spun
+            assert pool.stats['cache_hits'] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_memory_limit(self):
+        """Test a job allocating past its allowance fails with a memory error"""
+        pool = MetadataWorkerPool(workers=1, memory_mb=128, extractors={'allocate': allocate})
+        try:
+            assert await pool.extract('allocate', data=b'a') == {'error': 'Memory limit exceeded'}
+            assert (await pool.extract('image', data=_jpeg(2)))['basic_info']['format'] == 'JPEG'
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_crashing_worker_fails_only_its_job(self):
+        """Test a worker dying mid-batch restarts the pool and spares the other jobs"""
+        pool = MetadataWorkerPool(workers=1, extractors={'crash': crash})
+        try:
+            results = await pool.extract_many([
+                MetadataJob('image', data=_jpeg(5)), MetadataJob('crash', data=b'c'),
+                MetadataJob('audio', data=_wav()),
+            ])
+            assert results[1] == {'error': 'Metadata worker crashed'}
+            assert 'exif_data' in results[0] and 'format_info' in results[2]
+            assert pool.stats['pool_restarts'] >= 1
+        finally:
+            pool.shutdown()
+
+
+class TestResponsiveness:
+    """Test suite for event-loop lag under load"""
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive_for_100_files(self):
+        """Test 100 mixed files are processed while the loop keeps ticking"""
+        makers = [lambda i: ('image', _jpeg(i, size=(1600, 1200))), lambda i: ('video', _mp4(i)),
+                  lambda i: ('audio', _wav())]
+        jobs = [MetadataJob(*makers[i % 3](i)) for i in range(100)]
+        pool = MetadataWorkerPool(workers=2)
+        lags = []
+
+        async def ticker(stop):
+            while not stop.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - started - 0.01)
+
+        try:
+            stop = asyncio.Event()
+            ticking = asyncio.create_task(ticker(stop))
+            results = await asyncio.gather(*(pool.extract(job.kind, data=job.data) for job in jobs))
+            stop.set()
+            await ticking
+            assert len(results) == 100 and not any('error' in r for r in results)
+            assert max(lags) < 0.1
+        finally:
+            pool.shutdown()
@@ -0,0 +1,150 @@
+"""
+Test suite for public records scanners.
+Tests concurrent sub-source searches, partial results on timeout and the
+shared bounded TTL cache with negative caching.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.advanced_caching import LRUCache
+from app.scanners import public_records_scanners
+from app.scanners.public_records_scanners import (
+    BasePublicRecordsScanner, CourtRecordsScanner, CriminalRecordsScanner, PublicRecordsOrchestrator
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = LRUCache(max_size=16)
+    monkeypatch.setattr(public_records_scanners, "records_cache", cache)
+    return cache
+
+
+class SlowSourcesScanner(BasePublicRecordsScanner):
+    """Scanner whose sub-sources sleep for a configurable time"""
+
+    def __init__(self, delays, jurisdiction='test'):
+        super().__init__('slow_sources', jurisdiction)
+        self.delays = delays
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+
+    def can_handle(self, query_type):
+        return True
+
+    def _source(self, index):
+        async def search_source(query, **kwargs):
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delays[index])
+            finally:
+                self.in_flight -= 1
+            return [f'{query}-{index}']
+        search_source.__name__ = f'source_{index}'
+        return search_source
+
+    async def search(self, query, **kwargs):
+        cache_key = self._generate_cache_key(query, kwargs)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        records, complete = await self._run_subsearches(
+            query, [self._source(i) for i in range(len(self.delays))], **kwargs
+        )
+        if complete:
+            self._set_cached(cache_key, records)
+        return records
+
+
+class TestConcurrentSubsearches:
+    """Test suite for sub-source fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_sources_run_concurrently_in_order(self):
+        """Test sub-sources overlap and results keep source order"""
+        scanner = SlowSourcesScanner([0.1, 0.1, 0.1, 0.1])
+        started = time.perf_counter()
+        records = await scanner.search('q')
+        elapsed = time.perf_counter() - started
+        assert records == ['q-0', 'q-1', 'q-2', 'q-3']
+        assert elapsed < 0.3
+        assert scanner.peak_in_flight == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test no more than max_concurrency sub-sources run at once"""
+        scanner = SlowSourcesScanner([0.02] * 6)
+        scanner.max_concurrency = 2
+        await scanner.search('q')
+        assert scanner.peak_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_partial_results_uncached(self):
+        """Test slow sources are dropped, finished ones returned, and nothing cached"""
+        scanner = SlowSourcesScanner([0.01, 5, 0.01])
+        scanner.subsearch_timeout = 0.2
+        records = await asyncio.wait_for(scanner.search('q'), timeout=2)
+        assert records == ['q-0', 'q-2']
+        assert scanner.in_flight == 0
+        assert scanner._get_cached(scanner._generate_cache_key('q', {})) is None
+
+    @pytest.mark.asyncio
+    async def test_court_records_combine_all_courts(self):
+        """Test the court scanner still returns federal, state and local records"""
+        records = await CourtRecordsScanner('california').search('John Smith')
+        assert [r.record_type for r in records].count('court_case') == 5
+        assert {r.record_type for r in records} == {'court_case', 'state_case', 'municipal_case'}
+
+
+class TestSharedCache:
+    """Test suite for the shared records cache"""
+
+    @pytest.mark.asyncio
+    async def test_cache_is_shared_between_instances(self, fresh_cache):
+        """Test a second scanner instance is served from the cache"""
+        first = SlowSourcesScanner([0.01, 0.01])
+        second = SlowSourcesScanner([0.01, 0.01])
+        assert await first.search('q') == await second.search('q')
+        assert second.calls == 0
+        # Another jurisdiction is a different search
+        other = SlowSourcesScanner([0.01, 0.01], jurisdiction='elsewhere')
+        await other.search('q')
+        assert other.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_empty_results_use_negative_ttl(self, fresh_cache):
+        """Test "no records" is cached with the shorter negative TTL"""
+        scanner = CriminalRecordsScanner('test')
+        assert await scanner.search('Nobody') == []
+        entry = next(iter(fresh_cache.cache.values()))
+        assert entry.value == () and entry.ttl == scanner.negative_cache_ttl
+        assert await scanner.search('Nobody') == []
+        assert fresh_cache.metrics.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, fresh_cache):
+        """Test many distinct searches do not grow the cache past its limit"""
+        scanner = CourtRecordsScanner('california')
+        for i in range(40):
+            await scanner.search(f'Person {i}')
+        assert len(fresh_cache.cache) == 16
+        assert fresh_cache.metrics.evictions == 24
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_search_all(self):
+        """Test the orchestrator still collects every applicable scanner"""
+        async with PublicRecordsOrchestrator('california') as orchestrator:
+            results = await orchestrator.search_all('John Smith', 'name')
+        assert set(results) == {'court_records', 'property_records', 'business_records',
+                                'criminal_records', 'vital_records'}
+        assert orchestrator.get_total_record_count(results) > 0
@@ -0,0 +1,111 @@
+"""
+Test suite for keyset pagination and cached query counters.
+Runs keyset pages against SQLite and compares them with OFFSET pagination.
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, DateTime, select
+
+from app.services.query_pagination import (
+    apply_keyset, encode_cursor, decode_cursor, UserQueryCounters, benchmark_pagination
+)
+
+
+@pytest.fixture
+def query_table():
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table(
+        "queries", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer),
+        Column("created_at", DateTime),
+    )
+    metadata.create_all(engine)
+    base = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        # Many rows share a timestamp so the id tiebreak matters
+        connection.execute(table.insert(), [
+            {"id": i, "user_id": 1, "created_at": base + timedelta(minutes=i // 7)}
+            for i in range(1, 301)
+        ])
+    yield engine, table
+    engine.dispose()
+
+
+class TestKeysetPagination:
+    """Test suite for cursor pages"""
+
+    @pytest.mark.parametrize("row_values", [True, False])
+    @pytest.mark.parametrize("descending", [True, False])
+    def test_pages_match_offset_walk(self, query_table, row_values, descending):
+        """Test walking cursors visits every row once in OFFSET order"""
+        engine, table = query_table
+        base = select(table).where(table.c.user_id == 1)
+        order = (table.c.created_at.desc(), table.c.id.desc()) if descending else \
+            (table.c.created_at, table.c.id)
+
+        with engine.connect() as connection:
+            expected = [row.id for row in connection.execute(base.order_by(*order))]
+            seen, after = [], None
+            while True:
+                rows = connection.execute(apply_keyset(
+                    base, table.c.created_at, table.c.id, after, 25,
+                    descending=descending, row_values=row_values
+                )).all()
+                seen.extend(row.id for row in rows[:25])
+                if len(rows) <= 25:
+                    break
+                created_at, record_id = decode_cursor(encode_cursor(rows[24].created_at, rows[24].id))
+                after = (created_at, int(record_id))
+
+        assert seen == expected
+
+    def test_invalid_cursor_rejected(self):
+        """Test malformed cursors raise ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestUserQueryCounters:
+    """Test suite for cached per-user counts"""
+
+    def test_counts_follow_transitions(self):
+        """Test submit and status changes keep filtered totals current"""
+        counters = UserQueryCounters()
+        assert counters.get("u1") is None
+
+        counters.load("u1", [("completed", "email", 3), ("failed", "phone", 1)])
+        counters.record_submitted("u1", "email", "pending")
+        counters.record_transition("u1", "email", "pending", "completed")
+        counters.record_submitted("u1", "phone", "pending")
+
+        counts = counters.get("u1")
+        assert counters.total(counts) == 6
+        assert counters.total(counts, status="completed") == 4
+        assert counters.total(counts, query_type="phone") == 2
+        assert counters.total(counts, status="pending", query_type="phone") == 1
+
+    def test_updates_ignored_until_loaded(self):
+        """Test counters are not created from partial information"""
+        counters = UserQueryCounters()
+        counters.record_submitted("u2", "email", "pending")
+        assert counters.get("u2") is None
+
+
+def test_benchmark_on_seeded_sqlite(tmp_path):
+    """Test the benchmark returns identical pages and totals for both strategies"""
+    results = benchmark_pagination(
+        total_queries=20000, depths=(0, 50), path=str(tmp_path / "bench.db"), repeat=1
+    )
+    assert [r["page"] for r in results] == [0, 50]
+    assert all(r["rows_match"] and r["totals_match"] for r in results)
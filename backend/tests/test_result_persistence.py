@@ -0,0 +1,113 @@
+"""
+Test suite for buffered scan result persistence.
+Tests single-transaction flushes, bulk inserts and commit instrumentation on SQLite.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.db.result_persistence import ScanResultWriter, PersistenceMetrics
+
+Base = declarative_base()
+
+
+class ResultRow(Base):
+    __tablename__ = "results"
+
+    id = Column(Integer, primary_key=True)
+    scanner_name = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False)
+    confidence_score = Column(Float)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    db = sessionmaker(bind=engine)()
+    db.engine_commits = commits
+    yield db
+    db.close()
+
+
+def _count(db):
+    return db.execute(select(func.count()).select_from(ResultRow)).scalar()
+
+
+class TestScanResultWriter:
+    """Test suite for the result writer"""
+
+    @pytest.mark.asyncio
+    async def test_query_results_written_in_one_commit(self, session):
+        """Test all staged records land in a single transaction"""
+        metrics = PersistenceMetrics()
+        async with ScanResultWriter(session, metrics=metrics) as writer:
+            records = [writer.stage(ResultRow(scanner_name=f"s{i}", status="running")) for i in range(50)]
+            for record in records:
+                record.status = "completed"
+            assert _count(session) == 0
+
+        assert _count(session) == 50
+        assert len(session.engine_commits) == 1
+        assert session.execute(select(ResultRow.status).distinct()).scalars().all() == ["completed"]
+        assert metrics.to_dict()["commits"] == 1
+        assert metrics.to_dict()["rows_per_commit"] == 50
+
+    @pytest.mark.asyncio
+    async def test_bulk_rows_collapse_by_key(self, session):
+        """Test restaging a row under the same key keeps only the latest state"""
+        writer = ScanResultWriter(session, metrics=PersistenceMetrics())
+        writer.stage_rows(ResultRow, [{"id": 1, "scanner_name": "dns", "status": "running"}], key_field="id")
+        writer.stage_rows(ResultRow, [
+            {"id": 1, "scanner_name": "dns", "status": "completed"},
+            {"id": 2, "scanner_name": "whois", "status": "failed"},
+        ], key_field="id")
+
+        assert await writer.flush() == 2
+        assert session.get(ResultRow, 1).status == "completed"
+        assert await writer.flush() == 0
+        assert len(session.engine_commits) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_rolls_back(self, session):
+        """Test a failing transaction writes nothing and is counted"""
+        metrics = PersistenceMetrics()
+        writer = ScanResultWriter(session, metrics=metrics)
+        writer.stage_rows(ResultRow, [
+            {"id": 1, "scanner_name": "dns", "status": "completed"},
+            {"id": 1, "scanner_name": "dup", "status": "completed"},
+        ])
+
+        with pytest.raises(IntegrityError):
+            await writer.flush()
+        assert _count(session) == 0
+        assert metrics.failed_commits == 1
+        assert len(writer) == 0
+
+    @pytest.mark.asyncio
+    async def test_background_flush_window(self, session):
+        """Test time-window mode batches records across many stage calls"""
+        writer = ScanResultWriter(session, max_pending=25, flush_interval=0.05,
+                                  metrics=PersistenceMetrics())
+        writer.start()
+        for i in range(100):
+            writer.stage(ResultRow(scanner_name=f"s{i}", status="completed"))
+            if i % 10 == 9:
+                await asyncio.sleep(0)
+        await writer.close()
+
+        assert _count(session) == 100
+        assert 1 <= len(session.engine_commits) <= 10
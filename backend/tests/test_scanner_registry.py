@@ -0,0 +1,102 @@
+"""
+Test suite for scanner registry dispatch.
+Tests precomputed query-type buckets, priority order and invalidation.
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scanners.base import BaseScannerModule, ScannerRegistry, ANY_QUERY_TYPE
+
+
+class MockQuery:
+    def __init__(self, query_type: str):
+        self.query_type = query_type
+        self.query_value = "value"
+
+
+class DeclaredScanner(BaseScannerModule):
+    def __init__(self, name, handles, priority=1, scanner_type="api"):
+        super().__init__(name, scanner_type)
+        self.handles = handles
+        self.priority = priority
+
+    async def scan(self, query):
+        return {}
+
+
+class DynamicScanner(DeclaredScanner):
+    def __init__(self, name, priority=1):
+        super().__init__(name, None, priority)
+        self.calls = 0
+
+    def can_handle(self, query):
+        self.calls += 1
+        return query.query_value.startswith("val")
+
+
+def _names(scanners):
+    return [scanner.name for scanner in scanners]
+
+
+class TestScannerRegistry:
+    """Test suite for ScannerRegistry selection"""
+
+    def test_buckets_merge_wildcards_by_priority(self):
+        """Test type buckets include ANY scanners in priority then registration order"""
+        registry = ScannerRegistry()
+        registry.register(DeclaredScanner("web", ANY_QUERY_TYPE, priority=2))
+        registry.register(DeclaredScanner("email_a", frozenset({"email"}), priority=3))
+        registry.register(DeclaredScanner("email_b", frozenset({"email", "name"}), priority=1))
+        registry.register(DeclaredScanner("email_c", frozenset({"email"}), priority=2))
+
+        assert _names(registry.get_scanners_for_query(MockQuery("EMAIL"))) == ["email_b", "web", "email_c", "email_a"]
+        assert _names(registry.get_scanners_for_query(MockQuery("phone"))) == ["web"]
+
+    def test_enable_disable_invalidates(self):
+        """Test disabled scanners drop out and return when re-enabled"""
+        registry = ScannerRegistry()
+        registry.register(DeclaredScanner("a", frozenset({"email"})))
+        registry.register(DeclaredScanner("b", frozenset({"email"})))
+
+        registry.disable_scanner("a")
+        assert _names(registry.get_scanners_for_query(MockQuery("email"))) == ["b"]
+        registry.enable_scanner("a")
+        assert _names(registry.get_scanners_for_query(MockQuery("email"))) == ["a", "b"]
+        assert registry.get_scanner_by_name("b").name == "b"
+        assert registry.get_scanner_by_name("missing") is None
+
+    def test_dynamic_scanners_checked_per_query(self):
+        """Test only scanners without declared handles call can_handle"""
+        registry = ScannerRegistry()
+        dynamic = DynamicScanner("dynamic", priority=0)
+        registry.register(DeclaredScanner("email", frozenset({"email"})))
+        registry.register(dynamic)
+
+        assert _names(registry.get_scanners_for_query(MockQuery("email"))) == ["dynamic", "email"]
+        assert dynamic.calls == 1
+        assert registry.get_scanner_stats()["dynamic_scanners"] == 1
+
+    def test_returned_list_is_a_copy(self):
+        """Test callers cannot mutate the cached bucket"""
+        registry = ScannerRegistry()
+        registry.register(DeclaredScanner("a", frozenset({"email"})))
+        registry.get_scanners_for_query(MockQuery("email")).clear()
+        assert _names(registry.get_scanners_for_query(MockQuery("email"))) == ["a"]
+
+    def test_stats_accept_plain_string_types(self):
+        """Test stats handle scanner types that are not enums"""
+        registry = ScannerRegistry()
+        registry.register(DeclaredScanner("a", ANY_QUERY_TYPE, scanner_type="custom"))
+        assert registry.get_scanner_stats()["by_type"] == {"custom": {"total": 1, "enabled": 1}}
+
+    def test_declared_can_handle(self):
+        """Test can_handle is derived from handles"""
+        assert DeclaredScanner("a", frozenset({"email"})).can_handle(MockQuery("Email"))
+        assert not DeclaredScanner("a", frozenset({"email"})).can_handle(MockQuery("phone"))
+        with pytest.raises(NotImplementedError):
+            DeclaredScanner("a", None).can_handle(MockQuery("email"))
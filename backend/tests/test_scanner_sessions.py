@@ -0,0 +1,165 @@
+"""
+Test suite for pooled scanner sessions.
+Tests that orchestrators lend long-lived sessions to their scanners, run
+them concurrently under per-scanner timeouts and reuse keep-alive
+connections, against a local stand-in HTTP server.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp import web
+
+from app.scanners.public_records_scanners import BasePublicRecordsScanner, PublicRecordsOrchestrator
+from app.scanners.session_pool import ScannerSessionPool
+
+
+class StandInServer:
+    """Local HTTP server that records which client ports connected"""
+
+    def __init__(self):
+        self.peers = []
+        self.requests = 0
+        self.runner = None
+        self.base_url = None
+
+    async def _record(self, request):
+        self.requests += 1
+        self.peers.append(request.transport.get_extra_info('peername')[1])
+        return web.json_response({'path': request.path})
+
+    async def _slow(self, request):
+        await asyncio.sleep(5)
+        return web.json_response({})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/records', self._record)
+        app.router.add_get('/slow', self._slow)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class FakeRecordsScanner(BasePublicRecordsScanner):
+    """Scanner that makes a few requests to the stand-in server"""
+
+    def __init__(self, name, base_url, path='/records', requests=3):
+        super().__init__(name, 'test', rate_limit=600000)
+        self.base_url = base_url
+        self.path = path
+        self.requests = requests
+
+    def can_handle(self, query_type):
+        return True
+
+    async def search(self, query, **kwargs):
+        responses = []
+        for _ in range(self.requests):
+            responses.append(await self._make_request(f'{self.base_url}{self.path}', params={'q': query}))
+        if any('error' in response for response in responses):
+            raise RuntimeError(responses[0]['error'])
+        return responses
+
+
+def _orchestrator(server, **kwargs):
+    orchestrator = PublicRecordsOrchestrator('test', **kwargs)
+    orchestrator.scanners = {
+        name: FakeRecordsScanner(name, server.base_url) for name in ('alpha', 'beta', 'gamma')
+    }
+    for scanner in orchestrator.scanners.values():
+        scanner.session_pool = orchestrator.session_pool
+    return orchestrator
+
+
+class TestPooledSessions:
+    """Test suite for orchestrator-owned sessions"""
+
+    @pytest.mark.asyncio
+    async def test_sessions_stay_open_while_scanners_run(self):
+        """Test every scanner gets results instead of a closed-session error"""
+        server = StandInServer()
+        await server.start()
+        try:
+            async with _orchestrator(server) as orchestrator:
+                results = await orchestrator.search_all('John Smith')
+                assert {name: len(records) for name, records in results.items()} == {
+                    'alpha': 3, 'beta': 3, 'gamma': 3
+                }
+                assert all(not scanner.session.closed for scanner in orchestrator.scanners.values())
+                assert orchestrator.session_pool.sessions_created == 1
+            assert all(scanner.session.closed for scanner in orchestrator.scanners.values())
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_connections_are_reused_across_searches(self):
+        """Test repeated searches reuse warm connections rather than opening new ones"""
+        server = StandInServer()
+        await server.start()
+        try:
+            async with _orchestrator(server) as orchestrator:
+                for _ in range(3):
+                    await orchestrator.search_all('Jane Doe')
+                assert server.requests == 27
+                # At most one connection per concurrently running scanner
+                assert len(set(server.peers)) <= 3
+                assert orchestrator.session_pool.get_stats()['idle_connections'] >= 1
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_slow_scanner_times_out_alone(self):
+        """Test a per-scanner timeout fails only that scanner"""
+        server = StandInServer()
+        await server.start()
+        try:
+            async with _orchestrator(server, scanner_timeouts={'beta': 0.2}) as orchestrator:
+                orchestrator.scanners['beta'].path = '/slow'
+                results = await asyncio.wait_for(orchestrator.search_all('John Smith'), timeout=3)
+                assert len(results['alpha']) == 3 and len(results['gamma']) == 3
+                assert results['beta'] == []
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_standalone_scanner_owns_its_session(self):
+        """Test a scanner used on its own still opens and closes a private session"""
+        server = StandInServer()
+        await server.start()
+        try:
+            scanner = FakeRecordsScanner('solo', server.base_url, requests=1)
+            async with scanner:
+                assert len(await scanner.search('x')) == 1
+                session = scanner.session
+            assert session.closed and scanner.session is None
+        finally:
+            await server.stop()
+
+
+class TestSessionPool:
+    """Test suite for the session pool"""
+
+    def test_pool_starts_over_on_a_new_event_loop(self):
+        """Test sessions from a finished loop are not handed out again"""
+        pool = ScannerSessionPool()
+
+        async def borrow():
+            return await pool.get_session('records', headers={'User-Agent': 'test'})
+
+        first = asyncio.run(borrow())
+        second = asyncio.run(borrow())
+        assert first is not second
+        assert pool.sessions_created == 2
+        asyncio.run(pool.close())
@@ -0,0 +1,211 @@
+"""
+Test suite for historical result search.
+Tests FTS5 indexing, ranking, snippets and the incremental indexer on SQLite.
+"""
+
+import pytest
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, MetaData, Table, Column, String, DateTime, JSON
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base
+from app.db.models import ScanResult, Report, ScannerType
+import app.core.search_index as search_module
+from app.core.search_index import SearchIndex, SearchIndexer, flatten_document, make_document
+from app.db.result_persistence import ScanResultWriter
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _add_results(engine, payloads):
+    with sessionmaker(bind=engine)() as session:
+        records = [
+            ScanResult(query_id=index // 2 + 1, scanner_name=name, scanner_type=ScannerType.API, result_data=data)
+            for index, (name, data) in enumerate(payloads)
+        ]
+        session.add_all(records)
+        session.commit()
+        return [record.id for record in records]
+
+
+class TestSearchIndex:
+    """Test suite for indexing and querying"""
+
+    def test_flatten_document(self):
+        """Test nested JSON becomes key/value text without nulls or booleans"""
+        text = flatten_document({"profile": {"email": "a@b.com", "tags": ["x", "y"]}, "ok": True, "none": None})
+        assert text == "email a@b.com tags x tags y"
+
+    def test_catch_up_and_ranked_search(self, engine):
+        """Test watermark indexing and ranked, highlighted results"""
+        _add_results(engine, [
+            ("whois", {"registrant": "Acme Holdings", "country": "NL"}),
+            ("breach_check", {"breaches": [{"name": "Acme breach", "records": 1000}], "note": "acme acme"}),
+            ("dns", {"mx": "mail.example.com"}),
+        ])
+        index = SearchIndex(engine)
+        assert index.catch_up("scan_result") == 3
+        assert index.catch_up("scan_result") == 0
+
+        results = index.search("acme")
+        assert results["total"] == 2
+        assert [r["title"] for r in results["results"]] == ["breach_check", "whois"]
+        assert "<mark>" in results["results"][0]["snippet"]
+        assert index.search('acme" (')["total"] == 2
+        assert index.search("holding*")["results"][0]["title"] == "whois"
+
+    def test_pagination_and_type_filter(self, engine):
+        """Test pages do not overlap and doc_type narrows results"""
+        _add_results(engine, [(f"scanner_{i}", {"finding": f"shared token {i}"}) for i in range(25)])
+        with sessionmaker(bind=engine)() as session:
+            session.add(Report(query_id=1, user_id=1, title="Shared report", content="shared findings"))
+            session.commit()
+
+        index = SearchIndex(engine)
+        while index.catch_up("scan_result", batch_size=10):
+            pass
+        index.catch_up("report")
+
+        first = index.search("shared", page=1, page_size=10)
+        second = index.search("shared", page=2, page_size=10)
+        assert first["total"] == 26
+        assert not {r["doc_id"] for r in first["results"]} & {r["doc_id"] for r in second["results"]}
+        assert index.search("shared", doc_type="report")["results"][0]["title"] == "Shared report"
+
+    def test_reindex_replaces_document(self, engine):
+        """Test re-indexing an updated row replaces its old text"""
+        [result_id] = _add_results(engine, [("whois", {"registrant": "Old Name"})])
+        index = SearchIndex(engine)
+        index.catch_up("scan_result")
+
+        with sessionmaker(bind=engine)() as session:
+            session.get(ScanResult, result_id).result_data = {"registrant": "New Name"}
+            session.commit()
+        index.index_documents(index.build_documents("scan_result", [result_id]))
+
+        assert index.search("old")["total"] == 0
+        assert index.search("new")["total"] == 1
+
+    def test_late_committed_rows_are_not_skipped(self, engine):
+        """Test a row stamped before the watermark but committed after it is indexed"""
+        now = datetime.now(timezone.utc)
+        with sessionmaker(bind=engine)() as session:
+            session.add(ScanResult(query_id=1, scanner_name="first", scanner_type=ScannerType.API,
+                                   result_data={"value": "early"}, created_at=now))
+            session.commit()
+        index = SearchIndex(engine)
+        assert index.catch_up("scan_result") == 1
+
+        with sessionmaker(bind=engine)() as session:
+            session.add(ScanResult(query_id=1, scanner_name="late", scanner_type=ScannerType.API,
+                                   result_data={"value": "straggler"}, created_at=now - timedelta(seconds=30)))
+            session.commit()
+        assert index.catch_up("scan_result") == 1
+        assert index.search("straggler")["results"][0]["title"] == "late"
+        assert index.catch_up("scan_result") == 0
+
+
+    @pytest.mark.asyncio
+    async def test_catch_up_reads_enterprise_result_rows(self, tmp_path):
+        """Test catch-up indexes rows written through the enterprise writer (UUID ids, data column)"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'enterprise.db'}")
+        # Shape of app.db.enterprise_models.ScanResult, with ids stored as text on SQLite
+        scan_results = Table(
+            "scan_results", MetaData(),
+            Column("id", String(36), primary_key=True), Column("query_id", String(36)),
+            Column("scanner_name", String(100)), Column("status", String(20)), Column("data", JSON),
+            Column("created_at", DateTime(timezone=True)),
+        )
+        scan_results.create(engine)
+        rows = [
+            {"id": str(uuid.uuid4()), "query_id": str(uuid.uuid4()), "scanner_name": "breach_check",
+             "status": "completed", "data": {"breach": "Acme leak"}, "created_at": datetime.now(timezone.utc)},
+            {"id": str(uuid.uuid4()), "query_id": str(uuid.uuid4()), "scanner_name": "whois",
+             "status": "completed", "data": {"registrant": "Globex"}, "created_at": datetime.now(timezone.utc)},
+        ]
+        with sessionmaker(bind=engine)() as session:
+            async with ScanResultWriter(session) as writer:
+                writer.stage_rows(scan_results, rows)
+
+        index = SearchIndex(engine)
+        assert index.catch_up("scan_result") == 2
+        [hit] = index.search("acme")["results"]
+        assert (hit["doc_id"], hit["title"]) == (rows[0]["id"], "breach_check")
+        assert index.catch_up("scan_result") == 0
+        engine.dispose()
+
+
+class TestSearchIndexer:
+    """Test suite for the background indexer"""
+
+    @pytest.mark.asyncio
+    async def test_committed_records_are_indexed_once(self, engine):
+        """Test queued records are indexed and the watermark catch-up does not duplicate them"""
+        indexer = SearchIndexer(SearchIndex(engine), batch_size=2)
+        with sessionmaker(bind=engine)() as session:
+            records = [ScanResult(query_id=1, scanner_name=f"s{i}", scanner_type=ScannerType.API,
+                                  result_data={"value": "needle"}) for i in range(5)]
+            session.add_all(records)
+            session.commit()
+            indexer.enqueue_records(records)
+
+        assert indexer.get_stats()["queued"] == 5
+        assert await indexer.flush() == 5
+        assert indexer.stats["batches"] == 3
+        while await indexer.catch_up():
+            pass
+        assert indexer.index.search("needle")["total"] == 5
+
+    @pytest.mark.asyncio
+    async def test_write_path_documents_with_uuid_ids(self, engine):
+        """Test documents pushed from the write path are indexed without a table read"""
+        indexer = SearchIndexer(SearchIndex(engine))
+        result_id, query_id = uuid.uuid4(), uuid.uuid4()
+        indexer.enqueue_documents([
+            make_document("scan_result", result_id, query_id, "breach_check", {"breach": "Acme leak"})
+        ])
+
+        assert await indexer.flush() == 1
+        [hit] = indexer.index.search("acme")["results"]
+        assert hit["doc_id"] == str(result_id)
+        assert hit["query_id"] == str(query_id)
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(engine, monkeypatch):
+    """Test the API route returns ranked results and validates doc_type"""
+    fastapi = pytest.importorskip("fastapi")
+    from app.api.search import search_results
+
+    _add_results(engine, [("whois", {"registrant": "Acme Holdings"})])
+    indexer = SearchIndexer(SearchIndex(engine))
+    indexer.index.catch_up("scan_result")
+    monkeypatch.setattr(search_module, "_search_indexer", indexer)
+
+    response = await search_results(q="acme", doc_type=None, page=1, page_size=20)
+    assert response["results"][0]["title"] == "whois"
+    with pytest.raises(fastapi.HTTPException):
+        await search_results(q="acme", doc_type="bogus", page=1, page_size=20)
+
+    def failing_search(*args):
+        raise RuntimeError("database password=hunter2 unreachable")
+
+    monkeypatch.setattr(indexer.index, "search", failing_search)
+    with pytest.raises(fastapi.HTTPException) as error:
+        await search_results(q="acme", doc_type=None, page=1, page_size=20)
+    assert error.value.detail == "Search failed"
@@ -0,0 +1,126 @@
+"""
+Test suite for cold start behaviour.
+Tests import-time budgets of the app entry points, lazy scanner module
+registration and the lazy loading helpers.
+"""
+
+import os
+import sys
+import types
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from app.core.lazy import LazyObject, is_loaded, lazy_import
+from app.core.startup_profiler import parse_importtime, profile_imports
+from app.scanners.base import BaseScannerModule, ScannerRegistry
+
+# Generous so slow CI machines pass; a regression that pulls scanner or
+# analytics dependencies back into boot still shows up as heavy modules
+BOOT_BUDGET_SECONDS = float(os.getenv("BOOT_IMPORT_BUDGET_SECONDS", "6.0"))
+
+
+class TestBootTime:
+    """Regression tests for application import time"""
+
+    @pytest.mark.parametrize("target", ["app.main", "app.enterprise_main"])
+    def test_entry_point_boots_without_heavy_modules(self, target):
+        """Test importing an app stays within budget and defers heavy modules"""
+        profile = profile_imports(target)
+        assert profile.returncode == 0
+        assert profile.heavy_loaded() == []
+        assert "app.scanners.email_scanners" not in profile.loaded
+        assert "app.scanners.phone_scanners" not in profile.loaded
+        assert profile.import_seconds < BOOT_BUDGET_SECONDS
+
+    def test_parse_importtime(self):
+        """Test -X importtime lines are parsed and unrelated output ignored"""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "some log line\n"
+            "import time:       300 |        420 | json\n"
+        )
+        timings = parse_importtime(output)
+        assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+            ("json.decoder", 120, 120, 1), ("json", 300, 420, 0)
+        ]
+
+
+class StubScanner(BaseScannerModule):
+    async def scan(self, query):
+        return {}
+
+
+def _install_fake_module(name, scanner_name, handles, calls):
+    module = types.ModuleType(name)
+
+    def register(registry):
+        calls.append(name)
+        scanner = StubScanner(scanner_name, "test")
+        scanner.handles = frozenset(handles)
+        registry.register(scanner)
+
+    module.register = register
+    return module
+
+
+class TestLazyScannerRegistry:
+    """Test suite for scanner modules imported on first use"""
+
+    def test_modules_load_only_for_matching_queries(self, monkeypatch):
+        """Test a query only imports the scanner modules declared for its type"""
+        calls = []
+        for name, scanner, handles in [("fake_email_mod", "fake_email", {"email"}),
+                                       ("fake_phone_mod", "fake_phone", {"phone"})]:
+            monkeypatch.setitem(sys.modules, name, _install_fake_module(name, scanner, handles, calls))
+        registry = ScannerRegistry()
+        registry.register_lazy("fake_email_mod", "register", frozenset({"email"}))
+        registry.register_lazy("fake_phone_mod", "register", frozenset({"phone"}))
+        assert calls == []
+
+        query = types.SimpleNamespace(query_type="email")
+        assert [s.name for s in registry.get_scanners_for_query(query)] == ["fake_email"]
+        assert calls == ["fake_email_mod"]
+        assert registry.pending_modules == ["fake_phone_mod"]
+
+        assert registry.get_scanner_by_name("fake_phone") is not None
+        assert calls == ["fake_email_mod", "fake_phone_mod"]
+        assert registry.get_scanner_stats()["total_scanners"] == 2
+
+    def test_failed_module_is_skipped(self):
+        """Test a scanner module that cannot be imported does not break lookups"""
+        registry = ScannerRegistry()
+        registry.register_lazy("app.scanners.does_not_exist", "register", frozenset({"email"}))
+        assert registry.get_scanners_for_query(types.SimpleNamespace(query_type="email")) == []
+        assert registry.pending_modules == []
+
+
+class TestLazyHelpers:
+    """Test suite for lazy_import and LazyObject"""
+
+    def test_lazy_object_builds_once_on_first_use(self):
+        """Test the factory runs on first attribute access only"""
+        built = []
+
+        def factory():
+            built.append(1)
+            return types.SimpleNamespace(value=42)
+
+        proxy = LazyObject(factory)
+        assert not is_loaded(proxy)
+        assert proxy.value == 42
+        proxy.value = 7
+        assert proxy.value == 7
+        assert built == [1]
+        assert is_loaded(proxy)
+
+    def test_lazy_import_missing_module(self):
+        """Test missing optional modules still fail at the import site"""
+        with pytest.raises(ImportError):
+            lazy_import("definitely_not_an_installed_module")
+        assert lazy_import("os") is os
@@ -0,0 +1,147 @@
+"""
+Test suite for the streaming structured-data parsers.
+Tests JSON, XML, CSV and HTML-table records across arbitrary chunk
+boundaries, early filtering, time to first match and flat memory use.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tracemalloc
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scanners.streaming_parsers import (
+    aiter_structured_records, iter_structured_records, query_terms
+)
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _large_json(records, match_at=None):
+    """A ``{"result": {"results": [...]}}`` body produced lazily, one chunk per 500 records"""
+    yield b'{"help": "https://example.org", "result": {"count": %d, "results": [' % records
+    for start in range(0, records, 500):
+        batch = []
+        for i in range(start, min(start + 500, records)):
+            name = 'John Smith' if i == match_at else f'person {i}'
+            batch.append(json.dumps({'id': i, 'name': name, 'notes': 'lorem ipsum ' * 8}))
+        yield (',' if start else '').encode() + ','.join(batch).encode()
+    yield b']}}'
+
+
+class TestFormats:
+    """Test suite for each format across chunk boundaries"""
+
+    def test_json_records_under_prefix(self):
+        """Test records under a nested prefix survive any chunking"""
+        doc = {'help': [1, 2], 'result': {'count': 4, 'results': [
+            {'title': 'A "quoted" ] bracket', 'score': 1.5}, {'title': 'café'}, 12345, [1, [2]]
+        ]}}
+        raw = json.dumps(doc).encode()
+        for size in (1, 2, 3, 7, 64, len(raw)):
+            records = list(iter_structured_records(_chunks(raw, size), 'application/json',
+                                                   record_path='result.results.item'))
+            assert records == doc['result']['results']
+
+    def test_json_without_prefix(self):
+        """Test a top-level array streams its items and an object is one record"""
+        items = json.dumps([{'a': i} for i in range(5)]).encode()
+        assert list(iter_structured_records(_chunks(items, 3), 'json')) == [{'a': i} for i in range(5)]
+        assert list(iter_structured_records(_chunks(b'  {"x": 1}', 2), 'json')) == [{'x': 1}]
+
+    def test_xml_children_of_root(self):
+        """Test each child of the root becomes a record with its attributes"""
+        xml = b'<?xml version="1.0"?><root><item id="1">alpha</item><item id="2">beta<x/></item></root>'
+        for size in (1, 5, len(xml)):
+            assert list(iter_structured_records(_chunks(xml, size), 'text/xml')) == [
+                {'item': 'alpha', 'item_id': '1'}, {'item': 'beta', 'item_id': '2'}
+            ]
+
+    def test_csv_quoted_newlines_and_split_characters(self):
+        """Test multi-line quoted fields and multi-byte characters split across chunks"""
+        text = 'name,bio\r\n"Smith, John","line one\r\nline ""two"""\r\nJosé,Zürich\r\nlast,row'
+        expected = list(csv.DictReader(io.StringIO(text, newline='')))
+        for size in (1, 2, 3, 5, 100):
+            assert list(iter_structured_records(_chunks(text.encode(), size), 'text/csv')) == expected
+
+    def test_html_tables(self):
+        """Test rows of the first three tables are keyed by their header cells"""
+        html = (
+            '<html><body><table><tr><th>Name</th><th>City</th></tr>'
+            '<tr><td> John <b>Smith</b></td><td>NYC</td></tr>'
+            '<tr><td>Jane<td>LA</tr><tr><td>short row</td></tr></table>'
+            + ''.join(f'<table><tr><th>n</th></tr><tr><td>{i}</td></tr></table>' for i in range(4))
+            + '</body></html>'
+        ).encode()
+        for size in (1, 7, len(html)):
+            assert list(iter_structured_records(_chunks(html, size), 'text/html')) == [
+                {'Name': 'JohnSmith', 'City': 'NYC'}, {'Name': 'Jane', 'City': 'LA'}, {'n': '0'}, {'n': '1'}
+            ]
+
+
+class TestFiltering:
+    """Test suite for early filtering and streaming behaviour"""
+
+    def test_only_rows_with_every_term_are_kept(self):
+        """Test the query filter applies to every format"""
+        terms = query_terms('John SMITH')
+        rows = [{'name': 'John Smith'}, {'name': 'John Doe'}, {'name': 'Smith, John'}]
+        raw = json.dumps(rows).encode()
+        assert list(iter_structured_records([raw], 'json', terms)) == [rows[0], rows[2]]
+        text = 'name\nJohn Smith\nJohn Doe\n"Smith, John"\n'.encode()
+        assert [r['name'] for r in iter_structured_records([text], 'csv', terms)] == ['John Smith', 'Smith, John']
+        # Escaped characters are matched on their decoded value
+        escaped = json.dumps([{'name': 'José'}]).encode()
+        assert list(iter_structured_records([escaped], 'json', ['josé'])) == [{'name': 'José'}]
+
+    def test_key_names_do_not_match(self):
+        """Test a query equal to a key name only matches records with that value"""
+        rows = [{'name': 'Ann', 'email': 'ann@example.com'}, {'name': 'Email Team', 'tags': ['email']},
+                {'name': 'Bob', 'contact': {'email': 'bob@example.com'}}]
+        raw = json.dumps(rows).encode()
+        assert list(iter_structured_records([raw], 'json', ['email'])) == [rows[1]]
+        assert list(iter_structured_records([raw], 'json', ['name'])) == []
+
+    def test_first_match_arrives_before_the_body_ends(self):
+        """Test a match early in a large body is yielded after a few chunks"""
+        consumed = []
+
+        def counting(chunks):
+            for chunk in chunks:
+                consumed.append(len(chunk))
+                yield chunk
+
+        records = iter_structured_records(counting(_large_json(20000, match_at=700)), 'json',
+                                          query_terms('john smith'), 'result.results.item')
+        assert next(records)['id'] == 700
+        assert len(consumed) <= 3
+
+    def test_memory_stays_flat(self):
+        """Test peak memory does not grow with the size of the body"""
+        tracemalloc.start()
+        try:
+            matched = list(iter_structured_records(_large_json(40000, match_at=39000), 'json',
+                                                   ['john'], 'result.results.item'))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert [r['id'] for r in matched] == [39000]
+        # The body is about 5 MB; only one chunk and one record are held at a time
+        assert peak < 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_async_stream(self):
+        """Test records are parsed from an async byte stream"""
+        async def stream():
+            for chunk in _chunks(b'<r><a>1</a><a>2</a></r>', 4):
+                yield chunk
+
+        records = [record async for record in aiter_structured_records(stream(), 'application/xml')]
+        assert records == [{'a': '1'}, {'a': '2'}]
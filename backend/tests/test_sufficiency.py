@@ -0,0 +1,143 @@
+"""
+Test suite for early termination of multi-scanner queries.
+Tests per-field confidence tracking, cancellation of running scanners and
+skipped-stage accounting.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.core.execution_planner import ExecutionPlanner, ScannerStatsStore
+from app.core.sufficiency import SufficiencyEvaluator, default_targets
+from app.scanners.enterprise_scanner_engine import (
+    BaseScanner, EnterpriseScannerOrchestrator, EnterpriseScannerRegistry, ScannerCategory, ScannerStatus
+)
+
+
+@pytest.fixture
+def planner():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield ExecutionPlanner(ScannerStatsStore(sessionmaker(bind=engine)))
+    engine.dispose()
+
+
+class SleepyScanner(BaseScanner):
+    def __init__(self, name, delay, payload, cost_credits=1):
+        super().__init__()
+        self._name = name
+        self.delay = delay
+        self.payload = payload
+        self.config.cost_credits = cost_credits
+        self.config.timeout = 5
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def description(self):
+        return self._name
+
+    @property
+    def category(self):
+        return ScannerCategory.EMAIL
+
+    async def _scan_implementation(self, target, **kwargs):
+        await asyncio.sleep(self.delay)
+        return dict(self.payload)
+
+
+VERIFIED = {"email": "jane@example.com", "name": "Jane Doe", "confidence": 0.95}
+
+
+class TestSufficiencyEvaluator:
+    """Test suite for confidence tracking"""
+
+    def test_targets_met_by_field(self):
+        """Test each target field must reach its confidence before stopping"""
+        evaluator = SufficiencyEvaluator({"email": 0.8, "phone": 0.8})
+        assert not evaluator.add_result("email_validator", {"profile": {"emails": ["jane@example.com"]}, "confidence": 0.9})
+        assert evaluator.field_confidence["email"] >= 0.8
+        assert evaluator.add_result("phone_validator", {"phone_number": "+15550100", "confidence": 0.9})
+        assert evaluator.report()["sufficient"]
+
+    def test_errors_and_low_confidence_do_not_count(self):
+        """Test failed payloads and weak sources leave targets unmet"""
+        evaluator = SufficiencyEvaluator({"name": 0.8})
+        evaluator.add_result("x", {"error": "boom", "name": "Jane"})
+        evaluator.add_result("unknown_scanner", {"name": "Jane", "confidence": 0.3})
+        assert not evaluator.is_sufficient()
+        assert evaluator.results_seen == 2
+
+    def test_defaults_by_query_type(self):
+        """Test default targets exist for common query types and none for unknown ones"""
+        assert "email" in default_targets("email")
+        assert SufficiencyEvaluator.for_query("image") is None
+        assert SufficiencyEvaluator.for_query("image", {"url": 0.5}).targets == {"url": 0.5}
+
+
+class TestEarlyTermination:
+    """Test suite for stopping scanners once sufficient"""
+
+    @pytest.mark.asyncio
+    async def test_batch_cancels_running_scanners(self, planner):
+        """Test slow scanners are cancelled once a fast one meets every target"""
+        registry = EnterpriseScannerRegistry()
+        registry.register(SleepyScanner("email_validator", 0.01, VERIFIED))
+        registry.register(SleepyScanner("slow", 2.0, {"name": "Other"}, cost_credits=4))
+        orchestrator = EnterpriseScannerOrchestrator(registry, planner=planner)
+        evaluator = SufficiencyEvaluator({"email": 0.8, "name": 0.7})
+
+        results = await asyncio.wait_for(
+            orchestrator.execute_scan_batch("jane@example.com", sufficiency=evaluator), timeout=1.5
+        )
+        assert results["email_validator"].status == ScannerStatus.COMPLETED
+        assert results["slow"].status == ScannerStatus.CANCELLED
+        report = evaluator.report()
+        assert report["cancelled_scanners"] == ["slow"]
+        assert report["saved_credits"] == 4
+
+    @pytest.mark.asyncio
+    async def test_planned_scan_skips_later_stages(self, planner):
+        """Test a sufficient first stage saves the credits of later stages"""
+        registry = EnterpriseScannerRegistry()
+        registry.register(SleepyScanner("email_validator", 0.01, VERIFIED))
+        registry.register(SleepyScanner("pricey", 0.01, {"name": "Other"}, cost_credits=3))
+        orchestrator = EnterpriseScannerOrchestrator(registry, planner=planner)
+        evaluator = SufficiencyEvaluator({"email": 0.8, "name": 0.7})
+
+        results, plan = await orchestrator.execute_planned_scan(
+            "jane@example.com", user_plan="enterprise", sufficiency=evaluator
+        )
+        assert list(results) == ["email_validator"]
+        assert plan.skipped == {"pricey": "sufficient"}
+        assert plan.saved_credits == 3
+        assert evaluator.report()["skipped_scanners"] == ["pricey"]
+
+    @pytest.mark.asyncio
+    async def test_planned_scan_cancellations_count_once(self, planner):
+        """Test scanners cancelled mid-stage are saved credits in both the plan and the report"""
+        registry = EnterpriseScannerRegistry()
+        registry.register(SleepyScanner("email_validator", 0.01, VERIFIED))
+        registry.register(SleepyScanner("slow", 2.0, {"name": "Other"}))
+        orchestrator = EnterpriseScannerOrchestrator(registry, planner=planner)
+        evaluator = SufficiencyEvaluator({"email": 0.8, "name": 0.7})
+
+        results, plan = await asyncio.wait_for(orchestrator.execute_planned_scan(
+            "jane@example.com", user_plan="enterprise", sufficiency=evaluator
+        ), timeout=1.5)
+        assert plan.skipped == {"slow": "cancelled"}
+        assert plan.saved_credits == evaluator.report()["saved_credits"] == 1
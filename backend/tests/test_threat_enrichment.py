@@ -0,0 +1,143 @@
+"""
+Test suite for bulk IOC enrichment.
+Runs the enrichment pipeline against a local stub ThreatCrowd feed server.
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from contextlib import asynccontextmanager
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("numpy")
+web = pytest.importorskip("aiohttp.web")
+
+from app.core.threat_intelligence import ThreatIntelligenceProcessor, IOCType
+
+
+@asynccontextmanager
+async def stub_feed_server():
+    """Local ThreatCrowd stand-in that counts requests and tracks concurrency"""
+    state = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+
+    async def domain_report(request):
+        state["requests"] += 1
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.02)
+        state["in_flight"] -= 1
+        domain = request.query["domain"]
+        if domain.startswith("missing"):
+            return web.Response(status=404)
+        if domain.startswith("limited"):
+            return web.Response(status=429)
+        return web.json_response({"response_code": "1", "domain": domain})
+
+    app = web.Application()
+    app.router.add_get("/domain/report/", domain_report)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    try:
+        yield f"http://127.0.0.1:{port}", state
+    finally:
+        await runner.cleanup()
+
+
+def _processor(endpoint: str, max_concurrency: int = 5) -> ThreatIntelligenceProcessor:
+    processor = ThreatIntelligenceProcessor()
+    for source_id, config in processor.feed_sources.items():
+        config["enabled"] = source_id == "threatcrowd"
+    processor.feed_sources["threatcrowd"]["endpoint"] = endpoint
+    processor.feed_sources["threatcrowd"]["max_concurrency"] = max_concurrency
+    return processor
+
+
+class TestBulkEnrichment:
+    """Test suite for the bulk enrichment pipeline"""
+
+    def test_prepare_indicators_dedupes_and_validates(self):
+        """Test invalid and duplicate indicators are dropped"""
+        processor = ThreatIntelligenceProcessor()
+        prepared = processor.prepare_indicators([
+            ("evil.com", "domain"),
+            ("evil.com", "DOMAIN"),
+            ("not a domain", "domain"),
+            ("8.8.8.8", "ip_address"),
+            ("x", "unknown_type"),
+        ])
+        assert prepared == [("evil.com", IOCType.DOMAIN), ("8.8.8.8", IOCType.IP_ADDRESS)]
+
+    @pytest.mark.asyncio
+    async def test_bulk_enrichment_uses_cache(self):
+        """Test repeated IOCs are served from the enrichment cache"""
+        async with stub_feed_server() as (endpoint, state):
+            processor = _processor(endpoint)
+            indicators = [(f"host{i}.com", "domain") for i in range(10)]
+
+            iocs = await processor.process_iocs_bulk(indicators + indicators)
+            assert [ioc.value for ioc in iocs] == [value for value, _ in indicators]
+            assert all("threatcrowd" in ioc.sources for ioc in iocs)
+            assert state["requests"] == 10
+
+            await processor.process_iocs_bulk(indicators)
+            assert state["requests"] == 10
+            assert processor.get_enrichment_stats()["cache_hits"] == 10
+
+    @pytest.mark.asyncio
+    async def test_per_source_concurrency_limit(self):
+        """Test a source never sees more concurrent requests than its limit"""
+        async with stub_feed_server() as (endpoint, state):
+            processor = _processor(endpoint, max_concurrency=3)
+            indicators = [(f"host{i}.com", "domain") for i in range(20)]
+
+            streamed = [ioc async for ioc in processor.process_iocs_stream(indicators)]
+            assert len(streamed) == 20
+            assert 1 < state["max_in_flight"] <= 3
+
+    @pytest.mark.asyncio
+    async def test_only_not_found_is_negative_cached(self):
+        """Test 404s are cached while rate-limited lookups are retried"""
+        async with stub_feed_server() as (endpoint, state):
+            processor = _processor(endpoint)
+            indicators = [("missing.com", "domain"), ("limited.com", "domain")]
+
+            iocs = await processor.process_iocs_bulk(indicators)
+            assert all("threatcrowd" not in ioc.sources for ioc in iocs)
+            assert state["requests"] == 2
+
+            await processor.process_iocs_bulk(indicators)
+            assert state["requests"] == 3
+
+    def test_processor_reused_across_event_loops(self):
+        """Test per-source limits work when the processor is used from a second loop"""
+        processor = ThreatIntelligenceProcessor()
+
+        async def run(batch):
+            async with stub_feed_server() as (endpoint, state):
+                processor.feed_sources.update(_processor(endpoint, max_concurrency=2).feed_sources)
+                iocs = await processor.process_iocs_bulk([(f"{batch}{i}.com", "domain") for i in range(6)])
+                assert [ioc.value for ioc in iocs] == [f"{batch}{i}.com" for i in range(6)]
+                assert all("threatcrowd" in ioc.sources for ioc in iocs)
+                assert state["requests"] == 6 and state["max_in_flight"] <= 2
+
+        asyncio.run(run("first"))
+        asyncio.run(run("second"))
+
+    @pytest.mark.asyncio
+    async def test_bulk_prepares_indicators_once(self, monkeypatch):
+        """Test bulk enrichment validates its indicators a single time"""
+        async with stub_feed_server() as (endpoint, state):
+            processor = _processor(endpoint)
+            calls = []
+            prepare = processor.prepare_indicators
+            monkeypatch.setattr(processor, "prepare_indicators", lambda items: calls.append(1) or prepare(items))
+
+            await processor.process_iocs_bulk([("evil.com", "domain"), ("8.8.8.8", "ip_address")])
+            assert len(calls) == 1
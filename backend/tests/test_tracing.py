@@ -0,0 +1,187 @@
+"""
+Test suite for request tracing.
+Tests span propagation across asyncio tasks, automatic scanner and DB
+spans, the HTTP middleware and the /debug/traces breakdowns.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.tracing import RingBufferExporter, Tracer, TracingMiddleware, get_tracer, instrument_sqlalchemy
+
+
+@pytest.fixture
+def tracer():
+    return Tracer(RingBufferExporter(capacity=10), enabled=True)
+
+
+class TestSpans:
+    """Test suite for span recording"""
+
+    @pytest.mark.asyncio
+    async def test_spans_propagate_to_child_tasks(self, tracer):
+        """Test spans opened in gathered tasks attach to the span that spawned them"""
+        async def child(name):
+            with tracer.span(name, "scanner"):
+                await asyncio.sleep(0.01)
+
+        with tracer.trace("GET /x", "http") as root:
+            with tracer.span("fan-out") as fan_out:
+                await asyncio.gather(child("a"), child("b"))
+
+        trace = tracer.exporter.snapshot()[0]
+        by_name = {span.name: span for span in trace.spans}
+        assert by_name["fan-out"].parent_id == root.span_id
+        assert by_name["a"].parent_id == fan_out.span_id
+        assert by_name["b"].parent_id == fan_out.span_id
+
+    def test_outside_trace_is_noop(self, tracer):
+        """Test spans without an active trace record nothing"""
+        with tracer.span("orphan") as span:
+            span.set(ignored=True)
+        assert tracer.exporter.exported == 0
+
+        started = time.perf_counter()
+        for _ in range(10000):
+            with tracer.span("orphan"):
+                pass
+        assert time.perf_counter() - started < 0.5
+
+    def test_span_cap_per_trace(self):
+        """Test spans past the per-trace limit are counted as dropped"""
+        tracer = Tracer(RingBufferExporter(), enabled=True, max_spans=3)
+        with tracer.trace("job"):
+            for i in range(5):
+                with tracer.span(f"step {i}"):
+                    pass
+        trace = tracer.exporter.snapshot()[0]
+        assert len(trace.spans) == 3
+        assert trace.dropped == 3
+
+    def test_flame_breakdown(self, tracer):
+        """Test self time is attributed per kind and folded stacks are produced"""
+        with tracer.trace("GET /report", "http"):
+            with tracer.span("cache.get", "cache"):
+                time.sleep(0.01)
+            with tracer.span("aggregate", "aggregation"):
+                time.sleep(0.03)
+
+        flame = tracer.exporter.slowest(1)[0].flame()
+        kinds = flame["self_time_by_kind_ms"]
+        assert list(kinds)[0] == "aggregation"
+        assert kinds["cache"] >= 10
+        assert any(line.startswith("GET /report;aggregate ") for line in flame["folded"])
+        assert [child["name"] for child in flame["tree"]["children"]] == ["cache.get", "aggregate"]
+
+    def test_errors_recorded(self, tracer):
+        """Test an exception marks the span and still finishes the trace"""
+        with pytest.raises(ValueError):
+            with tracer.trace("job"):
+                with tracer.span("step"):
+                    raise ValueError("boom")
+        trace = tracer.exporter.snapshot()[0]
+        assert trace.spans[1].error == "ValueError: boom"
+        assert trace.root.error == "ValueError: boom"
+
+
+class TestInstrumentation:
+    """Test suite for automatic spans"""
+
+    @pytest.mark.asyncio
+    async def test_scanner_scan_is_traced(self):
+        """Test every BaseScannerModule.scan() gets a scanner span"""
+        pytest.importorskip("sqlalchemy")
+        from app.scanners.base import BaseScannerModule
+
+        class QuickScanner(BaseScannerModule):
+            handles = frozenset({"email"})
+
+            async def scan(self, query):
+                return {"ok": True}
+
+        tracer = get_tracer()
+        tracer.exporter.clear()
+        with tracer.trace("job"):
+            assert await QuickScanner("quick", "email").scan(None) == {"ok": True}
+        spans = tracer.exporter.snapshot()[-1].spans
+        assert [(s.name, s.kind) for s in spans[1:]] == [("scan quick", "scanner")]
+
+    def test_db_statements_and_commits(self):
+        """Test SQLAlchemy statements and commits show up as db spans"""
+        pytest.importorskip("sqlalchemy")
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import Session
+
+        instrument_sqlalchemy()
+        engine = create_engine("sqlite://")
+        tracer = get_tracer()
+        tracer.exporter.clear()
+        with tracer.trace("job"):
+            with Session(engine) as session:
+                session.execute(text("CREATE TABLE t (x INTEGER)"))
+                session.execute(text("INSERT INTO t VALUES (1)"))
+                session.commit()
+        names = [(s.name, s.attributes.get("statement")) for s in tracer.exporter.snapshot()[-1].spans[1:]]
+        assert ("db.execute", "INSERT") in names
+        assert ("db.commit", None) in names
+        engine.dispose()
+
+
+class TestHttpTracing:
+    """Test suite for the middleware and debug endpoint"""
+
+    @pytest.mark.asyncio
+    async def test_middleware_and_debug_endpoint(self):
+        """Test each request becomes a trace listed slowest-first by /debug/traces"""
+        pytest.importorskip("fastapi")
+        from app.api.debug import slowest_traces
+
+        tracer = get_tracer()
+        tracer.exporter.clear()
+
+        async def app(scope, receive, send):
+            delay = 0.03 if scope["path"] == "/slow" else 0.0
+            with tracer.span("scan work", "scanner"):
+                await asyncio.sleep(delay)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            pass
+
+        middleware = TracingMiddleware(app)
+        for path in ("/fast", "/slow", "/debug/traces"):
+            await middleware({"type": "http", "method": "GET", "path": path}, receive, send)
+
+        response = await slowest_traces(limit=5, kind="http", format="json")
+        names = [trace["name"] for trace in response["traces"]]
+        assert names == ["GET /slow", "GET /fast"]
+        slow = response["traces"][0]
+        assert slow["attributes"]["status_code"] == 200
+        assert slow["self_time_by_kind_ms"]["scanner"] >= 25
+
+    def test_debug_routes_mounted_only_when_enabled(self, monkeypatch):
+        """Test /debug is not exposed unless DEBUG_ROUTES_ENABLED is set"""
+        fastapi = pytest.importorskip("fastapi")
+        pytest.importorskip("httpx")
+        from fastapi.testclient import TestClient
+        from app.api.debug import include_debug_router
+
+        monkeypatch.delenv("DEBUG_ROUTES_ENABLED", raising=False)
+        hidden = fastapi.FastAPI()
+        assert include_debug_router(hidden) is False
+        assert TestClient(hidden).get("/debug/traces").status_code == 404
+
+        monkeypatch.setenv("DEBUG_ROUTES_ENABLED", "true")
+        exposed = fastapi.FastAPI()
+        assert include_debug_router(exposed) is True
+        assert TestClient(exposed).get("/debug/traces").status_code == 200
@@ -0,0 +1,138 @@
+"""
+Test suite for the vectorised trade flow analytics.
+Tests round trips, ownership cycles and sliding-window bursts against
+brute-force references, the wash-trading and circular-flow reports, and
+throughput on a large synthetic trade history.
+"""
+
+import random
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scanners.trade_analytics import (
+    TradeArrays, circular_flow_report, detect_wash_trading, generate_synthetic_trades, ownership_cycles,
+    round_trips, sliding_window_bursts, wash_trading_report
+)
+
+
+def _random_trades(rng, count=80, tokens=4, wallets=6, span=2000):
+    return TradeArrays.from_columns(
+        [rng.randrange(tokens) for _ in range(count)], [f'w{rng.randrange(wallets)}' for _ in range(count)],
+        [f'w{rng.randrange(wallets)}' for _ in range(count)], [rng.uniform(0.1, 5) for _ in range(count)],
+        [rng.randrange(span) for _ in range(count)],
+    )
+
+
+def _trade(token, seller, buyer, hours, price=1.0):
+    return {'token_id': token, 'seller': seller, 'buyer': buyer, 'price': price,
+            'timestamp': '2024-03-01T00:00:00Z' if not hours else 1709251200 + hours * 3600}
+
+
+class TestPatterns:
+    """Test suite for the individual pattern detectors against brute force"""
+
+    def test_round_trips_match_pairwise_reference(self):
+        """Test every A -> B trade answered by B -> A within the window is flagged, with its answer"""
+        rng = random.Random(1)
+        for _ in range(25):
+            trades = _random_trades(rng)
+            expected = [False] * len(trades)
+            for i in range(len(trades)):
+                for j in range(len(trades)):
+                    if (trades.seller[i] != trades.buyer[i] and trades.token[i] == trades.token[j]
+                            and trades.seller[j] == trades.buyer[i] and trades.buyer[j] == trades.seller[i]
+                            and 0 <= trades.timestamp[j] - trades.timestamp[i] <= 100):
+                        expected[i] = expected[j] = True
+            assert list(round_trips(trades, 100)) == expected
+
+    def test_sliding_window_bursts_match_reference(self):
+        """Test rows are flagged when some window holds enough rows of their key"""
+        rng = random.Random(2)
+        for _ in range(25):
+            trades = _random_trades(rng, tokens=3)
+            mask = sliding_window_bursts(trades.token, trades.timestamp, 150, 4)
+            expected = [False] * len(trades)
+            for i in range(len(trades)):
+                group = [j for j in range(len(trades)) if trades.token[j] == trades.token[i]
+                         and trades.timestamp[i] <= trades.timestamp[j] <= trades.timestamp[i] + 150]
+                if len(group) >= 4:
+                    for j in group:
+                        expected[j] = True
+            assert list(mask) == expected
+
+    def test_ownership_cycle_marks_the_whole_loop(self):
+        """Test A -> B -> C -> A within the window flags all three trades, and only those"""
+        trades = TradeArrays.from_records([
+            _trade(1, 'A', 'B', 1), _trade(1, 'B', 'C', 2), _trade(1, 'C', 'A', 3),
+            _trade(2, 'A', 'B', 1), _trade(2, 'B', 'A', 24 * 30),  # back to A, but a month later
+            _trade(3, 'D', 'E', 4),
+        ])
+        mask, cycles, longest = ownership_cycles(trades, window=7 * 24 * 3600)
+        assert list(mask) == [True, True, True, False, False, False]
+        assert cycles == 1 and longest == 3
+        assert not round_trips(trades, window=7 * 24 * 3600).any()
+
+
+class TestReports:
+    """Test suite for the wash-trading and circular-flow reports"""
+
+    def test_wash_trading_report_fields(self):
+        """Test the report keeps the estimated report's fields and explains what it found"""
+        trades = [_trade(1, 'A', 'B', 1, 10), _trade(1, 'B', 'A', 2, 10), _trade(2, 'C', 'C', 3, 5),
+                  _trade(3, 'D', 'E', 4, 75)]
+        report = wash_trading_report(trades)
+        assert report['wash_trading_probability'] == 0.25 and report['risk_level'] == 'low'
+        assert report['artificial_volume_percentage'] == 25.0
+        assert report['indicators'] == ["Circular trading patterns", "Same wallet repeated trades",
+                                        "Artificial volume"]
+        assert report['suspicious_wallets'] == 3 and report['top_suspicious_wallets'][:2] == ['A', 'B']
+        assert report['patterns']['self_trades'] == 1 and report['patterns']['round_trip_trades'] == 2
+        assert report == detect_wash_trading(TradeArrays.from_records(trades))
+
+    def test_clean_history_reports_nothing(self):
+        """Test ordinary one-way trades produce an empty report"""
+        trades = [_trade(i, f'seller{i}', f'buyer{i}', i + 1) for i in range(10)]
+        report = wash_trading_report(trades)
+        assert report['wash_trading_probability'] == 0.0 and report['indicators'] == []
+        assert report['suspicious_wallets'] == 0 and report['flagged_trades'] == 0
+
+    def test_malformed_records_are_skipped(self):
+        """Test records missing a wallet or timestamp are counted instead of failing the report"""
+        trades = [_trade(1, 'A', 'B', 1), _trade(1, 'B', 'A', 2), {'token_id': 2, 'seller': 'C', 'price': 1.0},
+                  {'token_id': 3, 'seller': 'D', 'buyer': 'E'},
+                  {'token_id': 4, 'seller': 'F', 'buyer': 'G', 'timestamp': 'soon'}]
+        report = wash_trading_report(trades)
+        assert report['trades_analyzed'] == 2 and report['records_skipped'] == 3
+        assert report['patterns']['round_trip_trades'] == 2
+
+    def test_hex_wallets_compare_case_insensitively(self):
+        """Test checksummed and lower-case spellings of one address are the same wallet"""
+        trades = [_trade(1, '0xAbC', '0xdef', 1), _trade(1, '0xDEF', '0xabc', 2), _trade(2, 'Alice', 'alice', 3)]
+        report = wash_trading_report(trades)
+        assert report['patterns']['round_trip_trades'] == 2 and report['patterns']['self_trades'] == 0
+
+    def test_circular_flows_between_wallets(self):
+        """Test funds sent back to their sender are reported per asset"""
+        base = 1709251200
+        transfers = [
+            {'asset': 'USDC', 'from': 'A', 'to': 'B', 'amount': 100.0, 'timestamp': base},
+            {'asset': 'USDC', 'from': 'B', 'to': 'A', 'amount': 99.0, 'timestamp': base + 60},
+            {'asset': 'WETH', 'from': 'A', 'to': 'B', 'amount': 1.0, 'timestamp': base + 120},
+            {'asset': 'DAI', 'from': 'C', 'to': 'D', 'amount': 800.0, 'timestamp': base + 180},
+        ]
+        report = circular_flow_report(transfers)
+        assert report['round_trip_transfers'] == 2 and report['wallets_involved'] == 2
+        assert report['circular_volume'] == 199.0 and report['circular_volume_percentage'] == 19.9
+
+
+class TestThroughput:
+    """Test suite for large trade histories"""
+
+    def test_100k_trades_find_planted_patterns(self):
+        """Test 100k trades are analysed and planted round trips are found; timing is left to the benchmark"""
+        report = detect_wash_trading(generate_synthetic_trades(100_000))
+        assert report['trades_analyzed'] == 100_000
+        assert report['patterns']['round_trip_trades'] > 4000 and report['patterns']['self_trades'] > 0
@@ -0,0 +1,231 @@
+"""
+Test suite for the transaction graph engine.
+Tests value- and depth-bounded tracing, common-input clustering, the
+persistent transaction cache and history loading against a local
+stand-in Esplora API.
+"""
+
+import asyncio
+import random
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp import web
+
+from app.scanners.tx_graph import GraphTransaction, TransactionCache, TransactionGraph, TransactionGraphEngine
+
+
+def _tx(txid, inputs, outputs, height=100):
+    """An Esplora-shaped transaction"""
+    return {
+        'txid': txid,
+        'vin': [{'prevout': {'scriptpubkey_address': a, 'value': v}} for a, v in inputs],
+        'vout': [{'scriptpubkey_address': a, 'value': v} for a, v in outputs] + [{'scriptpubkey_type': 'op_return',
+                                                                               'value': 0}],
+        'status': {'confirmed': True, 'block_height': height, 'block_time': 1700000000 + height},
+    }
+
+
+def _busy_graph(transactions=100000, addresses=20000, seed=7):
+    rnd = random.Random(seed)
+    graph = TransactionGraph()
+    for i in range(transactions):
+        inputs = [(f'addr{rnd.randrange(addresses)}', rnd.randrange(1, 10 ** 6)) for _ in range(rnd.randint(1, 3))]
+        outputs = [(f'addr{rnd.randrange(addresses)}', rnd.randrange(1, 10 ** 6)) for _ in range(rnd.randint(1, 3))]
+        graph.add_transaction(GraphTransaction(f'tx{i}', inputs, outputs))
+    return graph
+
+
+class StandInEsplora:
+    """Local Esplora API serving a chain A -> B -> C -> D plus a busy address"""
+
+    def __init__(self, busy_txs=60, delay=0.0):
+        self.delay = delay
+        self.txs = [
+            _tx('t1', [('A', 100), ('A2', 50)], [('B', 120), ('CHANGE', 30)], 1),
+            _tx('t2', [('B', 120)], [('C', 100), ('DUST', 1)], 2),
+            _tx('t3', [('C', 100)], [('D', 99)], 3),
+        ] + [_tx(f'busy{i}', [('HOT', 10)], [(f'R{i}', 10)], 10 + i) for i in range(busy_txs)]
+        self.requests = []
+        self.runner = None
+        self.base_url = None
+
+    async def _address_txs(self, request):
+        address, after = request.match_info['address'], request.match_info.get('after')
+        self.requests.append((address, after))
+        await asyncio.sleep(self.delay)
+        history = [tx for tx in reversed(self.txs)
+                   if address in [v['prevout']['scriptpubkey_address'] for v in tx['vin']]
+                   + [v.get('scriptpubkey_address') for v in tx['vout']]]
+        if after:
+            history = history[[tx['txid'] for tx in history].index(after) + 1:]
+        return web.json_response(history[:25])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/address/{address}/txs', self._address_txs)
+        app.router.add_get('/address/{address}/txs/chain/{after}', self._address_txs)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestTransactionGraph:
+    """Test suite for in-memory tracing and clustering"""
+
+    def test_trace_splits_value_and_respects_bounds(self):
+        """Test traced amounts follow proportional splits and stop at depth and value bounds"""
+        graph = TransactionGraph()
+        graph.add_transaction(GraphTransaction('t1', [('A', 100), ('B', 50)], [('C', 120), ('D', 30)]))
+        graph.add_transaction(GraphTransaction('t2', [('C', 120)], [('E', 60), ('F', 60)]))
+        graph.add_transaction(GraphTransaction('t3', [('E', 60)], [('G', 60)]))
+
+        trace = graph.trace('A', max_depth=3)
+        assert trace.addresses == [('C', 1, 80.0), ('D', 1, 20.0), ('E', 2, 40.0), ('F', 2, 40.0), ('G', 3, 40.0)]
+        assert graph.trace('A', max_depth=2).at_depth(2) == ['E', 'F'] and graph.k_hop('A', 1) == {'C': 1, 'D': 1}
+        # Branches carrying less than min_value are not followed
+        assert [a for a, _, _ in graph.trace('A', max_depth=3, min_value=50).addresses] == ['C']
+        assert graph.trace('G', 'backward', 3).addresses == [('E', 1, 60.0), ('C', 2, 60.0), ('A', 3, 40.0),
+                                                            ('B', 3, 20.0)]
+        assert graph.trace('unknown').addresses == []
+
+    def test_common_input_clusters_skip_coinjoins(self):
+        """Test inputs spent together are clustered unless the transaction looks like a CoinJoin"""
+        graph = TransactionGraph()
+        graph.add_transaction(GraphTransaction('t1', [('A', 1), ('B', 1)], [('X', 2)]))
+        graph.add_transaction(GraphTransaction('t2', [('B', 1), ('C', 1)], [('Y', 2)]))
+        coinjoin = GraphTransaction('cj', [('C', 5), ('P', 5), ('Q', 5)], [('M1', 4), ('M2', 4), ('M3', 4)])
+        graph.add_transaction(coinjoin)
+        assert sorted(graph.cluster_of('A')) == ['A', 'B', 'C']
+        assert graph.cluster_of('P') == ['P'] and graph.clusters() == [['A', 'B', 'C']]
+        assert graph.coinjoin_involvement('C') == (1, 2)
+        # Adding the same transaction again changes nothing
+        assert not graph.add_transaction(coinjoin) and len(graph) == 3
+
+    def test_five_hop_trace_from_busy_address_is_interactive(self):
+        """Test a 5-hop trace over 100k transactions finishes well under a second"""
+        graph = _busy_graph()
+        started = time.perf_counter()
+        trace = graph.trace('addr1', max_depth=5)
+        elapsed = time.perf_counter() - started
+        assert trace.to_dict()['depth_reached'] >= 4 and len(trace.addresses) > 10000
+        assert elapsed < 1.0
+        capped = graph.trace('addr1', max_depth=5, max_addresses=500)
+        assert capped.truncated and len(capped.addresses) == 500
+
+
+class TestGraphEngine:
+    """Test suite for loading histories through the API and the persistent cache"""
+
+    @pytest.mark.asyncio
+    async def test_trace_loads_each_hop_and_caches_histories(self, tmp_path):
+        """Test tracing fetches the addresses it reaches and a new engine reuses the cache"""
+        server = StandInEsplora()
+        await server.start()
+        path = str(tmp_path / 'txs.sqlite3')
+        try:
+            async with TransactionGraphEngine(api_url=server.base_url, cache=TransactionCache(path)) as engine:
+                trace = await engine.trace('A', depth=3, min_value=5)
+                assert [(a, d) for a, d, _ in trace.addresses] == [('B', 1), ('CHANGE', 1), ('C', 2), ('D', 3)]
+                # DUST falls under min_value and D is the last hop, so neither history is fetched
+                assert sorted(a for a, _ in server.requests) == ['A', 'B', 'C', 'CHANGE']
+                cluster = await engine.cluster('A')
+                assert sorted(cluster) == ['A', 'A2']
+
+            async with TransactionGraphEngine(api_url=server.base_url, cache=TransactionCache(path)) as engine:
+                again = await engine.trace('A', depth=3, min_value=5)
+                assert engine.stats['cache_hits'] == 4 and engine.stats['api_requests'] == 0
+            assert again.addresses == trace.addresses
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_busy_history_is_paged_and_capped(self, tmp_path):
+        """Test confirmed history is paged and busy addresses keep only the newest transactions"""
+        server = StandInEsplora(busy_txs=60)
+        await server.start()
+        try:
+            async with TransactionGraphEngine(api_url=server.base_url, max_txs_per_address=50,
+                                              cache=TransactionCache(str(tmp_path / 'txs.sqlite3'))) as engine:
+                await engine.load_address('HOT')
+                assert len(engine.graph) == 50 and engine.stats['truncated_histories'] == 1
+                assert server.requests == [('HOT', None), ('HOT', 'busy35')]
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_coalesce(self, tmp_path):
+        """Test simultaneous loads of one address share a single fetch"""
+        server = StandInEsplora(delay=0.05)
+        await server.start()
+        try:
+            async with TransactionGraphEngine(api_url=server.base_url,
+                                              cache=TransactionCache(str(tmp_path / 'txs.sqlite3'))) as engine:
+                await asyncio.gather(*(engine.load_address('B') for _ in range(5)))
+                assert engine.stats['coalesced'] == 4 and len(server.requests) == 1
+                assert await engine.load_addresses(['B', 'missing']) == 0
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_stale_histories_are_refreshed(self, tmp_path):
+        """Test an address loaded longer ago than history_ttl is fetched again and gains new transactions"""
+        server = StandInEsplora()
+        await server.start()
+        try:
+            async with TransactionGraphEngine(api_url=server.base_url, history_ttl=0.2,
+                                              cache=TransactionCache(str(tmp_path / 'txs.sqlite3'))) as engine:
+                await engine.load_address('D')
+                server.txs.append(_tx('t4', [('D', 99)], [('E', 98)], 4))
+                await engine.load_address('D')
+                assert len(server.requests) == 1 and 't4' not in engine.graph
+                await asyncio.sleep(0.25)
+                await engine.load_address('D')
+                assert len(server.requests) == 2 and 't4' in engine.graph
+                assert engine.stats['refreshed'] == 1 and engine.stats['addresses_loaded'] == 1
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_oversized_graph_is_rebuilt_between_investigations(self, tmp_path):
+        """Test the graph is dropped once over its cap and reloaded from the cache on the next trace"""
+        server = StandInEsplora()
+        await server.start()
+        try:
+            async with TransactionGraphEngine(api_url=server.base_url, max_graph_transactions=2,
+                                              cache=TransactionCache(str(tmp_path / 'txs.sqlite3'))) as engine:
+                first = await engine.trace('A', depth=3, min_value=5)
+                assert len(engine.graph) == 3 and engine.stats['graph_rebuilds'] == 0
+                second = await engine.trace('A', depth=3, min_value=5)
+                assert engine.stats['graph_rebuilds'] == 1 and second.addresses == first.addresses
+                assert engine.stats['cache_hits'] == 4 and len(server.requests) == 4
+        finally:
+            await server.stop()
+
+
+def test_cache_prunes_expired_histories(tmp_path):
+    """Test writes delete histories past max_age and transactions only they referenced"""
+    cache = TransactionCache(str(tmp_path / 'txs.sqlite3'), max_age=60)
+    shared = GraphTransaction('shared', [('A', 10)], [('B', 10)])
+    cache.put_history('A', [GraphTransaction('old', [('X', 5)], [('A', 5)]), shared])
+    cache.put_history('B', [shared])
+    with cache._connect() as connection:
+        connection.execute("UPDATE address_history SET fetched_at = ? WHERE address = 'A'", (time.time() - 120,))
+
+    cache._last_prune = 0.0
+    cache.put_history('C', [GraphTransaction('new', [('C', 1)], [('D', 1)])])
+    connection = cache._connect()
+    assert [row[0] for row in connection.execute("SELECT address FROM address_history ORDER BY address")] == ['B', 'C']
+    assert [row[0] for row in connection.execute("SELECT txid FROM transactions ORDER BY txid")] == ['new', 'shared']
+    assert [tx.txid for tx in cache.get_history('B')] == ['shared']
+    cache.close()
@@ -0,0 +1,206 @@
+"""
+Test suite for the username probing engine.
+Tests per-host batching, pair deduplication, presence caching and
+conditional revalidation against local stand-in platform servers.
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp import web
+
+from app.scanners.username_probe import (
+    PlatformProbe, UsernameProbeEngine, UsernamePresenceScanner, generate_username_variants
+)
+
+ROUND_TRIP = 0.2
+
+
+class StandInPlatform:
+    """Local server answering profile lookups after a simulated round trip"""
+
+    def __init__(self, existing, etag=None, missing_status=404, delay=ROUND_TRIP):
+        self.existing = {name.lower() for name in existing}
+        self.etag = etag
+        self.missing_status = missing_status
+        self.delay = delay
+        self.requests = []
+        self.runner = None
+        self.base_url = None
+
+    async def _profile(self, request):
+        username = request.match_info['username']
+        self.requests.append((request.method, username, request.headers.get('If-None-Match')))
+        await asyncio.sleep(self.delay)
+        if username.lower() not in self.existing:
+            return web.Response(status=self.missing_status, text='No such user.')
+        if self.etag and request.headers.get('If-None-Match') == self.etag:
+            return web.Response(status=304)
+        headers = {'ETag': self.etag} if self.etag else {}
+        return web.Response(text=f'profile of {username}', headers=headers)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/u/{username}', self._profile)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def _start_platforms(count, existing, **kwargs):
+    servers = [StandInPlatform(existing, **kwargs) for _ in range(count)]
+    for server in servers:
+        await server.start()
+    return servers
+
+
+def _probes(servers, method='HEAD'):
+    return [PlatformProbe(f'site{i}', server.base_url + '/u/{username}', method=method)
+            for i, server in enumerate(servers)]
+
+
+class TestBatching:
+    """Test suite for per-host batching"""
+
+    @pytest.mark.asyncio
+    async def test_variants_by_platforms_take_about_one_round_trip(self):
+        """Test 10 variants on 12 hosts cost about one round trip, not 120 serial requests"""
+        servers = await _start_platforms(12, existing=['janedoe', 'jane_doe'])
+        try:
+            async with UsernameProbeEngine(platforms=_probes(servers), per_host_limit=10) as engine:
+                variants = generate_username_variants('Jane Doe')
+                assert len(variants) == 10
+                started = time.perf_counter()
+                results = await engine.probe(variants)
+                elapsed = time.perf_counter() - started
+
+            assert len(results) == 120
+            assert sum(1 for server in servers for _ in server.requests) == 120
+            assert all(method == 'HEAD' for server in servers for method, _, _ in server.requests)
+            # Serial probing would take 120 round trips (24s)
+            assert elapsed < 5 * ROUND_TRIP
+            found = {(r.platform, r.username) for r in results if r.exists}
+            assert found == {(f'site{i}', name) for i in range(12) for name in ('janedoe', 'jane_doe')}
+        finally:
+            for server in servers:
+                await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_pairs_across_callers_share_requests(self):
+        """Test pairs repeated within and across concurrent calls hit the server once"""
+        servers = await _start_platforms(2, existing=['alice'])
+        try:
+            async with UsernameProbeEngine(platforms=_probes(servers)) as engine:
+                first, second = await asyncio.gather(
+                    engine.probe_pairs([('site0', 'alice'), ('site0', 'Alice'), ('site1', 'bob')]),
+                    engine.probe_pairs([('site0', 'ALICE'), ('site1', 'bob'), ('unknown', 'bob')]),
+                )
+                assert len(first) == 2 and len(second) == 2
+                assert [r.exists for r in first] == [True, False]
+                assert engine.stats['requests'] == 2
+                assert engine.stats['duplicates'] == 1
+                assert engine.stats['coalesced'] == 2
+        finally:
+            for server in servers:
+                await server.stop()
+
+
+class TestCaching:
+    """Test suite for presence caching"""
+
+    @pytest.mark.asyncio
+    async def test_positive_and_negative_results_are_cached(self):
+        """Test both answers are cached with their own TTLs"""
+        servers = await _start_platforms(1, existing=['alice'], delay=0)
+        try:
+            async with UsernameProbeEngine(platforms=_probes(servers), positive_ttl=600,
+                                           negative_ttl=60) as engine:
+                await engine.probe(['alice', 'bob'])
+                again = await engine.probe(['alice', 'bob'])
+                assert all(r.cached for r in again)
+                assert len(servers[0].requests) == 2
+                ttls = {entry.value.username: entry.ttl for entry in engine.cache.cache.values()}
+                assert ttls == {'alice': 600, 'bob': 60}
+        finally:
+            await servers[0].stop()
+
+    @pytest.mark.asyncio
+    async def test_inconclusive_answers_are_not_cached(self):
+        """Test rate-limited lookups are retried next time"""
+        servers = await _start_platforms(1, existing=[], missing_status=429, delay=0)
+        try:
+            async with UsernameProbeEngine(platforms=_probes(servers)) as engine:
+                result = (await engine.probe(['carol']))[0]
+                assert result.exists is None and result.error == 'HTTP 429'
+                await engine.probe(['carol'])
+                assert len(servers[0].requests) == 2
+        finally:
+            await servers[0].stop()
+
+    @pytest.mark.asyncio
+    async def test_get_platform_revalidates_with_etag(self):
+        """Test an expired profile is revalidated with a conditional GET"""
+        servers = await _start_platforms(1, existing=['alice'], etag='"v1"', delay=0)
+        try:
+            async with UsernameProbeEngine(platforms=_probes(servers, method='GET')) as engine:
+                assert (await engine.probe(['alice']))[0].exists is True
+                engine.cache.clear()
+                result = (await engine.probe(['alice']))[0]
+                assert result.exists is True and result.status == 304
+                assert [h for _, _, h in servers[0].requests] == [None, '"v1"']
+                assert engine.stats['not_modified'] == 1
+        finally:
+            await servers[0].stop()
+
+    @pytest.mark.asyncio
+    async def test_missing_marker_on_200_page(self):
+        """Test a "no such user" page served with 200 counts as absent"""
+        servers = await _start_platforms(1, existing=[], missing_status=200, delay=0)
+        probe = PlatformProbe('hn', servers[0].base_url + '/u/{username}', method='GET',
+                              missing_marker='No such user.')
+        try:
+            async with UsernameProbeEngine(platforms=[probe]) as engine:
+                assert (await engine.probe(['dave']))[0].exists is False
+        finally:
+            await servers[0].stop()
+
+
+class TestScanner:
+    """Test suite for the presence scanner and variant generation"""
+
+    def test_variants_are_unique_and_bounded(self):
+        """Test variants start with the input and contain no duplicates"""
+        variants = generate_username_variants('@john.smith', limit=8)
+        assert variants[0] == 'john.smith'
+        assert 'johnsmith' in variants and 'john_smith' in variants
+        assert len(variants) == len(set(variants)) == 8
+
+    @pytest.mark.asyncio
+    async def test_scanner_uses_email_local_part(self):
+        """Test an email query probes variants of its local part"""
+        servers = await _start_platforms(1, existing=['jdoe'], delay=0)
+        try:
+            engine = UsernameProbeEngine(platforms=_probes(servers))
+            scanner = UsernamePresenceScanner(engine=engine)
+
+            class EmailQuery:
+                query_type = 'email'
+                query_value = 'jdoe@example.com'
+
+            result = await scanner.scan(EmailQuery())
+            await engine.close()
+            assert result['platforms_found'] == ['site0']
+            assert result['search_results']['variants'][0] == 'jdoe'
+        finally:
+            await servers[0].stop()
@@ -0,0 +1,224 @@
+"""
+Test suite for the Wayback CDX batch engine.
+Tests CDX filtering, collapsing and paging, per-host limited snapshot
+retrieval and the content-addressed snapshot store, against a local
+stand-in CDX server.
+"""
+
+import asyncio
+import hashlib
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from aiohttp import web
+
+from app.scanners.wayback_cdx import CdxCapture, CdxQuery, SnapshotStore, WaybackCdxEngine
+
+FIELDS = ['urlkey', 'timestamp', 'original', 'mimetype', 'statuscode', 'digest', 'length']
+
+
+def _digest(body):
+    return hashlib.sha1(body).hexdigest()[:32].upper()
+
+
+class StandInCdxServer:
+    """Local CDX API and snapshot server for a synthetic example.org history"""
+
+    def __init__(self, pages=120, delay=0.05):
+        self.delay = delay
+        self.bodies = {}
+        self.rows = []
+        for page in range(pages):
+            original = f'http://example.org/page/{page}'
+            for capture in range(4):
+                # Two versions, each captured twice in a row; some last captures are 404s
+                version = capture // 2
+                body = f'<html>page {page % 10} version {version}</html>'.encode()
+                status = '404' if capture == 3 and page % 5 == 0 else '200'
+                timestamp = f'20{10 + capture}0101000000'
+                self.bodies[(timestamp, original)] = body
+                self.rows.append([f'org,example)/page/{page}', timestamp, original, 'text/html', status,
+                                  _digest(body), str(len(body))])
+        self.cdx_requests = []
+        self.snapshot_requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.runner = None
+        self.base_url = None
+
+    async def _cdx(self, request):
+        q = request.query
+        self.cdx_requests.append(dict(q))
+        url, match_type = q['url'], q.get('matchType', 'exact')
+        rows = []
+        for row in self.rows:
+            host_path = row[2].split('://', 1)[1]
+            if match_type == 'exact' and host_path != url:
+                continue
+            if match_type == 'prefix' and not host_path.startswith(url):
+                continue
+            if match_type == 'domain' and not host_path.split('/', 1)[0].endswith(url):
+                continue
+            if any(row[FIELDS.index(f.split(':')[0])] != f.split(':')[1] for f in q.getall('filter', [])):
+                continue
+            if q.get('collapse') == 'digest' and rows and rows[-1][5] == row[5] and rows[-1][2] == row[2]:
+                continue
+            rows.append(row)
+        start = int(q.get('resumeKey', 0))
+        limit = int(q.get('limit', len(rows)))
+        page = rows[start:start + limit]
+        fields = q['fl'].split(',')
+        body = [fields] + [[row[FIELDS.index(f)] for f in fields] for row in page]
+        if q.get('showResumeKey') == 'true' and start + limit < len(rows):
+            body += [[], [str(start + limit)]]
+        return web.json_response(body)
+
+    async def _snapshot(self, request):
+        stamp, original = request.match_info['stamp'], request.match_info['original']
+        self.snapshot_requests.append((stamp, original))
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        body = self.bodies.get((stamp.replace('id_', ''), original))
+        if body is None:
+            return web.Response(status=404)
+        return web.Response(body=body, content_type='text/html')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/cdx/search/cdx', self._cdx)
+        app.router.add_get('/web/{stamp}/{original:.+}', self._snapshot)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+class TestCdxQueries:
+    """Test suite for CDX batch queries"""
+
+    @pytest.mark.asyncio
+    async def test_domain_query_filters_and_collapses(self, tmp_path):
+        """Test one domain query replaces per-URL lookups and skips unchanged re-captures"""
+        server = StandInCdxServer()
+        await server.start()
+        try:
+            async with WaybackCdxEngine(base_url=server.base_url, store=SnapshotStore(str(tmp_path))) as engine:
+                captures = await engine.domain_captures('example.org')
+            # 120 pages x 4 captures: adjacent duplicates collapsed, 404s filtered out
+            assert len(captures) == 120 * 2
+            assert all(c.statuscode == '200' for c in captures)
+            assert len({c.original for c in captures}) == 120
+            assert len(server.cdx_requests) == 1
+            request = server.cdx_requests[0]
+            assert request['matchType'] == 'domain' and request['collapse'] == 'digest'
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_large_results_are_paged_with_resume_keys(self, tmp_path):
+        """Test pages are followed until the server stops returning a resume key"""
+        server = StandInCdxServer()
+        await server.start()
+        try:
+            async with WaybackCdxEngine(base_url=server.base_url, page_size=100,
+                                        store=SnapshotStore(str(tmp_path))) as engine:
+                captures = await engine.query(CdxQuery('example.org/page/', match_type='prefix', collapse=None))
+                limited = await engine.query(CdxQuery('example.org/page/', match_type='prefix', limit=150))
+            assert len(captures) == 480
+            assert len(server.cdx_requests) == 5 + 2
+            assert [c.timestamp for c in captures[:4]] == ['20100101000000', '20110101000000',
+                                                           '20120101000000', '20130101000000']
+            assert len(limited) == 150
+        finally:
+            await server.stop()
+
+
+class TestSnapshots:
+    """Test suite for snapshot retrieval and the snapshot store"""
+
+    def test_store_evicts_least_recently_used(self, tmp_path):
+        """Test the store stays under its byte cap, keeping recently read snapshots"""
+        store = SnapshotStore(str(tmp_path), max_bytes=3000)
+        for digest in ('AAA', 'BBB', 'CCC'):
+            store.put(digest, b'x' * 1000)
+        assert store.get('AAA') == b'x' * 1000
+        store.put('DDD', b'y' * 1000)
+        assert [d in store for d in ('AAA', 'BBB', 'CCC', 'DDD')] == [True, False, True, True]
+        assert store.total_bytes == 3000
+
+        # A store opened later accounts for the snapshots already on disk
+        reopened = SnapshotStore(str(tmp_path), max_bytes=2500)
+        reopened.put('EEE', b'z' * 500)
+        assert reopened.total_bytes == 2500 and 'EEE' in reopened
+
+    @pytest.mark.asyncio
+    async def test_identical_captures_are_fetched_once(self, tmp_path):
+        """Test each distinct digest is downloaded once and later served from the store"""
+        server = StandInCdxServer(delay=0)
+        await server.start()
+        store = SnapshotStore(str(tmp_path))
+        try:
+            async with WaybackCdxEngine(base_url=server.base_url, store=store) as engine:
+                captures = await engine.domain_captures('example.org')
+                bodies = await engine.fetch_snapshots(captures)
+            # Page bodies repeat every 10 pages, in 2 versions each
+            assert len(bodies) == 20
+            assert len(server.snapshot_requests) == 20
+            assert all(isinstance(body, bytes) for body in bodies.values())
+
+            # A new engine on the same store never goes back to the network
+            async with WaybackCdxEngine(base_url=server.base_url, store=store) as engine:
+                again = await engine.fetch_snapshots(captures)
+                assert engine.stats['store_hits'] == 20
+            assert again == bodies and len(server.snapshot_requests) == 20
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit_bounds_concurrency(self, tmp_path):
+        """Test snapshot downloads overlap but never exceed the per-host limit"""
+        server = StandInCdxServer(pages=10, delay=0.1)
+        await server.start()
+        captures = [CdxCapture('', '20100101000000', f'http://example.org/page/{i}', 'text/html', '200',
+                               f'DIGEST{i}', 0) for i in range(10)]
+        try:
+            async with WaybackCdxEngine(base_url=server.base_url, per_host_limit=4,
+                                        store=SnapshotStore(str(tmp_path))) as engine:
+                started = time.perf_counter()
+                bodies = await engine.fetch_snapshots(captures)
+                elapsed = time.perf_counter() - started
+            assert len(bodies) == 10 and server.peak_in_flight == 4
+            # Three waves of 0.1s rather than ten sequential requests
+            assert elapsed < 0.6
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_for_a_digest_coalesce(self, tmp_path):
+        """Test simultaneous fetches of one digest share a single download"""
+        server = StandInCdxServer(pages=1, delay=0.1)
+        await server.start()
+        capture = CdxCapture('', '20100101000000', 'http://example.org/page/0', 'text/html', '200', 'ONE', 0)
+        missing = CdxCapture('', '20100101000000', 'http://example.org/nope', 'text/html', '200', 'TWO', 0)
+        try:
+            async with WaybackCdxEngine(base_url=server.base_url, store=SnapshotStore(str(tmp_path))) as engine:
+                bodies = await asyncio.gather(*(engine.fetch_snapshot(capture) for _ in range(5)))
+                failed = await engine.fetch_snapshots([missing])
+                assert engine.stats['coalesced'] == 4
+            assert len(set(bodies)) == 1 and len(server.snapshot_requests) == 2
+            assert isinstance(failed['TWO'], Exception) and 'TWO' not in SnapshotStore(str(tmp_path))
+        finally:
+            await server.stop()
@@ -927,7 +927,10 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 """
         
-        Path("frontend/legacy-web/static/js/app.js").write_text(js_content)
+        # Skip the rewrite on every worker boot when nothing changed
+        js_file = Path("frontend/legacy-web/static/js/app.js")
+        if not js_file.exists() or js_file.read_text() != js_content:
+            js_file.write_text(js_content)
         
         logger.info("✅ Web templates and static files created")
 